@@ -6,7 +6,13 @@ Designed to change the online mode of a minecraft server,
 including the player's data.
 """
 
-from ._version import get_versions
 
-__version__ = get_versions()["version"]
-del get_versions
+def __getattr__(name):
+    # the version is computed on first access, as versioneer may run git
+    if name == "__version__":
+        # pylint: disable=import-outside-toplevel
+        from ._version import get_versions
+
+        version = globals()["__version__"] = get_versions()["version"]
+        return version
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,2 @@
+"""Commands of the command line interface, in modules imported only when the
+command is invoked (see `server_manager.main`)."""
@@ -0,0 +1,97 @@
+"""Commands `lia backup`."""
+
+from pathlib import Path
+
+import click
+
+from ..src.backup import create_backup, create_sfk_backup, list_backups, restore_backup
+from ..src.backup_chain import DEFAULT_FULL_EVERY
+from ..src.utils import click_handle_exception
+from ..src.zip_writer import DEFAULT_LEVEL, DEFAULT_WORKERS
+
+# pylint: disable=missing-raises-doc,missing-param-doc,missing-type-doc,missing-return-type-doc
+# pylint: disable=too-many-positional-arguments
+
+
+@click.group("backup", invoke_without_command=True, help="backup server")
+@click.option(
+    "--level",
+    type=click.IntRange(0, 9),
+    default=DEFAULT_LEVEL,
+    show_default=True,
+    help="Compression level (0 stores the files)",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=DEFAULT_WORKERS,
+    show_default=True,
+    help="Number of compression threads",
+)
+@click.option("--full", is_flag=True, help="Make a full backup")
+@click.option(
+    "--full-every",
+    type=click.IntRange(min=0),
+    default=DEFAULT_FULL_EVERY,
+    show_default=True,
+    envvar="LIA_BACKUP_FULL_EVERY",
+    help="Incremental backups between two full backups",
+)
+@click.option("--sfk", is_flag=True, help="Use the Swiss File Knife instead")
+@click.pass_context
+def backup(
+    ctx: click.Context,
+    level: int,
+    workers: int,
+    full: bool,
+    full_every: int,
+    sfk: bool,
+):
+    """Makes a backup of the minecraft server folder. Only the files changed
+    since the previous backup are stored, unless a full backup is due"""
+    if ctx.invoked_subcommand is not None:
+        return None
+    if sfk:
+        return create_sfk_backup()
+
+    stats = create_backup(
+        level=level, workers=workers, full=full, full_every=full_every
+    )
+    click.echo(
+        f"Backup {stats.backup_id} ({stats.kind}): stored {stats.stored} of "
+        f"{stats.files} files ({stats.bytes_in / 1e6:.1f} MB -> "
+        f"{stats.bytes_out / 1e6:.1f} MB) in {stats.seconds:.2f}s"
+    )
+    return None
+
+
+@backup.command("list")
+def print_backups():
+    """Prints the backups, from oldest to newest"""
+
+    manifests = list_backups()
+    if not manifests:
+        print("<no backups found>")
+        return
+
+    for manifest in manifests:
+        print(
+            f" - {manifest.id} ({manifest.kind}, "
+            f"{len(manifest.stored)} of {len(manifest.files)} files stored)"
+        )
+
+
+@backup.command("restore")
+@click.argument("backup-id", type=str)
+@click.option(
+    "--target",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="Empty folder to restore the files to [default: backups/restore-<id>]",
+)
+@click_handle_exception
+def cli_restore_backup(backup_id: str, target: Path):
+    """Restores the server folder as it was in a backup, into a new folder"""
+
+    restored = restore_backup(backup_id, target)
+    print(f"Restored {restored} files of backup {backup_id!r}")
@@ -0,0 +1,31 @@
+"""Commands `lia debug`."""
+
+import click
+
+from ..src.files import File
+from ..src.paths import get_server_path
+from ..src.properties_manager import PropertiesManager
+
+
+@click.group("debug")
+def debug():
+    """Debug tools"""
+
+
+@debug.command("files")
+def print_files():
+    """Prints all the files containing players data"""
+
+    File.gen_files(get_server_path())
+    for key in File.memory:
+        for file in File.memory[key]:
+            print(file)
+
+
+@debug.command("cache")
+def print_cache_info():
+    """Prints the hits and misses of the server.properties caches"""
+
+    PropertiesManager.get_property("online_mode")
+    for name, info in PropertiesManager.cache_info().items():
+        print(f"{name}: {info.hits} hits, {info.misses} misses, {info.currsize} cached")
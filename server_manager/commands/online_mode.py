@@ -0,0 +1,15 @@
+"""Command `lia online-mode get`."""
+
+import click
+
+from ..src.properties_manager import PropertiesManager
+from ..src.utils import click_handle_exception
+
+
+@click.command("get")
+@click_handle_exception
+def get_online_mode():
+    """Prints the current server online-mode"""
+
+    current_servermode = PropertiesManager.get_property("online_mode")
+    print(f"server is currently running as {current_servermode}")
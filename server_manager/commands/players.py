@@ -0,0 +1,194 @@
+"""Commands `lia players`."""
+
+from datetime import timedelta
+
+import click
+
+from ..src.checks import remove_players_safely
+from ..src.listing import (
+    DEFAULT_FIELDS,
+    FIELDS,
+    format_table,
+    get_player_rows,
+    parse_fields,
+)
+from ..src.player import Player
+from ..src.players_data import get_players_data
+from ..src.positions import PositionIndex
+from ..src.quarantine import (
+    DEFAULT_KEEP,
+    Quarantine,
+    list_quarantines,
+    prune_quarantines,
+)
+from ..src.utils import click_handle_exception
+
+# pylint: disable=missing-raises-doc,missing-param-doc,missing-type-doc,missing-return-type-doc
+
+
+@click.group("players")
+def players():
+    """Manages players"""
+
+
+@players.command("list-csv")
+def print_players_data():
+    """Prints the players data from parsing the csv"""
+    csv_players = get_players_data()
+    if not csv_players:
+        print("<no players found in the csv>")
+        return
+
+    for player in csv_players:
+        print(" -", player)
+
+
+@players.command("list-server")
+@click.option(
+    "--fields",
+    default=",".join(DEFAULT_FIELDS),
+    show_default=True,
+    help=f"comma separated fields to show ({', '.join(FIELDS)})",
+)
+@click.option("--sort", "sort_by", default=None, help="field to sort the players by")
+@click.option("--top", type=int, default=None, help="show only the first N players")
+@click.option("--no-cache", is_flag=True, help="decode every player data file")
+@click_handle_exception
+def list_players(fields: str, sort_by: str, top: int, no_cache: bool):
+    """Prints all the server's players information"""
+
+    field_names = parse_fields(fields)
+    server_players = Player.generate()
+    if not server_players:
+        print("<no players found in the server archives>")
+        return
+
+    rows = get_player_rows(
+        server_players, field_names, use_cache=not no_cache, sort=sort_by, top=top
+    )
+    for line in format_table(field_names, rows):
+        print(line)
+
+
+@players.command("reset")
+@click.option("--force", is_flag=True)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="threads used to analyse the players",
+)
+@click.option("--fail-fast", is_flag=True, help="abort at the first non-empty player")
+def reset_players(force: bool, workers: int, fail_fast: bool) -> bool:
+    """Moves all the players' data to a new quarantine if each player has the
+    ender chest and the inventory emtpy"""
+
+    server_players = Player.generate()
+    return remove_players_safely(
+        server_players, force=force, workers=workers, fail_fast=fail_fast
+    )
+
+
+@players.command("list-quarantine")
+def print_quarantines():
+    """Prints the quarantines of removed players"""
+
+    quarantines = list_quarantines()
+    if not quarantines:
+        print("<no quarantines found>")
+        return
+
+    for quarantine in quarantines:
+        print(f" - {quarantine.id} ({len(quarantine.players)} players)")
+
+
+@players.command("restore-quarantine")
+@click.argument("quarantine-id", type=str)
+@click_handle_exception
+def restore_quarantine(quarantine_id: str):
+    """Moves the players of a quarantine back to the server"""
+
+    restored = Quarantine.load(quarantine_id).restore()
+    print(f"Restored {restored} players from quarantine {quarantine_id!r}")
+
+
+@players.command("prune-quarantine")
+@click.option(
+    "--keep",
+    type=click.IntRange(min=0),
+    default=DEFAULT_KEEP,
+    show_default=True,
+    help="number of newest quarantines to keep",
+)
+@click.option(
+    "--older-than",
+    type=click.IntRange(min=0),
+    default=None,
+    help="also delete quarantines older than N days",
+)
+def prune_quarantine(keep: int, older_than: int):
+    """Deletes old quarantines permanently"""
+
+    max_age = timedelta(days=older_than) if older_than is not None else None
+    pruned = prune_quarantines(keep=keep, max_age=max_age)
+    for quarantine_id in pruned:
+        print(f"Pruned quarantine {quarantine_id!r}")
+
+
+@players.command("show")
+@click.argument("player-name", type=str)
+def show_player(player_name: str):
+    """Prints the detailed items in the inventory and ender chest of the player"""
+
+    player_name = player_name.lower()
+    server_players = Player.generate()
+    for player in server_players:
+        if player.username.lower() == player_name:
+            print("\nPlayer position:", player.get_position())
+            print("\nInventory:", player.get_detailed_inventory())
+            print("\nEnder chest:", player.get_detailed_ender_chest())
+            return
+
+    raise click.ClickException(f"No player named {player_name!r}")
+
+
+@players.command("near")
+@click.argument("x", type=float)
+@click.argument("y", type=float)
+@click.argument("z", type=float)
+@click.option("--radius", "-r", type=float, required=True, help="search radius")
+@click.option("--dim", default="overworld", show_default=True, help="dimension")
+@click_handle_exception
+def players_near(x: float, y: float, z: float, radius: float, dim: str):
+    """Prints the players within RADIUS blocks of the point X Y Z"""
+
+    index = PositionIndex.build(Player.generate())
+    positions = index.near(x, y, z, radius=radius, dim=dim)
+    if not positions:
+        print("<no players found>")
+        return
+
+    for position in positions:
+        coords = position.coords
+        print(
+            f" - {position.player.username} ({coords.dim} {coords.x:.1f} "
+            f"{coords.y:.1f} {coords.z:.1f}) distance={position.distance:.1f}"
+        )
+
+
+@players.command("regions")
+@click.option("--dim", default=None, help="dimension (default: all)")
+@click_handle_exception
+def players_by_region(dim: str):
+    """Prints the players grouped by the region file containing their position"""
+
+    index = PositionIndex.build(Player.generate())
+    regions = index.by_region(dim=dim)
+    if not regions:
+        print("<no players found>")
+        return
+
+    for (dimension, region), region_players in regions.items():
+        usernames = ", ".join(sorted(player.username for player in region_players))
+        print(f" - {dimension}/{region}: {usernames}")
@@ -0,0 +1,74 @@
+"""Commands `lia properties`."""
+
+from typing import Tuple
+
+import click
+
+from ..src.properties_manager import PropertiesManager, set_default_properties
+from ..src.utils import click_handle_exception
+
+# pylint: disable=missing-raises-doc,missing-param-doc,missing-type-doc,missing-return-type-doc
+
+
+@click.group("properties")
+@click_handle_exception
+def properties():
+    """Manage settings of server.properties"""
+
+
+@properties.command("set-defaults")
+@click_handle_exception
+def set_defaults():
+    """Set default values for all properties"""
+
+    set_default_properties()
+
+
+@properties.command("list")
+@click.option("--all", "all_", is_flag=True, help="List every key of the file")
+@click_handle_exception
+def list_properties(all_: bool):
+    """Lists all the properties and its values"""
+
+    if all_:
+        propnames = list(PropertiesManager.get_properties_file())
+    else:
+        propnames = list(PropertiesManager.general_map)
+
+    for propname in propnames:
+        print(f"{propname}={PropertiesManager.get_property(propname)}")
+
+
+@properties.command("get")
+@click.argument("property_", metavar="PROPERTY")
+@click_handle_exception
+def get_property(property_: str):
+    """Get a property"""
+
+    value = PropertiesManager.get_property(property_)
+    print(f"{property_}={value}")
+
+
+@properties.command("set")
+@click.argument("assignments", metavar="PROPERTY=VALUE...", nargs=-1, required=True)
+@click_handle_exception
+def set_property(assignments: Tuple[str, ...]):
+    """Set one or more properties, writing server.properties once.
+
+    The legacy form `set PROPERTY VALUE` is still accepted.
+    """
+
+    if len(assignments) == 2 and not any("=" in x for x in assignments):
+        data = {assignments[0]: assignments[1]}
+        PropertiesManager.set_property(**data)
+        return
+
+    values = {}
+    for assignment in assignments:
+        if "=" not in assignment:
+            raise ValueError(f"{assignment!r} must be PROPERTY=VALUE")
+        key, value = assignment.split("=", 1)
+        values[key] = value
+
+    for key in PropertiesManager.set_properties(values):
+        print(f"{key}={PropertiesManager.get_property(key)}")
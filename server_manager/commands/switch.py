@@ -0,0 +1,89 @@
+"""Commands `lia online-mode set` and `lia online-mode recover`."""
+
+import click
+
+from ..src.journal import DEFAULT_WORKERS, recover
+from ..src.set_mode import apply_plan, plan_mode, set_mode
+from ..src.utils import click_handle_exception
+
+# pylint: disable=missing-raises-doc,missing-param-doc,missing-type-doc,missing-return-type-doc
+# pylint: disable=too-many-positional-arguments
+
+
+@click.command("set")
+@click.argument("online-mode", type=bool)
+@click.option("--full-check", is_flag=True, help="re-validate every player")
+@click.option("--plan", "plan_only", is_flag=True, help="print and save the plan")
+@click.option(
+    "--apply-plan", "apply_saved_plan", is_flag=True, help="apply the saved plan"
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=DEFAULT_WORKERS,
+    show_default=True,
+    help="threads used to rename and patch the files",
+)
+@click.option("--live", is_flag=True, help="stop the running server through RCON")
+@click.option("--restart-command", help="command to start the server after the switch")
+@click_handle_exception
+def set_online_mode(
+    online_mode: bool,
+    full_check: bool,
+    plan_only: bool,
+    apply_saved_plan: bool,
+    workers: int,
+    live: bool,
+    restart_command: str,
+):
+    """Sets the server online-mode"""
+
+    if plan_only and apply_saved_plan:
+        raise click.UsageError("--plan and --apply-plan are mutually exclusive")
+    if plan_only and (live or restart_command):
+        raise click.UsageError("--plan can't be used with --live or --restart-command")
+
+    if plan_only:
+        plan = plan_mode(new_mode=online_mode)
+        print(plan.to_json())
+        plan.check()
+        return
+
+    if apply_saved_plan:
+        stats = apply_plan(
+            new_mode=online_mode,
+            workers=workers,
+            live=live,
+            restart_command=restart_command,
+        )
+    else:
+        stats = set_mode(
+            new_mode=online_mode,
+            full_check=full_check,
+            workers=workers,
+            live=live,
+            restart_command=restart_command,
+        )
+    print(f"Set online-mode to {online_mode}")
+    print(
+        f"Applied {stats.steps} steps in {stats.seconds:.2f}s "
+        f"({stats.throughput:.1f} steps/s)"
+    )
+
+
+@click.command("recover")
+@click.option("--rollback", is_flag=True, help="revert the interrupted switch")
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=DEFAULT_WORKERS,
+    show_default=True,
+    help="threads used to rename and patch the files",
+)
+@click_handle_exception
+def recover_online_mode(rollback: bool, workers: int):
+    """Finishes or reverts an interrupted online-mode switch"""
+
+    steps = recover(rollback=rollback, workers=workers)
+    action = "Reverted" if rollback else "Applied"
+    print(f"{action} {steps} pending steps of the interrupted switch")
@@ -0,0 +1,14 @@
+"""Command `lia update-whitelist`."""
+
+import click
+
+from ..src.whitelist import update_whitelist
+
+
+@click.command("update-whitelist")
+def cli_update_whitelist():
+    """Updates the whitelist using data from the csv"""
+
+    # TODO: test this call and update docstrign
+    # ensure_whitelist_on()
+    return update_whitelist()
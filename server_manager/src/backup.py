@@ -7,9 +7,21 @@ from os import makedirs
 from pathlib import Path
 from platform import system
 from subprocess import DEVNULL, PIPE, CalledProcessError, run
+import time
+from typing import Dict, List, Optional
 
+from .backup_chain import (
+    DEFAULT_FULL_EVERY,
+    BackupStats,
+    FileRecord,
+    Manifest,
+    list_manifests,
+    restore_chain,
+    scan_folder,
+)
 from .exceptions import SFKError, SFKNotFoundError
 from .paths import get_server_path
+from .zip_writer import DEFAULT_LEVEL, DEFAULT_WORKERS, EntryInfo, ZipStats, write_zip
 
 
 def is_sfk_installed() -> bool:
@@ -98,7 +110,7 @@ def run_sfk():
     logger.info("Backup created")
 
 
-def create_backup():
+def create_sfk_backup():
     """Creates a backup of the minecraft server using the Swiss File Knife.
 
     Raises:
@@ -109,3 +121,162 @@ def create_backup():
         raise SFKNotFoundError("SFK is not installed or is not in the PATH")
 
     run_sfk()
+
+
+def get_latest_manifest() -> Optional[Manifest]:
+    """Returns the manifest of the newest backup with a manifest.
+
+    Returns:
+        Optional[Manifest]: manifest, or None if there are no backups.
+    """
+
+    manifests = list_manifests(get_backups_folder())
+    return manifests[-1] if manifests else None
+
+
+def store_files(
+    manifest: Manifest,
+    records: Dict[str, FileRecord],
+    relpaths: List[str],
+    level: int,
+    workers: int,
+) -> ZipStats:
+    """Writes the archive of a backup. The records of the files stored get the
+    size, the mtime and the SHA-256 of the data compressed, so they match the
+    archive even if a file is saved again meanwhile. The files that couldn't
+    be read are removed from the records.
+
+    Args:
+        manifest (Manifest): manifest of the backup.
+        records (Dict[str, FileRecord]): records of the files, updated in
+            place.
+        relpaths (List[str]): paths of the files to store, relative to the
+            server folder.
+        level (int): compression level.
+        workers (int): number of threads.
+
+    Returns:
+        ZipStats: statistics of the archive.
+    """
+
+    server_path = get_server_path()
+    arcnames = {manifest.get_arcname(x): x for x in relpaths}
+    pending = set(relpaths)
+
+    def record(info: EntryInfo):
+        relpath = arcnames[info.filename]
+        records[relpath] = FileRecord(
+            info.file_size, info.mtime_ns, info.digest, manifest.id
+        )
+        pending.discard(relpath)
+
+    entries = [(server_path.joinpath(x), arcname) for arcname, x in arcnames.items()]
+    zip_stats = write_zip(
+        entries, manifest.archive_path, level, workers, on_entry=record
+    )
+
+    for relpath in pending:
+        # removed or locked while the archive was created
+        del records[relpath]
+    return zip_stats
+
+
+def create_backup(
+    level: int = DEFAULT_LEVEL,
+    workers: int = DEFAULT_WORKERS,
+    full: bool = False,
+    full_every: int = DEFAULT_FULL_EVERY,
+) -> BackupStats:
+    """Creates a backup of the minecraft server, compressing the files in
+    parallel. Unless a full backup is due, only the files changed since the
+    previous backup are stored (see `backup_chain`).
+
+    Args:
+        level (int, optional): compression level, from 0 (stored) to 9.
+            Defaults to DEFAULT_LEVEL.
+        workers (int, optional): number of threads. Defaults to
+            DEFAULT_WORKERS.
+        full (bool, optional): if True, a full backup is made. Defaults to
+            False.
+        full_every (int, optional): number of incremental backups between two
+            full backups. Defaults to DEFAULT_FULL_EVERY.
+
+    Returns:
+        BackupStats: statistics of the backup.
+    """
+
+    logger = logging.getLogger(__name__)
+    start = time.perf_counter()
+    server_path = get_server_path()
+    previous = get_latest_manifest()
+
+    full = full or previous is None or previous.chain_length >= full_every
+    manifest = Manifest.create(get_backups_folder(), None if full else previous)
+    manifest.root = server_path.name
+
+    logger.debug(
+        "Creating %s backup of %r to %r (level=%d, workers=%d)",
+        manifest.kind,
+        server_path.as_posix(),
+        manifest.archive_path.as_posix(),
+        level,
+        workers,
+    )
+
+    # the digests of the unchanged files are reused by full backups too
+    records, changed = scan_folder(server_path, previous, workers)
+    if full:
+        changed = list(records)
+
+    zip_stats = store_files(manifest, records, changed, level, workers)
+    manifest.files = records
+    manifest.save()
+
+    stats = BackupStats(
+        manifest.id,
+        manifest.kind,
+        len(records),
+        zip_stats.files,
+        zip_stats.bytes_in,
+        zip_stats.bytes_out,
+        time.perf_counter() - start,
+    )
+    logger.info(
+        "Backup %r created (%s, %d of %d files stored, %.1f MB/s)",
+        stats.backup_id,
+        stats.kind,
+        stats.stored,
+        stats.files,
+        stats.throughput / 1e6,
+    )
+    return stats
+
+
+def list_backups() -> List[Manifest]:
+    """Returns the manifests of the backups, from oldest to newest.
+
+    Returns:
+        List[Manifest]: manifests.
+    """
+
+    return list_manifests(get_backups_folder())
+
+
+def restore_backup(backup_id: str, target: Optional[Path] = None) -> int:
+    """Restores the server folder as it was in a backup, without touching the
+    server.
+
+    Args:
+        backup_id (str): identifier of the backup.
+        target (Optional[Path], optional): folder where the files are
+            restored, it must not exist or be empty. If None, it's the folder
+            `restore-<backup_id>` inside the backups folder. Defaults to None.
+
+    Returns:
+        int: number of files restored.
+    """
+
+    manifest = Manifest.load(get_backups_folder(), backup_id)
+    if target is None:
+        target = get_backups_folder().joinpath(f"restore-{backup_id}")
+    return restore_chain(manifest, target)
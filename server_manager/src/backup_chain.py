@@ -0,0 +1,440 @@
+"""Chains of incremental backups.
+
+Every backup has a manifest (`LIA-backup-<id>.json`, next to its archive) with
+the size, the mtime (ns), the SHA-256 and the backup storing the content of
+each file of the server at that time. A full backup stores every file, while
+an incremental one stores only the new or changed files and refers to its
+predecessors for the rest. A point in time is restored by walking the chain of
+parents from its manifest back to the last full backup.
+
+A file is hashed only if its size or its mtime changed since the previous
+backup, so an incremental backup of a mostly idle world costs a `stat` per
+file plus the compression of the few region files that were saved.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import zipfile
+
+from .exceptions import BackupError
+from .utils import get_timestamp_id_key
+from .zip_writer import CHUNK_SIZE, DEFAULT_WORKERS, iter_folder
+
+MANIFEST_VERSION = 1
+DEFAULT_FULL_EVERY = 6
+FULL = "full"
+INCREMENTAL = "incremental"
+
+logger = logging.getLogger(__name__)
+
+
+class FileRecord(NamedTuple):
+    """State of a file in a backup."""
+
+    size: int
+    mtime_ns: int
+    digest: str
+    backup_id: Optional[str]
+
+
+class BackupStats(NamedTuple):
+    """Statistics of a backup."""
+
+    backup_id: str
+    kind: str
+    files: int
+    stored: int
+    bytes_in: int
+    bytes_out: int
+    seconds: float
+
+    @property
+    def throughput(self) -> float:
+        """Bytes stored per second."""
+        return self.bytes_in / self.seconds if self.seconds else float(self.bytes_in)
+
+
+def get_file_digest(path: Path) -> str:
+    """Returns the SHA-256 of a file, read in chunks.
+
+    Args:
+        path (Path): file path.
+
+    Returns:
+        str: hex digest.
+    """
+
+    digest = hashlib.sha256()
+    with path.open("rb") as file_handler:
+        while True:
+            chunk = file_handler.read(CHUNK_SIZE)
+            if not chunk:
+                return digest.hexdigest()
+            digest.update(chunk)
+
+
+# the attributes are the fields of the manifest file, plus the backups folder
+class Manifest:  # pylint: disable=too-many-instance-attributes
+    """Manifest of a backup.
+
+    Use `Manifest.create()` to start a new backup and `Manifest.load()` to read
+    an existing one.
+
+    Args:
+        folder (Path): backups folder.
+        backup_id (str): identifier of the backup (timestamp).
+        kind (str): FULL or INCREMENTAL.
+        parent (Optional[str], optional): identifier of the previous backup of
+            the chain. None for full backups. Defaults to None.
+        chain_length (int, optional): number of incremental backups since the
+            last full backup, this one included. Defaults to 0.
+    """
+
+    def __init__(
+        self,
+        folder: Path,
+        backup_id: str,
+        kind: str,
+        parent: Optional[str] = None,
+        chain_length: int = 0,
+    ):
+        self.folder = folder
+        self.id = backup_id
+        self.kind = kind
+        self.parent = parent
+        self.chain_length = chain_length
+        self.root = ""
+        self.files: Dict[str, FileRecord] = {}
+        self.created = datetime.now().isoformat(timespec="seconds")
+
+    def __repr__(self):
+        return f"Manifest({self.id!r}, {self.kind!r})"
+
+    @property
+    def archive_path(self) -> Path:
+        """Path of the archive of the backup."""
+        return self.folder.joinpath(f"LIA-backup-{self.id}.zip")
+
+    @property
+    def manifest_path(self) -> Path:
+        """Path of the manifest."""
+        return self.folder.joinpath(f"LIA-backup-{self.id}.json")
+
+    @property
+    def stored(self) -> List[str]:
+        """Files stored in the archive of this backup."""
+        return [x for x, record in self.files.items() if record.backup_id == self.id]
+
+    @classmethod
+    def create(cls, folder: Path, parent: Optional["Manifest"] = None) -> "Manifest":
+        """Creates the manifest of a new backup, identified by the current
+        timestamp. It's written to disk by `save`.
+
+        Args:
+            folder (Path): backups folder.
+            parent (Optional[Manifest], optional): previous backup. If None,
+                the backup is a full one. Defaults to None.
+
+        Returns:
+            Manifest: new manifest.
+        """
+
+        timestamp = datetime.now().strftime("%Y.%m.%d.%H.%M.%S")
+        backup_id, suffix = timestamp, 1
+        while folder.joinpath(f"LIA-backup-{backup_id}.json").exists():
+            backup_id = f"{timestamp}-{suffix}"
+            suffix += 1
+
+        if parent is None:
+            return cls(folder, backup_id, FULL)
+        return cls(folder, backup_id, INCREMENTAL, parent.id, parent.chain_length + 1)
+
+    @classmethod
+    def load(cls, folder: Path, backup_id: str) -> "Manifest":
+        """Loads the manifest of an existing backup.
+
+        Args:
+            folder (Path): backups folder.
+            backup_id (str): identifier of the backup.
+
+        Raises:
+            BackupError: if the backup doesn't exist or its manifest is not
+                valid.
+
+        Returns:
+            Manifest: manifest.
+        """
+
+        manifest = cls(folder, backup_id, FULL)
+        try:
+            data = json.loads(manifest.manifest_path.read_text("utf-8"))
+        except FileNotFoundError as exc:
+            raise BackupError(f"Backup {backup_id!r} not found") from exc
+        except ValueError as exc:
+            raise BackupError(f"Invalid manifest of backup {backup_id!r}") from exc
+
+        if data.get("version") != MANIFEST_VERSION:
+            raise BackupError(
+                f"Unsupported manifest version of backup {backup_id!r}: "
+                f"{data.get('version')!r}"
+            )
+
+        manifest.kind = data["kind"]
+        manifest.parent = data["parent"]
+        manifest.chain_length = data["chain_length"]
+        manifest.root = data["root"]
+        manifest.created = data["created"]
+        manifest.files = {x: FileRecord(*record) for x, record in data["files"].items()}
+        return manifest
+
+    def save(self):
+        """Writes the manifest. It's replaced atomically, so a backup without a
+        complete manifest is never part of a chain."""
+
+        data = {
+            "version": MANIFEST_VERSION,
+            "id": self.id,
+            "kind": self.kind,
+            "parent": self.parent,
+            "chain_length": self.chain_length,
+            "created": self.created,
+            "root": self.root,
+            "files": {x: list(record) for x, record in self.files.items()},
+        }
+
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        with tmp_path.open("wt", encoding="utf-8") as file_handler:
+            json.dump(data, file_handler, separators=(",", ":"))
+            file_handler.flush()
+            os.fsync(file_handler.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    def get_arcname(self, relpath: str) -> str:
+        """Returns the name of a file inside the archive.
+
+        Args:
+            relpath (str): path of the file, relative to the server folder.
+
+        Returns:
+            str: name inside the archive.
+        """
+
+        return f"{self.root}/{relpath}" if self.root else relpath
+
+
+def list_manifests(folder: Path) -> List[Manifest]:
+    """Returns the manifests of the backups, from oldest to newest. The
+    backups without a manifest (made with SFK or interrupted) are ignored.
+
+    Args:
+        folder (Path): backups folder.
+
+    Returns:
+        List[Manifest]: manifests.
+    """
+
+    backup_ids = [
+        x.stem[len("LIA-backup-") :] for x in folder.glob("LIA-backup-*.json")
+    ]
+    manifests = []
+    for backup_id in sorted(backup_ids, key=get_timestamp_id_key):
+        try:
+            manifests.append(Manifest.load(folder, backup_id))
+        except BackupError as exc:
+            logger.warning("Ignoring backup %r: %s", backup_id, exc)
+    return manifests
+
+
+def stat_files(
+    folder: Path, old_files: Dict[str, FileRecord]
+) -> Tuple[Dict[str, FileRecord], List[Tuple[Path, str, os.stat_result]]]:
+    """Compares the size and the mtime of the files of a folder with their
+    records in the previous backup.
+
+    Args:
+        folder (Path): server folder.
+        old_files (Dict[str, FileRecord]): records of the previous backup.
+
+    Returns:
+        Tuple[Dict[str, FileRecord], List[Tuple[Path, str, os.stat_result]]]:
+            records of the unchanged files, and path, relative path and stat
+            of the rest.
+    """
+
+    records: Dict[str, FileRecord] = {}
+    candidates: List[Tuple[Path, str, os.stat_result]] = []
+
+    for path, relpath in iter_folder(folder, prefix=""):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+
+        old = old_files.get(relpath)
+        if old is not None and (old.size, old.mtime_ns) == (
+            stat.st_size,
+            stat.st_mtime_ns,
+        ):
+            records[relpath] = old
+        else:
+            candidates.append((path, relpath, stat))
+
+    return records, candidates
+
+
+def get_digests(paths: List[Path], workers: int) -> List[Optional[str]]:
+    """Hashes files on a pool of threads. The files removed or locked meanwhile
+    are skipped.
+
+    Args:
+        paths (List[Path]): file paths.
+        workers (int): number of threads.
+
+    Returns:
+        List[Optional[str]]: hex digest of each file, None if it was skipped.
+    """
+
+    def get_digest(path: Path) -> Optional[str]:
+        try:
+            return get_file_digest(path)
+        except (FileNotFoundError, PermissionError) as exc:
+            logger.warning("Skipping %r: %s", path.as_posix(), exc)
+            return None
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(get_digest, paths))
+
+
+def scan_folder(
+    folder: Path,
+    previous: Optional[Manifest] = None,
+    workers: int = DEFAULT_WORKERS,
+) -> Tuple[Dict[str, FileRecord], List[str]]:
+    """Compares the files of a folder with the previous backup. The files whose
+    size and mtime didn't change keep their record, the rest are hashed on a
+    pool of threads.
+
+    Args:
+        folder (Path): server folder.
+        previous (Optional[Manifest], optional): previous backup. If None,
+            every file is new. Defaults to None.
+        workers (int, optional): number of threads. Defaults to
+            DEFAULT_WORKERS.
+
+    Returns:
+        Tuple[Dict[str, FileRecord], List[str]]: record of every file (the new
+            or changed ones without backup id) and paths of the files to
+            store, relative to the folder.
+    """
+
+    old_files = previous.files if previous is not None else {}
+    records, candidates = stat_files(folder, old_files)
+    digests = get_digests([x[0] for x in candidates], workers)
+
+    changed = []
+    for (_, relpath, stat), digest in zip(candidates, digests):
+        if digest is None:
+            continue
+
+        old = old_files.get(relpath)
+        if old is not None and old.digest == digest:
+            # touched, but the content is the one already stored
+            backup_id = old.backup_id
+        else:
+            backup_id = None
+            changed.append(relpath)
+        records[relpath] = FileRecord(stat.st_size, stat.st_mtime_ns, digest, backup_id)
+
+    return records, changed
+
+
+def extract_file(archive: zipfile.ZipFile, arcname: str, dst: Path, record: FileRecord):
+    """Extracts a file of a backup, checking its SHA-256.
+
+    Args:
+        archive (zipfile.ZipFile): archive storing the file.
+        arcname (str): name of the file inside the archive.
+        dst (Path): destination path.
+        record (FileRecord): record of the file.
+
+    Raises:
+        BackupError: if the file is not in the archive or its content doesn't
+            match the manifest.
+    """
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    try:
+        with archive.open(arcname) as src, dst.open("wb") as file_handler:
+            while True:
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                file_handler.write(chunk)
+    except KeyError as exc:
+        raise BackupError(f"{arcname!r} not found in {archive.filename!r}") from exc
+
+    if digest.hexdigest() != record.digest:
+        raise BackupError(f"Checksum mismatch of {arcname!r} in {archive.filename!r}")
+    os.utime(dst, ns=(record.mtime_ns, record.mtime_ns))
+
+
+def restore_chain(manifest: Manifest, target: Path) -> int:
+    """Restores the files of a backup, walking its chain of parents: each
+    backup provides the files it stored.
+
+    Args:
+        manifest (Manifest): backup to restore.
+        target (Path): folder where the files are restored. It must not exist
+            or be empty.
+
+    Raises:
+        BackupError: if the target folder is not empty, or an archive or a
+            backup of the chain is missing.
+
+    Returns:
+        int: number of files restored.
+    """
+
+    if target.exists() and any(target.iterdir()):
+        raise BackupError(f"Target folder {target.as_posix()!r} is not empty")
+    target.mkdir(parents=True, exist_ok=True)
+
+    pending = dict(manifest.files)
+    current = manifest
+    while True:
+        stored = {
+            x: record for x, record in pending.items() if record.backup_id == current.id
+        }
+        if stored:
+            logger.debug("Restoring %d files of backup %r", len(stored), current.id)
+            try:
+                archive = zipfile.ZipFile(current.archive_path)
+            except FileNotFoundError as exc:
+                raise BackupError(
+                    f"Archive of backup {current.id!r} not found"
+                ) from exc
+            with archive:
+                for relpath, record in stored.items():
+                    arcname = current.get_arcname(relpath)
+                    extract_file(archive, arcname, target.joinpath(relpath), record)
+                    del pending[relpath]
+
+        if not pending:
+            break
+        if current.parent is None:
+            raise BackupError(
+                f"Chain of backup {manifest.id!r} is broken, "
+                f"{len(pending)} files not found"
+            )
+        current = Manifest.load(manifest.folder, current.parent)
+
+    logger.info("Restored %d files of backup %r", len(manifest.files), manifest.id)
+    return len(manifest.files)
@@ -1,9 +1,11 @@
 """Checks to make before changing anything."""
 
-from itertools import groupby
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 import logging
+from operator import attrgetter
 import sys
-from typing import List, Tuple
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
 
 from colorama.ansi import Fore
 
@@ -11,35 +13,161 @@ from .exceptions import CheckError
 from .player import Player
 from .plugin import get_plugin_mode
 from .properties_manager import PropertiesManager
+from .quarantine import Quarantine
+from .summary_cache import get_player_summaries
+from .verification import VerdictCache
 
+KeyFunc = Callable[[Player], Hashable]
+GROUP_KEYS: Dict[str, KeyFunc] = {
+    "username": attrgetter("username"),
+    "username_lower": lambda player: player.username.lower(),
+    "uuid": attrgetter("uuid"),
+}
 
-def check_players(players: List[Player]) -> bool:
-    """Checks the current files are ok.
+
+@dataclass
+class ValidationReport:
+    """Result of validating the players before switching the online mode.
+
+    Args:
+        server_mode (bool): current online mode of the server.
+        mode_mismatches (List[Player]): players whose mode differs from the
+            server's.
+        duplicates (Dict[str, List[Player]]): players sharing the same username.
+        item_counts (Dict[Player, Tuple[int, int]]): number of item stacks in
+            the ender chest and in the inventory of each player.
+    """
+
+    server_mode: bool
+    mode_mismatches: List[Player] = field(default_factory=list)
+    duplicates: Dict[str, List[Player]] = field(default_factory=dict)
+    item_counts: Dict[Player, Tuple[int, int]] = field(default_factory=dict)
+
+    @property
+    def passed(self) -> bool:
+        """Returns whether the players can be converted without removing them.
+
+        Returns:
+            bool: True if there are no mode mismatches nor duplicates.
+        """
+
+        return not self.mode_mismatches and not self.duplicates
+
+    @property
+    def non_empty(self) -> List[Player]:
+        """Returns the players with items in the inventory or the ender chest.
+
+        Returns:
+            List[Player]: players with items.
+        """
+
+        return [player for player, counts in self.item_counts.items() if any(counts)]
+
+
+def validate_players(
+    players: List[Player], use_cache: bool = True, full_check: bool = False
+) -> ValidationReport:
+    """Validates the players in a single pass, collecting the mode mismatches,
+    the duplicated usernames and the item counts of each player.
+
+    The verdict of the players whose files didn't change since the last
+    validation is reused (see `VerdictCache`). The rest of the player data
+    files are decoded at most once (none if their summary is cached).
+
+    Args:
+        players (List[Player]): players to validate.
+        use_cache (bool, optional): if False, the summary cache is bypassed.
+            Defaults to True.
+        full_check (bool, optional): if True, the previous verdicts and the
+            summary cache are ignored and every player is checked again.
+            Defaults to False.
+
+    Returns:
+        ValidationReport: validation report.
+    """
+
+    server_mode = PropertiesManager.get_property("online_mode")
+    report = ValidationReport(server_mode)
+    usernames = {}
+
+    verdicts = VerdictCache()
+    if full_check:
+        verdicts.entries.clear()
+
+    for player in players:
+        verdict = verdicts.get(player)
+        if verdict is not None:
+            report.item_counts[player] = verdict
+
+    changed = [player for player in players if player not in report.item_counts]
+    summaries = get_player_summaries(changed, use_cache=use_cache and not full_check)
+    for player, summary in zip(changed, summaries):
+        report.item_counts[player] = (summary.ender_chest, summary.inventory)
+        verdicts.set(player, report.item_counts[player])
+    verdicts.save()
+
+    for player in players:
+        if player.online != server_mode:
+            report.mode_mismatches.append(player)
+        usernames.setdefault(player.username, []).append(player)
+
+    report.duplicates = {
+        username: group for username, group in usernames.items() if len(group) > 1
+    }
+    return report
+
+
+def check_players(players: List[Player], full_check: bool = False) -> bool:
+    """Checks the current files are ok. If a player uses a different mode than
+    the server, or there are duplicated usernames, all the players are removed
+    safely (see `remove_players_safely`).
 
     Args:
         players (List[Player]): list of players detected.
+        full_check (bool, optional): if True, the verdicts of the previous
+            validations are ignored. Defaults to False.
 
     Raises:
         CheckError: if online mode check fails.
         CheckError: if duplicates check fails.
 
     Returns:
-        bool: True for success, False otherwise.
+        bool: True if the checks passed, False if the players were removed (the
+            list is outdated then).
     """
 
     logger = logging.getLogger(__name__)
 
     logger.debug("Checking players")
-
-    result = PlayerChecks.check_online_mode(players)
-    if not result:
-        logger.critical("Online mode check failed")
-        raise CheckError("Online mode check failed")
-
-    result = PlayerChecks.check_duplicates(players)
-    if not result:
-        logger.critical("Duplicates check failed")
-        raise CheckError("Duplicates check failed")
+    report = validate_players(players, full_check=full_check)
+
+    if report.mode_mismatches:
+        logger.error(
+            "These players are using a different mode than the server (%s!=%s): %s",
+            report.mode_mismatches[0].online,
+            report.server_mode,
+            report.mode_mismatches,
+        )
+
+    if report.duplicates:
+        logger.error(
+            "Check result negative: these players "
+            "have more than one online mode: %s",
+            {username: len(group) for username, group in report.duplicates.items()},
+        )
+
+    if not report.passed:
+        result = remove_players_safely(players, item_counts=report.item_counts)
+        if not result:
+            if report.mode_mismatches:
+                msg = "Online mode check failed"
+            else:
+                msg = "Duplicates check failed"
+            logger.critical(msg)
+            raise CheckError(msg)
+
+        logger.debug("Players removed")
+        return False
 
     logger.debug("Player checks passed")
     return True
@@ -49,12 +177,18 @@ class PlayerChecks:
     """Checks applied to players."""
 
     @classmethod
-    def check_online_mode(cls, players: List[Player]):
+    def check_online_mode(
+        cls, players: List[Player], workers: int = 1, fail_fast: bool = False
+    ):
         """Checks that all players have the same online-mode, and it matches
         the current server mode.
 
         Args:
             players (List[Player]): players to check.
+            workers (int, optional): number of threads used to analyse the
+                players if they must be removed. Defaults to 1.
+            fail_fast (bool, optional): stop at the first player that can't be
+                removed (see `remove_players_safely`). Defaults to False.
 
         Returns:
             bool: True for success, False otherwise.
@@ -75,15 +209,19 @@ class PlayerChecks:
                 invalid_modes,
             )
 
-            return remove_players_safely(players)
+            return remove_players_safely(players, workers=workers, fail_fast=fail_fast)
         return True
 
     @classmethod
-    def check_duplicates(cls, players):
+    def check_duplicates(cls, players, workers: int = 1, fail_fast: bool = False):
         """Checks that there are no players with the same username.
 
         Args:
             players (List[Player]): players to check.
+            workers (int, optional): number of threads used to analyse the
+                players if they must be removed. Defaults to 1.
+            fail_fast (bool, optional): stop at the first player that can't be
+                removed (see `remove_players_safely`). Defaults to False.
 
         Returns:
             bool: True for success, False otherwise.
@@ -102,7 +240,7 @@ class PlayerChecks:
                 "have more than one online mode: %s",
                 duplicates,
             )
-            return remove_players_safely(players)
+            return remove_players_safely(players, workers=workers, fail_fast=fail_fast)
         return True
 
 
@@ -128,62 +266,194 @@ def check_plugin() -> bool:
     return True
 
 
-def group_players(iterable: List[Player], key=None) -> List[Tuple[str, List[Player]]]:
-    """Groups player.
+def group_players(
+    iterable: Iterable[Player], key: KeyFunc = None
+) -> List[Tuple[Hashable, List[Player]]]:
+    """Groups players in a single pass, using a dict. The input doesn't need to
+    be sorted: the groups keep the order in which each key was first seen.
 
     Args:
-        iterable (List[Player]): list of players to group.
-        key (callable, optional): function to group the players by. Defaults
+        iterable (Iterable[Player]): players to group.
+        key (KeyFunc, optional): function to group the players by. Defaults
             to None, which means that the players will be grouped by username.
 
     Returns:
-        List[Tuple[str, List[Player]]]: list of pairs usermane - users with same username.
+        List[Tuple[Hashable, List[Player]]]: list of pairs key - players with
+            that key.
     """
 
     if not key:
-        key = lambda x: x.username
-    return [(x, list(y)) for x, y in groupby(iterable, key)]
+        key = GROUP_KEYS["username"]
+
+    groups = {}
+    for player in iterable:
+        groups.setdefault(key(player), []).append(player)
+    return list(groups.items())
+
+
+def group_players_multi(
+    iterable: Iterable[Player], keys: Dict[str, KeyFunc] = None
+) -> Dict[str, Dict[Hashable, List[Player]]]:
+    """Groups players by several keys at once, in a single pass.
+
+    Args:
+        iterable (Iterable[Player]): players to group.
+        keys (Dict[str, KeyFunc], optional): key functions, by name. Defaults
+            to None, which means GROUP_KEYS (username, lowercase username and
+            uuid).
+
+    Returns:
+        Dict[str, Dict[Hashable, List[Player]]]: for each key name, the players
+            grouped by that key.
+    """
 
+    if not keys:
+        keys = GROUP_KEYS
 
-def remove_players_safely(players: List[Player], force=False) -> bool:
+    groups = {name: {} for name in keys}
+    key_funcs = [(groups[name], func) for name, func in keys.items()]
+
+    for player in iterable:
+        for group, func in key_funcs:
+            group.setdefault(func(player), []).append(player)
+
+    return groups
+
+
+def _count_items(player: Player) -> Tuple[int, int]:
+    summary = player.get_summary()
+    return summary.ender_chest, summary.inventory
+
+
+def analyse_players(
+    players: List[Player],
+    item_counts: Optional[Dict[Player, Tuple[int, int]]] = None,
+    workers: int = 1,
+    fail_fast: bool = False,
+) -> List[Optional[Tuple[int, int]]]:
+    """Counts the items in the ender chest and in the inventory of each player,
+    decoding the player data files on a pool of `workers` threads.
+
+    Args:
+        players (List[Player]): players to analyse.
+        item_counts (Optional[Dict[Player, Tuple[int, int]]], optional): counts
+            already known, which won't be computed again. Defaults to None.
+        workers (int, optional): number of threads. Defaults to 1.
+        fail_fast (bool, optional): if True, the outstanding work is cancelled
+            once the first player with items, in the order of `players`, is
+            found. Defaults to False.
+
+    Raises:
+        ValueError: if `workers` is less than 1.
+
+    Returns:
+        List[Optional[Tuple[int, int]]]: pairs (ender chest, inventory), in the
+            same order as `players`. Players whose analysis was cancelled
+            are None.
+    """
+
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, not {workers!r}")
+
+    item_counts = item_counts or {}
+    results = [item_counts.get(player) for player in players]
+    pending = [i for i, counts in enumerate(results) if counts is None]
+
+    if fail_fast and any(counts and any(counts) for counts in results):
+        return results
+
+    if workers == 1:
+        for i in pending:
+            results[i] = _count_items(players[i])
+            if fail_fast and any(results[i]):
+                break
+        return results
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_count_items, players[i]) for i in pending]
+        # the results are collected in order, so fail_fast stops on the same
+        # offender as the sequential analysis, whatever the thread timing
+        for i, future in zip(pending, futures):
+            results[i] = future.result()
+            if fail_fast and any(results[i]):
+                for other in futures:
+                    other.cancel()
+                break
+
+    return results
+
+
+def remove_players_safely(
+    players: List[Player],
+    force=False,
+    item_counts: Optional[Dict[Player, Tuple[int, int]]] = None,
+    workers: int = 1,
+    fail_fast: bool = False,
+) -> bool:
     """Removes players if their inventory and ender chest is emtpy. This filter can
     be bypassed by the `force` argument.
 
+    The files of the removed players are moved to a new quarantine (see
+    `Quarantine`), so the removal can be undone.
+
+    The player data files are analysed first (see `analyse_players`), and then
+    the players are removed in order, so the output is deterministic regardless
+    of the number of workers.
+
     Args:
         players (List[Players]): list of players to remove.
         force (optional, bool): if True, inventory and ender chest checkers
             will be ignored. Defaults to False.
+        item_counts (Optional[Dict[Player, Tuple[int, int]]], optional): number
+            of items in the ender chest and in the inventory of each player, as
+            collected by `validate_players`. Players not present are decoded.
+            Defaults to None.
+        workers (int, optional): number of threads used to analyse the
+            players. Defaults to 1.
+        fail_fast (bool, optional): if True, the analysis stops at the first
+            player with items and no player is removed. Otherwise, every
+            offender is reported and the rest of the players are removed.
+            Ignored if `force` is True. Defaults to False.
 
     Returns:
         bool: True if all players were able to be removed, False otherwise.
     """
 
     logger = logging.getLogger(__name__)
+    fail_fast = fail_fast and not force
+    results = analyse_players(players, item_counts, workers, fail_fast)
     error = False
 
-    for player in players:
-        logger.debug("Analysing player %s [%s]", player.username, player.online)
-        ender_chest = player.get_ender_chest()
-        inventory = player.get_inventory()
-
-        if ender_chest or inventory:
-            ender_chest = len(ender_chest)
-            inventory = len(inventory)
-
-            if not force:
+    if fail_fast and any(counts and any(counts) for counts in results):
+        for player, counts in zip(players, results):
+            if counts and any(counts):
                 msg = "Can't remove player %s\nItems: ender_chest=%d, inventory=%d"
-                args = (player.to_extended_repr(), ender_chest, inventory)
+                args = (player.to_extended_repr(), *counts)
                 logger.error(msg, *args)
                 print(Fore.LIGHTRED_EX + msg % args + Fore.RESET, file=sys.stderr)
-                error = True
-                continue
 
-            msg = "Removing player %s (ender-chest=%d, inventory=%d)"
-            args = (player.to_extended_repr(), ender_chest, inventory)
-            logger.warning(msg, *args)
-            print(Fore.LIGHTYELLOW_EX + msg % args + Fore.RESET)
+        logger.critical("Aborted removal of %d players (fail-fast)", len(players))
+        return False
+
+    with Quarantine.create() as quarantine:
+        for player, (ender_chest, inventory) in zip(players, results):
+            logger.debug("Analysing player %s [%s]", player.username, player.online)
+
+            if ender_chest or inventory:
+                if not force:
+                    msg = "Can't remove player %s\nItems: ender_chest=%d, inventory=%d"
+                    args = (player.to_extended_repr(), ender_chest, inventory)
+                    logger.error(msg, *args)
+                    print(Fore.LIGHTRED_EX + msg % args + Fore.RESET, file=sys.stderr)
+                    error = True
+                    continue
+
+                msg = "Removing player %s (ender-chest=%d, inventory=%d)"
+                args = (player.to_extended_repr(), ender_chest, inventory)
+                logger.warning(msg, *args)
+                print(Fore.LIGHTYELLOW_EX + msg % args + Fore.RESET)
 
-        player.remove()
-        logger.info("Removed player %s [%s]", player.username, player.online)
+            quarantine.add(player)
+            logger.info("Removed player %s [%s]", player.username, player.online)
 
-    return error
+    return not error
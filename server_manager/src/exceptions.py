@@ -5,6 +5,10 @@ class ServerManagerError(Exception):
     """Server manager error."""
 
 
+class BackupError(ServerManagerError):
+    """Backup error."""
+
+
 class CheckError(ServerManagerError):
     """Check error."""
 
@@ -29,10 +33,30 @@ class InvalidServerStateError(ServerManagerError):
     """Invalid server state error."""
 
 
+class JournalError(ServerManagerError):
+    """Mode switch journal error."""
+
+
+class PlanError(ServerManagerError):
+    """Mode switch plan error."""
+
+
 class PropertyError(ServerManagerError):
     """Property Error."""
 
 
+class QuarantineError(ServerManagerError):
+    """Quarantine error."""
+
+
+class RconError(ServerManagerError):
+    """RCON client error."""
+
+
+class RewriterError(ServerManagerError):
+    """Plugin data rewriter error."""
+
+
 class SearchError(ServerManagerError):
     """Search error."""
 
@@ -168,12 +168,16 @@ class File(metaclass=MetaFile):
     @classmethod
     def gen_files(cls, path: Path):
         """Scans dir `path` recursively looking for files that contain minecraft player data.
+        The files found replace the ones of the previous scan.
 
         Args:
             path (Path): root dir to start recursive scan.
         """
 
         logger.debug("generating files for path %s", path.as_posix())
+        for files in cls.memory.values():
+            files.clear()
+
         for root, _, files in os.walk(path):
             for filename in files:
                 file = Path(root).joinpath(filename)
@@ -0,0 +1,499 @@
+"""Write-ahead journal of the online-mode switches.
+
+Before touching the server, `set_mode` writes the whole list of steps of the
+switch (the renames of the players' files and the plugin, the uuid patches,
+the rewrite of the region, JSON and plugin files and the change of
+`online-mode` in `server.properties`, see `plan`) to the journal. Then each step is applied
+and its index is appended to the journal, which is fsync'd every time.
+
+If the switch is interrupted, `lia online-mode recover` reads the journal and
+either applies the remaining steps (roll forward) or reverts the applied ones
+(roll back). The journal is deleted once the switch is completed or reverted.
+
+The journal is a text file: the first line is the JSON header with the steps,
+the rest are the indexes of the steps already applied.
+
+Consecutive file steps (renames and uuid patches) are applied on a pool of
+threads, as each rename is a round trip on networked storage. Steps touching
+the same path (a chain, where a file is renamed to the old path of another
+file, or the patch of a renamed file) are kept in the same group and applied in
+order, so the result is the same as applying them sequentially.
+"""
+
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+import json
+import logging
+import os
+from pathlib import Path
+from threading import Lock
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from .exceptions import JournalError
+from .nbt_patch import get_uuid_map, patch_gzip_file
+from .paths import get_cache_folder
+from .plugin_data import rewrite_plugin_data
+from .properties_manager import PropertiesManager
+from .regions import rewrite_regions
+from .server_json import rewrite_json_files
+
+JOURNAL_FILENAME = "mode-switch.journal"
+DEFAULT_WORKERS = 8
+FILE_OPS = ("rename", "patch_uuid")
+MAPPING_OPS = ("patch_regions", "patch_json", "patch_plugins")
+
+logger = logging.getLogger(__name__)
+Step = dict
+
+
+class SwitchStats(NamedTuple):
+    """Statistics of a mode switch."""
+
+    steps: int
+    seconds: float
+
+    @property
+    def throughput(self) -> float:
+        """Steps applied per second."""
+        return self.steps / self.seconds if self.seconds else float(self.steps)
+
+
+def get_journal_path() -> Path:
+    """Returns the path of the mode switch journal.
+
+    Returns:
+        Path: journal path.
+    """
+
+    return get_cache_folder().joinpath(JOURNAL_FILENAME)
+
+
+def rename_step(src: Path, dst: Path) -> Step:
+    """Returns the step to rename a file.
+
+    Args:
+        src (Path): current path.
+        dst (Path): new path.
+
+    Returns:
+        Step: rename step.
+    """
+
+    return {"op": "rename", "src": src.as_posix(), "dst": dst.as_posix()}
+
+
+def patch_uuid_step(path: Path, old_uuid: str, new_uuid: str) -> Step:
+    """Returns the step to replace the uuid stored in a player data file.
+
+    Args:
+        path (Path): player data file path (after renaming it).
+        old_uuid (str): uuid to replace.
+        new_uuid (str): new uuid.
+
+    Returns:
+        Step: patch step.
+    """
+
+    return {
+        "op": "patch_uuid",
+        "path": path.as_posix(),
+        "old": old_uuid,
+        "new": new_uuid,
+    }
+
+
+def patch_regions_step(mapping: Dict[str, str]) -> Step:
+    """Returns the step to replace the uuids stored in the region files (the
+    owners of the tamed animals, see `regions`).
+
+    Args:
+        mapping (Dict[str, str]): new uuid by old uuid.
+
+    Returns:
+        Step: region files step.
+    """
+
+    return {"op": "patch_regions", "mapping": mapping}
+
+
+def patch_json_step(mapping: Dict[str, str]) -> Step:
+    """Returns the step to replace the uuids stored in the JSON files of the
+    server (ops, bans, etc, see `server_json`).
+
+    Args:
+        mapping (Dict[str, str]): new uuid by old uuid.
+
+    Returns:
+        Step: JSON files step.
+    """
+
+    return {"op": "patch_json", "mapping": mapping}
+
+
+def patch_plugins_step(mapping: Dict[str, str]) -> Step:
+    """Returns the step to replace the uuids stored by the plugins (see
+    `plugin_data`).
+
+    Args:
+        mapping (Dict[str, str]): new uuid by old uuid.
+
+    Returns:
+        Step: plugins data step.
+    """
+
+    return {"op": "patch_plugins", "mapping": mapping}
+
+
+def get_step_paths(step: Step) -> Tuple[str, ...]:
+    """Returns the paths touched by a file step.
+
+    Args:
+        step (Step): rename or patch step.
+
+    Returns:
+        Tuple[str, ...]: paths.
+    """
+
+    if step["op"] == "patch_uuid":
+        return (step["path"],)
+    return step["src"], step["dst"]
+
+
+def write_property(name: str, value: Any):
+    """Writes the value of a property to `server.properties`, unless it's
+    already set, so a property step can be applied or reverted twice.
+
+    Args:
+        name (str): property name.
+        value (Any): new value.
+    """
+
+    if PropertiesManager.get_property(name) == value:
+        logger.debug("Property %s is already set to %r", name, value)
+        return
+
+    spec = PropertiesManager.get_spec(name)
+    PropertiesManager.set_raw_values(**spec.to_raw(value))
+
+
+def apply_step(step: Step):
+    """Applies a step. Renames and properties already applied are skipped, so applying a step
+    twice is safe.
+
+    Args:
+        step (Step): step to apply.
+
+    Raises:
+        JournalError: if neither the source nor the destination of a rename
+            exist, or if the file to patch doesn't exist.
+    """
+
+    if step["op"] == "property":
+        write_property(step["name"], step["new"])
+        return
+
+    if step["op"] == "patch_uuid":
+        path = Path(step["path"])
+        if not path.exists():
+            raise JournalError(f"Can't patch {path.as_posix()!r}, file not found")
+        patch_gzip_file(path, get_uuid_map({step["old"]: step["new"]}))
+        return
+
+    if step["op"] == "patch_regions":
+        rewrite_regions(step["mapping"])
+        return
+
+    if step["op"] == "patch_json":
+        rewrite_json_files(step["mapping"])
+        return
+
+    if step["op"] == "patch_plugins":
+        rewrite_plugin_data(step["mapping"])
+        return
+
+    src, dst = Path(step["src"]), Path(step["dst"])
+    if src.exists():
+        logger.debug("Renaming %s to %s", src.as_posix(), dst.as_posix())
+        src.rename(dst)
+    elif not dst.exists():
+        raise JournalError(f"Can't rename {src.as_posix()!r}, file not found")
+
+
+def revert_step(step: Step):
+    """Reverts a step. Steps not applied are skipped, so reverting a step
+    twice is safe.
+
+    Args:
+        step (Step): step to revert.
+    """
+
+    if step["op"] == "property":
+        write_property(step["name"], step["old"])
+        return
+
+    if step["op"] == "patch_uuid":
+        path = Path(step["path"])
+        if path.exists():
+            patch_gzip_file(path, get_uuid_map({step["new"]: step["old"]}))
+        return
+
+    if step["op"] in MAPPING_OPS:
+        apply_step({**step, "mapping": {y: x for x, y in step["mapping"].items()}})
+        return
+
+    src, dst = Path(step["src"]), Path(step["dst"])
+    if dst.exists() and not src.exists():
+        logger.debug("Renaming %s back to %s", dst.as_posix(), src.as_posix())
+        dst.rename(src)
+
+
+def group_file_steps(steps: List[Step], indexes: List[int]) -> List[List[int]]:
+    """Groups the file steps so that the ones touching the same path end in the
+    same group. Each group keeps the order of `indexes`.
+
+    Args:
+        steps (List[Step]): steps of the switch.
+        indexes (List[int]): indexes of the file steps to group.
+
+    Returns:
+        List[List[int]]: groups of indexes.
+    """
+
+    groups: Dict[int, List[int]] = {}
+    group_by_path: Dict[str, int] = {}
+
+    for index in indexes:
+        paths = get_step_paths(steps[index])
+        found = {group_by_path[path] for path in paths if path in group_by_path}
+
+        group_id = min(found, default=index)
+        group = groups.setdefault(group_id, [])
+        for other in found - {group_id}:
+            for moved in groups.pop(other):
+                for path in get_step_paths(steps[moved]):
+                    group_by_path[path] = group_id
+                group.append(moved)
+            group.sort()
+
+        group.append(index)
+        for path in paths:
+            group_by_path[path] = group_id
+
+    return list(groups.values())
+
+
+class Journal:
+    """Write-ahead journal of a mode switch.
+
+    Args:
+        path (Optional[Path], optional): journal path. If None,
+            `get_journal_path()` is used. Defaults to None.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or get_journal_path())
+        self.steps: List[Step] = []
+        self.done: Set[int] = set()
+        self._lock = Lock()
+
+    def exists(self) -> bool:
+        """Checks if there is an unfinished mode switch.
+
+        Returns:
+            bool: True if the journal exists, False otherwise.
+        """
+
+        return self.path.is_file()
+
+    def check_clean(self):
+        """Checks that there is no unfinished mode switch.
+
+        Raises:
+            JournalError: if there is an unfinished mode switch.
+        """
+
+        if self.exists():
+            raise JournalError(
+                "A mode switch was interrupted, run 'lia online-mode recover'"
+            )
+
+    def _append(self, line: str):
+        with self.path.open("at", encoding="utf-8") as file_handler:
+            file_handler.write(line + "\n")
+            file_handler.flush()
+            os.fsync(file_handler.fileno())
+
+    def begin(self, steps: List[Step]):
+        """Writes the steps of a new mode switch.
+
+        Args:
+            steps (List[Step]): steps of the switch.
+        """
+
+        self.check_clean()
+        self.steps, self.done = steps, set()
+        self._append(json.dumps({"steps": steps}))
+        logger.info("Mode switch journal started (%d steps)", len(steps))
+
+    def load(self):
+        """Reads the steps and the progress of the unfinished mode switch. A
+        truncated last line (the process died while writing it) is ignored.
+
+        Raises:
+            JournalError: if there is no journal.
+        """
+
+        try:
+            # the last item is empty unless the last write was torn
+            lines = self.path.read_text(encoding="utf-8").split("\n")[:-1]
+        except FileNotFoundError as exc:
+            raise JournalError("There is no interrupted mode switch") from exc
+
+        try:
+            self.steps = json.loads(lines[0])["steps"]
+        except (IndexError, ValueError):
+            # the process died while writing the header, nothing was applied
+            logger.warning("Ignoring incomplete journal %r", self.path.as_posix())
+            self.steps = []
+
+        self.done = {int(line) for line in lines[1:]}
+
+    def mark_done(self, index: int):
+        """Records that a step was applied.
+
+        Args:
+            index (int): index of the step.
+        """
+
+        with self._lock:
+            self.done.add(index)
+            self._append(str(index))
+
+    def apply(self, workers: int = DEFAULT_WORKERS) -> int:
+        """Applies the remaining steps and deletes the journal. Consecutive
+        file steps are applied on a pool of `workers` threads (see
+        `group_file_steps`), the rest of steps are applied one by one.
+
+        Args:
+            workers (int, optional): number of threads used to rename and
+                patch the files. Defaults to DEFAULT_WORKERS.
+
+        Raises:
+            ValueError: if `workers` is less than 1.
+
+        Returns:
+            int: number of steps applied.
+        """
+
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, not {workers!r}")
+
+        pending = [i for i in range(len(self.steps)) if i not in self.done]
+        start = time.perf_counter()
+        file_steps: List[int] = []
+
+        for index in pending + [None]:
+            if index is not None and self.steps[index]["op"] in FILE_OPS:
+                file_steps.append(index)
+                continue
+
+            self._apply_file_steps(file_steps, workers)
+            file_steps = []
+            if index is not None:
+                apply_step(self.steps[index])
+                self.mark_done(index)
+
+        self.path.unlink()
+        elapsed = time.perf_counter() - start
+        logger.info(
+            "Mode switch completed (%d steps applied in %.2fs, %.1f steps/s)",
+            len(pending),
+            elapsed,
+            SwitchStats(len(pending), elapsed).throughput,
+        )
+        return len(pending)
+
+    def _apply_group(self, group: List[int]):
+        for index in group:
+            apply_step(self.steps[index])
+            self.mark_done(index)
+
+    def _apply_file_steps(self, indexes: List[int], workers: int):
+        groups = group_file_steps(self.steps, indexes)
+        if workers == 1 or len(groups) < 2:
+            for group in groups:
+                self._apply_group(group)
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self._apply_group, group) for group in groups]
+            done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in not_done:
+                future.cancel()
+            for future in done:
+                future.result()
+
+    def rollback(self) -> int:
+        """Reverts the applied steps, in reverse order, and deletes the journal.
+        File and property steps not recorded as applied are reverted too, in
+        case the process died before the journal write. Mapping steps are
+        applied one by one, so only the first step not recorded may have been
+        running: it's the only mapping step reverted without being recorded.
+
+        Returns:
+            int: number of steps reverted.
+        """
+
+        pending = [i for i in range(len(self.steps)) if i not in self.done]
+        interrupted = pending[0] if pending else None
+        reverted = 0
+        for index in reversed(range(len(self.steps))):
+            step = self.steps[index]
+            if index in self.done:
+                revert_step(step)
+                reverted += 1
+            elif step["op"] in FILE_OPS + ("property",) or index == interrupted:
+                revert_step(step)
+
+        self.path.unlink()
+        logger.info("Mode switch rolled back (%d steps reverted)", reverted)
+        return reverted
+
+
+def run_mode_switch(steps: List[Step], workers: int = DEFAULT_WORKERS) -> SwitchStats:
+    """Applies the steps of a mode switch through the journal.
+
+    Args:
+        steps (List[Step]): steps of the switch (see `plan.build_plan`).
+        workers (int, optional): number of threads used to rename and patch
+            the files. Defaults to DEFAULT_WORKERS.
+
+    Returns:
+        SwitchStats: number of steps applied and time spent.
+    """
+
+    start = time.perf_counter()
+    journal = Journal()
+    journal.begin(steps)
+    applied = journal.apply(workers=workers)
+    return SwitchStats(applied, time.perf_counter() - start)
+
+
+def recover(rollback: bool = False, workers: int = DEFAULT_WORKERS) -> int:
+    """Finishes an interrupted mode switch.
+
+    Args:
+        rollback (bool, optional): if True, the switch is reverted instead of
+            completed. Defaults to False.
+        workers (int, optional): number of threads used to rename and patch
+            the files when rolling forward. Defaults to DEFAULT_WORKERS.
+
+    Returns:
+        int: number of steps applied or reverted.
+    """
+
+    journal = Journal()
+    journal.load()
+    if rollback:
+        return journal.rollback()
+    return journal.apply(workers=workers)
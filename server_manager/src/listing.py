@@ -0,0 +1,234 @@
+"""Builds the table of players shown by `lia players list-server`.
+
+Each field declares where its data comes from, so the table only pays for the
+I/O the selected fields need:
+
+- registry fields (username, mode, uuid) don't touch the player files.
+- summary fields (item counts, position, etc.) use the summary cache.
+- detailed fields (item listings) decode the full player data file.
+"""
+
+from collections import namedtuple
+from enum import Enum
+import heapq
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .player import Item, Player, PlayerSummary
+from .players_data import get_mode
+from .summary_cache import get_player_summaries
+
+
+class FieldSource(Enum):
+    """Data needed to compute a field, from cheapest to most expensive."""
+
+    REGISTRY = 0
+    SUMMARY = 1
+    DETAILED = 2
+
+
+Field = namedtuple("Field", "source getter numeric")
+
+
+def items_to_str(items: List[Item]) -> str:
+    """Returns a compact representation of a list of items.
+
+    Args:
+        items (List[Item]): items to represent.
+
+    Returns:
+        str: items representation.
+    """
+
+    return ", ".join(f"{item.name} x{item.count}" for item in items) or "-"
+
+
+# pylint: disable=unused-argument
+FIELDS = {
+    "username": Field(FieldSource.REGISTRY, lambda ply, smr: ply.username, False),
+    "mode": Field(
+        FieldSource.REGISTRY,
+        lambda ply, smr: "online" if get_mode(ply.uuid) else "offline",
+        False,
+    ),
+    "uuid": Field(FieldSource.REGISTRY, lambda ply, smr: ply.uuid, False),
+    "inventory": Field(FieldSource.SUMMARY, lambda ply, smr: smr.inventory, True),
+    "ender-chest": Field(FieldSource.SUMMARY, lambda ply, smr: smr.ender_chest, True),
+    "dimension": Field(FieldSource.SUMMARY, lambda ply, smr: smr.dimension, False),
+    "position": Field(
+        FieldSource.SUMMARY, lambda ply, smr: f"{smr.x} {smr.y} {smr.z}", False
+    ),
+    "health": Field(FieldSource.SUMMARY, lambda ply, smr: smr.health, True),
+    "xp-level": Field(FieldSource.SUMMARY, lambda ply, smr: smr.xp_level, True),
+    "inventory-items": Field(
+        FieldSource.DETAILED,
+        lambda ply, smr: items_to_str(ply.get_detailed_inventory()),
+        False,
+    ),
+    "ender-chest-items": Field(
+        FieldSource.DETAILED,
+        lambda ply, smr: items_to_str(ply.get_detailed_ender_chest()),
+        False,
+    ),
+}
+# pylint: enable=unused-argument
+
+DEFAULT_FIELDS = ("username", "mode", "uuid", "inventory", "ender-chest")
+
+
+def parse_fields(fields: str) -> List[str]:
+    """Parses a comma separated list of fields.
+
+    Args:
+        fields (str): comma separated field names.
+
+    Raises:
+        ValueError: if a field is not valid.
+
+    Returns:
+        List[str]: field names.
+    """
+
+    names = [name.strip().lower() for name in fields.split(",") if name.strip()]
+    if not names:
+        raise ValueError("Must select at least one field")
+
+    for name in names:
+        validate_field(name)
+    return names
+
+
+def validate_field(name: str):
+    """Checks that `name` is a valid field.
+
+    Args:
+        name (str): field name.
+
+    Raises:
+        ValueError: if the field is not valid.
+    """
+
+    if name not in FIELDS:
+        valid = ", ".join(FIELDS)
+        raise ValueError(f"Invalid field {name!r} (valid fields: {valid})")
+
+
+def plan_sources(fields: Sequence[str]) -> Set[FieldSource]:
+    """Returns the data sources needed to compute `fields`.
+
+    Args:
+        fields (Sequence[str]): field names.
+
+    Returns:
+        Set[FieldSource]: data sources needed.
+    """
+
+    return {FIELDS[name].source for name in fields}
+
+
+def _get_summaries(
+    players: Sequence[Player], fields: Sequence[str], use_cache: bool
+) -> List[Optional[PlayerSummary]]:
+    if not players or FieldSource.SUMMARY not in plan_sources(fields):
+        return [None] * len(players)
+    return get_player_summaries(players, use_cache=use_cache)
+
+
+def _select_sorted(
+    players: Sequence[Player], sort: str, use_cache: bool, top: Optional[int]
+) -> Tuple[List[int], Dict[int, Optional[PlayerSummary]]]:
+    # returns the indexes of the selected players, in order, and the summaries
+    # already loaded to compute the sort keys
+    field = FIELDS[sort]
+    indexes = range(len(players))
+    summaries = _get_summaries(players, [sort], use_cache)
+    keys = [field.getter(players[i], summaries[i]) for i in indexes]
+    known = dict(enumerate(summaries)) if field.source == FieldSource.SUMMARY else {}
+
+    if top is None:
+        selected = sorted(indexes, key=keys.__getitem__, reverse=field.numeric)
+    elif field.numeric:
+        selected = heapq.nlargest(top, indexes, key=keys.__getitem__)
+    else:
+        selected = heapq.nsmallest(top, indexes, key=keys.__getitem__)
+    return selected, known
+
+
+def get_player_rows(
+    players: Sequence[Player],
+    fields: Sequence[str] = DEFAULT_FIELDS,
+    use_cache: bool = True,
+    sort: Optional[str] = None,
+    top: Optional[int] = None,
+) -> List[Tuple[str, ...]]:
+    """Returns the value of `fields` for each player, reading only the data
+    the fields need.
+
+    When sorting, only the sort field is computed for every player. The `top`
+    rows are selected using a heap and the rest of the fields are computed just
+    for them. Numeric fields are sorted in descending order, text fields in
+    ascending order.
+
+    Args:
+        players (Sequence[Player]): players to list.
+        fields (Sequence[str], optional): fields to show. Defaults to
+            DEFAULT_FIELDS.
+        use_cache (bool, optional): if False, the summary cache is bypassed.
+            Defaults to True.
+        sort (Optional[str], optional): field to sort the rows by. If None,
+            the players order is kept. Defaults to None.
+        top (Optional[int], optional): maximum number of rows to return. If
+            None, all the rows are returned. Defaults to None.
+
+    Raises:
+        ValueError: if `top` is negative.
+
+    Returns:
+        List[Tuple[str, ...]]: rows, one per player.
+    """
+
+    if top is not None and top < 0:
+        raise ValueError(f"top can't be negative ({top!r})")
+
+    for name in fields:
+        validate_field(name)
+
+    if sort:
+        validate_field(sort)
+        selected, known_summaries = _select_sorted(players, sort, use_cache, top)
+    else:
+        selected, known_summaries = list(range(len(players))[:top]), {}
+
+    missing = [i for i in selected if i not in known_summaries]
+    summaries = _get_summaries([players[i] for i in missing], fields, use_cache)
+    known_summaries.update(zip(missing, summaries))
+
+    getters = [FIELDS[name].getter for name in fields]
+    rows = []
+    for i in selected:
+        player, summary = players[i], known_summaries[i]
+        rows.append(tuple(str(getter(player, summary)) for getter in getters))
+    return rows
+
+
+def format_table(header: Sequence[str], rows: Sequence[Sequence[str]]) -> List[str]:
+    """Formats a table, aligning the first column to the left and centering the
+    rest.
+
+    Args:
+        header (Sequence[str]): column names.
+        rows (Sequence[Sequence[str]]): table rows.
+
+    Returns:
+        List[str]: formatted lines, including the header.
+    """
+
+    data = [tuple(header)] + [tuple(row) for row in rows]
+    lengths = [max(len(row[x]) for row in data) for x in range(len(header))]
+    output_str = " | " + " - ".join(["{:{}}"] + ["{:^{}}"] * (len(header) - 1))
+    output_str += " |"
+
+    lines = []
+    for row in data:
+        format_data = tuple(x for y in zip(row, lengths) for x in y)
+        lines.append(output_str.format(*format_data))
+    return lines
@@ -0,0 +1,105 @@
+"""In-place patching of the UUIDs stored in NBT data.
+
+Since Minecraft 1.16, UUIDs are stored as int arrays of length 4 (`UUID`,
+`Owner`, `Attach`, etc). In the binary NBT format, every int array is its
+length (4 bytes, big endian) followed by the ints, so each UUID is the 4 bytes
+`00 00 00 04` followed by the 16 bytes of the UUID (`uuid.UUID(...).bytes`).
+
+Instead of decoding and encoding the whole compound, the decompressed stream is
+scanned for these fixed-size arrays and the 16 bytes of the UUIDs to replace are
+patched directly.
+"""
+
+import gzip
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Tuple
+from uuid import UUID
+
+INT_ARRAY_4 = b"\x00\x00\x00\x04"
+COMPRESS_LEVEL = 6
+
+logger = logging.getLogger(__name__)
+UUIDMap = Dict[bytes, bytes]
+
+
+def uuid_to_bytes(uuid: str) -> bytes:
+    """Returns the NBT representation of an UUID (the content of its int array).
+
+    Args:
+        uuid (str): uuid, with or without dashes.
+
+    Returns:
+        bytes: 16 bytes of the uuid.
+    """
+
+    return UUID(uuid).bytes
+
+
+def get_uuid_map(mapping: Dict[str, str]) -> UUIDMap:
+    """Transforms a mapping old uuid -> new uuid into its NBT representation.
+
+    Args:
+        mapping (Dict[str, str]): new uuid by old uuid.
+
+    Returns:
+        UUIDMap: new uuid bytes by old uuid bytes.
+    """
+
+    return {uuid_to_bytes(old): uuid_to_bytes(new) for old, new in mapping.items()}
+
+
+def patch_uuid_arrays(data: bytes, uuid_map: UUIDMap) -> Tuple[bytes, int]:
+    """Replaces the UUID int arrays of decompressed NBT data.
+
+    Args:
+        data (bytes): decompressed NBT data.
+        uuid_map (UUIDMap): new uuid bytes by old uuid bytes.
+
+    Returns:
+        Tuple[bytes, int]: patched data and number of UUIDs replaced.
+    """
+
+    patched = None
+    count = 0
+    pos = data.find(INT_ARRAY_4)
+
+    while pos != -1:
+        start = pos + 4
+        new_uuid = uuid_map.get(data[start : start + 16])
+        if new_uuid is not None:
+            if patched is None:
+                patched = bytearray(data)
+            patched[start : start + 16] = new_uuid
+            count += 1
+            pos = data.find(INT_ARRAY_4, start + 16)
+        else:
+            pos = data.find(INT_ARRAY_4, pos + 1)
+
+    return (bytes(patched), count) if patched is not None else (data, 0)
+
+
+def patch_gzip_file(path: Path, uuid_map: UUIDMap) -> int:
+    """Replaces the UUIDs of a gzipped NBT file (like a player data file). The
+    file is only written, atomically, if some UUID was replaced.
+
+    Args:
+        path (Path): path of the file.
+        uuid_map (UUIDMap): new uuid bytes by old uuid bytes.
+
+    Returns:
+        int: number of UUIDs replaced.
+    """
+
+    data = gzip.decompress(path.read_bytes())
+    data, count = patch_uuid_arrays(data, uuid_map)
+    if not count:
+        return 0
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(gzip.compress(data, compresslevel=COMPRESS_LEVEL))
+    os.replace(tmp_path, path)
+
+    logger.debug("Replaced %d uuids in %s", count, path.as_posix())
+    return count
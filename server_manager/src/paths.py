@@ -9,8 +9,6 @@ DATA_PATH = Path(__file__).parent.joinpath("data/server-path.txt")
 if os.environ.get("TESTING", None):  # pragma: no cover
     DATA_PATH = Path(os.environ["SERVER-PATH-TESTING"])
 
-os.makedirs(DATA_PATH.parent, exist_ok=True)
-
 
 @lru_cache(maxsize=10)
 def get_server_path() -> Path:
@@ -27,6 +25,19 @@ def get_server_path() -> Path:
     return gen_and_save_server_path()
 
 
+@lru_cache(maxsize=10)
+def get_cache_folder() -> Path:
+    """Returns the folder where cached data about the server is stored.
+
+    Returns:
+        Path: cache folder.
+    """
+
+    cache_folder = get_server_path().with_name("lia-cache")
+    os.makedirs(cache_folder, exist_ok=True)
+    return cache_folder
+
+
 def gen_and_save_server_path():
     """Asks the user to input the server path and stores it.
 
@@ -40,5 +51,6 @@ def gen_and_save_server_path():
     server_path = input("Write the path of the server: ").strip()
     validate_server_path(server_path)
 
+    DATA_PATH.parent.mkdir(parents=True, exist_ok=True)
     DATA_PATH.write_text(Path(server_path).as_posix())
     return Path(server_path)
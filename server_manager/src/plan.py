@@ -0,0 +1,275 @@
+"""Dry-run planner of the online-mode switches.
+
+The plan holds the old -> new uuid of every player and the ordered list of
+steps of the switch (see `journal`). It's computed in memory, without touching
+the server, and it's validated in linear time with hash sets and dicts:
+
+- missing roster entries: uuids or usernames not found in the players data.
+- collisions: two files renamed to the same path, or renamed over a file that
+  is not renamed itself.
+- cycles: renames that can't be ordered without a temporary name.
+- invalid uuids, which can't be patched inside the player data files.
+
+Renames forming a chain (a file renamed to the current path of another file)
+are ordered so the last file of the chain is renamed first. After the renames,
+the uuid stored inside each player data file is patched (see `nbt_patch`) and
+the uuids are replaced in the region files (owners of the tamed animals, see
+`regions`), in the JSON files of the server (see `server_json`) and in the
+plugins data (see `plugin_data`).
+
+The plan can be saved and applied later (`lia online-mode set --apply-plan`),
+so the discovery work doesn't need to be done while the server is down.
+"""
+
+from dataclasses import asdict, dataclass, field
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from uuid import UUID
+
+from .exceptions import PlanError
+from .journal import (
+    Step,
+    patch_json_step,
+    patch_plugins_step,
+    patch_regions_step,
+    patch_uuid_step,
+    rename_step,
+)
+from .paths import get_cache_folder
+from .player import Player
+from .players_data import PlayersIndex, get_players_index
+from .plugin import get_plugin_rename
+
+PLAN_FILENAME = "mode-switch-plan.json"
+PLAN_VERSION = 5
+
+
+def get_plan_path() -> Path:
+    """Returns the path where the mode switch plan is saved.
+
+    Returns:
+        Path: plan path.
+    """
+
+    return get_cache_folder().joinpath(PLAN_FILENAME)
+
+
+@dataclass
+class ModeSwitchPlan:
+    """Plan of an online-mode switch.
+
+    Args:
+        new_mode (bool): new online mode.
+        mapping (Dict[str, str]): new uuid of each player, by old uuid.
+        steps (List[Step]): ordered steps of the switch.
+        errors (List[str]): problems that prevent the switch.
+    """
+
+    new_mode: bool
+    mapping: Dict[str, str] = field(default_factory=dict)
+    steps: List[Step] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        """True if the plan can be applied."""
+        return not self.errors
+
+    def check(self):
+        """Checks that the plan can be applied.
+
+        Raises:
+            PlanError: if the plan has errors.
+        """
+
+        if self.errors:
+            raise PlanError("Invalid mode switch plan: " + "; ".join(self.errors))
+
+    def to_json(self) -> str:
+        """Returns the plan encoded as json.
+
+        Returns:
+            str: json plan.
+        """
+
+        return json.dumps({"version": PLAN_VERSION, **asdict(self)}, indent=2)
+
+    def save(self, path: Optional[Path] = None):
+        """Writes the plan to disk atomically.
+
+        Args:
+            path (Optional[Path], optional): plan path. If None,
+                `get_plan_path()` is used. Defaults to None.
+        """
+
+        path = Path(path or get_plan_path())
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(self.to_json(), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> "ModeSwitchPlan":
+        """Reads a saved plan.
+
+        Args:
+            path (Optional[Path], optional): plan path. If None,
+                `get_plan_path()` is used. Defaults to None.
+
+        Raises:
+            PlanError: if there is no saved plan or it's not valid.
+
+        Returns:
+            ModeSwitchPlan: plan.
+        """
+
+        path = Path(path or get_plan_path())
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError as exc:
+            raise PlanError("No saved plan, run 'lia online-mode set --plan'") from exc
+
+        if data.pop("version", None) != PLAN_VERSION:
+            raise PlanError("Saved plan is not compatible, create it again")
+        return cls(**data)
+
+
+def _order_renames(renames: Dict[str, str], errors: List[str]) -> List[str]:
+    # Each path has at most one target, so the renames form chains and cycles.
+    # Every chain is walked once and its renames are ordered from the end.
+    visiting, visited = 1, 2
+    state: Dict[str, int] = {}
+    ordered = []
+
+    for start in renames:
+        chain = []
+        node = start
+        while node in renames and node not in state:
+            state[node] = visiting
+            chain.append(node)
+            node = renames[node]
+
+        if state.get(node) == visiting:
+            cycle = chain[chain.index(node) :]
+            errors.append("Rename cycle: " + " -> ".join(cycle + [node]))
+        else:
+            ordered.extend(reversed(chain))
+
+        for node in chain:
+            state[node] = visited
+
+    return ordered
+
+
+def _get_new_uuid(
+    player: Player, index: PlayersIndex, new_mode: bool, errors: List[str]
+) -> Optional[str]:
+    """Returns the uuid of a player in `new_mode`, looked up in the roster.
+
+    Args:
+        player (Player): player.
+        index (PlayersIndex): roster of the players.
+        new_mode (bool): new online mode.
+        errors (List[str]): errors of the plan, where the missing roster
+            entries and the invalid uuids are added.
+
+    Returns:
+        Optional[str]: new uuid, or None if it can't be found.
+    """
+
+    entry = index.by_uuid.get(player.uuid)
+    if entry is None:
+        errors.append(f"Missing roster entry for uuid={player.uuid}")
+        return None
+
+    target = index.by_username.get((entry.username, new_mode))
+    if target is None:
+        errors.append(
+            f"Missing roster entry for username={entry.username} "
+            f"and online={new_mode}"
+        )
+        return None
+
+    try:
+        UUID(player.uuid)
+        UUID(target.uuid)
+    except ValueError:
+        errors.append(f"Invalid uuid: {player.uuid} -> {target.uuid}")
+        return None
+
+    return target.uuid
+
+
+def _check_collisions(renames: Dict[str, str], paths: Set[str], errors: List[str]):
+    """Checks that no file is renamed over another one.
+
+    Args:
+        renames (Dict[str, str]): new path by current path.
+        paths (Set[str]): paths of all the player files.
+        errors (List[str]): errors of the plan, where the collisions are added.
+    """
+
+    sources_by_target: Dict[str, str] = {}
+    for src, dst in renames.items():
+        if dst in sources_by_target:
+            other = sources_by_target[dst]
+            errors.append(f"Collision: {other} and {src} would be renamed to {dst}")
+        elif dst in paths and dst not in renames:
+            errors.append(f"Collision: {src} would overwrite {dst}")
+        sources_by_target[dst] = src
+
+
+def build_plan(players: List[Player], new_mode: bool) -> ModeSwitchPlan:
+    """Computes the plan to switch the server to `new_mode`, without touching
+    the server files.
+
+    Args:
+        players (List[Player]): players of the server.
+        new_mode (bool): new online mode.
+
+    Returns:
+        ModeSwitchPlan: plan, with the errors found.
+    """
+
+    index = get_players_index()
+    plan = ModeSwitchPlan(new_mode)
+    renames: Dict[str, str] = {}
+    patches: List[Step] = []
+    paths: Set[str] = set()
+
+    for player in players:
+        files = (player.player_data_file, player.stats_file, player.advancements_file)
+        paths.update(file.as_posix() for file in files)
+
+        new_uuid = _get_new_uuid(player, index, new_mode, plan.errors)
+        if new_uuid is None:
+            continue
+
+        plan.mapping[player.uuid] = new_uuid
+        if new_uuid == player.uuid:
+            continue
+
+        for file in files:
+            new_path = file.path.with_name(new_uuid + file.path.suffix)
+            renames[file.as_posix()] = new_path.as_posix()
+        new_data_path = files[0].path.with_name(new_uuid + files[0].path.suffix)
+        patches.append(patch_uuid_step(new_data_path, player.uuid, new_uuid))
+
+    _check_collisions(renames, paths, plan.errors)
+    for src in _order_renames(renames, plan.errors):
+        plan.steps.append(rename_step(Path(src), Path(renames[src])))
+    plan.steps.extend(patches)
+
+    changed = {old: new for old, new in plan.mapping.items() if old != new}
+    if changed:
+        plan.steps.append(patch_regions_step(changed))
+        plan.steps.append(patch_json_step(changed))
+        plan.steps.append(patch_plugins_step(changed))
+
+    # plugin mode is the opposite as server mode
+    plan.steps.append(rename_step(*get_plugin_rename(not new_mode)))
+    plan.steps.append(
+        {"op": "property", "name": "online_mode", "old": not new_mode, "new": new_mode}
+    )
+    return plan
@@ -15,6 +15,9 @@ from .players_data import get_mode, get_username, get_uuid
 from .properties_manager import get_server_path
 
 Coords = namedtuple("Coords", "dim x y z")
+PlayerSummary = namedtuple(
+    "PlayerSummary", "inventory ender_chest dimension x y z health xp_level"
+)
 
 
 class Item:
@@ -40,7 +43,22 @@ class Item:
 
 
 class Player:
-    """Represents a player."""
+    """Represents a player.
+
+    The username and the online mode are looked up in the players registry the
+    first time they are accessed, so building a player doesn't do any I/O.
+    Players are identified by their uuid, so they can be used as dict keys and
+    set members.
+    """
+
+    __slots__ = (
+        "uuid",
+        "player_data_file",
+        "stats_file",
+        "advancements_file",
+        "_username",
+        "_online",
+    )
 
     required_files = ["player_data_file", "stats_file", "advancements_file"]
     logger: logging.Logger = logging.getLogger(__name__)
@@ -59,8 +77,8 @@ class Player:
         """
 
         self.uuid = uuid
-        self.username = get_username(self.uuid)
-        self.online = get_mode(self.uuid)
+        self._username = None
+        self._online = None
 
         for file in files:
             if isinstance(file, PlayerDataFile):
@@ -79,14 +97,40 @@ class Player:
                     f"Can't create Player {self.username!r} without {file}"
                 )
 
+    @property
+    def username(self) -> str:
+        """Returns the username of the player, registered in the csv.
+
+        Returns:
+            str: username.
+        """
+
+        if self._username is None:
+            self._username = get_username(self.uuid)
+        return self._username
+
+    @property
+    def online(self) -> bool:
+        """Returns the online mode of the player, registered in the csv.
+
+        Returns:
+            bool: online mode.
+        """
+
+        if self._online is None:
+            self._online = get_mode(self.uuid)
+        return self._online
+
     def __repr__(self):
         return f"Player({self.username}|{self.online} - {self.uuid})"
 
     def __eq__(self, other):
-        return self.__dict__ == other.__dict__
+        if not isinstance(other, Player):
+            return NotImplemented
+        return self.uuid == other.uuid
 
-    def __ne__(self, other):
-        return not self.__eq__(other)
+    def __hash__(self):
+        return hash(self.uuid)
 
     def to_extended_repr(self) -> str:
         """Returns the extended representation string of the Player.
@@ -150,18 +194,47 @@ class Player:
         result.sort(key=lambda x: x.name)
         return result
 
-    def get_position(self) -> Coords:
+    def get_position(self, exact: bool = False) -> Coords:
         """Returns the current coords of the player and its dimension.
 
+        Args:
+            exact (bool, optional): if True, the coords are the raw ones stored
+                in the player data (floats), otherwise they are rounded.
+                Defaults to False.
+
         Returns:
             Coords: player position.
         """
 
         nbt_data = self.get_nbt_data()
-        coords = [round(x) for x in nbt_data["Pos"]]
+        if exact:
+            coords = [float(x) for x in nbt_data["Pos"]]
+        else:
+            coords = [round(x) for x in nbt_data["Pos"]]
         dimension = nbt_data["Dimension"].split(":")[-1]
         return Coords(dimension, *coords)
 
+    def get_summary(self) -> PlayerSummary:
+        """Returns the item counts, position, health and experience level of
+        the player, decoding the player data file only once.
+
+        Returns:
+            PlayerSummary: player summary.
+        """
+
+        nbt_data = self.get_nbt_data()
+        coords = [round(x) for x in nbt_data["Pos"]]
+        return PlayerSummary(
+            inventory=len(nbt_data["Inventory"]),
+            ender_chest=len(nbt_data["EnderItems"]),
+            dimension=nbt_data["Dimension"].split(":")[-1],
+            x=coords[0],
+            y=coords[1],
+            z=coords[2],
+            health=float(nbt_data["Health"]),
+            xp_level=int(nbt_data["XpLevel"]),
+        )
+
     def get_inventory(self) -> nbtlib.tag.List[nbtlib.tag.Compound]:
         """Returns the current items in the player's inventory.
 
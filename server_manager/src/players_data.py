@@ -6,8 +6,9 @@ and stored below, in the variable `BASE64_DF`.
 
 from ast import literal_eval
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import Dict, List, NamedTuple, Tuple
 
 from .exceptions import SearchError
 
@@ -26,6 +27,29 @@ class PlayerInterface:
         self.online = literal_eval(str(self.online))
 
 
+class PlayersIndex(NamedTuple):
+    """Lookup tables of the players data."""
+
+    by_uuid: Dict[str, PlayerInterface]
+    by_username: Dict[Tuple[str, bool], PlayerInterface]
+
+
+@lru_cache(maxsize=1)
+def get_players_index() -> PlayersIndex:
+    """Reads the csv once and indexes the players by uuid and by (username, mode).
+
+    Returns:
+        PlayersIndex: players index.
+    """
+
+    by_uuid = {}
+    by_username = {}
+    for player in get_players_data():
+        by_uuid.setdefault(player.uuid, player)
+        by_username.setdefault((player.username, player.online), player)
+    return PlayersIndex(by_uuid, by_username)
+
+
 def get_uuid(username, mode) -> str:
     """Returns the uuid of a player given its username and online mode.
 
@@ -40,10 +64,9 @@ def get_uuid(username, mode) -> str:
         str: uuid of the player.
     """
 
-    players_data = get_players_data()
-    for player in players_data:
-        if player.username == username and player.online == mode:
-            return player.uuid
+    player = get_players_index().by_username.get((username, mode))
+    if player:
+        return player.uuid
 
     raise SearchError(
         "No player found with username=%s and online=%s" % (username, mode)
@@ -63,11 +86,9 @@ def get_username(uuid) -> str:
         str: username of the player.
     """
 
-    players_data = get_players_data()
-
-    for player in players_data:
-        if player.uuid == uuid:
-            return player.username
+    player = get_players_index().by_uuid.get(uuid)
+    if player:
+        return player.username
 
     raise SearchError("No player found with uuid=%s" % uuid)
 
@@ -85,11 +106,9 @@ def get_mode(uuid) -> bool:
         bool: online mode of the player.
     """
 
-    players_data = get_players_data()
-
-    for player in players_data:
-        if player.uuid == uuid:
-            return player.online
+    player = get_players_index().by_uuid.get(uuid)
+    if player:
+        return player.online
 
     raise SearchError("No player found with uuid=%s" % uuid)
 
@@ -1,6 +1,7 @@
 """Manages plugin SkinRestorer."""
 
 from pathlib import Path
+from typing import Tuple
 
 from .exceptions import InvalidPluginStateError
 from .paths import get_server_path
@@ -63,11 +64,14 @@ def get_plugin_mode() -> bool:
     raise InvalidPluginStateError("Plugin is neither online nor offile")
 
 
-def set_plugin_mode(new_mode: bool):
-    """Changes the plugin mode to `new_mode`.
+def get_plugin_rename(new_mode: bool) -> Tuple[Path, Path]:
+    """Returns the rename needed to change the plugin mode to `new_mode`.
 
     Args:
         new_mode (bool): new plugin mode to set.
+
+    Returns:
+        Tuple[Path, Path]: current and new path of the plugin.
     """
 
     if new_mode:
@@ -79,4 +83,15 @@ def set_plugin_mode(new_mode: bool):
         old = get_plugin_online_path()
         new = get_plugin_offline_path()
 
+    return old, new
+
+
+def set_plugin_mode(new_mode: bool):
+    """Changes the plugin mode to `new_mode`.
+
+    Args:
+        new_mode (bool): new plugin mode to set.
+    """
+
+    old, new = get_plugin_rename(new_mode)
     old.rename(new)
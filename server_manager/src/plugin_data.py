@@ -0,0 +1,244 @@
+"""Rewriting of the UUIDs stored in the plugins' data.
+
+Many plugins keep a file per player named after its uuid (Essentials,
+LuckPerms with YAML storage, etc). After a mode switch, these files must be
+renamed to the new uuids, or the players lose their homes, balances,
+permissions...
+
+Each plugin is handled by a `UUIDRewriter`, which declares the paths it owns
+and rewrites them given the mapping old uuid -> new uuid. Besides the built-in
+rewriters, other packages can provide rewriters through the
+`lia.uuid_rewriters` entry point group:
+
+    entry_points={"lia.uuid_rewriters": ["myplugin = mypackage:rewriter"]}
+
+The rewriters own different paths, so they are run concurrently.
+"""
+
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    from importlib.metadata import entry_points
+except ImportError:  # Python < 3.8
+    from importlib_metadata import entry_points
+
+from .exceptions import RewriterError
+from .paths import get_server_path
+
+ENTRY_POINT_GROUP = "lia.uuid_rewriters"
+TMP_SUFFIX = ".lia-tmp"
+DEFAULT_WORKERS = 4
+
+logger = logging.getLogger(__name__)
+
+
+class UUIDRewriter(ABC):
+    """Rewriter of the uuids stored by a plugin. Subclasses must implement
+    `get_paths` and `rewrite`.
+
+    Args:
+        name (str): name of the rewriter.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r})"
+
+    @abstractmethod
+    def get_paths(self, server_path: Path) -> List[Path]:
+        """Returns the paths owned by the rewriter. No other rewriter can
+        modify them.
+
+        Args:
+            server_path (Path): server path.
+
+        Returns:
+            List[Path]: owned paths (files or folders).
+        """
+
+    @abstractmethod
+    def rewrite(self, server_path: Path, mapping: Dict[str, str]) -> int:
+        """Replaces the old uuids by the new ones.
+
+        Args:
+            server_path (Path): server path.
+            mapping (Dict[str, str]): new uuid by old uuid.
+
+        Returns:
+            int: number of uuids replaced.
+        """
+
+
+class UserdataRewriter(UUIDRewriter):
+    """Rewriter of a folder with a file per player, named `<uuid><suffix>`.
+
+    The files are renamed in two phases (first to a temporary name, then to
+    the final name), so chains and swaps of uuids are handled. Files whose new
+    name is already taken are left untouched.
+
+    Args:
+        name (str): name of the rewriter.
+        folder (str): path of the folder, relative to the server path.
+        suffix (str, optional): suffix of the files. Defaults to ".yml".
+    """
+
+    def __init__(self, name: str, folder: str, suffix: str = ".yml"):
+        super().__init__(name)
+        self.folder = folder
+        self.suffix = suffix
+
+    def get_paths(self, server_path: Path) -> List[Path]:
+        return [server_path.joinpath(self.folder)]
+
+    def rewrite(self, server_path: Path, mapping: Dict[str, str]) -> int:
+        folder = server_path.joinpath(self.folder)
+        if not folder.is_dir():
+            return 0
+
+        sources = {
+            old: folder.joinpath(old + self.suffix)
+            for old in mapping
+            if folder.joinpath(old + self.suffix).is_file()
+        }
+
+        for old, src in sources.items():
+            dst = folder.joinpath(mapping[old] + self.suffix)
+            if dst.exists() and mapping[old] not in sources:
+                logger.warning(
+                    "[%s] Can't rename %s, %s already exists",
+                    self.name,
+                    src.name,
+                    dst.name,
+                )
+                continue
+            src.rename(dst.with_name(dst.name + TMP_SUFFIX))
+
+        # temporary files left by an interrupted rewrite are finished too
+        count = 0
+        for tmp_path in folder.glob("*" + self.suffix + TMP_SUFFIX):
+            dst = tmp_path.with_name(tmp_path.name[: -len(TMP_SUFFIX)])
+            if dst.exists():
+                logger.warning("[%s] Can't rename %s", self.name, tmp_path.name)
+                continue
+            tmp_path.rename(dst)
+            count += 1
+
+        logger.debug("[%s] Renamed %d files", self.name, count)
+        return count
+
+
+BUILTIN_REWRITERS = [
+    UserdataRewriter("essentials", "plugins/Essentials/userdata"),
+    UserdataRewriter("luckperms", "plugins/LuckPerms/yaml-storage/users"),
+]
+
+
+def get_entry_points(group: str) -> Iterable[Any]:
+    """Returns the entry points of a group. Before Python 3.10,
+    `entry_points()` returns a dict of entry points by group instead of a
+    selectable collection.
+
+    Args:
+        group (str): entry point group.
+
+    Returns:
+        Iterable[Any]: entry points.
+    """
+
+    all_entry_points = entry_points()
+    if hasattr(all_entry_points, "select"):
+        return all_entry_points.select(group=group)
+    return all_entry_points.get(group, [])
+
+
+def load_rewriters() -> List[UUIDRewriter]:
+    """Returns the built-in rewriters and the ones registered through the
+    `lia.uuid_rewriters` entry point group.
+
+    Raises:
+        RewriterError: if an entry point is not a `UUIDRewriter`, or if two
+            rewriters have the same name.
+
+    Returns:
+        List[UUIDRewriter]: rewriters.
+    """
+
+    rewriters = list(BUILTIN_REWRITERS)
+    for entry_point in get_entry_points(ENTRY_POINT_GROUP):
+        rewriter = entry_point.load()
+        if not isinstance(rewriter, UUIDRewriter):
+            raise RewriterError(
+                f"Entry point {entry_point.name!r} is not a UUIDRewriter"
+            )
+        rewriters.append(rewriter)
+
+    names = [rewriter.name for rewriter in rewriters]
+    duplicated = sorted({name for name in names if names.count(name) > 1})
+    if duplicated:
+        raise RewriterError("Duplicated rewriters: " + ", ".join(duplicated))
+    return rewriters
+
+
+def check_ownership(rewriters: List[UUIDRewriter], server_path: Path):
+    """Checks that no path is owned by two rewriters (nor a path and one of
+    its parents).
+
+    Args:
+        rewriters (List[UUIDRewriter]): rewriters.
+        server_path (Path): server path.
+
+    Raises:
+        RewriterError: if two rewriters own the same path.
+    """
+
+    owners: Dict[Path, UUIDRewriter] = {}
+    for rewriter in rewriters:
+        for path in rewriter.get_paths(server_path):
+            for owned, owner in owners.items():
+                if owner is not rewriter and (
+                    path == owned or owned in path.parents or path in owned.parents
+                ):
+                    raise RewriterError(
+                        f"{rewriter.name!r} and {owner.name!r} both own "
+                        f"{path.as_posix()!r}"
+                    )
+            owners[path] = rewriter
+
+
+def rewrite_plugin_data(
+    mapping: Dict[str, str],
+    server_path: Optional[Path] = None,
+    workers: int = DEFAULT_WORKERS,
+) -> int:
+    """Replaces the uuids stored by the plugins, running every rewriter on a
+    pool of threads.
+
+    Args:
+        mapping (Dict[str, str]): new uuid by old uuid.
+        server_path (Optional[Path], optional): server path. If None,
+            `get_server_path()` is used. Defaults to None.
+        workers (int, optional): number of threads. Defaults to DEFAULT_WORKERS.
+
+    Returns:
+        int: number of uuids replaced.
+    """
+
+    server_path = server_path or get_server_path()
+    rewriters = load_rewriters()
+    check_ownership(rewriters, server_path)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(rewriter.rewrite, server_path, mapping)
+            for rewriter in rewriters
+        ]
+        count = sum(future.result() for future in futures)
+
+    logger.info("Replaced %d uuids in the plugins data", count)
+    return count
@@ -0,0 +1,211 @@
+"""Spatial index of the players' positions."""
+
+from collections import defaultdict
+import logging
+from math import floor, sqrt
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .player import Coords, Player
+
+# Each region file (`r.<x>.<z>.mca`) stores 32x32 chunks of 16x16 blocks.
+REGION_SIZE = 512
+DEFAULT_CELL_SIZE = 64
+
+logger = logging.getLogger(__name__)
+Cell = Tuple[int, int]
+
+
+class PlayerPosition(NamedTuple):
+    """Position of a player, as returned by the index queries."""
+
+    player: Player
+    coords: Coords
+    distance: float = 0.0
+
+
+def normalize_dimension(dimension: str) -> str:
+    """Removes the namespace of a dimension id (`minecraft:overworld` -> `overworld`).
+
+    Args:
+        dimension (str): dimension id.
+
+    Returns:
+        str: dimension name.
+    """
+
+    return dimension.split(":")[-1].lower()
+
+
+def get_region_filename(coords: Coords) -> str:
+    """Returns the name of the region file which stores the chunk at `coords`.
+
+    Args:
+        coords (Coords): exact coordinates. They are floored, not rounded: x=-0.4
+            is in the block -1 and x=511.6 in the block 511.
+
+    Returns:
+        str: region filename.
+    """
+
+    region_x = floor(coords.x) // REGION_SIZE
+    region_z = floor(coords.z) // REGION_SIZE
+    return f"r.{region_x}.{region_z}.mca"
+
+
+class PositionIndex:
+    """Grid-bucketed index of the players' positions, one grid per dimension.
+
+    Players are stored in square cells of `cell_size` blocks (x and z axis), so
+    a radius query only visits the cells overlapping the sphere's bounding box
+    instead of every player.
+
+    Args:
+        cell_size (int, optional): side of each cell, in blocks. Defaults to 64.
+    """
+
+    def __init__(self, cell_size: int = DEFAULT_CELL_SIZE):
+        if cell_size <= 0:
+            raise ValueError(f"cell_size must be positive, not {cell_size!r}")
+
+        self.cell_size = cell_size
+        self._grids: Dict[str, Dict[Cell, List[PlayerPosition]]] = defaultdict(
+            lambda: defaultdict(list)
+        )
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def dimensions(self) -> List[str]:
+        """Returns the dimensions containing at least one player.
+
+        Returns:
+            List[str]: dimension names.
+        """
+
+        return sorted(self._grids)
+
+    def _get_cell(self, x: float, z: float) -> Cell:
+        return int(x // self.cell_size), int(z // self.cell_size)
+
+    def add(self, player: Player, coords: Coords):
+        """Adds a player to the index.
+
+        Args:
+            player (Player): player to add.
+            coords (Coords): position of the player.
+        """
+
+        dimension = normalize_dimension(coords.dim)
+        coords = coords._replace(dim=dimension)
+        cell = self._get_cell(coords.x, coords.z)
+        self._grids[dimension][cell].append(PlayerPosition(player, coords))
+        self._size += 1
+
+    @classmethod
+    def build(
+        cls, players: Iterable[Player], cell_size: int = DEFAULT_CELL_SIZE
+    ) -> "PositionIndex":
+        """Loads the position of every player and builds the index.
+
+        Args:
+            players (Iterable[Player]): players to index.
+            cell_size (int, optional): side of each cell, in blocks. Defaults to 64.
+
+        Returns:
+            PositionIndex: index containing every player.
+        """
+
+        index = cls(cell_size)
+        for player in players:
+            index.add(player, player.get_position(exact=True))
+
+        logger.debug(
+            "Indexed %d players in %d dimensions", len(index), len(index.dimensions)
+        )
+        return index
+
+    def _get_cells(
+        self, grid: Dict[Cell, List[PlayerPosition]], x: float, z: float, radius: float
+    ) -> Iterable[List[PlayerPosition]]:
+        min_cell = self._get_cell(x - radius, z - radius)
+        max_cell = self._get_cell(x + radius, z + radius)
+        ncells = (max_cell[0] - min_cell[0] + 1) * (max_cell[1] - min_cell[1] + 1)
+
+        if ncells >= len(grid):
+            # The radius covers more cells than the occupied ones
+            return grid.values()
+
+        return (
+            grid.get((cx, cz), [])
+            for cx in range(min_cell[0], max_cell[0] + 1)
+            for cz in range(min_cell[1], max_cell[1] + 1)
+        )
+
+    def near(
+        self, x: float, y: float, z: float, radius: float, dim: str = "overworld"
+    ) -> List[PlayerPosition]:
+        """Returns the players within `radius` blocks of a point.
+
+        Args:
+            x (float): x coordinate of the center.
+            y (float): y coordinate of the center.
+            z (float): z coordinate of the center.
+            radius (float): maximum distance (euclidean) to the center.
+            dim (str, optional): dimension to search. Defaults to "overworld".
+
+        Raises:
+            ValueError: if `radius` is negative.
+
+        Returns:
+            List[PlayerPosition]: players found, sorted by distance.
+        """
+
+        if radius < 0:
+            raise ValueError(f"radius can't be negative ({radius!r})")
+
+        grid = self._grids.get(normalize_dimension(dim))
+        if not grid:
+            return []
+
+        result = []
+        for cell in self._get_cells(grid, x, z, radius):
+            for position in cell:
+                coords = position.coords
+                distance = sqrt(
+                    (coords.x - x) ** 2 + (coords.y - y) ** 2 + (coords.z - z) ** 2
+                )
+                if distance <= radius:
+                    result.append(position._replace(distance=distance))
+
+        result.sort(key=lambda pos: (pos.distance, pos.player.username))
+        return result
+
+    def by_region(
+        self, dim: Optional[str] = None
+    ) -> Dict[Tuple[str, str], List[Player]]:
+        """Groups the players by the region file containing their position.
+
+        Args:
+            dim (Optional[str], optional): dimension to list. If None, all the
+                dimensions will be listed. Defaults to None.
+
+        Returns:
+            Dict[Tuple[str, str], List[Player]]: pairs (dimension, region filename)
+                mapped to the players inside that region.
+        """
+
+        if dim is None:
+            dimensions = self.dimensions
+        else:
+            dimensions = [normalize_dimension(dim)]
+
+        regions = defaultdict(list)
+        for dimension in dimensions:
+            for cell in self._grids.get(dimension, {}).values():
+                for position in cell:
+                    region = get_region_filename(position.coords)
+                    regions[(dimension, region)].append(position.player)
+
+        return {key: regions[key] for key in sorted(regions)}
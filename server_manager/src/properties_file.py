@@ -0,0 +1,262 @@
+"""Parser of `server.properties`.
+
+The file is parsed once into an ordered model of its logical lines, keeping
+the comments, blank lines and the position of every property. Reading a
+property is a dict lookup, and setting it only replaces its own line, so the
+rest of the file is written back untouched.
+
+The syntax is the one of java `.properties` files: the key and the value are
+separated by `=`, `:` or whitespace, `#` and `!` start comments, a line ending
+with an odd number of backslashes continues in the next one and the special
+characters are escaped with a backslash.
+"""
+
+from functools import lru_cache
+import re
+import string
+from typing import Dict, Iterator, List, Optional, Tuple
+
+COMMENT_CHARS = "#!"
+SEPARATORS = "=:"
+WHITESPACE = " \t\f"
+HEX_DIGITS = frozenset(string.hexdigits)
+
+UNESCAPES = {"t": "\t", "n": "\n", "r": "\r", "f": "\f"}
+ESCAPES = {"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\f": "\\f"}
+ESCAPES.update({char: "\\" + char for char in SEPARATORS + COMMENT_CHARS})
+CONTINUATION_PATTERN = re.compile(r"(?<!\\)(\\\\)*\\$")
+
+
+def unescape(text: str) -> str:
+    """Removes the escapes of a key or a value. A `\\u` not followed by four
+    hex digits is kept as a plain `u`, like any other unknown escape.
+
+    Args:
+        text (str): escaped text.
+
+    Returns:
+        str: unescaped text.
+    """
+
+    if "\\" not in text:
+        return text
+
+    chars = []
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if char != "\\" or index == len(text) - 1:
+            chars.append(char)
+            index += 1
+            continue
+
+        char = text[index + 1]
+        code = text[index + 2 : index + 6]
+        if char == "u" and len(code) == 4 and all(x in HEX_DIGITS for x in code):
+            chars.append(chr(int(code, 16)))
+            index += 6
+        else:
+            chars.append(UNESCAPES.get(char, char))
+            index += 2
+
+    return "".join(chars)
+
+
+def escape(text: str, is_key: bool = False) -> str:
+    """Escapes a key or a value.
+
+    Args:
+        text (str): text to escape.
+        is_key (bool, optional): if True, the spaces are escaped too. Defaults
+            to False.
+
+    Returns:
+        str: escaped text.
+    """
+
+    escaped = "".join(ESCAPES.get(char, char) for char in text)
+    if is_key:
+        return escaped.replace(" ", "\\ ")
+    if escaped.startswith(" "):
+        return "\\" + escaped
+    return escaped
+
+
+def split_line(line: str) -> Optional[Tuple[str, str]]:
+    """Splits a logical line into its key and its value.
+
+    Args:
+        line (str): logical line, with the continuations already joined.
+
+    Returns:
+        Optional[Tuple[str, str]]: unescaped key and value, or None if the
+            line is blank or a comment.
+    """
+
+    line = line.lstrip(WHITESPACE)
+    if not line or line[0] in COMMENT_CHARS:
+        return None
+
+    index = 0
+    while index < len(line) and line[index] not in SEPARATORS + WHITESPACE:
+        index += 2 if line[index] == "\\" else 1
+    key, rest = line[:index], line[index:].lstrip(WHITESPACE)
+    if rest and rest[0] in SEPARATORS:
+        rest = rest[1:].lstrip(WHITESPACE)
+
+    return unescape(key), unescape(rest)
+
+
+class PropertiesFile:
+    """Ordered model of a `.properties` file.
+
+    Args:
+        lines (List[str]): logical lines (a line and its continuations, joined
+            by newlines).
+        trailing_newline (bool, optional): if True, the file ends with a
+            newline. Defaults to True.
+    """
+
+    def __init__(self, lines: List[str], trailing_newline: bool = True):
+        self.lines = lines
+        self.trailing_newline = trailing_newline
+        self._values: Dict[str, str] = {}
+        self._positions: Dict[str, int] = {}
+
+        for position, line in enumerate(lines):
+            pair = split_line(self._join(line))
+            if pair is not None:
+                self._values[pair[0]] = pair[1]
+                self._positions[pair[0]] = position
+
+    @staticmethod
+    def _join(line: str) -> str:
+        # each physical line but the last ends with the continuation backslash
+        parts = line.split("\n")
+        joined = parts[0]
+        for part in parts[1:]:
+            joined = joined[:-1] + part.lstrip(WHITESPACE)
+        return joined
+
+    @classmethod
+    def parse(cls, text: str) -> "PropertiesFile":
+        """Parses the content of a `.properties` file.
+
+        Args:
+            text (str): content of the file.
+
+        Returns:
+            PropertiesFile: parsed file.
+        """
+
+        lines: List[str] = []
+        pending = None
+        for line in text.splitlines():
+            line = pending + "\n" + line if pending is not None else line
+            is_comment = line.lstrip(WHITESPACE).startswith(tuple(COMMENT_CHARS))
+            if not is_comment and CONTINUATION_PATTERN.search(line):
+                pending = line
+                continue
+            lines.append(line)
+            pending = None
+
+        if pending is not None:
+            lines.append(pending)
+        return cls(lines, text.endswith("\n") or not text)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._values
+
+    def __getitem__(self, key: str) -> str:
+        return self._values[key]
+
+    def __setitem__(self, key: str, value: str):
+        line = escape(key, is_key=True) + "=" + escape(value)
+        if key in self._positions:
+            self.lines[self._positions[key]] = line
+        else:
+            self._positions[key] = len(self.lines)
+            self.lines.append(line)
+        self._values[key] = value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Returns the value of a property.
+
+        Args:
+            key (str): property name.
+            default (Optional[str], optional): value returned if the property
+                is not in the file. Defaults to None.
+
+        Returns:
+            Optional[str]: value of the property.
+        """
+
+        return self._values.get(key, default)
+
+    def items(self) -> List[Tuple[str, str]]:
+        """Returns the properties, in the order of the file.
+
+        Returns:
+            List[Tuple[str, str]]: pairs (key, value).
+        """
+
+        return list(self._values.items())
+
+    def get_line_number(self, key: str) -> int:
+        """Returns the position of a property in the file.
+
+        Args:
+            key (str): property name.
+
+        Raises:
+            KeyError: if the property is not in the file.
+
+        Returns:
+            int: index of its logical line (comments and blank lines count).
+        """
+
+        return self._positions[key]
+
+    def copy(self) -> "PropertiesFile":
+        """Returns a copy of the file, which can be modified independently.
+
+        Returns:
+            PropertiesFile: copy.
+        """
+
+        copy = PropertiesFile([], self.trailing_newline)
+        copy.lines = list(self.lines)
+        copy._values = dict(self._values)  # pylint: disable=protected-access
+        copy._positions = dict(self._positions)  # pylint: disable=protected-access
+        return copy
+
+    def dump(self) -> str:
+        """Returns the content of the file.
+
+        Returns:
+            str: content of the file.
+        """
+
+        text = "\n".join(self.lines)
+        return text + "\n" if self.trailing_newline and self.lines else text
+
+
+@lru_cache(maxsize=1)
+def parse_properties(text: str) -> PropertiesFile:
+    """Parses the content of a `.properties` file, caching the last result.
+    The cached model must not be modified, use `PropertiesFile.copy` first.
+
+    Args:
+        text (str): content of the file.
+
+    Returns:
+        PropertiesFile: parsed file.
+    """
+
+    return PropertiesFile.parse(text)
@@ -1,20 +1,29 @@
-"""Manages the properties of the minecraft server (`server.properties`)."""
+"""Manages the properties of the minecraft server (`server.properties`).
+
+Every key of the schema (see `properties_schema`) can be read and written
+with its type. The members of `Properties` are the ones managed by lia, with
+their own defaults (`DEFAULTS`), used by `lia properties set-defaults`.
+"""
 
 from enum import Enum
 from functools import lru_cache
 import logging
+import os
 from pathlib import Path
-import re
 import sys
-from typing import Any, Union
+from typing import Any, Callable, Dict, List, Tuple, Union
 
 from colorama import Fore
 
 from .exceptions import PropertyError
 from .paths import get_server_path
-from .utils import Validators, bool2str, gen_hash, str2bool
+from .properties_file import PropertiesFile, parse_properties
+from .properties_schema import SCHEMA, compile_type
+from .stat_cache import CacheInfo, StatCache, get_stat_key
+from .utils import bool2str, gen_hash, str2bool
 
 PropertiesLike = Union["Properties", str]
+TMP_SUFFIX = ".lia-tmp"
 logger = logging.getLogger(__name__)
 
 
@@ -84,347 +93,453 @@ def get_server_properties_filepath(server_path: str = None) -> Path:
     return Path(real_server_path).joinpath("server.properties")
 
 
-class PropertiesManager:
-    """Manages settings of file `server.properties`."""
+class PropertySpec:
+    """Property of `server.properties`, compiled from a row of the schema.
 
-    getters_map = {}
-    setters_map = {}
-    general_map = {}
+    Args:
+        key (str): property name in `server.properties`.
+        type_ (str): "bool", "int", "str" or "enum".
+        default (str): raw vanilla default.
+        arg (Any, optional): choices of an "enum" or bounds of an "int".
+            Defaults to None.
+    """
 
-    @classmethod
-    @lru_cache(maxsize=10)
-    def get_property(cls, request: PropertiesLike) -> Any:
-        """Returs a property's current value.
+    def __init__(self, key: str, type_: str, default: str, arg: Any = None):
+        self.key = key
+        self.type = type_
+        self.str_to_value, self.value_to_str, self.validator = compile_type(
+            key, type_, arg
+        )
+        self.default = self.str_to_value(default)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.key!r}, {self.type!r})"
+
+    def get(self) -> Any:
+        """Returns the property's current value."""
+
+        return self.str_to_value(PropertiesManager.get_raw_value(self.key))
+
+    def validate(self, value: Any):
+        """Validates a value.
 
         Args:
-            request (PropertiesLike): property to find.
+            value (Any): input value.
 
-        Returns:
-            Any: the property's current value.
+        Raises:
+            ValueError: if the value is not valid.
         """
 
-        request = Properties.get(request)
-        return cls.getters_map[request]()
+        if not self.validator(value):
+            raise ValueError(f"Invalid value for {self.key}: {value!r}")
 
-    @classmethod
-    def adapt_value(cls, prop: PropertiesLike, value: Any) -> Any:
-        """Tryes to change `value` to the property valid type.
+    def to_raw(self, value: Any) -> Dict[str, str]:
+        """Returns the lines of `server.properties` that store a value.
 
         Args:
-            prop (PropertiesLike): property where the value belongs.
-            value (Any): value to adapt.
+            value (Any): property value.
 
         Returns:
-            Any: value adapted.
+            Dict[str, str]: raw value of each key of `server.properties`.
         """
 
-        prop = Properties.get(prop)
-        return cls.general_map[prop].str_to_value(value)
+        return {self.key: self.value_to_str(value)}
 
-    @classmethod
-    def set_property(cls, **kwargs: Any):
-        """Sets a property's value.
+    def check_same_property(self, new_property: Any):
+        """Checks if the property's current value is the same as `new_property`.
 
         Args:
-            kwargs (Any): just one property to set, and its new value.
+            new_property (Any): new property value.
 
         Raises:
-            ValueError: if no valid property names are passed in kwargs.
+            PropertyError: if the property's current value is the
+                same as `new_property`.
         """
 
-        for property_ in cls.setters_map:
-            if kwargs.get(property_.name) is not None:
-                value = kwargs.get(property_.name)
-                value = cls.adapt_value(property_, value)
-                cls.setters_map[property_](value)
-                break
-        else:
-            raise ValueError("Must set one argument")
+        current_property = self.get()
+        if new_property == current_property:
+            logger.critical(
+                "Tried to set %s to %r (same value)", self.key, new_property
+            )
+            raise PropertyError(f"{self.key} is already set to {current_property}")
 
-    @classmethod
-    @lru_cache(maxsize=10)
-    def get_properties_raw(cls) -> str:
-        """Returns the content of `server.properties` as utf-8 text.
+    def set(self, value: Any):
+        """Sets a new property value.
 
-        Returns:
-            str: contents of `server.properties`.
+        Args:
+            value (Any): property value to set.
+
+        Raises:
+            ValueError: if the value is not valid.
+            PropertyError: if the property is already set to `value`.
         """
 
-        server_properties_filepath = get_server_properties_filepath()
-        return server_properties_filepath.read_text(encoding="utf-8")
+        self.validate(value)
+        self.check_same_property(value)
+        PropertiesManager.set_raw_values(**self.to_raw(value))
 
-    @classmethod
-    def write_properties_raw(cls, raw_properties: str):
-        """Writes `raw_properties` into the server properties file (`server.properties`).
 
-        Args:
-            raw_properties (str): contents of `server.properties` to save.
-        """
+class WhitelistSpec(PropertySpec):
+    """Whitelist status, stored in 'white-list' and 'enforce-whitelist'."""
 
-        server_properties_filepath = get_server_properties_filepath()
-        server_properties_filepath.write_text(raw_properties, encoding="utf-8")
+    def __init__(self):
+        super().__init__("whitelist", "bool", "false")
 
-        # Reset cache
-        cls.get_properties_raw.cache_clear()
-        cls.get_property.cache_clear()
+    def get(self) -> bool:
+        """Returns the current whitelist status.
 
-    @classmethod
-    def register_property(cls, property_class: "BaseProperty", property_name: str):
-        """Registers a property (setter, getter and name).
+        Raises:
+            ValueError: if 'white-list' and 'enforce-whitelist' are unsynced.
 
-        Args:
-            property_class (BaseProperty): property class.
-            property_name (str): property name.
+        Returns:
+            bool: current whitelist status.
         """
 
-        prop = Properties(property_name)
-        cls.getters_map[prop] = property_class.get
-        cls.setters_map[prop] = property_class.set
-        cls.general_map[prop] = property_class
+        state1 = str2bool(PropertiesManager.get_raw_value("white-list"))
+        state2 = str2bool(PropertiesManager.get_raw_value("enforce-whitelist"))
+
+        if state1 != state2:
+            msg = "Properties white-list (%s) and enforce-whitelist (%s) can't be different"
+            logger.critical(msg, state1, state2)
+            raise ValueError(msg % (state1, state2))
+        return state1
+
+    def to_raw(self, value: bool) -> Dict[str, str]:
+        """Returns the lines of `server.properties` that store the whitelist
+        status.
 
+        Args:
+            value (bool): whitelist status.
 
-class MetaProperty(type):
-    """Metaclass to automatically register new properties."""
+        Returns:
+            Dict[str, str]: raw values of 'white-list' and 'enforce-whitelist'.
+        """
 
-    # pylint: disable=missing-param-doc,missing-type-doc
-    def __new__(cls, name, bases, attrs):
-        property_name = attrs.get("property_name")
-        if not property_name and "Base" not in name:
-            raise ValueError("Must set property name")
+        raw_value = bool2str(value)
+        return {"white-list": raw_value, "enforce-whitelist": raw_value}
 
-        new_cls = super().__new__(cls, name, bases, attrs)
-        if "Base" not in name:
-            PropertiesManager.register_property(new_cls, property_name)
 
-        return new_cls
+@lru_cache(maxsize=1)
+def get_schema() -> Dict[str, PropertySpec]:
+    """Returns the specs of all the known properties, compiling the schema
+    the first time.
 
+    Returns:
+        Dict[str, PropertySpec]: specs by property name.
+    """
 
-class BaseProperty(metaclass=MetaProperty):
-    """Base class for Properties."""
+    schema = {row[0]: PropertySpec(*row) for row in SCHEMA}
+    schema["whitelist"] = WhitelistSpec()
+    return schema
 
-    property_name = None
-    str_to_value = str2bool
-    value_to_str = bool2str
-    validator = Validators.bool
-    default = None
 
-    @classmethod
-    def get_pattern(cls):
-        """Returns the regex pattern to parse the `server.properties` file."""
+# defaults of `lia properties set-defaults` (callables are evaluated lazily)
+DEFAULTS: Dict[Properties, Union[Any, Callable[[], Any]]] = {
+    Properties.allow_nether: True,
+    Properties.broadcast_rcon_to_ops: True,
+    Properties.difficulty: "hard",
+    Properties.enable_rcon: True,
+    Properties.enable_status: True,
+    Properties.max_players: 3,
+    Properties.online_mode: True,
+    Properties.rcon_password: gen_hash,
+    Properties.rcon_port: 25575,
+    Properties.whitelist: True,
+}
 
-        return re.compile(rf"({cls.property_name}=)(\w*)", re.IGNORECASE)
 
-    @classmethod
-    def get(cls):
-        """Returns the property's current value."""
+class PropertiesManager:
+    """Manages settings of file `server.properties`."""
 
-        file_data = PropertiesManager.get_properties_raw()
-        return cls.str_to_value(cls.get_pattern().search(file_data).group(2))
+    general_map = {prop: get_schema()[prop.value] for prop in Properties}
+    raw_cache = StatCache("server.properties")
+    values_cache = StatCache("properties")
 
     @classmethod
-    def validate(cls, value: Any):
-        """Validates a value.
+    def get_spec(cls, request: PropertiesLike) -> PropertySpec:
+        """Returns the spec of a property. Apart from the managed properties
+        (`Properties`), any key of the schema is valid (its dashes can be
+        written as underscores), and any other key of `server.properties` is
+        handled as a string.
 
         Args:
-            value (Any): input value.
+            request (PropertiesLike): property, by name or by key.
 
         Raises:
-            ValueError: if the value is not valid.
+            ValueError: if the property is unknown.
+
+        Returns:
+            PropertySpec: spec of the property.
         """
 
-        if cls.validator(value) is False:
-            msg = f"Validator 'Validators.{cls.validator.__name__}' rejected value {value!r}"
-            raise ValueError(msg)
+        try:
+            return cls.general_map[Properties.get(request)]
+        except (KeyError, ValueError):
+            pass
+
+        schema = get_schema()
+        for key in (request, request.replace("_", "-")):
+            if key in schema:
+                return schema[key]
+        if request in cls.get_properties_file():
+            return PropertySpec(request, "str", "")
+        raise ValueError(f"Unknown property: {request!r}")
 
     @classmethod
-    def set(cls, property_value: Any):
-        """Sets a new property value.
+    def get_property(cls, request: PropertiesLike) -> Any:
+        """Returs a property's current value. The value is cached until
+        `server.properties` changes.
 
         Args:
-            property_value (Any): property value to set.
-        """
+            request (PropertiesLike): property to find.
 
-        cls.validate(property_value)
-        cls.check_same_property(property_value)
+        Returns:
+            Any: the property's current value.
+        """
 
-        file_data = PropertiesManager.get_properties_raw()
-        sub = r"\g<1>" + cls.value_to_str(property_value)
-        file_data = cls.get_pattern().sub(sub, file_data)
-        PropertiesManager.write_properties_raw(file_data)
+        spec = cls.get_spec(request)
+        return cls.values_cache.get(cls.get_properties_raw(), spec.key, spec.get)
 
     @classmethod
-    def check_same_property(cls, new_property: Any):
-        """Checks if the property's current value is the same as `new_property`.
+    def adapt_value(cls, prop: PropertiesLike, value: Any) -> Any:
+        """Tryes to change `value` to the property valid type.
 
         Args:
-            new_property (Any): new property value.
+            prop (PropertiesLike): property where the value belongs.
+            value (Any): value to adapt.
 
-        Raises:
-            PropertyError: if the property's current value is the
-                same as `new_property`.
+        Returns:
+            Any: value adapted.
         """
 
-        current_property = cls.get()
-        if new_property == current_property:
-            logger.critical(
-                "Tried to set %s to %r (same value)", cls.property_name, new_property
-            )
-            raise PropertyError(
-                f"{cls.property_name} is already set to {current_property}"
-            )
+        return cls.get_spec(prop).str_to_value(value)
 
     @classmethod
-    def set_default(cls):
-        """Sets the default value for the property."""
-
-        cls.set(cls.default)
-
-
-class AllowNetherProperty(BaseProperty):
-    """Manages property 'allow-nether'."""
+    def set_property(cls, **kwargs: Any):
+        """Sets a property's value.
 
-    property_name = "allow-nether"
-    default = True
+        Args:
+            kwargs (Any): just one property to set, and its new value.
 
+        Raises:
+            ValueError: if not exactly one property is passed in kwargs, or
+                the property is unknown.
+        """
 
-class BroadcastRconToOpsProperty(BaseProperty):
-    """Manages property 'broadcast-rcon-to-ops'."""
+        if len(kwargs) != 1 or None in kwargs.values():
+            raise ValueError("Must set one argument")
 
-    property_name = "broadcast-rcon-to-ops"
-    default = True
+        request, value = next(iter(kwargs.items()))
+        spec = cls.get_spec(request)
+        spec.set(spec.str_to_value(value))
 
+    @classmethod
+    def transaction(cls) -> "PropertiesTransaction":
+        """Returns a new transaction, to set several properties writing
+        `server.properties` only once.
 
-class DifficultyProperty(BaseProperty):
-    """Manages property 'difficulty'."""
+        Returns:
+            PropertiesTransaction: new transaction.
+        """
 
-    property_name = "difficulty"
-    value_to_str = str
-    validator = Validators.difficulty
-    default = "hard"
+        return PropertiesTransaction()
 
     @classmethod
-    def str_to_value(cls, string: str) -> str:
-        """Returns the string representation of a difficulty.
+    def set_properties(cls, values: Dict[PropertiesLike, Any]) -> List[str]:
+        """Sets the value of several properties at once. All the values are
+        validated before writing anything, and `server.properties` is written
+        only once.
 
         Args:
-            string (str): input difficulty.
+            values (Dict[PropertiesLike, Any]): new value of each property.
 
         Raises:
-            ValueError: if `string` is not a valid difficulty.
+            ValueError: if a value is not valid (nothing is written).
 
         Returns:
-            str: string representation of a difficulty.
+            List[str]: names of the properties changed (the ones already set
+                to their new value are skipped).
         """
 
-        if not cls.validator(string):
-            raise ValueError(f"Invalid difficulty: {string!r}")
-        return string
+        with cls.transaction() as transaction:
+            for prop, value in values.items():
+                transaction.set(prop, value)
+        return transaction.changed
 
+    @classmethod
+    def get_properties_raw(cls) -> str:
+        """Returns the content of `server.properties` as utf-8 text. The
+        content is cached and revalidated with a `stat` of the file, so it's
+        read again only if the file changed.
 
-class EnableRconProperty(BaseProperty):
-    """Manges property 'enable-rcon'."""
+        Returns:
+            str: contents of `server.properties`.
+        """
 
-    property_name = "enable-rcon"
-    default = True
+        server_properties_filepath = get_server_properties_filepath()
+        return cls.raw_cache.get(
+            get_stat_key(server_properties_filepath),
+            server_properties_filepath,
+            lambda: server_properties_filepath.read_text(encoding="utf-8"),
+        )
 
+    @classmethod
+    def cache_info(cls) -> Dict[str, CacheInfo]:
+        """Returns the metrics of the caches of `server.properties`.
 
-class EnableStatusProperty(BaseProperty):
-    """"Manages property 'enable-status'."""
+        Returns:
+            Dict[str, CacheInfo]: metrics of the cache of the file content
+                and of the cache of the property values.
+        """
 
-    property_name = "enable-status"
-    default = True
+        return {
+            cls.raw_cache.name: cls.raw_cache.cache_info(),
+            cls.values_cache.name: cls.values_cache.cache_info(),
+        }
 
+    @classmethod
+    def get_properties_file(cls) -> PropertiesFile:
+        """Returns `server.properties` parsed. The model is cached until the
+        file is written, so it must not be modified (see `PropertiesFile.copy`).
 
-class MaxPlayersProperty(BaseProperty):
-    """Manages property 'max-players'."""
+        Returns:
+            PropertiesFile: parsed `server.properties`.
+        """
 
-    property_name = "max-players"
-    value_to_str = str
-    str_to_value = int
-    validator = Validators.int
-    default = 3
+        return parse_properties(cls.get_properties_raw())
 
+    @classmethod
+    def get_raw_value(cls, key: str) -> str:
+        """Returns the value of a property, as written in `server.properties`.
 
-class OnlineModeProperty(BaseProperty):
-    """Manages property 'online-mode'."""
+        Args:
+            key (str): property name.
 
-    property_name = "online-mode"
-    default = True
+        Raises:
+            PropertyError: if the property is not in `server.properties`.
 
+        Returns:
+            str: value of the property.
+        """
 
-class RconPasswordProperty(BaseProperty):
-    """Manages property 'rcon.password'."""
+        value = cls.get_properties_file().get(key)
+        if value is None:
+            raise PropertyError(f"Property {key!r} not found in server.properties")
+        return value
 
-    property_name = "rcon.password"
-    value_to_str = str
-    str_to_value = str
-    validator = Validators.str
-    default = gen_hash()
+    @classmethod
+    def set_raw_values(cls, **values: str):
+        """Sets the value of some properties, modifying only their lines of
+        `server.properties`.
 
+        Args:
+            values (str): new value of each property, by property name.
+        """
 
-class RconPortProperty(BaseProperty):
-    """Manages property 'rcon.port'."""
+        properties = cls.get_properties_file().copy()
+        for key, value in values.items():
+            properties[key] = value
+        cls.write_properties_raw(properties.dump())
 
-    property_name = "rcon.port"
-    value_to_str = str
-    str_to_value = int
-    validator = Validators.int
-    default = 25575
+    @classmethod
+    def write_properties_raw(cls, raw_properties: str):
+        """Writes `raw_properties` into the server properties file (`server.properties`).
+        The file is replaced atomically, so it's never left half written.
 
+        Args:
+            raw_properties (str): contents of `server.properties` to save.
+        """
 
-class WhitelistProperty(BaseProperty):
-    """Manages properties 'white-list' and 'enforce-whitelist'."""
+        server_properties_filepath = get_server_properties_filepath()
+        tmp_path = server_properties_filepath.with_name(
+            server_properties_filepath.name + TMP_SUFFIX
+        )
+        with tmp_path.open("wt", encoding="utf-8", newline="") as file_handler:
+            file_handler.write(raw_properties)
+            file_handler.flush()
+            os.fsync(file_handler.fileno())
+        os.replace(tmp_path, server_properties_filepath)
+
+        # mtime resolution may be coarse, don't rely on the stat key
+        cls.raw_cache.invalidate()
+        cls.values_cache.invalidate()
+
+
+class PropertiesTransaction:
+    """Batch of property changes, written to `server.properties` at once.
+
+    Each value is adapted and validated when it's set, and all of them are
+    written on commit, replacing the file once. Used as a context manager, it
+    commits on exit unless an exception was raised inside the block, in which
+    case nothing is written.
+
+    Usage:
+        >>> with PropertiesManager.transaction() as transaction:
+        ...     transaction.set("max-players", 10)
+        ...     transaction["difficulty"] = "hard"
+    """
 
-    property_name = "whitelist"
-    pattern_1 = re.compile(r"(white-list=)(\w+)", re.IGNORECASE)
-    pattern_2 = re.compile(r"(enforce-whitelist=)(\w+)", re.IGNORECASE)
-    default = True
+    def __init__(self):
+        self.values: Dict[str, Tuple[PropertySpec, Any]] = {}
+        self.changed: List[str] = []
 
-    @classmethod
-    def get(cls) -> bool:
-        """Returns the current whitelist status.
+    def __enter__(self):
+        return self
 
-        Raises:
-            ValueError: if 'white-list' and 'enforce-whitelist' are unsynced.
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
 
-        Returns:
-            bool: current whitelist status.
-        """
+    def __setitem__(self, prop: PropertiesLike, value: Any):
+        self.set(prop, value)
 
-        file_data = PropertiesManager.get_properties_raw()
-        state1 = str2bool(cls.pattern_1.search(file_data).group(2))
-        state2 = str2bool(cls.pattern_2.search(file_data).group(2))
+    def set(self, prop: PropertiesLike, value: Any):
+        """Adds a property change to the transaction.
 
-        if state1 != state2:
-            msg = "Properties white-list (%s) and enforce-whitelist (%s) can't be different"
-            logger.critical(msg, state1, state2)
-            raise ValueError(msg % (state1, state2))
-        return state1
+        Args:
+            prop (PropertiesLike): property to set.
+            value (Any): new value.
 
-    @classmethod
-    def set(cls, whl_state: bool):  # pylint: disable=arguments-differ
-        """Sets a new whitelist status.
+        Raises:
+            ValueError: if the value is not valid.
+        """
 
-        Args:
-            whl_state (bool): new whitelist status.
+        spec = PropertiesManager.get_spec(prop)
+        value = spec.str_to_value(value)
+        spec.validate(value)
+        self.values[spec.key] = (spec, value)
+
+    def commit(self) -> List[str]:
+        """Writes the changes. The properties already set to their new value
+        are skipped, and the file is not written if nothing changed.
+
+        Returns:
+            List[str]: names of the properties changed.
         """
 
-        cls.validate(whl_state)
-        cls.check_same_property(whl_state)
+        raw_values = {}
+        self.changed = []
+        for key, (spec, value) in self.values.items():
+            if spec.get() != value:
+                raw_values.update(spec.to_raw(value))
+                self.changed.append(key)
 
-        file_data = PropertiesManager.get_properties_raw()
-        file_data = cls.pattern_1.sub(r"\1" + bool2str(whl_state), file_data)
-        file_data = cls.pattern_2.sub(r"\1" + bool2str(whl_state), file_data)
-        PropertiesManager.write_properties_raw(file_data)
+        if raw_values:
+            PropertiesManager.set_raw_values(**raw_values)
+        self.values = {}
+        return self.changed
 
 
 def set_default_properties():
-    """Sets the default value for all properties."""
-
-    for propname, prop in PropertiesManager.general_map.items():
-        try:
-            prop.set_default()
-            msg = f"{Fore.CYAN}Fixed property {propname}"
-            print(msg)
-        except PropertyError:
-            print(f"{Fore.LIGHTGREEN_EX}{propname} OK")
+    """Sets the default value for all properties, writing `server.properties`
+    only once."""
+
+    with PropertiesManager.transaction() as transaction:
+        for propname, spec in PropertiesManager.general_map.items():
+            default = DEFAULTS[propname]
+            default = default() if callable(default) else default
+            if spec.get() == default:
+                print(f"{Fore.LIGHTGREEN_EX}{propname} OK")
+            else:
+                transaction.set(propname, default)
+                print(f"{Fore.CYAN}Fixed property {propname}")
@@ -0,0 +1,173 @@
+"""Schema of `server.properties`: type and vanilla default of every key.
+
+Each row of `SCHEMA` is `(key, type, default)` or `(key, type, default, arg)`,
+where `arg` is the list of values of an "enum" or the inclusive `(min, max)`
+bounds of an "int" (None means unbounded). The parser, serializer and
+validator of each row are compiled once, by `compile_type`.
+
+The keys removed from recent versions and the ones added by Bukkit, Spigot or
+Paper are kept, so the files of older servers are fully described too.
+"""
+
+from functools import lru_cache, partial
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+from .utils import Validators, bool2str, str2bool
+
+Parser = Callable[[Any], Any]
+Serializer = Callable[[Any], str]
+Validator = Callable[[Any], bool]
+
+DIFFICULTIES = ("peaceful", "easy", "normal", "hard")
+GAMEMODES = ("survival", "creative", "adventure", "spectator")
+COMPRESSIONS = ("deflate", "lz4", "none")
+PORT = (1, 65535)
+POSITIVE = (0, None)
+
+SCHEMA = (
+    ("accepts-transfers", "bool", "false"),
+    ("allow-flight", "bool", "false"),
+    ("allow-nether", "bool", "true"),
+    ("broadcast-console-to-ops", "bool", "true"),
+    ("broadcast-rcon-to-ops", "bool", "true"),
+    ("bug-report-link", "str", ""),
+    ("debug", "bool", "false"),  # bukkit
+    ("difficulty", "enum", "easy", DIFFICULTIES),
+    ("enable-command-block", "bool", "false"),
+    ("enable-jmx-monitoring", "bool", "false"),
+    ("enable-query", "bool", "false"),
+    ("enable-rcon", "bool", "false"),
+    ("enable-status", "bool", "true"),
+    ("enforce-secure-profile", "bool", "true"),
+    ("enforce-whitelist", "bool", "false"),
+    ("entity-broadcast-range-percentage", "int", "100", (10, 1000)),
+    ("force-gamemode", "bool", "false"),
+    ("function-permission-level", "int", "2", (1, 4)),
+    ("gamemode", "enum", "survival", GAMEMODES),
+    ("generate-structures", "bool", "true"),
+    ("generator-settings", "str", "{}"),
+    ("hardcore", "bool", "false"),
+    ("hide-online-players", "bool", "false"),
+    ("initial-disabled-packs", "str", ""),
+    ("initial-enabled-packs", "str", "vanilla"),
+    ("level-name", "str", "world"),
+    ("level-seed", "str", ""),
+    ("level-type", "str", "minecraft:normal"),
+    ("log-ips", "bool", "true"),
+    ("max-build-height", "int", "256", POSITIVE),  # removed in 1.17
+    ("max-chained-neighbor-updates", "int", "1000000"),
+    ("max-players", "int", "20", POSITIVE),
+    ("max-tick-time", "int", "60000", (-1, None)),
+    ("max-world-size", "int", "29999984", (1, 29999984)),
+    ("motd", "str", "A Minecraft Server"),
+    ("network-compression-threshold", "int", "256", (-1, None)),
+    ("online-mode", "bool", "true"),
+    ("op-permission-level", "int", "4", (0, 4)),
+    ("pause-when-empty-seconds", "int", "60"),
+    ("player-idle-timeout", "int", "0", POSITIVE),
+    ("prevent-proxy-connections", "bool", "false"),
+    ("pvp", "bool", "true"),
+    ("query.port", "int", "25565", PORT),
+    ("rate-limit", "int", "0", POSITIVE),
+    ("rcon.password", "str", ""),
+    ("rcon.port", "int", "25575", PORT),
+    ("region-file-compression", "enum", "deflate", COMPRESSIONS),
+    ("require-resource-pack", "bool", "false"),
+    ("resource-pack", "str", ""),
+    ("resource-pack-id", "str", ""),
+    ("resource-pack-prompt", "str", ""),
+    ("resource-pack-sha1", "str", ""),
+    ("server-ip", "str", ""),
+    ("server-port", "int", "25565", PORT),
+    ("simulation-distance", "int", "10", (3, 32)),
+    ("snooper-enabled", "bool", "true"),  # removed in 1.18
+    ("spawn-animals", "bool", "true"),
+    ("spawn-monsters", "bool", "true"),
+    ("spawn-npcs", "bool", "true"),
+    ("spawn-protection", "int", "16", POSITIVE),
+    ("sync-chunk-writes", "bool", "true"),
+    ("text-filtering-config", "str", ""),
+    ("text-filtering-version", "int", "0", (0, 1)),
+    ("use-native-transport", "bool", "true"),
+    ("view-distance", "int", "10", (2, 32)),
+    ("white-list", "bool", "false"),
+)
+
+
+def compile_enum(key: str, choices: Sequence[str]) -> Tuple[Parser, Validator]:
+    """Returns the parser and the validator of an "enum" property.
+
+    Args:
+        key (str): property name, used in the error messages.
+        choices (Sequence[str]): valid values.
+
+    Returns:
+        Tuple[Parser, Validator]: parser and validator.
+    """
+
+    def validator(value: Any) -> bool:
+        return value in choices
+
+    def parser(string: Any) -> str:
+        value = str(string).lower()
+        if not validator(value):
+            raise ValueError(f"Invalid {key}: {string!r}")
+        return value
+
+    return parser, validator
+
+
+def compile_int(bounds: Optional[Tuple[Optional[int], Optional[int]]]) -> Validator:
+    """Returns the validator of an "int" property.
+
+    Args:
+        bounds (Optional[Tuple[Optional[int], Optional[int]]]): inclusive
+            bounds of the value. If None, any int is valid.
+
+    Returns:
+        Validator: validator.
+    """
+
+    minimum, maximum = bounds or (None, None)
+
+    def validator(value: Any) -> bool:
+        if not Validators.int(value):
+            return False
+        if minimum is not None and value < minimum:
+            return False
+        return maximum is None or value <= maximum
+
+    return validator
+
+
+@lru_cache(maxsize=None)
+def compile_type(
+    key: str, type_: str, arg: Any = None
+) -> Tuple[Parser, Serializer, Validator]:
+    """Returns the functions handling the values of a property.
+
+    Args:
+        key (str): property name.
+        type_ (str): "bool", "int", "str" or "enum".
+        arg (Any, optional): choices of an "enum" or bounds of an "int".
+            Defaults to None.
+
+    Raises:
+        ValueError: if the type is not valid.
+
+    Returns:
+        Tuple[Parser, Serializer, Validator]: parser of the raw value (it also
+            adapts values of other types), serializer and validator.
+    """
+
+    if type_ == "bool":
+        # a library call must get a ValueError, not a click exception
+        return partial(str2bool, click_enabled=False), bool2str, Validators.bool
+    if type_ == "int":
+        return int, str, compile_int(arg)
+    if type_ == "str":
+        return str, str, Validators.str
+    if type_ == "enum":
+        parser, validator = compile_enum(key, arg)
+        return parser, str, validator
+    raise ValueError(f"Invalid property type for {key}: {type_!r}")
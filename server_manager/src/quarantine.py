@@ -0,0 +1,258 @@
+"""Reversible removal of players.
+
+Instead of deleting the files of the removed players, they are moved into a
+timestamped folder inside the quarantine folder (next to the server folder, so
+on the same filesystem and every move is a single rename). Each quarantine
+keeps a `manifest.json` with the players and the original location of their
+files, so it can be restored with `lia players restore-quarantine <id>`.
+"""
+
+from datetime import datetime, timedelta
+import errno
+from functools import lru_cache
+import json
+import logging
+import os
+from pathlib import Path
+import shutil
+from typing import List, Optional
+
+from .exceptions import QuarantineError
+from .paths import get_server_path
+from .player import Player
+from .utils import get_timestamp_id_key
+
+MANIFEST_FILENAME = "manifest.json"
+DEFAULT_KEEP = 10
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=10)
+def get_quarantine_folder() -> Path:
+    """Returns the folder where the quarantines are stored.
+
+    Returns:
+        Path: quarantine folder.
+    """
+
+    quarantine_folder = get_server_path().with_name("quarantine")
+    os.makedirs(quarantine_folder, exist_ok=True)
+    return quarantine_folder
+
+
+def move_file(src: Path, dst: Path):
+    """Moves a file, creating the parent folders of `dst`. It's a rename unless
+    `src` and `dst` are in different filesystems.
+
+    Args:
+        src (Path): file to move.
+        dst (Path): destination path.
+
+    Raises:
+        OSError: if the file can't be moved.
+    """
+
+    os.makedirs(dst.parent, exist_ok=True)
+    try:
+        os.replace(src, dst)
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+        shutil.move(src.as_posix(), dst.as_posix())
+
+
+class Quarantine:
+    """Batch of players moved out of the server.
+
+    Use `Quarantine.create()` to start a new batch, `add` to move the files of
+    each player and `close` (or a `with` block) to write the manifest.
+
+    Args:
+        quarantine_id (str): identifier of the quarantine (folder name).
+    """
+
+    def __init__(self, quarantine_id: str):
+        self.id = quarantine_id
+        self.path = get_quarantine_folder().joinpath(quarantine_id)
+        self.manifest_path = self.path.joinpath(MANIFEST_FILENAME)
+        self.players: List[dict] = []
+        self.created = datetime.now().isoformat(timespec="seconds")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return f"Quarantine({self.id!r})"
+
+    @classmethod
+    def create(cls) -> "Quarantine":
+        """Creates an empty quarantine, identified by the current timestamp.
+
+        Returns:
+            Quarantine: new quarantine.
+        """
+
+        timestamp = datetime.now().strftime("%Y.%m.%d.%H.%M.%S")
+        quarantine_id, suffix = timestamp, 1
+        while True:
+            try:
+                os.makedirs(get_quarantine_folder().joinpath(quarantine_id))
+                return cls(quarantine_id)
+            except FileExistsError:
+                quarantine_id = f"{timestamp}-{suffix}"
+                suffix += 1
+
+    @classmethod
+    def load(cls, quarantine_id: str) -> "Quarantine":
+        """Loads an existing quarantine.
+
+        Args:
+            quarantine_id (str): identifier of the quarantine.
+
+        Raises:
+            QuarantineError: if the identifier is not a folder name, or the
+                quarantine doesn't exist.
+
+        Returns:
+            Quarantine: quarantine.
+        """
+
+        if not quarantine_id or any(x in quarantine_id for x in ("/", "\\", "..")):
+            raise QuarantineError(f"Invalid quarantine id: {quarantine_id!r}")
+
+        quarantine = cls(quarantine_id)
+        try:
+            manifest = json.loads(quarantine.manifest_path.read_text("utf-8"))
+        except FileNotFoundError as exc:
+            raise QuarantineError(f"Quarantine {quarantine_id!r} not found") from exc
+
+        quarantine.players = manifest["players"]
+        quarantine.created = manifest["created"]
+        return quarantine
+
+    def add(self, player: Player):
+        """Moves the files of a player into the quarantine.
+
+        Args:
+            player (Player): player to quarantine.
+        """
+
+        server_path = get_server_path()
+        files = (player.player_data_file, player.stats_file, player.advancements_file)
+        moved = []
+
+        try:
+            for file in files:
+                relpath = file.path.relative_to(server_path).as_posix()
+                move_file(file.path, self.path.joinpath(relpath))
+                moved.append(relpath)
+        finally:
+            if moved:
+                self.players.append(
+                    {
+                        "uuid": player.uuid,
+                        "username": player.username,
+                        "online": player.online,
+                        "files": moved,
+                    }
+                )
+
+    def close(self):
+        """Writes the manifest. Empty quarantines are deleted instead."""
+
+        if not self.players:
+            shutil.rmtree(self.path, ignore_errors=True)
+            return
+
+        manifest = {"id": self.id, "created": self.created, "players": self.players}
+        tmp_path = self.manifest_path.with_name(MANIFEST_FILENAME + ".tmp")
+        tmp_path.write_text(json.dumps(manifest, indent=2), "utf-8")
+        os.replace(tmp_path, self.manifest_path)
+
+        logger.info("Moved %d players to quarantine %r", len(self.players), self.id)
+        print(f"Moved {len(self.players)} players to quarantine {self.id!r}")
+
+    def restore(self) -> int:
+        """Moves the files back to the server and deletes the quarantine.
+
+        Raises:
+            QuarantineError: if any of the files already exists in the server.
+                In that case, no file is moved.
+
+        Returns:
+            int: number of players restored.
+        """
+
+        server_path = get_server_path()
+        relpaths = [relpath for player in self.players for relpath in player["files"]]
+
+        conflicts = [x for x in relpaths if server_path.joinpath(x).exists()]
+        if conflicts:
+            raise QuarantineError(
+                f"Can't restore quarantine {self.id!r}, files already exist: "
+                + ", ".join(conflicts)
+            )
+
+        for relpath in relpaths:
+            move_file(self.path.joinpath(relpath), server_path.joinpath(relpath))
+
+        shutil.rmtree(self.path)
+        logger.info(
+            "Restored %d players from quarantine %r", len(self.players), self.id
+        )
+        return len(self.players)
+
+
+def list_quarantines() -> List[Quarantine]:
+    """Returns the existing quarantines, from oldest to newest.
+
+    Returns:
+        List[Quarantine]: quarantines.
+    """
+
+    quarantines = []
+    paths = get_quarantine_folder().iterdir()
+    for path in sorted(paths, key=lambda x: get_timestamp_id_key(x.name)):
+        if path.joinpath(MANIFEST_FILENAME).is_file():
+            quarantines.append(Quarantine.load(path.name))
+    return quarantines
+
+
+def prune_quarantines(
+    keep: Optional[int] = DEFAULT_KEEP, max_age: Optional[timedelta] = None
+) -> List[str]:
+    """Deletes the old quarantines permanently.
+
+    Args:
+        keep (Optional[int], optional): number of newest quarantines to keep.
+            If None, there is no limit. Defaults to DEFAULT_KEEP.
+        max_age (Optional[timedelta], optional): quarantines older than this
+            are deleted. If None, there is no limit. Defaults to None.
+
+    Returns:
+        List[str]: identifiers of the deleted quarantines.
+    """
+
+    quarantines = list_quarantines()
+    expired = set()
+
+    if keep is not None:
+        expired.update(q.id for q in quarantines[: max(len(quarantines) - keep, 0)])
+
+    if max_age is not None:
+        limit = datetime.now() - max_age
+        expired.update(
+            q.id for q in quarantines if datetime.fromisoformat(q.created) < limit
+        )
+
+    pruned = []
+    for quarantine in quarantines:
+        if quarantine.id in expired:
+            shutil.rmtree(quarantine.path)
+            pruned.append(quarantine.id)
+            logger.info("Pruned quarantine %r", quarantine.id)
+    return pruned
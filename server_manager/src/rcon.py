@@ -0,0 +1,221 @@
+"""Client of the RCON protocol of the minecraft server.
+
+It's used to switch the online mode with the server running (`lia
+online-mode set --live`): the players are scanned and checked and the plan is
+computed while the server is up, and the server is only stopped to apply the
+plan.
+
+Each RCON packet is its length, the request id, the type (all of them little
+endian int32) and the body, terminated by two null bytes. The server needs
+`enable-rcon`, `rcon.port` and `rcon.password` in `server.properties`.
+"""
+
+import logging
+import re
+import socket
+import struct
+import time
+from typing import List, Optional
+
+from .exceptions import RconError
+from .properties_manager import PropertiesManager
+
+DEFAULT_HOST = "localhost"
+DEFAULT_TIMEOUT = 5
+DEFAULT_STOP_TIMEOUT = 120
+KICK_REASON = "Server restarting, join again in a minute"
+
+AUTH, AUTH_RESPONSE, COMMAND, RESPONSE = 3, 2, 2, 0
+AUTH_FAILED_ID = -1
+PLAYERS_PATTERN = re.compile(r"players online:(.*)$", re.IGNORECASE | re.DOTALL)
+
+logger = logging.getLogger(__name__)
+
+
+class RconClient:
+    """RCON client. Use it as a context manager to connect and log in.
+
+    Args:
+        port (int): RCON port.
+        password (str): RCON password.
+        host (str, optional): server host. Defaults to "localhost".
+        timeout (float, optional): socket timeout, in seconds. Defaults to 5.
+    """
+
+    def __init__(
+        self,
+        port: int,
+        password: str,
+        host: str = DEFAULT_HOST,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self._socket: Optional[socket.socket] = None
+        self._request_id = 0
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @classmethod
+    def from_properties(cls) -> "RconClient":
+        """Returns a client configured with the RCON properties of the server.
+
+        Raises:
+            RconError: if RCON is not enabled.
+
+        Returns:
+            RconClient: client.
+        """
+
+        if not PropertiesManager.get_property("enable_rcon"):
+            raise RconError("RCON is disabled, set enable-rcon=true")
+
+        return cls(
+            PropertiesManager.get_property("rcon_port"),
+            PropertiesManager.get_property("rcon_password"),
+        )
+
+    def connect(self):
+        """Connects to the server and logs in.
+
+        Raises:
+            RconError: if the server is not reachable or the password is wrong.
+        """
+
+        try:
+            self._socket = socket.create_connection(
+                (self.host, self.port), timeout=self.timeout
+            )
+        except OSError as exc:
+            raise RconError(f"Can't connect to {self.host}:{self.port}") from exc
+
+        request_id, _, _ = self._request(AUTH, self.password)
+        if request_id == AUTH_FAILED_ID:
+            self.close()
+            raise RconError("RCON authentication failed, check rcon.password")
+        logger.debug("Connected to RCON at %s:%d", self.host, self.port)
+
+    def close(self):
+        """Closes the connection."""
+
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def command(self, command: str) -> str:
+        """Runs a command in the server.
+
+        Args:
+            command (str): command, without the leading slash.
+
+        Returns:
+            str: response of the server.
+        """
+
+        logger.debug("RCON command: %s", command)
+        _, _, body = self._request(COMMAND, command)
+        return body
+
+    def _request(self, packet_type: int, body: str):
+        if self._socket is None:
+            raise RconError("RCON client is not connected")
+
+        self._request_id += 1
+        payload = struct.pack("<ii", self._request_id, packet_type)
+        payload += body.encode("utf-8") + b"\x00\x00"
+
+        try:
+            self._socket.sendall(struct.pack("<i", len(payload)) + payload)
+            (length,) = struct.unpack("<i", self._recv(4))
+            request_id, response_type = struct.unpack("<ii", self._recv(8))
+            response = self._recv(length - 8)
+        except OSError as exc:
+            self.close()
+            raise RconError("RCON connection lost") from exc
+
+        return request_id, response_type, response[:-2].decode("utf-8")
+
+    def _recv(self, size: int) -> bytes:
+        data = b""
+        while len(data) < size:
+            chunk = self._socket.recv(size - len(data))
+            if not chunk:
+                raise ConnectionResetError("Connection closed by the server")
+            data += chunk
+        return data
+
+
+def get_online_players(client: RconClient) -> List[str]:
+    """Returns the usernames of the players online.
+
+    Args:
+        client (RconClient): connected client.
+
+    Returns:
+        List[str]: usernames.
+    """
+
+    match = PLAYERS_PATTERN.search(client.command("list"))
+    if not match:
+        return []
+    return [x.strip() for x in match.group(1).split(",") if x.strip()]
+
+
+def wait_port_closed(host: str, port: int, timeout: float):
+    """Waits until the server stops listening on `port`.
+
+    Args:
+        host (str): server host.
+        port (int): port.
+        timeout (float): maximum time to wait, in seconds.
+
+    Raises:
+        RconError: if the port is still open after `timeout` seconds.
+    """
+
+    limit = time.monotonic() + timeout
+    while time.monotonic() < limit:
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+        except OSError:
+            return
+        time.sleep(0.5)
+    raise RconError(f"Server still running after {timeout} seconds")
+
+
+def stop_server(
+    client: RconClient,
+    reason: str = KICK_REASON,
+    timeout: float = DEFAULT_STOP_TIMEOUT,
+):
+    """Saves the worlds, kicks every player and stops the server, waiting
+    until it's stopped. The server closes the RCON port after saving the
+    worlds, so its files can be modified once this function returns.
+
+    Args:
+        client (RconClient): connected client.
+        reason (str, optional): message shown to the kicked players.
+            Defaults to KICK_REASON.
+        timeout (float, optional): maximum time to wait for the server to
+            stop, in seconds. Defaults to DEFAULT_STOP_TIMEOUT.
+    """
+
+    client.command("save-all flush")
+    for username in get_online_players(client):
+        client.command(f"kick {username} {reason}")
+    client.command("save-off")
+
+    logger.info("Stopping the server")
+    try:
+        client.command("stop")
+    except RconError:
+        pass  # the server may close the connection before answering
+    client.close()
+    wait_port_closed(client.host, client.port, timeout)
@@ -0,0 +1,360 @@
+"""Rewriting of the UUIDs stored in the region files.
+
+Tamed animals (wolves, cats, horses, parrots...) store the UUID of their owner
+(`Owner`, `Trusted`, etc) in the chunk data, inside the region files
+(`region/*.mca` and, since 1.17, `entities/*.mca`). After a mode switch the
+owners have a new UUID, so these tags must be rewritten too.
+
+A region file starts with two tables of 1024 entries: the location of each
+chunk (offset and size, in sectors of 4 KiB) and its timestamp. Each chunk is
+its length (4 bytes), its compression type (1 byte) and the compressed NBT.
+Only the chunks containing some UUID to replace are decompressed and
+compressed again (see `nbt_patch`), the rest are copied byte by byte.
+
+The region files are independent, so they are rewritten in a pool of
+processes. Every finished region file is recorded in a checkpoint, so an
+interrupted rewrite resumes where it stopped.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import gzip
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+import zlib
+
+from .nbt_patch import COMPRESS_LEVEL, UUIDMap, get_uuid_map, patch_uuid_arrays
+from .paths import get_cache_folder, get_server_path
+
+SECTOR_SIZE = 4096
+CHUNKS_PER_REGION = 1024
+HEADER_SIZE = 2 * SECTOR_SIZE
+# the sector count of a chunk is stored in one byte of its location
+MAX_CHUNK_SECTORS = 255
+REGION_FOLDERS = ("region", "entities")
+CHECKPOINT_FILENAME = "region-rewrite.checkpoint"
+
+GZIP, ZLIB, UNCOMPRESSED = 1, 2, 3
+EXTERNAL = 128
+
+logger = logging.getLogger(__name__)
+
+
+class RewriteStats(NamedTuple):
+    """Statistics of a rewrite of the region files."""
+
+    regions: int
+    chunks: int
+
+
+def get_checkpoint_path() -> Path:
+    """Returns the path of the checkpoint of the region files rewrite.
+
+    Returns:
+        Path: checkpoint path.
+    """
+
+    return get_cache_folder().joinpath(CHECKPOINT_FILENAME)
+
+
+def find_region_files(root_path: Optional[Path] = None) -> List[Path]:
+    """Returns the region files of every world and dimension of the server.
+
+    Args:
+        root_path (Optional[Path], optional): root path to search files. If
+            None, the server path is used. Defaults to None.
+
+    Returns:
+        List[Path]: region files, sorted.
+    """
+
+    region_files = []
+    for root, _, files in os.walk(root_path or get_server_path()):
+        if Path(root).name in REGION_FOLDERS:
+            region_files.extend(Path(root, x) for x in files if x.endswith(".mca"))
+    return sorted(region_files)
+
+
+def decompress_chunk(compression: int, data: bytes) -> bytes:
+    """Decompresses the NBT data of a chunk.
+
+    Args:
+        compression (int): compression type.
+        data (bytes): compressed data.
+
+    Raises:
+        ValueError: if the compression type is not supported.
+
+    Returns:
+        bytes: NBT data.
+    """
+
+    if compression == ZLIB:
+        return zlib.decompress(data)
+    if compression == GZIP:
+        return gzip.decompress(data)
+    if compression == UNCOMPRESSED:
+        return data
+    raise ValueError(f"Unsupported chunk compression: {compression}")
+
+
+def compress_chunk(compression: int, data: bytes) -> bytes:
+    """Compresses the NBT data of a chunk.
+
+    Args:
+        compression (int): compression type.
+        data (bytes): NBT data.
+
+    Raises:
+        ValueError: if the compression type is not supported.
+
+    Returns:
+        bytes: compressed data.
+    """
+
+    if compression == ZLIB:
+        return zlib.compress(data, COMPRESS_LEVEL)
+    if compression == GZIP:
+        return gzip.compress(data, compresslevel=COMPRESS_LEVEL)
+    if compression == UNCOMPRESSED:
+        return data
+    raise ValueError(f"Unsupported chunk compression: {compression}")
+
+
+def rewrite_chunk(payload: bytes, uuid_map: UUIDMap) -> Optional[bytes]:
+    """Replaces the UUIDs of a chunk.
+
+    Args:
+        payload (bytes): compression type and compressed data of the chunk.
+        uuid_map (UUIDMap): new uuid bytes by old uuid bytes.
+
+    Returns:
+        Optional[bytes]: new payload, or None if no UUID was replaced or the
+            chunk would not fit in the region file anymore.
+    """
+
+    compression = payload[0]
+    if compression & EXTERNAL or compression not in (GZIP, ZLIB, UNCOMPRESSED):
+        # oversized chunks are stored in .mcc files, not supported
+        logger.warning("Skipping chunk with compression %d", compression)
+        return None
+
+    data, count = patch_uuid_arrays(
+        decompress_chunk(compression, payload[1:]), uuid_map
+    )
+    if not count:
+        return None
+
+    new_payload = bytes([compression]) + compress_chunk(compression, data)
+    if 4 + len(new_payload) > MAX_CHUNK_SECTORS * SECTOR_SIZE:
+        logger.warning("Skipping chunk of %d bytes once rewritten", len(new_payload))
+        return None
+    return new_payload
+
+
+def _rewrite_chunks(data: bytes, uuid_map: UUIDMap) -> Tuple[Dict[int, bytes], int]:
+    """Replaces the UUIDs of the chunks of a region file.
+
+    Args:
+        data (bytes): content of the region file.
+        uuid_map (UUIDMap): new uuid bytes by old uuid bytes.
+
+    Returns:
+        Tuple[Dict[int, bytes], int]: payload of each chunk present, by index,
+            and number of chunks rewritten.
+    """
+
+    payloads: Dict[int, bytes] = {}
+    changed = 0
+
+    for index in range(CHUNKS_PER_REGION):
+        location = int.from_bytes(data[index * 4 : index * 4 + 4], "big")
+        offset = (location >> 8) * SECTOR_SIZE
+        if not offset:
+            continue
+
+        length = int.from_bytes(data[offset : offset + 4], "big")
+        payload = data[offset + 4 : offset + 4 + length]
+        new_payload = rewrite_chunk(payload, uuid_map) if payload else None
+        if new_payload is not None:
+            payload = new_payload
+            changed += 1
+        payloads[index] = payload
+
+    return payloads, changed
+
+
+def _build_region(payloads: Dict[int, bytes], timestamps: bytes) -> bytes:
+    """Lays out the chunks of a region file, one after another.
+
+    Args:
+        payloads (Dict[int, bytes]): payload of each chunk, by index.
+        timestamps (bytes): timestamps table of the header.
+
+    Raises:
+        ValueError: if a chunk takes more than MAX_CHUNK_SECTORS sectors.
+
+    Returns:
+        bytes: content of the region file.
+    """
+
+    locations = bytearray(SECTOR_SIZE)
+    body = bytearray()
+    for index, payload in payloads.items():
+        chunk = len(payload).to_bytes(4, "big") + payload
+        sectors = -(-len(chunk) // SECTOR_SIZE)
+        if sectors > MAX_CHUNK_SECTORS:
+            raise ValueError(f"Chunk {index} takes {sectors} sectors")
+        sector = HEADER_SIZE // SECTOR_SIZE + len(body) // SECTOR_SIZE
+        locations[index * 4 : index * 4 + 4] = ((sector << 8) | sectors).to_bytes(
+            4, "big"
+        )
+        body += chunk.ljust(sectors * SECTOR_SIZE, b"\x00")
+
+    return bytes(locations) + timestamps + bytes(body)
+
+
+def rewrite_region(path: Path, uuid_map: UUIDMap) -> int:
+    """Replaces the UUIDs of a region file. The file is only written,
+    atomically, if some chunk changed.
+
+    Args:
+        path (Path): region file.
+        uuid_map (UUIDMap): new uuid bytes by old uuid bytes.
+
+    Returns:
+        int: number of chunks rewritten.
+    """
+
+    data = path.read_bytes()
+    if len(data) < HEADER_SIZE:
+        return 0
+
+    payloads, changed = _rewrite_chunks(data, uuid_map)
+    if not changed:
+        return 0
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(_build_region(payloads, data[SECTOR_SIZE:HEADER_SIZE]))
+    os.replace(tmp_path, path)
+
+    logger.debug("Rewrote %d chunks of %s", changed, path.as_posix())
+    return changed
+
+
+class RegionCheckpoint:
+    """Region files already rewritten with a mapping.
+
+    The checkpoint is a text file: the first line is the JSON header with the
+    mapping, the rest are the paths of the region files already rewritten.
+
+    Args:
+        mapping (Dict[str, str]): new uuid by old uuid.
+        path (Optional[Path], optional): checkpoint path. If None,
+            `get_checkpoint_path()` is used. Defaults to None.
+    """
+
+    def __init__(self, mapping: Dict[str, str], path: Optional[Path] = None):
+        self.mapping = mapping
+        self.path = Path(path or get_checkpoint_path())
+
+    def _append(self, line: str):
+        with self.path.open("at", encoding="utf-8") as file_handler:
+            file_handler.write(line + "\n")
+            file_handler.flush()
+            os.fsync(file_handler.fileno())
+
+    def load(self) -> Set[str]:
+        """Returns the region files already rewritten. If there is no
+        checkpoint, or it was written with another mapping, a new one is
+        started.
+
+        Returns:
+            Set[str]: paths of the region files already rewritten.
+        """
+
+        try:
+            lines = self.path.read_text(encoding="utf-8").split("\n")[:-1]
+            if lines and json.loads(lines[0])["mapping"] == self.mapping:
+                return set(lines[1:])
+        except FileNotFoundError:
+            pass
+        except (KeyError, ValueError):
+            logger.warning("Ignoring corrupted checkpoint %r", self.path.as_posix())
+
+        self.delete()
+        self._append(json.dumps({"mapping": self.mapping}))
+        return set()
+
+    def mark_done(self, path: Path):
+        """Records that a region file was rewritten.
+
+        Args:
+            path (Path): region file.
+        """
+
+        self._append(path.as_posix())
+
+    def delete(self):
+        """Deletes the checkpoint."""
+
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def rewrite_regions(
+    mapping: Dict[str, str],
+    root_path: Optional[Path] = None,
+    workers: Optional[int] = None,
+) -> RewriteStats:
+    """Replaces the UUIDs of every region file of the server, resuming the
+    previous rewrite with the same mapping if it was interrupted.
+
+    Args:
+        mapping (Dict[str, str]): new uuid by old uuid.
+        root_path (Optional[Path], optional): root path to search files. If
+            None, the server path is used. Defaults to None.
+        workers (Optional[int], optional): number of processes. If None, the
+            number of CPUs is used. Defaults to None.
+
+    Returns:
+        RewriteStats: number of region files and chunks rewritten.
+    """
+
+    uuid_map = get_uuid_map(mapping)
+    checkpoint = RegionCheckpoint(mapping)
+    done = checkpoint.load()
+    pending = [x for x in find_region_files(root_path) if x.as_posix() not in done]
+    logger.info("Rewriting %d region files (%d already done)", len(pending), len(done))
+
+    stats = RewriteStats(0, 0)
+
+    def record(path: Path, changed: int):
+        nonlocal stats
+        checkpoint.mark_done(path)
+        stats = RewriteStats(stats.regions + bool(changed), stats.chunks + changed)
+
+    if workers == 1:
+        for path in pending:
+            record(path, rewrite_region(path, uuid_map))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(rewrite_region, path, uuid_map): path
+                for path in pending
+            }
+            try:
+                for future in as_completed(futures):
+                    record(futures[future], future.result())
+            finally:
+                # if a region failed, the regions not started are skipped
+                for future in futures:
+                    future.cancel()
+
+    checkpoint.delete()
+    logger.info("Rewrote %d chunks in %d region files", stats.chunks, stats.regions)
+    return stats
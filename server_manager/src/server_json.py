@@ -0,0 +1,129 @@
+"""Rewriting of the UUIDs stored in the JSON files of the server.
+
+The server keeps some lists of players in JSON files next to
+`server.properties` (`ops.json`, `banned-players.json`, `usercache.json` and
+`whitelist.json`), each entry with the `uuid` of the player. After a mode
+switch, these uuids must be replaced by the new ones.
+
+Each file is registered with the function that rewrites its content, so other
+JSON files can be added with `register_json_file` without changing the mode
+switch. Each file is read and written once, atomically, and only if some uuid
+was replaced.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from .paths import get_server_path
+
+VANILLA_JSON_FILES = (
+    "ops.json",
+    "banned-players.json",
+    "usercache.json",
+    "whitelist.json",
+)
+
+logger = logging.getLogger(__name__)
+Rewriter = Callable[[Any, Dict[str, str]], int]
+JSON_FILES: Dict[str, Rewriter] = {}
+
+
+def register_json_file(filename: str, rewriter: Optional[Rewriter] = None):
+    """Registers a JSON file of the server whose uuids must be replaced.
+
+    Args:
+        filename (str): path of the file, relative to the server path.
+        rewriter (Optional[Rewriter], optional): function which replaces the
+            uuids of the decoded content in place and returns the number of
+            uuids replaced. If None, `remap_entries` is used. Defaults to None.
+    """
+
+    JSON_FILES[filename] = rewriter or remap_entries
+
+
+def remap_entries(data: Any, mapping: Dict[str, str]) -> int:
+    """Replaces the `uuid` of each entry of a list of players, the format of
+    the vanilla JSON files.
+
+    Args:
+        data (Any): decoded content of the file.
+        mapping (Dict[str, str]): new uuid by old uuid.
+
+    Returns:
+        int: number of uuids replaced.
+    """
+
+    count = 0
+    for entry in data:
+        new_uuid = mapping.get(str(entry.get("uuid", "")).lower())
+        if new_uuid is not None:
+            entry["uuid"] = new_uuid
+            count += 1
+    return count
+
+
+def rewrite_json_file(path: Path, rewriter: Rewriter, mapping: Dict[str, str]) -> int:
+    """Replaces the uuids of a JSON file. The file is only written, atomically,
+    if some uuid was replaced, keeping its indentation (or lack of it).
+
+    Args:
+        path (Path): path of the file.
+        rewriter (Rewriter): function which replaces the uuids of the content.
+        mapping (Dict[str, str]): new uuid by old uuid.
+
+    Returns:
+        int: number of uuids replaced.
+    """
+
+    text = path.read_text(encoding="utf-8")
+    data = json.loads(text)
+    count = rewriter(data, mapping)
+    if not count:
+        return 0
+
+    if "\n" in text.strip():
+        text = json.dumps(data, indent=2, ensure_ascii=False)
+    else:
+        text = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+    logger.debug("Replaced %d uuids in %s", count, path.as_posix())
+    return count
+
+
+def rewrite_json_files(
+    mapping: Dict[str, str], server_path: Optional[Path] = None
+) -> int:
+    """Replaces the uuids of every registered JSON file. Missing files are
+    skipped.
+
+    Args:
+        mapping (Dict[str, str]): new uuid by old uuid.
+        server_path (Optional[Path], optional): server path. If None,
+            `get_server_path()` is used. Defaults to None.
+
+    Returns:
+        int: number of uuids replaced.
+    """
+
+    server_path = server_path or get_server_path()
+    mapping = {old.lower(): new for old, new in mapping.items()}
+    count = 0
+
+    for filename, rewriter in JSON_FILES.items():
+        path = server_path.joinpath(filename)
+        if path.is_file():
+            count += rewrite_json_file(path, rewriter, mapping)
+
+    logger.info("Replaced %d uuids in the server JSON files", count)
+    return count
+
+
+for _filename in VANILLA_JSON_FILES:
+    register_json_file(_filename)
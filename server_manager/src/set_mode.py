@@ -1,22 +1,32 @@
 """Checkers needed before setting a new mode."""
 
 import logging
+from pathlib import Path
+import shlex
+import subprocess
+from typing import Callable, List, Optional
 
-from .checks import check_players, check_plugin
-from .player import Player, change_players_mode
-from .plugin import set_plugin_mode
+from .checks import check_players, check_plugin, validate_players
+from .exceptions import PlanError
+from .journal import DEFAULT_WORKERS, Journal, Step, SwitchStats, run_mode_switch
+from .plan import ModeSwitchPlan, build_plan, get_plan_path
+from .player import Player
 from .properties_manager import PropertiesManager, get_server_path
+from .rcon import RconClient, stop_server
 
 
-def set_mode(new_mode):
-    """Modifies the online mode of the minecraft server.
+def check_new_mode(new_mode) -> Path:
+    """Checks that the server can be switched to `new_mode`.
 
     Args:
         new_mode (bool): new online mode to set.
 
     Raises:
         ValueError: if the server is already running with `new_mode`.
-        CheckError: if some checks do not pass.
+        JournalError: if a previous mode switch was interrupted.
+
+    Returns:
+        Path: server path.
     """
 
     logger = logging.getLogger(__name__)
@@ -35,13 +45,248 @@ def set_mode(new_mode):
         logger.critical(msg, current_servermode)
         raise ValueError(msg % current_servermode)
 
+    Journal().check_clean()
+    return server_path
+
+
+def restart_server(restart_command: str):
+    """Runs the command which starts the server again.
+
+    Args:
+        restart_command (str): command, like `systemctl start minecraft`.
+
+    Raises:
+        CalledProcessError: if the command fails.
+    """
+
+    logging.getLogger(__name__).info("Restarting the server: %s", restart_command)
+    subprocess.run(shlex.split(restart_command), check=True)
+
+
+def check_plan_sources(plan: ModeSwitchPlan):
+    """Checks that the files renamed by a plan exist.
+
+    Args:
+        plan (ModeSwitchPlan): plan.
+
+    Raises:
+        PlanError: if a file to rename doesn't exist.
+    """
+
+    for step in plan.steps:
+        if step["op"] == "rename" and not Path(step["src"]).exists():
+            raise PlanError(f"Saved plan is outdated, {step['src']!r} not found")
+
+
+def check_plan_players(plan: ModeSwitchPlan, players: List[Player]):
+    """Checks that a plan still matches the players of the server.
+
+    Args:
+        plan (ModeSwitchPlan): plan.
+        players (List[Player]): players of the server.
+
+    Raises:
+        PlanError: if a player is not in the plan or a file to rename doesn't
+            exist.
+    """
+
+    unplanned = sorted(x.uuid for x in players if x.uuid not in plan.mapping)
+    if unplanned:
+        raise PlanError(
+            "Saved plan is outdated, players not planned: " + ", ".join(unplanned)
+        )
+    check_plan_sources(plan)
+
+
+def check_and_plan(
+    server_path: Path, players: List[Player], new_mode: bool, full_check: bool
+) -> ModeSwitchPlan:
+    """Checks the players (see `check_players`), which may move some of them to
+    a quarantine, and the plugin, and computes the plan of the switch.
+
+    Args:
+        server_path (Path): server path.
+        players (List[Player]): players of the server.
+        new_mode (bool): new online mode to set.
+        full_check (bool): if True, every player is validated again, ignoring
+            the verdicts of previous runs.
+
+    Raises:
+        CheckError: if some checks do not pass.
+        PlanError: if the renames can't be planned.
+
+    Returns:
+        ModeSwitchPlan: valid plan.
+    """
+
+    if not check_players(players, full_check=full_check):
+        # the files of the players removed were moved to a quarantine
+        players = Player.generate(server_path)
+    check_plugin()
+    plan = build_plan(players, new_mode)
+    plan.check()
+    return plan
+
+
+def switch(
+    steps: List[Step],
+    workers=DEFAULT_WORKERS,
+    live=False,
+    restart_command=None,
+    replan: Optional[Callable[[List[Player]], ModeSwitchPlan]] = None,
+) -> SwitchStats:
+    """Applies the steps of a mode switch, stopping the server before if it's
+    running and starting it after if a restart command is given.
+
+    Args:
+        steps (List[Step]): steps of the switch.
+        workers (int, optional): number of threads used to rename and patch
+            the files. Defaults to DEFAULT_WORKERS.
+        live (bool, optional): if True, the server is stopped through RCON
+            before applying the steps. Defaults to False.
+        restart_command (Optional[str], optional): command run to start the
+            server after the switch. Defaults to None.
+        replan (Optional[Callable[[List[Player]], ModeSwitchPlan]], optional):
+            if `live`, called with the players scanned once the server is
+            stopped, as they may have changed. Its plan replaces `steps`.
+            Defaults to None.
+
+    Returns:
+        SwitchStats: number of steps applied and time spent.
+    """
+
+    if live:
+        with RconClient.from_properties() as client:
+            stop_server(client)
+        if replan is not None:
+            steps = replan(Player.generate(get_server_path())).steps
+
+    stats = run_mode_switch(steps, workers=workers)
+    if restart_command:
+        restart_server(restart_command)
+    return stats
+
+
+def set_mode(
+    new_mode,
+    full_check=False,
+    workers=DEFAULT_WORKERS,
+    live=False,
+    restart_command: Optional[str] = None,
+) -> SwitchStats:
+    """Modifies the online mode of the minecraft server. The changes are
+    recorded in a journal first (see `journal`), so an interrupted switch can
+    be recovered.
+
+    If `live` is True, the server is running: the players are scanned and
+    validated and the plan is computed with the server up, and then the
+    server is stopped through RCON (see `rcon.stop_server`). The players are
+    scanned and checked again once it's stopped, as they may have changed and
+    only then their files can be moved to a quarantine, and the plan is
+    computed again. The verdicts of the players whose files didn't change are
+    reused (see `verification`), so this takes little time.
+
+    Args:
+        new_mode (bool): new online mode to set.
+        full_check (bool, optional): if True, every player is validated again,
+            ignoring the verdicts of previous runs. Defaults to False.
+        workers (int, optional): number of threads used to rename and patch
+            the files. Defaults to DEFAULT_WORKERS.
+        live (bool, optional): if True, the server is stopped through RCON
+            after the checks. Defaults to False.
+        restart_command (Optional[str], optional): command run to start the
+            server after the switch. Defaults to None.
+
+    Raises:
+        ValueError: if the server is already running with `new_mode`.
+        CheckError: if some checks do not pass.
+        JournalError: if a previous mode switch was interrupted.
+        PlanError: if the renames can't be planned.
+        RconError: if the server can't be stopped through RCON.
+
+    Returns:
+        SwitchStats: number of steps applied and time spent.
+    """
+
+    server_path = check_new_mode(new_mode)
     players = Player.generate(server_path)
 
     # Checks
-    check_players(players)
+    if not live:
+        plan = check_and_plan(server_path, players, new_mode, full_check)
+        return switch(plan.steps, workers, restart_command=restart_command)
+
+    # nothing is removed while the server is running
+    validate_players(players, full_check=full_check)
     check_plugin()
+    plan = build_plan(players, new_mode)
+    plan.check()
+
+    def replan(players: List[Player]) -> ModeSwitchPlan:
+        return check_and_plan(server_path, players, new_mode, full_check=False)
 
     # Setters
-    change_players_mode(players, new_mode)
-    set_plugin_mode(not new_mode)  # plugin mode is the opposite as server mode
-    PropertiesManager.set_property(online_mode=new_mode)
+    return switch(plan.steps, workers, live, restart_command, replan)
+
+
+def plan_mode(new_mode) -> ModeSwitchPlan:
+    """Computes the plan to switch the server to `new_mode` without modifying
+    the server. If the plan is valid, it's saved to be applied later (see
+    `apply_plan`).
+
+    Args:
+        new_mode (bool): new online mode to set.
+
+    Returns:
+        ModeSwitchPlan: plan, with the errors found.
+    """
+
+    server_path = check_new_mode(new_mode)
+    plan = build_plan(Player.generate(server_path), new_mode)
+    if plan.ok:
+        plan.save()
+    return plan
+
+
+def apply_plan(
+    new_mode, workers=DEFAULT_WORKERS, live=False, restart_command=None
+) -> SwitchStats:
+    """Switches the server to `new_mode` using the plan saved by `plan_mode`,
+    without scanning the players again. If `live` is True, the players are
+    scanned once the server is stopped, to check that none joined since the
+    plan was saved.
+
+    Args:
+        new_mode (bool): new online mode to set.
+        workers (int, optional): number of threads used to rename and patch
+            the files. Defaults to DEFAULT_WORKERS.
+        live (bool, optional): if True, the server is stopped through RCON
+            after the checks. Defaults to False.
+        restart_command (Optional[str], optional): command run to start the
+            server after the switch. Defaults to None.
+
+    Raises:
+        PlanError: if there is no saved plan for `new_mode`, it has errors
+            or it's outdated (some of its files no longer exist).
+        RconError: if the server can't be stopped through RCON.
+
+    Returns:
+        SwitchStats: number of steps applied and time spent.
+    """
+
+    check_new_mode(new_mode)
+    plan = ModeSwitchPlan.load()
+    if plan.new_mode != new_mode:
+        raise PlanError(f"Saved plan sets online-mode={plan.new_mode}")
+    plan.check()
+    check_plan_sources(plan)
+
+    def replan(players: List[Player]) -> ModeSwitchPlan:
+        # players may have joined since the plan was saved
+        check_plan_players(plan, players)
+        return plan
+
+    check_plugin()
+    stats = switch(plan.steps, workers, live, restart_command, replan)
+    get_plan_path().unlink()
+    return stats
@@ -0,0 +1,104 @@
+"""Caches of values computed from a file, revalidated with a single `stat`.
+
+Unlike `functools.lru_cache`, the cached values are dropped as soon as the
+file changes, so a long-running process never returns stale values after an
+external edit, and a lookup costs only a `stat` of the file.
+"""
+
+from collections import namedtuple
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "currsize"])
+StatKey = Tuple[int, int, int]
+
+logger = logging.getLogger(__name__)
+
+
+def get_stat_key(path: Path) -> StatKey:
+    """Returns the key identifying the current version of a file. An atomic
+    replace changes the inode, and an in-place edit the mtime or the size.
+
+    Args:
+        path (Path): file path.
+
+    Returns:
+        StatKey: modification time (ns), size and inode of the file.
+    """
+
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class StatCache:
+    """Cache of values, dropped when its key changes. The key is usually the
+    stat key of a file (see `get_stat_key`) or a value derived from it.
+
+    Args:
+        name (str): name used in the logs.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.key: Any = None
+        self.values: Dict[Hashable, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r})"
+
+    def get(self, key: Any, name: Hashable, func: Callable[[], Any]) -> Any:
+        """Returns a cached value, computing it if it's not cached or the key
+        changed since it was cached.
+
+        Args:
+            key (Any): current key. If it's different from the key of the
+                cached values, all of them are dropped.
+            name (Hashable): name of the value.
+            func (Callable[[], Any]): function computing the value.
+
+        Returns:
+            Any: value.
+        """
+
+        if key != self.key:
+            if self.key is not None:
+                logger.debug("%s changed, dropping %d values", self.name, len(self))
+            self.key = key
+            self.values = {}
+
+        try:
+            value = self.values[name]
+        except KeyError:
+            self.misses += 1
+            value = self.values[name] = func()
+        else:
+            self.hits += 1
+        return value
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def invalidate(self):
+        """Drops the cached values, keeping the metrics."""
+
+        self.key = None
+        self.values = {}
+
+    def cache_info(self) -> CacheInfo:
+        """Returns the metrics of the cache.
+
+        Returns:
+            CacheInfo: hits, misses and number of values cached.
+        """
+
+        return CacheInfo(self.hits, self.misses, len(self))
+
+    def cache_clear(self):
+        """Drops the cached values and resets the metrics."""
+
+        self.invalidate()
+        self.hits = 0
+        self.misses = 0
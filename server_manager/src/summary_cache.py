@@ -0,0 +1,132 @@
+"""Persistent cache of the players' summaries.
+
+Decoding a player data file means decompressing and parsing the whole NBT
+structure, so the summaries are stored in a SQLite database next to the server
+folder. Each entry is keyed by the file identity (path, size and modification
+time in nanoseconds): unchanged players are served without opening their
+`.dat` files and stale entries are recomputed transparently.
+"""
+
+import logging
+from pathlib import Path
+import sqlite3
+from typing import Iterable, List, Optional
+
+from .paths import get_cache_folder
+from .player import Player, PlayerSummary
+
+SCHEMA_VERSION = 1
+CACHE_FILENAME = "player-summaries.sqlite3"
+
+logger = logging.getLogger(__name__)
+
+
+def get_summary_cache_path() -> Path:
+    """Returns the path of the summary cache database.
+
+    Returns:
+        Path: summary cache path.
+    """
+
+    return get_cache_folder().joinpath(CACHE_FILENAME)
+
+
+class SummaryCache:
+    """SQLite backed cache of `PlayerSummary`, keyed by file identity.
+
+    Args:
+        path (Path, optional): database path. If None, `get_summary_cache_path()`
+            is used. Defaults to None.
+    """
+
+    columns = ("path", "size", "mtime_ns") + PlayerSummary._fields
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or get_summary_cache_path())
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(self.path.as_posix())
+        self._setup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _setup(self):
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            logger.debug("Resetting summary cache (schema %d)", version)
+            self.connection.execute("DROP TABLE IF EXISTS summaries")
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, "
+            "inventory INTEGER, ender_chest INTEGER, dimension TEXT, "
+            "x INTEGER, y INTEGER, z INTEGER, health REAL, xp_level INTEGER)"
+        )
+        self.connection.commit()
+
+    def get(self, player: Player) -> PlayerSummary:
+        """Returns the summary of a player, decoding its player data file only
+        if it changed since the summary was cached.
+
+        Args:
+            player (Player): player to summarize.
+
+        Returns:
+            PlayerSummary: player summary.
+        """
+
+        path = player.player_data_file.as_posix()
+        stat = player.player_data_file.path.stat()
+
+        row = self.connection.execute(
+            "SELECT * FROM summaries WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (path, stat.st_size, stat.st_mtime_ns),
+        ).fetchone()
+
+        if row:
+            self.hits += 1
+            return PlayerSummary(*row[3:])
+
+        self.misses += 1
+        summary = player.get_summary()
+        placeholders = ", ".join("?" * len(self.columns))
+        self.connection.execute(
+            f"INSERT OR REPLACE INTO summaries VALUES ({placeholders})",
+            (path, stat.st_size, stat.st_mtime_ns) + tuple(summary),
+        )
+        return summary
+
+    def close(self):
+        """Saves the new summaries and closes the database."""
+
+        self.connection.commit()
+        self.connection.close()
+        logger.debug(
+            "Summary cache closed (hits=%d, misses=%d)", self.hits, self.misses
+        )
+
+
+def get_player_summaries(
+    players: Iterable[Player], use_cache: bool = True
+) -> List[PlayerSummary]:
+    """Returns the summary of each player, in the same order.
+
+    Args:
+        players (Iterable[Player]): players to summarize.
+        use_cache (bool, optional): if False, the cache is bypassed and every
+            player data file is decoded. Defaults to True.
+
+    Returns:
+        List[PlayerSummary]: summaries of the players.
+    """
+
+    if not use_cache:
+        return [player.get_summary() for player in players]
+
+    with SummaryCache() as cache:
+        return [cache.get(player) for player in players]
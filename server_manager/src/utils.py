@@ -2,7 +2,11 @@
 
 from functools import wraps
 from hashlib import sha256
-from typing import Any
+from importlib import import_module
+import logging
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from typing import Type
 
 import click
@@ -169,6 +173,22 @@ def gen_hash() -> str:
     return sha256(data).hexdigest()
 
 
+def get_timestamp_id_key(identifier: str) -> Tuple[str, int]:
+    """Returns the sort key of an identifier made of a timestamp and, when
+    several were created in the same second, a numeric suffix
+    (`<timestamp>-<n>`). Sorting by it puts `-10` after `-2`.
+
+    Args:
+        identifier (str): identifier.
+
+    Returns:
+        Tuple[str, int]: timestamp and suffix (0 if there is none).
+    """
+
+    timestamp, _, suffix = identifier.partition("-")
+    return timestamp, int(suffix) if suffix.isdecimal() else 0
+
+
 def click_handle_exception(
     _func=_def, *, exc_type: _Ex = None
 ):  # pylint:disable=W9015,W9016,W9011,W9012
@@ -211,3 +231,89 @@ def click_handle_exception(
     if _func is _def:
         return outer_wrapper
     return outer_wrapper(_func)
+
+
+class DeferredFileHandler(logging.FileHandler):
+    """File handler whose path is only computed, and its folder created, when
+    the first record is emitted. Commands that don't log don't touch the disk.
+
+    Args:
+        get_path (Callable[[], Path]): returns the path of the log file.
+        mode (str, optional): mode to open the file. Defaults to "at".
+        encoding (str, optional): file encoding. Defaults to "utf8".
+    """
+
+    def __init__(
+        self, get_path: Callable[[], Path], mode: str = "at", encoding: str = "utf8"
+    ):
+        self.get_path = get_path
+        super().__init__(os.devnull, mode, encoding, delay=True)
+
+    def _open(self):
+        path = Path(self.get_path())
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.baseFilename = os.fspath(path.absolute())
+        return super()._open()
+
+
+class LazyGroup(click.Group):
+    """Click group whose subcommands are imported only when they are invoked.
+    Their short help is given with their import path, so listing them in the
+    help doesn't import them either.
+
+    Args:
+        lazy_subcommands (Dict[str, Tuple[str, str]], optional): import path
+            ("module:attribute") and short help of each subcommand, by name.
+            Defaults to None.
+    """
+
+    def __init__(
+        self,
+        *args,
+        lazy_subcommands: Optional[Dict[str, Tuple[str, str]]] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = lazy_subcommands or {}
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_subcommands))
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        if cmd_name not in self.lazy_subcommands:
+            return super().get_command(ctx, cmd_name)
+        return self.load_command(cmd_name)
+
+    def load_command(self, cmd_name: str) -> click.Command:
+        """Imports a lazy subcommand.
+
+        Args:
+            cmd_name (str): subcommand name.
+
+        Raises:
+            TypeError: if the import path is not a click command.
+
+        Returns:
+            click.Command: subcommand.
+        """
+
+        module_name, attribute = self.lazy_subcommands[cmd_name][0].split(":")
+        command = getattr(import_module(module_name), attribute)
+        if not isinstance(command, click.Command):
+            raise TypeError(f"Lazy subcommand {cmd_name!r} is not a click command")
+        return command
+
+    def format_commands(self, ctx: click.Context, formatter: click.HelpFormatter):
+        rows = []
+        for cmd_name in self.list_commands(ctx):
+            if cmd_name in self.lazy_subcommands:
+                rows.append((cmd_name, self.lazy_subcommands[cmd_name][1]))
+                continue
+            command = super().get_command(ctx, cmd_name)
+            if command is not None and not command.hidden:
+                limit = formatter.width - 6 - len(cmd_name)
+                rows.append((cmd_name, command.get_short_help_str(limit)))
+
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
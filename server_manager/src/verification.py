@@ -0,0 +1,180 @@
+"""Incremental verification of the players.
+
+The verdict of each validated player (the items in its ender chest and in its
+inventory) is stored along with a digest of its files: path, size, modification
+time and a crc32 of the raw (compressed) content. Later validations reuse the
+verdict of every player whose files didn't change, so only the modified
+players are decoded again.
+
+Like the summary cache, the files are identified by their size and
+modification time: a file is read to compute its crc32 only if any of them
+changed, and a file touched without changing its content keeps the verdict.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from zlib import crc32
+
+from .paths import get_cache_folder
+from .player import Player
+
+VERDICTS_FILENAME = "verdicts.json"
+FORMAT_VERSION = 1
+
+logger = logging.getLogger(__name__)
+Digest = List[list]
+Verdict = Tuple[int, int]
+
+
+def get_verdicts_path() -> Path:
+    """Returns the path of the file where the verdicts are stored.
+
+    Returns:
+        Path: verdicts path.
+    """
+
+    return get_cache_folder().joinpath(VERDICTS_FILENAME)
+
+
+def get_file_digest(path: Path, previous: Optional[list] = None) -> list:
+    """Returns the digest of a file: path, size, modification time (ns) and
+    crc32 of its content.
+
+    Args:
+        path (Path): file path.
+        previous (Optional[list], optional): previous digest of the file. Its
+            crc32 is reused if the size and the modification time didn't
+            change. Defaults to None.
+
+    Returns:
+        list: file digest.
+    """
+
+    stat = path.stat()
+    digest = [path.as_posix(), stat.st_size, stat.st_mtime_ns]
+    if previous is not None and previous[:3] == digest:
+        return digest + previous[3:]
+    return digest + [crc32(path.read_bytes())]
+
+
+def get_player_digest(player: Player, previous: Optional[Digest] = None) -> Digest:
+    """Returns the digest of the three files of a player.
+
+    Args:
+        player (Player): player.
+        previous (Optional[Digest], optional): previous digest of the player
+            (see `get_file_digest`). Defaults to None.
+
+    Returns:
+        Digest: digest of the player data, stats and advancements files.
+    """
+
+    files = (player.player_data_file, player.stats_file, player.advancements_file)
+    previous = previous or [None] * len(files)
+    return [get_file_digest(file.path, old) for file, old in zip(files, previous)]
+
+
+def is_same_content(digest: Digest, other: Digest) -> bool:
+    """Checks if two digests describe the same files, whatever their
+    modification times.
+
+    Args:
+        digest (Digest): digest of a player.
+        other (Digest): digest of a player.
+
+    Returns:
+        bool: True if the paths, the sizes and the crc32 match.
+    """
+
+    if len(digest) != len(other):
+        return False
+    return all(
+        (new[0], new[1], new[3]) == (old[0], old[1], old[3])
+        for new, old in zip(digest, other)
+    )
+
+
+class VerdictCache:
+    """Verdicts of the last validation, keyed by player uuid. Only the players
+    looked up or recorded since it was loaded are saved, so the verdicts of the
+    players that are gone (renamed, quarantined...) are dropped.
+
+    Args:
+        path (Optional[Path], optional): file where the verdicts are stored. If
+            None, `get_verdicts_path()` is used. Defaults to None.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or get_verdicts_path())
+        self.hits = 0
+        self.misses = 0
+        self.entries: Dict[str, dict] = self._load()
+        self._digests: Dict[str, Digest] = {}
+        self._seen: Set[str] = set()
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logger.warning("Ignoring corrupted verdicts file %r", self.path.as_posix())
+            return {}
+
+        if data.get("version") != FORMAT_VERSION:
+            return {}
+        return data.get("players", {})
+
+    def get(self, player: Player) -> Optional[Verdict]:
+        """Returns the cached verdict of a player, if its files didn't change
+        since it was recorded.
+
+        Args:
+            player (Player): player.
+
+        Returns:
+            Optional[Verdict]: pair (ender chest, inventory) if the verdict
+                is still valid, None otherwise.
+        """
+
+        self._seen.add(player.uuid)
+        entry = self.entries.get(player.uuid)
+        digest = get_player_digest(player, entry["digest"] if entry else None)
+        self._digests[player.uuid] = digest
+
+        if entry and is_same_content(entry["digest"], digest):
+            # the new modification times avoid reading the files next time
+            entry["digest"] = digest
+            self.hits += 1
+            return tuple(entry["verdict"])
+
+        self.misses += 1
+        return None
+
+    def set(self, player: Player, verdict: Verdict):
+        """Records the verdict of a player.
+
+        Args:
+            player (Player): player.
+            verdict (Verdict): pair (ender chest, inventory).
+        """
+
+        self._seen.add(player.uuid)
+        digest = self._digests.pop(player.uuid, None) or get_player_digest(player)
+        self.entries[player.uuid] = {"digest": digest, "verdict": list(verdict)}
+
+    def save(self):
+        """Writes the verdicts of the players seen to disk atomically."""
+
+        for uuid in set(self.entries) - self._seen:
+            del self.entries[uuid]
+
+        data = {"version": FORMAT_VERSION, "players": self.entries}
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+        logger.debug("Verdicts saved (hits=%d, misses=%d)", self.hits, self.misses)
@@ -0,0 +1,447 @@
+"""Multi-threaded writer of zip archives.
+
+The entries are independent, so each file is read in large chunks and
+deflated on a thread pool (zlib releases the GIL while compressing). The
+compressed entries are then written to the archive in order by a single
+thread, so the archive is the same whatever the number of workers.
+
+At most `2 * workers` compressed entries are kept waiting to be written, and
+each one is spooled to disk once it exceeds `SPOOL_SIZE`, so the memory used
+is bounded even with gigabytes of region files.
+
+`zipfile` can't append an entry compressed elsewhere without using its
+internals, so the headers and the central directory are written by
+`ZipWriter`. The archives are read with `zipfile`.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+import hashlib
+import logging
+import os
+from pathlib import Path
+import stat
+import struct
+from tempfile import SpooledTemporaryFile
+import time
+from typing import (
+    IO,
+    BinaryIO,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+import zlib
+
+CHUNK_SIZE = 1 << 20
+SPOOL_SIZE = 16 << 20
+DEFAULT_LEVEL = 6
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+# zip format (see the APPNOTE of PKWARE), the limits are the ones of zipfile
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+ZIP64_LIMIT = (1 << 31) - 1
+ZIP_FILECOUNT_LIMIT = (1 << 16) - 1
+DEFAULT_VERSION = 20
+ZIP64_VERSION = 45
+CREATE_SYSTEM = 0 if os.name == "nt" else 3
+UTF8_FLAG = 0x800
+LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+CENTRAL_HEADER = struct.Struct("<4s4B4HL2L5H2L")
+END_RECORD = struct.Struct("<4s4H2LH")
+END_RECORD_64 = struct.Struct("<4sQ2H2L4Q")
+END_LOCATOR_64 = struct.Struct("<4sLQL")
+
+Entry = Tuple[Path, str]
+DateTime = Tuple[int, int, int, int, int, int]
+
+logger = logging.getLogger(__name__)
+
+
+class ZipStats(NamedTuple):
+    """Statistics of the creation of a zip archive."""
+
+    files: int
+    bytes_in: int
+    bytes_out: int
+    seconds: float
+
+    @property
+    def throughput(self) -> float:
+        """Bytes read per second."""
+        return self.bytes_in / self.seconds if self.seconds else float(self.bytes_in)
+
+    @property
+    def ratio(self) -> float:
+        """Size of the archive relative to the size of the files."""
+        return self.bytes_out / self.bytes_in if self.bytes_in else 1.0
+
+
+class EntryInfo(NamedTuple):
+    """Header fields of an entry, known once it's compressed, along with the
+    modification time (ns) and the SHA-256 of the data read."""
+
+    filename: str
+    date_time: DateTime
+    external_attr: int
+    compress_type: int
+    crc: int
+    file_size: int
+    compress_size: int
+    mtime_ns: int
+    digest: str
+
+
+class CompressedEntry(NamedTuple):
+    """Entry compressed, waiting to be written to the archive."""
+
+    info: EntryInfo
+    payload: IO[bytes]
+
+
+def get_date_time(mtime: float) -> DateTime:
+    """Returns the local date and time of a timestamp, clamped to the range of
+    the zip files (1980 to 2107).
+
+    Args:
+        mtime (float): timestamp.
+
+    Returns:
+        DateTime: year, month, day, hour, minute and second.
+    """
+
+    date_time = time.localtime(mtime)[:6]
+    if date_time[0] < 1980:
+        return 1980, 1, 1, 0, 0, 0
+    if date_time[0] > 2107:
+        return 2107, 12, 31, 23, 59, 59
+    return date_time
+
+
+class ZipWriter:
+    """Writer of zip archives whose entries are already compressed (see
+    `compress_file`). The local headers are written along with the entries
+    and the central directory when the writer is closed. The zip64 extensions
+    are only used when the sizes, the offsets or the number of entries need
+    them, like `zipfile` does.
+
+    Args:
+        file_handler (BinaryIO): file opened for writing, at its start.
+    """
+
+    def __init__(self, file_handler: BinaryIO):
+        self.file_handler = file_handler
+        self.records: List[Tuple[EntryInfo, int]] = []
+
+    def write_entry(self, entry: CompressedEntry) -> int:
+        """Appends an entry, and closes its payload.
+
+        Args:
+            entry (CompressedEntry): compressed entry.
+
+        Returns:
+            int: number of bytes written.
+        """
+
+        info, payload = entry
+        start = self.file_handler.tell()
+        filename, flags = self._encode_filename(info.filename)
+        extra = b""
+        sizes = info.compress_size, info.file_size
+        if max(sizes) > ZIP64_LIMIT:
+            extra = struct.pack("<2H2Q", 1, 16, info.file_size, info.compress_size)
+            sizes = 0xFFFFFFFF, 0xFFFFFFFF
+
+        header = LOCAL_HEADER.pack(
+            b"PK\x03\x04",
+            ZIP64_VERSION if extra else DEFAULT_VERSION,
+            0,
+            flags,
+            info.compress_type,
+            *self._encode_date_time(info.date_time),
+            info.crc,
+            *sizes,
+            len(filename),
+            len(extra),
+        )
+        with payload:
+            self.file_handler.write(header + filename + extra)
+            while True:
+                chunk = payload.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                self.file_handler.write(chunk)
+
+        self.records.append((info, start))
+        return self.file_handler.tell() - start
+
+    def close(self):
+        """Writes the central directory and the end of the archive."""
+
+        start = self.file_handler.tell()
+        for info, offset in self.records:
+            self.file_handler.write(self._get_central_header(info, offset))
+
+        count = len(self.records)
+        size = self.file_handler.tell() - start
+        if max(start, size) > ZIP64_LIMIT or count > ZIP_FILECOUNT_LIMIT:
+            offset = self.file_handler.tell()
+            self.file_handler.write(
+                END_RECORD_64.pack(
+                    b"PK\x06\x06",
+                    END_RECORD_64.size - 12,
+                    ZIP64_VERSION,
+                    ZIP64_VERSION,
+                    0,
+                    0,
+                    count,
+                    count,
+                    size,
+                    start,
+                )
+            )
+            self.file_handler.write(END_LOCATOR_64.pack(b"PK\x06\x07", 0, offset, 1))
+            count = min(count, 0xFFFF)
+            size, start = min(size, 0xFFFFFFFF), min(start, 0xFFFFFFFF)
+
+        self.file_handler.write(
+            END_RECORD.pack(b"PK\x05\x06", 0, 0, count, count, size, start, 0)
+        )
+
+    def _get_central_header(self, info: EntryInfo, offset: int) -> bytes:
+        filename, flags = self._encode_filename(info.filename)
+        values = [info.file_size, info.compress_size, offset]
+        large = [x for x in values if x > ZIP64_LIMIT]
+        extra = b""
+        if large:
+            extra = struct.pack(f"<2H{len(large)}Q", 1, 8 * len(large), *large)
+            values = [0xFFFFFFFF if x > ZIP64_LIMIT else x for x in values]
+
+        version = ZIP64_VERSION if extra else DEFAULT_VERSION
+        header = CENTRAL_HEADER.pack(
+            b"PK\x01\x02",
+            version,
+            CREATE_SYSTEM,
+            version,
+            0,
+            flags,
+            info.compress_type,
+            *self._encode_date_time(info.date_time),
+            info.crc,
+            values[1],
+            values[0],
+            len(filename),
+            len(extra),
+            0,
+            0,
+            0,
+            info.external_attr,
+            values[2],
+        )
+        return header + filename + extra
+
+    @staticmethod
+    def _encode_filename(filename: str) -> Tuple[bytes, int]:
+        try:
+            return filename.encode("ascii"), 0
+        except UnicodeEncodeError:
+            return filename.encode("utf-8"), UTF8_FLAG
+
+    @staticmethod
+    def _encode_date_time(date_time: DateTime) -> Tuple[int, int]:
+        year, month, day, hour, minute, second = date_time
+        dos_time = hour << 11 | minute << 5 | second // 2
+        dos_date = (year - 1980) << 9 | month << 5 | day
+        return dos_time, dos_date
+
+
+def iter_folder(folder: Path, prefix: Optional[str] = None) -> Iterator[Entry]:
+    """Returns the files of a folder, in a stable order.
+
+    Args:
+        folder (Path): folder.
+        prefix (Optional[str], optional): folder of the entries inside the
+            archive. If None, the name of the folder is used. Defaults to None.
+
+    Yields:
+        Entry: path of the file and its name inside the archive.
+    """
+
+    prefix = folder.name if prefix is None else prefix
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        relative = Path(root).relative_to(folder)
+        for filename in sorted(files):
+            arcname = Path(prefix, relative, filename).as_posix()
+            yield Path(root, filename), arcname
+
+
+def compress_file(path: Path, arcname: str, level: int) -> CompressedEntry:
+    """Compresses a file. Called from the workers.
+
+    Args:
+        path (Path): file path.
+        arcname (str): name of the entry inside the archive.
+        level (int): compression level, from 0 (stored) to 9.
+
+    Returns:
+        CompressedEntry: header fields of the entry, with the sizes, the CRC
+            and the SHA-256 of the data read, and the compressed data.
+    """
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    digest = hashlib.sha256()
+    crc = size = 0
+
+    with ExitStack() as stack:
+        payload = stack.enter_context(SpooledTemporaryFile(max_size=SPOOL_SIZE))
+        with path.open("rb") as file_handler:
+            file_stat = os.fstat(file_handler.fileno())
+            while True:
+                chunk = file_handler.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                crc = zlib.crc32(chunk, crc)
+                digest.update(chunk)
+                size += len(chunk)
+                payload.write(compressor.compress(chunk) if level else chunk)
+        if level:
+            payload.write(compressor.flush())
+        # the file was read, the payload is closed by ZipWriter.write_entry
+        stack.pop_all()
+
+    # the size read is used, the file may have changed since the stat
+    info = EntryInfo(
+        filename=arcname,
+        date_time=get_date_time(file_stat.st_mtime),
+        external_attr=(stat.S_IFREG | stat.S_IMODE(file_stat.st_mode)) << 16,
+        compress_type=ZIP_DEFLATED if level else ZIP_STORED,
+        crc=crc,
+        file_size=size,
+        compress_size=payload.tell(),
+        mtime_ns=file_stat.st_mtime_ns,
+        digest=digest.hexdigest(),
+    )
+    payload.seek(0)
+    return CompressedEntry(info, payload)
+
+
+def compress_entries(
+    entries: Iterable[Entry], level: int, workers: int
+) -> Iterator[CompressedEntry]:
+    """Compresses the files on a pool of threads. The files removed or locked
+    are skipped.
+
+    Args:
+        entries (Iterable[Entry]): path and name inside the archive of each
+            file.
+        level (int): compression level, from 0 (stored) to 9.
+        workers (int): number of threads.
+
+    Yields:
+        CompressedEntry: compressed entries, in the order of `entries`.
+    """
+
+    def compress(entry: Entry) -> Optional[CompressedEntry]:
+        try:
+            return compress_file(entry[0], entry[1], level)
+        except (FileNotFoundError, PermissionError) as exc:
+            logger.warning("Skipping %r: %s", entry[0].as_posix(), exc)
+            return None
+
+    def compress_all() -> Iterator[Optional[CompressedEntry]]:
+        if workers == 1:
+            yield from map(compress, entries)
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending: deque = deque()
+            try:
+                for entry in entries:
+                    pending.append(executor.submit(compress, entry))
+                    if len(pending) >= 2 * workers:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                # if the archive failed, the files not started are skipped
+                for future in pending:
+                    future.cancel()
+
+    yield from filter(None, compress_all())
+
+
+def write_zip(
+    entries: Iterable[Entry],
+    zip_path: Path,
+    level: int = DEFAULT_LEVEL,
+    workers: int = DEFAULT_WORKERS,
+    on_entry: Optional[Callable[[EntryInfo], None]] = None,
+) -> ZipStats:
+    """Creates a zip archive, compressing the files in parallel. The archive is
+    written to a temporary file and moved into place once it's complete.
+
+    The files removed or locked while the archive is created are skipped.
+
+    Args:
+        entries (Iterable[Entry]): path and name inside the archive of each
+            file, in the order of the archive.
+        zip_path (Path): path of the archive.
+        level (int, optional): compression level, from 0 (stored) to 9.
+            Defaults to DEFAULT_LEVEL.
+        workers (int, optional): number of threads. Defaults to
+            DEFAULT_WORKERS.
+        on_entry (Optional[Callable[[EntryInfo], None]], optional): called
+            with the info of each entry once it's written. Defaults to None.
+
+    Raises:
+        ValueError: if the level or the number of workers is not valid.
+
+    Returns:
+        ZipStats: statistics of the archive.
+    """
+
+    if not 0 <= level <= 9:
+        raise ValueError(f"Invalid compression level: {level!r}")
+    if workers < 1:
+        raise ValueError(f"Invalid number of workers: {workers!r}")
+
+    start = time.perf_counter()
+    tmp_path = zip_path.with_name(zip_path.name + ".part")
+    files = bytes_in = 0
+
+    try:
+        with tmp_path.open("wb") as file_handler:
+            writer = ZipWriter(file_handler)
+            for entry in compress_entries(entries, level, workers):
+                writer.write_entry(entry)
+                files += 1
+                bytes_in += entry.info.file_size
+                if on_entry is not None:
+                    on_entry(entry.info)
+            writer.close()
+        os.replace(tmp_path, zip_path)
+    finally:
+        # only left if the archive is not complete
+        try:
+            tmp_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    stats = ZipStats(
+        files, bytes_in, zip_path.stat().st_size, time.perf_counter() - start
+    )
+    logger.debug(
+        "Zipped %d files (%d bytes) into %r in %.2fs",
+        stats.files,
+        stats.bytes_in,
+        zip_path.as_posix(),
+        stats.seconds,
+    )
+    return stats
@@ -0,0 +1,104 @@
+"""Benchmark of the backups, on a synthetic server of `SIZE` bytes.
+
+The region files are half random (already compressed chunks) and half
+repeated data, like the real ones. The native engine is timed with one
+thread and with `DEFAULT_WORKERS` threads, and compared with SFK when it's in
+the PATH. The throughput must be at least `MIN_THROUGHPUT` MB/s (override it
+with the `LIA_BACKUP_MIN_THROUGHPUT` environment variable on slow machines).
+
+An incremental backup after saving a single region file must be much faster
+than a full one.
+"""
+
+import os
+import subprocess
+import time
+from unittest import mock
+import zipfile
+
+import pytest
+
+from server_manager.src.backup import create_backup, is_sfk_installed
+from server_manager.src.zip_writer import DEFAULT_WORKERS, iter_folder, write_zip
+
+RUNS = 3
+SIZE = 64 << 20
+REGION_SIZE = 4 << 20
+MIN_THROUGHPUT = float(os.environ.get("LIA_BACKUP_MIN_THROUGHPUT", 5))
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    server_path = tmp_path_factory.mktemp("benchmark").joinpath("server")
+    region_path = server_path.joinpath("world/region")
+    region_path.mkdir(parents=True)
+    server_path.joinpath("server.properties").write_text("online-mode=true\n")
+
+    for index in range(SIZE // REGION_SIZE):
+        data = os.urandom(REGION_SIZE // 2) + bytes(range(256)) * (REGION_SIZE // 512)
+        region_path.joinpath(f"r.{index}.0.mca").write_bytes(data)
+    yield server_path
+
+
+def best_of(func, runs=RUNS):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+@pytest.mark.parametrize("workers", sorted({1, DEFAULT_WORKERS}))
+def test_native_throughput(server, tmp_path, workers):
+    zip_path = tmp_path.joinpath("backup.zip")
+    elapsed = best_of(lambda: write_zip(iter_folder(server), zip_path, 6, workers))
+    throughput = SIZE / elapsed / 1e6
+
+    print(f"\nnative backup ({workers} workers): {throughput:.1f} MB/s")
+    with zipfile.ZipFile(zip_path) as archive:
+        assert archive.testzip() is None
+    assert throughput > MIN_THROUGHPUT
+
+
+@pytest.mark.skipif(not is_sfk_installed(), reason="SFK is not installed")
+def test_sfk_throughput(server, tmp_path):
+    zip_path = tmp_path.joinpath("backup.zip")
+
+    def run_sfk():
+        if zip_path.exists():
+            zip_path.unlink()
+        args = ["sfk", "zip", zip_path.as_posix(), server.as_posix(), "-yes"]
+        subprocess.run(args, capture_output=True, check=True)
+
+    sfk_elapsed = best_of(run_sfk)
+    native_elapsed = best_of(lambda: write_zip(iter_folder(server), zip_path))
+
+    print(f"\nsfk backup: {SIZE / sfk_elapsed / 1e6:.1f} MB/s")
+    print(f"native backup: {SIZE / native_elapsed / 1e6:.1f} MB/s")
+    assert native_elapsed < sfk_elapsed * 1.5
+
+
+def test_incremental_backup(server, tmp_path):
+    backups = tmp_path.joinpath("backups")
+    backups.mkdir()
+    region = server.joinpath("world/region/r.0.0.mca")
+
+    with mock.patch("server_manager.src.backup.get_server_path") as gsp_m, mock.patch(
+        "server_manager.src.backup.get_backups_folder"
+    ) as gbf_m:
+        gsp_m.return_value, gbf_m.return_value = server, backups
+        full_elapsed = best_of(lambda: create_backup(full=True), runs=1)
+
+        def incremental():
+            region.write_bytes(os.urandom(REGION_SIZE))
+            stats = create_backup()
+            assert (stats.kind, stats.stored) == ("incremental", 1)
+
+        incremental_elapsed = best_of(incremental)
+
+    print(f"\nfull backup: {full_elapsed * 1000:.0f}ms")
+    print(f"incremental backup: {incremental_elapsed * 1000:.0f}ms")
+    assert incremental_elapsed < full_elapsed / 3
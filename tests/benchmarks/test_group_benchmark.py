@@ -0,0 +1,44 @@
+"""Benchmark of the grouping of the players done by the checks.
+
+100 000 players are grouped, with the uuids and the usernames shuffled.
+"""
+
+from collections import namedtuple
+import random
+import time
+
+from server_manager.src.checks import group_players, group_players_multi
+
+PLAYERS = 100_000
+
+Player = namedtuple("Player", "uuid username")
+
+
+def test_group_players():
+    rng = random.Random(0)
+    players = [Player(f"uuid-{i}", f"User{i % 50_000}") for i in range(PLAYERS)]
+    rng.shuffle(players)
+
+    start = time.perf_counter()
+    result = group_players(players)
+    elapsed = time.perf_counter() - start
+
+    print(f"\ngroup_players, {PLAYERS} players: {elapsed:.2f}s")
+    assert len(result) == 50_000
+    assert elapsed < 2
+
+
+def test_group_players_multi():
+    rng = random.Random(1)
+    players = [
+        Player(f"uuid-{i % 70_000}", f"User{i % 30_000}") for i in range(PLAYERS)
+    ]
+    rng.shuffle(players)
+
+    start = time.perf_counter()
+    result = group_players_multi(players)
+    elapsed = time.perf_counter() - start
+
+    print(f"\ngroup_players_multi, {PLAYERS} players: {elapsed:.2f}s")
+    assert len(result["uuid"]) == 70_000
+    assert elapsed < 3
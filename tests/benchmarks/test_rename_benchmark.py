@@ -0,0 +1,61 @@
+"""Benchmark of the rename phase of a mode switch on a slow filesystem.
+
+Each rename sleeps `LATENCY` seconds, like a round trip to networked storage.
+"""
+
+from pathlib import Path
+import time
+from unittest import mock
+
+import pytest
+
+from server_manager.src.journal import Journal, rename_step
+
+LATENCY = 0.005
+PLAYERS = 40
+
+
+@pytest.fixture
+def slow_rename():
+    rename = Path.rename
+
+    def latency_rename(self, target):
+        time.sleep(LATENCY)
+        return rename(self, target)
+
+    with mock.patch.object(Path, "rename", latency_rename):
+        yield
+
+
+def make_steps(folder: Path):
+    steps = []
+    for name in ("playerdata", "stats", "advancements"):
+        folder.joinpath(name).mkdir(parents=True)
+        for i in range(PLAYERS):
+            path = folder.joinpath(name, f"off-{i}.dat")
+            path.write_bytes(b"")
+            steps.append(rename_step(path, path.with_name(f"on-{i}.dat")))
+    return steps
+
+
+def run_switch(tmp_path, workers):
+    journal = Journal(tmp_path.joinpath(f"journal-{workers}"))
+    journal.begin(make_steps(tmp_path.joinpath(f"server-{workers}")))
+
+    start = time.perf_counter()
+    assert journal.apply(workers=workers) == 3 * PLAYERS
+    return time.perf_counter() - start
+
+
+@pytest.mark.usefixtures("slow_rename")
+def test_concurrent_renames_speedup(tmp_path):
+    sequential = run_switch(tmp_path, workers=1)
+    concurrent = run_switch(tmp_path, workers=8)
+
+    print(
+        f"\n{3 * PLAYERS} renames, {LATENCY * 1000:.0f}ms latency: "
+        f"sequential={sequential:.2f}s, concurrent={concurrent:.2f}s "
+        f"(x{sequential / concurrent:.1f})"
+    )
+    assert sequential >= 3 * PLAYERS * LATENCY
+    assert sequential / concurrent > 3
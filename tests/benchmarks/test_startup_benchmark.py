@@ -0,0 +1,117 @@
+"""Benchmark of the startup of the CLI, run in a fresh interpreter.
+
+Each command is run `RUNS` times and the fastest run is compared with
+`THRESHOLD` seconds (override it with the `LIA_STARTUP_THRESHOLD` environment
+variable on slow machines). Startup must not touch the disk either: no
+folder is created until a command needs it.
+
+The import-time profile (`python -X importtime`) of the simple commands is
+checked too: the modules of the heavy commands (and nbtlib) must not be
+imported.
+"""
+
+import os
+from pathlib import Path
+import subprocess
+import sys
+import time
+
+import pytest
+
+RUNS = 3
+THRESHOLD = float(os.environ.get("LIA_STARTUP_THRESHOLD", 1.5))
+ROOT = Path(__file__).parents[2]
+HEAVY_MODULES = (
+    "nbtlib",
+    "server_manager.commands.players",
+    "server_manager.commands.switch",
+    "server_manager.src.journal",
+    "server_manager.src.player",
+    "server_manager.src.set_mode",
+)
+PROFILE_TOP = 10
+TEST_DATA = ROOT.joinpath("tests/test_data/server.properties")
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def server(tmp_path):
+    server_path = tmp_path.joinpath("server")
+    server_path.mkdir()
+    server_path.joinpath("server.properties").write_text(TEST_DATA.read_text())
+
+    path_file = tmp_path.joinpath("config", "server-path.txt")
+    path_file.parent.mkdir()
+    path_file.write_text(server_path.as_posix())
+
+    env = dict(os.environ, TESTING="1")
+    env["SERVER-PATH-TESTING"] = path_file.as_posix()
+    yield tmp_path, env
+
+
+def run_cli(args, env, runs=RUNS, options=()):
+    cmd = [sys.executable, *options, "-m", "server_manager.main", *args]
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(
+            cmd, cwd=ROOT, env=env, capture_output=True, text=True, check=False
+        )
+        timings.append(time.perf_counter() - start)
+        assert result.returncode == 0, result.stderr
+    return min(timings), result
+
+
+def get_import_profile(args, env):
+    """Returns the modules imported by a command, with their cumulative import
+    time in microseconds."""
+
+    _, result = run_cli(args, env, runs=1, options=("-X", "importtime"))
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            profile[module.strip()] = int(cumulative)
+    return profile
+
+
+def test_help_startup(server):
+    folder, env = server
+    elapsed, result = run_cli(["--help"], env)
+    output = result.stdout
+
+    print(f"\nlia --help: {elapsed * 1000:.0f}ms")
+    assert "Usage:" in output
+    assert elapsed < THRESHOLD
+    assert sorted(x.name for x in folder.iterdir()) == ["config", "server"]
+
+
+def test_properties_get_startup(server):
+    folder, env = server
+    elapsed, result = run_cli(["properties", "get", "online-mode"], env)
+    output = result.stdout
+
+    print(f"\nlia properties get: {elapsed * 1000:.0f}ms")
+    assert output == "online-mode=True\n"
+    assert elapsed < THRESHOLD
+    assert sorted(x.name for x in folder.iterdir()) == ["config", "server"]
+
+
+@pytest.mark.parametrize(
+    "args", [["--help"], ["properties", "get", "online-mode"], ["online-mode", "get"]]
+)
+def test_import_profile(server, args):
+    _, env = server
+    profile = get_import_profile(args, env)
+
+    top = sorted(profile.items(), key=lambda x: x[1], reverse=True)[:PROFILE_TOP]
+    print(f"\nlia {' '.join(args)}: {len(profile)} modules imported")
+    for module, cumulative in top:
+        print(f"  {cumulative / 1000:7.1f}ms  {module}")
+
+    assert "server_manager.src.utils" in profile
+    imported = [x for x in profile if x.startswith(HEAVY_MODULES)]
+    assert not imported
@@ -1,3 +1,8 @@
+from unittest import mock
+
+import pytest
+
+
 def test_import_colorama():
     from colorama import Fore
 
@@ -8,3 +13,19 @@ def test_import_nbtlib():
     from nbtlib import File
 
     assert File
+
+
+def test_lazy_version():
+    import server_manager
+
+    with mock.patch("server_manager._version.get_versions") as gv_m:
+        server_manager.__dict__.pop("__version__", None)
+        gv_m.return_value = {"version": "1.2.3"}
+
+        assert server_manager.__version__ == "1.2.3"
+        assert server_manager.__version__ == "1.2.3"
+        gv_m.assert_called_once_with()
+    server_manager.__dict__.pop("__version__")
+
+    with pytest.raises(AttributeError):
+        server_manager.invalid  # pylint: disable=pointless-statement
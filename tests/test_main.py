@@ -1,33 +1,54 @@
+from collections import namedtuple
+from datetime import timedelta
+from pathlib import Path
 from unittest import mock
 
+import click
 from click.testing import CliRunner
 import pytest
 
 from server_manager import __version__
-from server_manager.main import main, setup_logging
-from server_manager.src.exceptions import CheckError
-
-
-@mock.patch("logging.FileHandler")
-@mock.patch("server_manager.main.get_backups_folder")
+from server_manager.main import (
+    get_log_path,
+    main,
+    online_mode_command,
+    setup_logging,
+)
+from server_manager.src.backup_chain import DEFAULT_FULL_EVERY, BackupStats
+from server_manager.src.exceptions import (
+    BackupError,
+    CheckError,
+    JournalError,
+    PlanError,
+    QuarantineError,
+)
+from server_manager.src.journal import SwitchStats
+from server_manager.src.player import Coords
+from server_manager.src.stat_cache import CacheInfo
+from server_manager.src.zip_writer import DEFAULT_LEVEL, DEFAULT_WORKERS
+
+
+@mock.patch("server_manager.main.DeferredFileHandler")
 @mock.patch("logging.basicConfig")
-def test_setup_logging(log_config_m, gsp_m, file_h_m):
+def test_setup_logging(log_config_m, file_h_m):
     fmt = "[%(asctime)s] %(levelname)s - %(name)s:%(lineno)s - %(message)s"
-    filename = gsp_m.return_value.joinpath.return_value
 
     setup_logging()
 
-    gsp_m.assert_called_once_with()
-    gsp_m.return_value.joinpath.assert_called_once_with("lia-manager.log")
-
-    file_h_m.assert_called_once_with(filename, "at", "utf8")
-
+    file_h_m.assert_called_once_with(get_log_path)
     log_config_m.assert_called_once_with(
         level=10, format=fmt, handlers=[file_h_m.return_value]
     )
     setup_logging_m.call = False
 
 
+@mock.patch("server_manager.main.get_backups_folder")
+def test_get_log_path(gbf_m):
+    assert get_log_path() == gbf_m.return_value.joinpath.return_value
+    gbf_m.return_value.joinpath.assert_called_once_with("lia-manager.log")
+    setup_logging_m.call = False
+
+
 @pytest.fixture(autouse=True)
 def setup_logging_m():
     setup_logging_m.call = True
@@ -51,6 +72,17 @@ def test_help(arg):
     setup_logging_m.call = False
 
 
+@pytest.mark.parametrize("group", [main, online_mode_command], ids=["main", "online"])
+def test_lazy_commands(group):
+    ctx = click.Context(group)
+    for name, (_, short_help) in group.lazy_subcommands.items():
+        command = group.get_command(ctx, name)
+        assert command.name == name
+        assert command.get_short_help_str(100) == short_help
+
+    setup_logging_m.call = False
+
+
 def test_version():
     runner = CliRunner()
     result = runner.invoke(main, ["--version"])
@@ -61,17 +93,110 @@ def test_version():
     setup_logging_m.call = False
 
 
-@mock.patch("server_manager.main.create_backup")
-def test_backup(backup_m):
+@mock.patch("server_manager.commands.backup.create_sfk_backup")
+@mock.patch("server_manager.commands.backup.create_backup")
+def test_backup(backup_m, sfk_backup_m):
+    backup_m.return_value = BackupStats(
+        "2026.01.02.03.04.05", "incremental", 10, 3, 2_000_000, 1_000_000, 0.5
+    )
     runner = CliRunner()
     result = runner.invoke(main, ["backup"])
     assert result.exit_code == 0
+    assert result.output == (
+        "Backup 2026.01.02.03.04.05 (incremental): stored 3 of 10 files "
+        "(2.0 MB -> 1.0 MB) in 0.50s\n"
+    )
+    backup_m.assert_called_once_with(
+        level=DEFAULT_LEVEL,
+        workers=DEFAULT_WORKERS,
+        full=False,
+        full_every=DEFAULT_FULL_EVERY,
+    )
+    sfk_backup_m.assert_not_called()
+
+
+@mock.patch("server_manager.commands.backup.create_backup")
+def test_backup_options(backup_m):
+    backup_m.return_value = BackupStats("id", "full", 10, 10, 0, 0, 0)
+    runner = CliRunner()
+    args = ["backup", "--level", "9", "--workers", "2", "--full", "--full-every", "3"]
+    result = runner.invoke(main, args)
+    assert result.exit_code == 0
+    backup_m.assert_called_once_with(level=9, workers=2, full=True, full_every=3)
+
+
+@mock.patch("server_manager.commands.backup.create_backup")
+def test_backup_full_every_env(backup_m):
+    backup_m.return_value = BackupStats("id", "full", 10, 10, 0, 0, 0)
+    runner = CliRunner(env={"LIA_BACKUP_FULL_EVERY": "0"})
+    result = runner.invoke(main, ["backup"])
+    assert result.exit_code == 0
+    assert backup_m.call_args[1]["full_every"] == 0
+
+
+@pytest.mark.parametrize(
+    "args", [["--level", "10"], ["--workers", "0"], ["--full-every", "-1"]]
+)
+@mock.patch("server_manager.commands.backup.create_backup")
+def test_backup_invalid_options(backup_m, args):
+    runner = CliRunner()
+    result = runner.invoke(main, ["backup", *args])
+    assert result.exit_code == 2
+    backup_m.assert_not_called()
+
+
+@mock.patch("server_manager.commands.backup.create_sfk_backup")
+@mock.patch("server_manager.commands.backup.create_backup")
+def test_backup_sfk(backup_m, sfk_backup_m):
+    runner = CliRunner()
+    result = runner.invoke(main, ["backup", "--sfk"])
+    assert result.exit_code == 0
     assert result.output == ""
-    backup_m.assert_called_once_with()
+    sfk_backup_m.assert_called_once_with()
+    backup_m.assert_not_called()
+
+
+@pytest.mark.parametrize("empty", [True, False])
+@mock.patch("server_manager.commands.backup.list_backups")
+def test_print_backups(list_backups_m, empty):
+    manifest = mock.MagicMock(
+        id="2026.01.02.03.04.05", kind="full", files={"a": 0, "b": 0}, stored=["a"]
+    )
+    list_backups_m.return_value = [] if empty else [manifest]
+    runner = CliRunner()
+    result = runner.invoke(main, ["backup", "list"])
+
+    assert result.exit_code == 0
+    if empty:
+        assert result.output == "<no backups found>\n"
+    else:
+        assert result.output == " - 2026.01.02.03.04.05 (full, 1 of 2 files stored)\n"
+
+
+@pytest.mark.parametrize("is_ok", [True, False])
+@mock.patch("server_manager.commands.backup.create_backup")
+@mock.patch("server_manager.commands.backup.restore_backup")
+def test_restore_backup(restore_m, backup_m, is_ok):
+    if is_ok:
+        restore_m.return_value = 3
+    else:
+        restore_m.side_effect = BackupError("Backup 'x' not found")
+
+    runner = CliRunner()
+    result = runner.invoke(main, ["backup", "restore", "x", "--target", "out"])
+
+    if is_ok:
+        assert result.exit_code == 0
+        assert result.output == "Restored 3 files of backup 'x'\n"
+    else:
+        assert result.exit_code == 1
+        assert "BackupError: Backup 'x' not found" in result.output
+    restore_m.assert_called_once_with("x", Path("out"))
+    backup_m.assert_not_called()
 
 
 @pytest.mark.parametrize("mode", [True, False])
-@mock.patch("server_manager.main.PropertiesManager.get_property")
+@mock.patch("server_manager.commands.online_mode.PropertiesManager.get_property")
 def test_get_online_mode(get_prop_m, mode):
     get_prop_m.return_value = mode
     runner = CliRunner()
@@ -83,25 +208,146 @@ def test_get_online_mode(get_prop_m, mode):
     get_prop_m.assert_called_once_with("online_mode")
 
 
+@pytest.mark.parametrize("full_check", [True, False])
 @pytest.mark.parametrize("is_ok", [True, False])
-@mock.patch("server_manager.main.set_mode")
-def test_set_online_mode(set_mode_m, is_ok):
+@mock.patch("server_manager.commands.switch.set_mode")
+def test_set_online_mode(set_mode_m, is_ok, full_check):
+    set_mode_m.return_value = SwitchStats(steps=30, seconds=1.5)
     if not is_ok:
         set_mode_m.side_effect = CheckError("a", "b", "c", 25)
 
+    args = ["online-mode", "set", "true"]
+    if full_check:
+        args += ["--full-check", "--workers", "2"]
+
     runner = CliRunner()
-    result = runner.invoke(main, ["online-mode", "set", "true"])
+    result = runner.invoke(main, args)
+    set_mode_m.assert_called_once_with(
+        new_mode=True,
+        full_check=full_check,
+        workers=2 if full_check else 8,
+        live=False,
+        restart_command=None,
+    )
 
     if is_ok:
         assert result.exit_code == 0
-        assert result.output == "Set online-mode to True\n"
+        assert result.output == (
+            "Set online-mode to True\nApplied 30 steps in 1.50s (20.0 steps/s)\n"
+        )
     else:
         assert result.exit_code == 1
         assert result.output == "Error: CheckError: a, b, c, 25\n"
 
 
+@pytest.mark.parametrize("is_ok", [True, False])
+@mock.patch("server_manager.commands.switch.plan_mode")
+def test_set_online_mode_plan(plan_mode_m, is_ok):
+    plan = plan_mode_m.return_value
+    plan.to_json.return_value = '{"plan": true}'
+    if not is_ok:
+        plan.check.side_effect = PlanError("Invalid mode switch plan: x")
+
+    runner = CliRunner()
+    result = runner.invoke(main, ["online-mode", "set", "true", "--plan"])
+
+    plan_mode_m.assert_called_once_with(new_mode=True)
+    if is_ok:
+        assert result.exit_code == 0
+        assert result.output == '{"plan": true}\n'
+    else:
+        assert result.exit_code == 1
+        assert result.output.startswith('{"plan": true}\n')
+        assert "Invalid mode switch plan: x" in result.output
+
+
+@mock.patch("server_manager.commands.switch.set_mode")
+@mock.patch("server_manager.commands.switch.apply_plan")
+def test_set_online_mode_apply_plan(apply_plan_m, set_mode_m):
+    apply_plan_m.return_value = SwitchStats(steps=3, seconds=0)
+
+    runner = CliRunner()
+    result = runner.invoke(main, ["online-mode", "set", "false", "--apply-plan"])
+
+    apply_plan_m.assert_called_once_with(
+        new_mode=False, workers=8, live=False, restart_command=None
+    )
+    set_mode_m.assert_not_called()
+    assert result.exit_code == 0
+    assert result.output == (
+        "Set online-mode to False\nApplied 3 steps in 0.00s (3.0 steps/s)\n"
+    )
+
+
+@mock.patch("server_manager.commands.switch.apply_plan")
+@mock.patch("server_manager.commands.switch.plan_mode")
+def test_set_online_mode_plan_exclusive(plan_mode_m, apply_plan_m):
+    runner = CliRunner()
+    args = ["online-mode", "set", "true", "--plan", "--apply-plan"]
+    result = runner.invoke(main, args)
+
+    assert result.exit_code == 1
+    assert "mutually exclusive" in result.output
+    plan_mode_m.assert_not_called()
+    apply_plan_m.assert_not_called()
+
+
+@mock.patch("server_manager.commands.switch.set_mode")
+def test_set_online_mode_live(set_mode_m):
+    set_mode_m.return_value = SwitchStats(steps=3, seconds=1)
+
+    runner = CliRunner()
+    args = ["online-mode", "set", "true", "--live", "--restart-command", "./start"]
+    result = runner.invoke(main, args)
+
+    assert result.exit_code == 0
+    set_mode_m.assert_called_once_with(
+        new_mode=True,
+        full_check=False,
+        workers=8,
+        live=True,
+        restart_command="./start",
+    )
+
+
+@mock.patch("server_manager.commands.switch.plan_mode")
+def test_set_online_mode_live_plan(plan_mode_m):
+    runner = CliRunner()
+    result = runner.invoke(main, ["online-mode", "set", "true", "--plan", "--live"])
+
+    assert result.exit_code == 1
+    assert "--plan can't be used with --live" in result.output
+    plan_mode_m.assert_not_called()
+
+
+@pytest.mark.parametrize("rollback", [True, False])
+@mock.patch("server_manager.commands.switch.recover")
+def test_recover_online_mode(recover_m, rollback):
+    recover_m.return_value = 7
+    args = ["online-mode", "recover"] + (["--rollback"] if rollback else [])
+
+    runner = CliRunner()
+    result = runner.invoke(main, args)
+
+    recover_m.assert_called_once_with(rollback=rollback, workers=8)
+    assert result.exit_code == 0
+    action = "Reverted" if rollback else "Applied"
+    assert result.output == f"{action} 7 pending steps of the interrupted switch\n"
+
+
+@mock.patch("server_manager.commands.switch.recover")
+def test_recover_online_mode_no_journal(recover_m):
+    recover_m.side_effect = JournalError("There is no interrupted mode switch")
+
+    runner = CliRunner()
+    result = runner.invoke(main, ["online-mode", "recover"])
+
+    assert result.exit_code == 1
+    assert "There is no interrupted mode switch" in result.output
+
+
 @pytest.mark.parametrize("empty", [True, False])
-@mock.patch("server_manager.main.get_players_data")
+@mock.patch("server_manager.commands.players.get_players_data")
 def test_get_players_data(gpd_m, empty):
     if empty:
         gpd_m.return_value = []
@@ -120,20 +366,14 @@ def test_get_players_data(gpd_m, empty):
         assert result.output == " - p1\n - p2\n - p3\n"
 
 
+@pytest.mark.parametrize("no_cache", [False, True])
 @pytest.mark.parametrize("empty", [True, False])
-@mock.patch("server_manager.main.get_mode")
-@mock.patch("server_manager.main.Player.generate")
-def test_list_players(player_gen_m, get_mode_m, empty):
-    class Player:
-        def __init__(self, username: str, uuid: str):
-            self.username = username
-            self.uuid = uuid
-
-        def get_inventory(self):
-            return self.username
-
-        def get_ender_chest(self):
-            return self.uuid
+@mock.patch("server_manager.src.listing.get_player_summaries")
+@mock.patch("server_manager.src.listing.get_mode")
+@mock.patch("server_manager.commands.players.Player.generate")
+def test_list_players(player_gen_m, get_mode_m, gps_m, empty, no_cache):
+    Player = namedtuple("Player", "username uuid")
+    Summary = namedtuple("Summary", "inventory ender_chest")
 
     if empty:
         player_gen_m.return_value = []
@@ -143,17 +383,24 @@ def test_list_players(player_gen_m, get_mode_m, empty):
             Player("p2", "id-2"),
             Player("this is player 3", "333-333-333"),
         ]
+        gps_m.return_value = [Summary(10, 6), Summary(2, 4), Summary(16, 11)]
         get_mode_m.side_effect = [True, False, True]
 
+    args = ["players", "list-server"]
+    if no_cache:
+        args.append("--no-cache")
+
     runner = CliRunner()
-    result = runner.invoke(main, ["players", "list-server"])
+    result = runner.invoke(main, args)
 
     player_gen_m.assert_called_once_with()
 
     if empty:
         get_mode_m.assert_not_called()
+        gps_m.assert_not_called()
     else:
         get_mode_m.assert_called()
+        gps_m.assert_called_once_with(player_gen_m.return_value, use_cache=not no_cache)
 
     if empty:
         expected = "<no players found in the server archives>\n"
@@ -169,26 +416,121 @@ def test_list_players(player_gen_m, get_mode_m, empty):
     assert result.output == expected
 
 
+@mock.patch("server_manager.commands.players.format_table")
+@mock.patch("server_manager.commands.players.get_player_rows")
+@mock.patch("server_manager.commands.players.Player.generate")
+def test_list_players_options(player_gen_m, gpr_m, format_table_m):
+    format_table_m.return_value = ["<line-1>", "<line-2>"]
+    args = ["players", "list-server", "--fields", "username, Inventory"]
+    args += ["--sort", "inventory", "--top", "20"]
+
+    runner = CliRunner()
+    result = runner.invoke(main, args)
+
+    gpr_m.assert_called_once_with(
+        player_gen_m.return_value,
+        ["username", "inventory"],
+        use_cache=True,
+        sort="inventory",
+        top=20,
+    )
+    format_table_m.assert_called_once_with(
+        ["username", "inventory"], gpr_m.return_value
+    )
+    assert result.exit_code == 0
+    assert result.output == "<line-1>\n<line-2>\n"
+
+
+@mock.patch("server_manager.commands.players.Player.generate")
+def test_list_players_invalid_field(player_gen_m):
+    runner = CliRunner()
+    result = runner.invoke(main, ["players", "list-server", "--fields", "invalid"])
+
+    player_gen_m.assert_not_called()
+    assert result.exit_code == 1
+    assert "Invalid field 'invalid'" in result.output
+
+
+@pytest.mark.parametrize("fail_fast", [True, False])
 @pytest.mark.parametrize("force", [True, False])
-@mock.patch("server_manager.main.remove_players_safely")
-@mock.patch("server_manager.main.Player.generate")
-def test_reset_players(player_gen_m, rps_m, force):
+@mock.patch("server_manager.commands.players.remove_players_safely")
+@mock.patch("server_manager.commands.players.Player.generate")
+def test_reset_players(player_gen_m, rps_m, force, fail_fast):
     args = ["players", "reset"]
     if force:
         args.append("--force")
+    if fail_fast:
+        args += ["--fail-fast", "--workers", "4"]
 
     runner = CliRunner()
     result = runner.invoke(main, args)
 
     player_gen_m.assert_called_once_with()
-    rps_m.assert_called_once_with(player_gen_m.return_value, force=force)
+    rps_m.assert_called_once_with(
+        player_gen_m.return_value,
+        force=force,
+        workers=4 if fail_fast else 1,
+        fail_fast=fail_fast,
+    )
 
     assert result.exit_code == 0
     assert result.output == ""
 
 
+@pytest.mark.parametrize("empty", [True, False])
+@mock.patch("server_manager.commands.players.list_quarantines")
+def test_print_quarantines(list_q_m, empty):
+    quarantine = mock.MagicMock(id="2026.01.02.03.04.05", players=[{}, {}])
+    list_q_m.return_value = [] if empty else [quarantine]
+
+    runner = CliRunner()
+    result = runner.invoke(main, ["players", "list-quarantine"])
+
+    assert result.exit_code == 0
+    if empty:
+        assert result.output == "<no quarantines found>\n"
+    else:
+        assert result.output == " - 2026.01.02.03.04.05 (2 players)\n"
+
+
+@pytest.mark.parametrize("is_ok", [True, False])
+@mock.patch("server_manager.commands.players.Quarantine.load")
+def test_restore_quarantine(load_m, is_ok):
+    load_m.return_value.restore.return_value = 3
+    if not is_ok:
+        load_m.side_effect = QuarantineError("Quarantine 'x' not found")
+
+    runner = CliRunner()
+    result = runner.invoke(main, ["players", "restore-quarantine", "x"])
+
+    load_m.assert_called_once_with("x")
+    if is_ok:
+        assert result.exit_code == 0
+        assert result.output == "Restored 3 players from quarantine 'x'\n"
+    else:
+        assert result.exit_code == 1
+        assert "Quarantine 'x' not found" in result.output
+
+
+@pytest.mark.parametrize("older_than", [None, 7])
+@mock.patch("server_manager.commands.players.prune_quarantines")
+def test_prune_quarantine(prune_m, older_than):
+    prune_m.return_value = ["a", "b"]
+    args = ["players", "prune-quarantine", "--keep", "2"]
+    if older_than is not None:
+        args += ["--older-than", str(older_than)]
+
+    runner = CliRunner()
+    result = runner.invoke(main, args)
+
+    max_age = timedelta(days=older_than) if older_than is not None else None
+    prune_m.assert_called_once_with(keep=2, max_age=max_age)
+    assert result.exit_code == 0
+    assert result.output == "Pruned quarantine 'a'\nPruned quarantine 'b'\n"
+
+
 @pytest.mark.parametrize("fail", [False, True])
-@mock.patch("server_manager.main.Player.generate")
+@mock.patch("server_manager.commands.players.Player.generate")
 def test_show_player(player_gen_m, fail):
     jeb = mock.MagicMock(username="Jeb")
     notch = mock.MagicMock(username="Notch")
@@ -231,7 +573,7 @@ def test_show_player(player_gen_m, fail):
 
 
 @pytest.mark.parametrize("exc", (ValueError("yes"), None))
-@mock.patch("server_manager.main.set_default_properties")
+@mock.patch("server_manager.commands.properties.set_default_properties")
 def test_set_defaults(sdp_m, exc):
     if exc:
         sdp_m.side_effect = exc
@@ -247,7 +589,7 @@ def test_set_defaults(sdp_m, exc):
         assert result.output == ""
 
 
-@mock.patch("server_manager.main.PropertiesManager")
+@mock.patch("server_manager.commands.properties.PropertiesManager")
 def test_list_properties(prop_man_m):
     prop_man_m.general_map = {"prop-a": "value-a", "prop-b": "value-b"}
     prop_man_m.get_property.side_effect = prop_man_m.general_map.__getitem__
@@ -263,8 +605,20 @@ def test_list_properties(prop_man_m):
     assert result.output == "prop-a=value-a\nprop-b=value-b\n"
 
 
+@mock.patch("server_manager.commands.properties.PropertiesManager")
+def test_list_properties_all(prop_man_m):
+    prop_man_m.get_properties_file.return_value = {"a": "1", "b-c": "x"}
+    prop_man_m.get_property.side_effect = {"a": 1, "b-c": "x"}.get
+
+    runner = CliRunner()
+    result = runner.invoke(main, ["properties", "list", "--all"])
+
+    assert result.exit_code == 0
+    assert result.output == "a=1\nb-c=x\n"
+
+
 @pytest.mark.parametrize("error", [None, ValueError("fail")])
-@mock.patch("server_manager.main.PropertiesManager.get_property")
+@mock.patch("server_manager.commands.properties.PropertiesManager.get_property")
 def test_get_property(get_prop_m, error):
     get_prop_m.return_value = "some-value"
     if error:
@@ -284,7 +638,7 @@ def test_get_property(get_prop_m, error):
 
 
 @pytest.mark.parametrize("error", [None, ValueError("failed")])
-@mock.patch("server_manager.main.PropertiesManager.set_property")
+@mock.patch("server_manager.commands.properties.PropertiesManager.set_property")
 def test_set_property(set_prop_m, error):
     if error:
         set_prop_m.side_effect = error
@@ -302,9 +656,55 @@ def test_set_property(set_prop_m, error):
         assert result.output == ""
 
 
-@mock.patch("server_manager.main.File.gen_files")
-@mock.patch("server_manager.main.get_server_path")
-@mock.patch("server_manager.main.File.memory")
+@mock.patch("server_manager.commands.properties.PropertiesManager.get_property")
+@mock.patch("server_manager.commands.properties.PropertiesManager.set_properties")
+def test_set_properties(set_props_m, get_prop_m):
+    set_props_m.return_value = ["max-players", "difficulty"]
+    get_prop_m.side_effect = {"max-players": 10, "difficulty": "hard"}.get
+
+    runner = CliRunner()
+    args = ["properties", "set", "max-players=10", "difficulty=hard", "motd=a=b"]
+    result = runner.invoke(main, args)
+
+    set_props_m.assert_called_once_with(
+        {"max-players": "10", "difficulty": "hard", "motd": "a=b"}
+    )
+    assert result.exit_code == 0
+    assert result.output == "max-players=10\ndifficulty=hard\n"
+
+
+@mock.patch("server_manager.commands.properties.PropertiesManager.set_properties")
+def test_set_properties_invalid_assignment(set_props_m):
+    runner = CliRunner()
+    result = runner.invoke(main, ["properties", "set", "max-players=10", "motd"])
+
+    set_props_m.assert_not_called()
+    assert result.exit_code == 1
+    assert result.output == "Error: ValueError: 'motd' must be PROPERTY=VALUE\n"
+
+
+@mock.patch("server_manager.commands.debug.PropertiesManager.cache_info")
+@mock.patch("server_manager.commands.debug.PropertiesManager.get_property")
+def test_print_cache_info(get_prop_m, cache_info_m):
+    cache_info_m.return_value = {
+        "server.properties": CacheInfo(4, 1, 1),
+        "properties": CacheInfo(2, 3, 3),
+    }
+
+    runner = CliRunner()
+    result = runner.invoke(main, ["debug", "cache"])
+
+    get_prop_m.assert_called_once_with("online_mode")
+    assert result.exit_code == 0
+    assert result.output == (
+        "server.properties: 4 hits, 1 misses, 1 cached\n"
+        "properties: 2 hits, 3 misses, 3 cached\n"
+    )
+
+
+@mock.patch("server_manager.commands.debug.File.gen_files")
+@mock.patch("server_manager.commands.debug.get_server_path")
+@mock.patch("server_manager.commands.debug.File.memory")
 def test_print_files(memory_m, gsp_m, gen_files_m):
     memory = {"a": ["a1"], "b": ["b1", "b2"], "c": ["c1", "c2", "c3"]}
     memory_m.__getitem__.side_effect = lambda x: memory[x]
@@ -321,7 +721,7 @@ def test_print_files(memory_m, gsp_m, gen_files_m):
     assert result.output == "a1\nb1\nb2\nc1\nc2\nc3\n"
 
 
-@mock.patch("server_manager.main.update_whitelist")
+@mock.patch("server_manager.commands.whitelist.update_whitelist")
 def test_update_whitelist(update_wl_m):
     runner = CliRunner()
     result = runner.invoke(main, ["update-whitelist"])
@@ -330,3 +730,67 @@ def test_update_whitelist(update_wl_m):
 
     assert result.exit_code == 0
     assert result.output == ""
+
+
+@pytest.mark.parametrize("empty", [True, False])
+@mock.patch("server_manager.commands.players.PositionIndex")
+@mock.patch("server_manager.commands.players.Player.generate")
+def test_players_near(player_gen_m, index_m, empty):
+    Position = namedtuple("Position", "player coords distance")
+    index = index_m.build.return_value
+    if empty:
+        index.near.return_value = []
+    else:
+        index.near.return_value = [
+            Position(mock.MagicMock(username="a"), Coords("overworld", 1, 2, 3), 0),
+            Position(
+                mock.MagicMock(username="b"), Coords("overworld", 4.5, 5, -6.75), 5.2
+            ),
+        ]
+
+    runner = CliRunner()
+    args = ["players", "near", "1", "2", "3", "--radius", "10", "--dim", "the_end"]
+    result = runner.invoke(main, args)
+
+    index_m.build.assert_called_once_with(player_gen_m.return_value)
+    index.near.assert_called_once_with(1.0, 2.0, 3.0, radius=10.0, dim="the_end")
+
+    assert result.exit_code == 0
+    if empty:
+        assert result.output == "<no players found>\n"
+    else:
+        assert result.output == (
+            " - a (overworld 1.0 2.0 3.0) distance=0.0\n"
+            " - b (overworld 4.5 5.0 -6.8) distance=5.2\n"
+        )
+
+
+@pytest.mark.parametrize("empty", [True, False])
+@mock.patch("server_manager.commands.players.PositionIndex")
+@mock.patch("server_manager.commands.players.Player.generate")
+def test_players_by_region(player_gen_m, index_m, empty):
+    index = index_m.build.return_value
+    if empty:
+        index.by_region.return_value = {}
+    else:
+        index.by_region.return_value = {
+            ("overworld", "r.0.0.mca"): [
+                mock.MagicMock(username="b"),
+                mock.MagicMock(username="a"),
+            ],
+            ("the_end", "r.-1.2.mca"): [mock.MagicMock(username="c")],
+        }
+
+    runner = CliRunner()
+    result = runner.invoke(main, ["players", "regions"])
+
+    index_m.build.assert_called_once_with(player_gen_m.return_value)
+    index.by_region.assert_called_once_with(dim=None)
+
+    assert result.exit_code == 0
+    if empty:
+        assert result.output == "<no players found>\n"
+    else:
+        assert result.output == (
+            " - overworld/r.0.0.mca: a, b\n - the_end/r.-1.2.mca: c\n"
+        )
@@ -1,15 +1,24 @@
+import os
 from subprocess import CalledProcessError
 from unittest import mock
+import zipfile
 
 import pytest
+from server_manager.src import backup
 from server_manager.src.backup import (
     create_backup,
+    create_sfk_backup,
     get_backup_zipfile_path,
     get_backups_folder,
+    get_latest_manifest,
     is_sfk_installed,
+    list_backups,
+    restore_backup,
     run_sfk,
 )
-from server_manager.src.exceptions import SFKError, SFKNotFoundError
+from server_manager.src.backup_chain import FULL, INCREMENTAL, Manifest
+from server_manager.src.exceptions import BackupError, SFKError, SFKNotFoundError
+from server_manager.src.zip_writer import ZipStats, compress_file
 
 
 class TestIsSfkInstalled:
@@ -148,7 +157,7 @@ class TestRunSfk:
         assert caplog.records[0].levelname == "DEBUG"
 
 
-class TestCreateBackup:
+class TestCreateSfkBackup:
     @pytest.fixture(autouse=True)
     def mocks(self):
         self.isi_m = mock.patch("server_manager.src.backup.is_sfk_installed").start()
@@ -159,7 +168,7 @@ class TestCreateBackup:
     def test_ok(self):
         self.isi_m.return_value = True
 
-        create_backup()
+        create_sfk_backup()
 
         self.isi_m.assert_called_once_with()
         self.run_sfk_m.assert_called_once_with()
@@ -168,7 +177,150 @@ class TestCreateBackup:
         self.isi_m.return_value = False
 
         with pytest.raises(SFKNotFoundError, match="SFK is not installed"):
-            create_backup()
+            create_sfk_backup()
 
         self.isi_m.assert_called_once_with()
         self.run_sfk_m.assert_not_called()
+
+
+class TestCreateBackup:
+    @pytest.fixture(autouse=True)
+    def mocks(self, tmp_path):
+        self.server = tmp_path.joinpath("server")
+        self.server.joinpath("world").mkdir(parents=True)
+        self.server.joinpath("server.properties").write_text("online-mode=true\n")
+        self.server.joinpath("world/level.dat").write_bytes(b"level")
+        self.backups = tmp_path.joinpath("backups")
+        self.backups.mkdir()
+
+        self.gsp_m = mock.patch("server_manager.src.backup.get_server_path").start()
+        self.gsp_m.return_value = self.server
+        self.gbf_m = mock.patch("server_manager.src.backup.get_backups_folder").start()
+        self.gbf_m.return_value = self.backups
+        yield
+        mock.patch.stopall()
+
+    def read_backup(self, stats):
+        manifest = Manifest.load(self.backups, stats.backup_id)
+        with zipfile.ZipFile(manifest.archive_path) as archive:
+            return manifest, sorted(archive.namelist())
+
+    def modify(self, relpath, data):
+        path = self.server.joinpath(relpath)
+        mtime_ns = path.stat().st_mtime_ns if path.exists() else 0
+        path.write_bytes(data)
+        os.utime(path, ns=(mtime_ns + 10**9, mtime_ns + 10**9))
+
+    def test_full(self, caplog):
+        caplog.set_level(10)
+        stats = create_backup(level=9, workers=2)
+
+        assert stats.kind == FULL
+        assert (stats.files, stats.stored) == (2, 2)
+        manifest, names = self.read_backup(stats)
+        assert names == ["server/server.properties", "server/world/level.dat"]
+        assert manifest.root == "server"
+        assert sorted(manifest.stored) == ["server.properties", "world/level.dat"]
+
+        assert caplog.records[0].msg == (
+            "Creating %s backup of %r to %r (level=%d, workers=%d)"
+        )
+        assert caplog.records[0].args[0] == FULL
+        assert caplog.records[0].args[3:] == (9, 2)
+        assert caplog.records[-1].args[:4] == (stats.backup_id, FULL, 2, 2)
+        assert caplog.records[-1].levelname == "INFO"
+
+    def test_incremental(self):
+        full = create_backup()
+        self.modify("world/level.dat", b"changed")
+        self.modify("world/new.dat", b"new")
+        self.server.joinpath("server.properties").unlink()
+
+        stats = create_backup()
+        assert stats.kind == INCREMENTAL
+        assert (stats.files, stats.stored) == (2, 2)
+        manifest, names = self.read_backup(stats)
+        assert names == ["server/world/level.dat", "server/world/new.dat"]
+        assert manifest.parent == full.backup_id
+        assert manifest.chain_length == 1
+
+        stats = create_backup()
+        assert (stats.kind, stats.files, stats.stored) == (INCREMENTAL, 2, 0)
+        assert self.read_backup(stats)[1] == []
+
+    def test_full_every(self):
+        kinds = [create_backup(full_every=2).kind for _ in range(5)]
+        assert kinds == [FULL, INCREMENTAL, INCREMENTAL, FULL, INCREMENTAL]
+
+        assert create_backup(full=True).kind == FULL
+        assert create_backup(full_every=0).kind == FULL
+
+    def test_full_reuses_digests(self):
+        create_backup()
+        with mock.patch("server_manager.src.backup_chain.get_file_digest") as gfd_m:
+            stats = create_backup(full=True)
+        gfd_m.assert_not_called()
+        assert (stats.kind, stats.stored) == (FULL, 2)
+        assert len(self.read_backup(stats)[1]) == 2
+
+    @mock.patch("server_manager.src.backup.write_zip")
+    def test_skipped_file(self, write_zip_m):
+        def write_zip(entries, zip_path, *args, on_entry):
+            path, arcname = list(entries)[0]
+            info, payload = compress_file(path, arcname, 6)
+            payload.close()
+            with zipfile.ZipFile(zip_path, "w") as archive:
+                archive.write(path, arcname)
+            on_entry(info)
+            return ZipStats(1, info.file_size, 0, 0)
+
+        write_zip_m.side_effect = write_zip
+        stats = create_backup()
+        manifest, names = self.read_backup(stats)
+        assert names == ["server/server.properties"]
+        assert list(manifest.files) == ["server.properties"]
+
+    def test_saved_during_backup(self, tmp_path):
+        scan_folder = backup.scan_folder
+
+        def save_level(*args):
+            # the region is saved again once it has been hashed
+            result = scan_folder(*args)
+            self.modify("world/level.dat", b"saved")
+            return result
+
+        with mock.patch("server_manager.src.backup.scan_folder", save_level):
+            stats = create_backup()
+
+        record = Manifest.load(self.backups, stats.backup_id).files["world/level.dat"]
+        level = self.server.joinpath("world/level.dat")
+        assert (record.size, record.mtime_ns) == (5, level.stat().st_mtime_ns)
+
+        assert restore_backup(stats.backup_id, tmp_path.joinpath("restore")) == 2
+        assert tmp_path.joinpath("restore/world/level.dat").read_bytes() == b"saved"
+
+        stats = create_backup()
+        assert (stats.files, stats.stored) == (2, 0)
+
+    def test_restore(self, tmp_path):
+        first = create_backup()
+        self.modify("world/level.dat", b"changed")
+        create_backup()
+
+        assert [x.id for x in list_backups()] == [first.backup_id, mock.ANY]
+        assert get_latest_manifest().kind == INCREMENTAL
+
+        assert restore_backup(first.backup_id, tmp_path.joinpath("first")) == 2
+        restored = tmp_path.joinpath("first/world/level.dat")
+        assert restored.read_bytes() == b"level"
+
+        latest = get_latest_manifest()
+        assert restore_backup(latest.id) == 2
+        restored = self.backups.joinpath(f"restore-{latest.id}/world/level.dat")
+        assert restored.read_bytes() == b"changed"
+
+    def test_no_backups(self):
+        assert get_latest_manifest() is None
+        assert list_backups() == []
+        with pytest.raises(BackupError, match="not found"):
+            restore_backup("x")
@@ -0,0 +1,288 @@
+import hashlib
+import json
+import os
+from unittest import mock
+import zipfile
+
+import pytest
+
+from server_manager.src.backup_chain import (
+    FULL,
+    INCREMENTAL,
+    BackupStats,
+    FileRecord,
+    Manifest,
+    extract_file,
+    get_file_digest,
+    list_manifests,
+    restore_chain,
+    scan_folder,
+)
+from server_manager.src.exceptions import BackupError
+
+# pylint: disable=redefined-outer-name
+
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = tmp_path.joinpath("backups")
+    folder.mkdir()
+    yield folder
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = tmp_path.joinpath("server")
+    server.joinpath("world").mkdir(parents=True)
+    server.joinpath("server.properties").write_bytes(b"online-mode=true\n")
+    server.joinpath("world/level.dat").write_bytes(b"level")
+    yield server
+
+
+def make_backup(folder, files, parent=None, stored=None, root="server"):
+    """Creates a backup storing `stored` (all the files by default)."""
+
+    manifest = Manifest.create(folder, parent)
+    manifest.root = root
+    stored = files if stored is None else stored
+    with zipfile.ZipFile(manifest.archive_path, "w") as archive:
+        for relpath in stored:
+            archive.writestr(manifest.get_arcname(relpath), files[relpath])
+
+    for relpath, data in files.items():
+        if relpath in stored:
+            backup_id = manifest.id
+        else:
+            backup_id = parent.files[relpath].backup_id
+        manifest.files[relpath] = FileRecord(len(data), 10**18, sha256(data), backup_id)
+    manifest.save()
+    return manifest
+
+
+def test_get_file_digest(tmp_path):
+    path = tmp_path.joinpath("file")
+    path.write_bytes(b"x" * 3000)
+    with mock.patch("server_manager.src.backup_chain.CHUNK_SIZE", 1000):
+        assert get_file_digest(path) == sha256(b"x" * 3000)
+
+
+def test_backup_stats():
+    stats = BackupStats("id", FULL, 3, 2, 1000, 500, 0.5)
+    assert stats.throughput == 2000
+    assert BackupStats("id", FULL, 3, 0, 0, 22, 0).throughput == 0
+
+
+class TestManifest:
+    def test_create(self, folder):
+        full = Manifest.create(folder)
+        assert (full.kind, full.parent, full.chain_length) == (FULL, None, 0)
+        assert full.archive_path == folder.joinpath(f"LIA-backup-{full.id}.zip")
+        assert full.manifest_path == folder.joinpath(f"LIA-backup-{full.id}.json")
+
+        full.save()
+        incremental = Manifest.create(folder, full)
+        assert incremental.kind == INCREMENTAL
+        assert incremental.parent == full.id
+        assert incremental.chain_length == 1
+        assert incremental.id != full.id
+
+    @mock.patch("server_manager.src.backup_chain.datetime")
+    def test_create_same_timestamp(self, dt_m, folder):
+        dt_m.now.return_value.strftime.return_value = "2026.01.02.03.04.05"
+        dt_m.now.return_value.isoformat.return_value = "2026-01-02T03:04:05"
+        ids = []
+        for _ in range(3):
+            manifest = Manifest.create(folder)
+            manifest.save()
+            ids.append(manifest.id)
+        assert ids == ["2026.01.02.03.04.05", "2026.01.02.03.04.05-1"] + [
+            "2026.01.02.03.04.05-2"
+        ]
+
+    def test_save_load(self, folder):
+        manifest = Manifest.create(folder)
+        manifest.root = "server"
+        manifest.files["a/b"] = FileRecord(1, 2, "ab", manifest.id)
+        manifest.files["c"] = FileRecord(3, 4, "cd", "old")
+        manifest.save()
+
+        loaded = Manifest.load(folder, manifest.id)
+        assert (loaded.id, loaded.kind, loaded.parent) == (manifest.id, FULL, None)
+        assert loaded.root == "server"
+        assert loaded.created == manifest.created
+        assert loaded.files == manifest.files
+        assert loaded.stored == ["a/b"]
+        assert loaded.get_arcname("a/b") == "server/a/b"
+        assert not list(folder.glob("*.tmp"))
+
+    def test_load_errors(self, folder):
+        with pytest.raises(BackupError, match="Backup 'x' not found"):
+            Manifest.load(folder, "x")
+
+        folder.joinpath("LIA-backup-x.json").write_text("{")
+        with pytest.raises(BackupError, match="Invalid manifest"):
+            Manifest.load(folder, "x")
+
+        folder.joinpath("LIA-backup-x.json").write_text(json.dumps({"version": 9}))
+        with pytest.raises(BackupError, match="Unsupported manifest version"):
+            Manifest.load(folder, "x")
+
+
+def test_list_manifests(folder, caplog):
+    assert list_manifests(folder) == []
+
+    first = make_backup(folder, {"a": b"a"})
+    second = make_backup(folder, {"a": b"a"}, first, stored=[])
+    folder.joinpath("LIA-backup-2020.01.01.00.00.zip").write_bytes(b"sfk")
+    folder.joinpath("LIA-backup-broken.json").write_text("{")
+
+    manifests = list_manifests(folder)
+    assert [x.id for x in manifests] == [first.id, second.id]
+    assert caplog.records[0].msg == "Ignoring backup %r: %s"
+
+
+def test_list_manifests_suffix(folder):
+    for backup_id in ("2026.01.02.03.04.05-10", "2026.01.02.03.04.05-2"):
+        Manifest(folder, backup_id, FULL).save()
+    Manifest(folder, "2026.01.02.03.04.05", FULL).save()
+    ids = [x.id for x in list_manifests(folder)]
+    assert ids == [
+        "2026.01.02.03.04.05",
+        "2026.01.02.03.04.05-2",
+        "2026.01.02.03.04.05-10",
+    ]
+
+
+class TestScanFolder:
+    def test_no_previous(self, server):
+        records, changed = scan_folder(server, workers=2)
+        assert changed == ["server.properties", "world/level.dat"]
+        record = records["world/level.dat"]
+        assert record.size == 5
+        assert record.digest == sha256(b"level")
+        assert record.backup_id is None
+        assert record.mtime_ns == server.joinpath("world/level.dat").stat().st_mtime_ns
+
+    def test_previous(self, server, folder):
+        records, _ = scan_folder(server)
+        previous = Manifest.create(folder)
+        previous.files = {x: r._replace(backup_id="old") for x, r in records.items()}
+        previous.files["deleted"] = FileRecord(1, 1, "x", "old")
+
+        level = server.joinpath("world/level.dat")
+        stat = level.stat()
+        os.utime(level, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        server.joinpath("world/new.dat").write_bytes(b"new")
+        server.joinpath("server.properties").write_bytes(b"online-mode=false\n")
+
+        with mock.patch("server_manager.src.backup_chain.get_file_digest") as gfd_m:
+            gfd_m.side_effect = get_file_digest
+            records, changed = scan_folder(server, previous)
+        assert gfd_m.call_count == 3
+
+        assert changed == ["server.properties", "world/new.dat"]
+        assert sorted(records) == ["server.properties", "world/level.dat"] + [
+            "world/new.dat"
+        ]
+        # touched, the content is still in the old backup
+        assert records["world/level.dat"].backup_id == "old"
+        assert records["world/level.dat"].mtime_ns == stat.st_mtime_ns + 10**9
+        assert records["server.properties"].backup_id is None
+
+    def test_unchanged(self, server, folder):
+        records, _ = scan_folder(server)
+        previous = Manifest.create(folder)
+        previous.files = {x: r._replace(backup_id="old") for x, r in records.items()}
+
+        with mock.patch("server_manager.src.backup_chain.get_file_digest") as gfd_m:
+            records, changed = scan_folder(server, previous)
+        gfd_m.assert_not_called()
+        assert changed == []
+        assert records == previous.files
+
+    def test_vanished(self, server, caplog):
+        with mock.patch("server_manager.src.backup_chain.get_file_digest") as gfd_m:
+            gfd_m.side_effect = [FileNotFoundError("gone"), "digest"]
+            records, changed = scan_folder(server, workers=1)
+        assert changed == ["world/level.dat"]
+        assert list(records) == ["world/level.dat"]
+        assert caplog.records[0].msg == "Skipping %r: %s"
+
+
+class TestExtractFile:
+    @pytest.fixture
+    def archive(self, tmp_path):
+        path = tmp_path.joinpath("archive.zip")
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("server/a", b"data")
+        with zipfile.ZipFile(path) as archive:
+            yield archive
+
+    def test_ok(self, archive, tmp_path):
+        dst = tmp_path.joinpath("out/a")
+        extract_file(
+            archive, "server/a", dst, FileRecord(4, 10**18, sha256(b"data"), "x")
+        )
+        assert dst.read_bytes() == b"data"
+        assert dst.stat().st_mtime_ns == 10**18
+
+    def test_missing(self, archive, tmp_path):
+        record = FileRecord(4, 10**18, sha256(b"data"), "x")
+        with pytest.raises(BackupError, match="'server/b' not found"):
+            extract_file(archive, "server/b", tmp_path.joinpath("b"), record)
+
+    def test_checksum(self, archive, tmp_path):
+        record = FileRecord(4, 10**18, sha256(b"other"), "x")
+        with pytest.raises(BackupError, match="Checksum mismatch of 'server/a'"):
+            extract_file(archive, "server/a", tmp_path.joinpath("a"), record)
+
+
+class TestRestoreChain:
+    @pytest.fixture
+    def chain(self, folder):
+        full = make_backup(folder, {"a": b"a1", "b": b"b1", "c": b"c1"})
+        files = {"a": b"a2", "b": b"b1", "d": b"d2"}
+        second = make_backup(folder, files, full, stored=["a", "d"])
+        files = {"a": b"a2", "b": b"b1", "d": b"d3"}
+        third = make_backup(folder, files, second, stored=["d"])
+        yield full, second, third
+
+    @pytest.mark.parametrize(
+        "index,expected",
+        [
+            (0, {"a": b"a1", "b": b"b1", "c": b"c1"}),
+            (1, {"a": b"a2", "b": b"b1", "d": b"d2"}),
+            (2, {"a": b"a2", "b": b"b1", "d": b"d3"}),
+        ],
+    )
+    def test_restore(self, chain, tmp_path, index, expected):
+        target = tmp_path.joinpath("restored")
+        assert restore_chain(chain[index], target) == len(expected)
+        restored = {x.name: x.read_bytes() for x in target.iterdir()}
+        assert restored == expected
+
+    def test_target_not_empty(self, chain, tmp_path):
+        target = tmp_path.joinpath("restored")
+        target.mkdir()
+        target.joinpath("x").touch()
+        with pytest.raises(BackupError, match="is not empty"):
+            restore_chain(chain[2], target)
+
+    def test_missing_parent(self, chain, tmp_path):
+        chain[1].manifest_path.unlink()
+        with pytest.raises(BackupError, match="Backup .* not found"):
+            restore_chain(chain[2], tmp_path.joinpath("restored"))
+
+    def test_missing_archive(self, chain, tmp_path):
+        chain[0].archive_path.unlink()
+        with pytest.raises(BackupError, match="Archive of backup .* not found"):
+            restore_chain(chain[1], tmp_path.joinpath("restored"))
+
+    def test_broken_chain(self, chain, tmp_path):
+        chain[2].files["x"] = FileRecord(1, 1, "x", "unknown")
+        with pytest.raises(BackupError, match="is broken, 1 files not found"):
+            restore_chain(chain[2], tmp_path.joinpath("restored"))
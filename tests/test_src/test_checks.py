@@ -1,66 +1,213 @@
 from collections import namedtuple
+import random
+import time
 from unittest import mock
 
 import pytest
 from colorama.ansi import Fore
 from server_manager.src.checks import (
     PlayerChecks,
+    ValidationReport,
     check_players,
     check_plugin,
     group_players,
+    group_players_multi,
+    analyse_players,
     remove_players_safely,
+    validate_players,
 )
 from server_manager.src.exceptions import CheckError
 
+Player = namedtuple("Player", "username online")
+Summary = namedtuple("Summary", "ender_chest inventory")
+
+
+class TestValidatePlayers:
+    @pytest.fixture(autouse=True)
+    def mocks(self):
+        root = "server_manager.src.checks."
+        self.get_prop_m = mock.patch(root + "PropertiesManager.get_property").start()
+        self.get_prop_m.return_value = True
+        self.gps_m = mock.patch(root + "get_player_summaries").start()
+        self.gps_m.side_effect = lambda players, use_cache: [
+            Summary(ender_chest=i, inventory=2 * i) for i in range(len(players))
+        ]
+        self.vc_m = mock.patch(root + "VerdictCache").start()
+        self.verdicts = self.vc_m.return_value
+        self.verdicts.get.return_value = None
+        yield
+        mock.patch.stopall()
+
+    def test_ok(self):
+        players = [Player("a", True), Player("b", True)]
+        report = validate_players(players)
+
+        assert report.passed is True
+        assert report.server_mode is True
+        assert report.mode_mismatches == []
+        assert report.duplicates == {}
+        assert report.item_counts == {players[0]: (0, 0), players[1]: (1, 2)}
+        assert report.non_empty == [players[1]]
+
+        self.get_prop_m.assert_called_once_with("online_mode")
+        self.gps_m.assert_called_once_with(players, use_cache=True)
+
+    def test_fail(self):
+        players = [
+            Player("a", True),
+            Player("b", False),
+            Player("c", True),
+            Player("a", False),
+        ]
+        report = validate_players(players, use_cache=False)
+
+        assert report.passed is False
+        assert report.mode_mismatches == [players[1], players[3]]
+        assert report.duplicates == {"a": [players[0], players[3]]}
+        assert report.non_empty == players[1:]
+
+        self.get_prop_m.assert_called_once_with("online_mode")
+        self.gps_m.assert_called_once_with(players, use_cache=False)
+
+    def test_only_duplicates(self):
+        players = [Player("a", True), Player("a", True)]
+        report = validate_players(players)
+
+        assert report.passed is False
+        assert report.mode_mismatches == []
+        assert report.duplicates == {"a": players}
+
+    def test_reuse_verdicts(self):
+        players = [Player("a", True), Player("b", True), Player("c", False)]
+        self.verdicts.get.side_effect = [(3, 4), None, None]
+        report = validate_players(players)
+
+        assert report.item_counts == {
+            players[0]: (3, 4),
+            players[1]: (0, 0),
+            players[2]: (1, 2),
+        }
+        assert report.mode_mismatches == [players[2]]
+        self.gps_m.assert_called_once_with(players[1:], use_cache=True)
+        self.verdicts.set.assert_has_calls(
+            [mock.call(players[1], (0, 0)), mock.call(players[2], (1, 2))]
+        )
+        assert self.verdicts.set.call_count == 2
+        self.verdicts.save.assert_called_once_with()
+
+    def test_all_verdicts_cached(self):
+        players = [Player("a", True), Player("b", True)]
+        self.verdicts.get.return_value = (0, 0)
+        report = validate_players(players)
+
+        assert report.item_counts == {players[0]: (0, 0), players[1]: (0, 0)}
+        self.gps_m.assert_called_once_with([], use_cache=True)
+        self.verdicts.set.assert_not_called()
+
+    def test_full_check(self):
+        players = [Player("a", True), Player("b", True)]
+        self.verdicts.entries = {"x": "y"}
+        report = validate_players(players, full_check=True)
+
+        assert report.item_counts == {players[0]: (0, 0), players[1]: (1, 2)}
+        assert self.verdicts.entries == {}
+        self.gps_m.assert_called_once_with(players, use_cache=False)
+        assert self.verdicts.set.call_count == 2
+        self.verdicts.save.assert_called_once_with()
+
 
 class TestCheckPlayers:
     @pytest.fixture(autouse=True)
     def mocks(self, caplog):
         caplog.set_level(10, "server_manager.src.checks")
         self.caplog = caplog
-        self.plchecks_m = mock.patch("server_manager.src.checks.PlayerChecks").start()
+        root = "server_manager.src.checks."
+        self.vp_m = mock.patch(root + "validate_players").start()
+        self.rps_m = mock.patch(root + "remove_players_safely").start()
+        self.players = [Player("a", True), Player("b", False), Player("a", False)]
         yield
         records = caplog.get_records(when="call")
         assert records[0].message == "Checking players"
-        assert len(records) == 2
 
         mock.patch.stopall()
 
     def test_check_players_ok(self):
-        self.plchecks_m.check_online_mode.return_value = True
-        self.plchecks_m.check_duplicates.return_value = True
-        players = mock.MagicMock()
+        self.vp_m.return_value = ValidationReport(True)
 
-        result = check_players(players)
+        result = check_players(self.players)
         assert result is True
 
-        self.plchecks_m.check_online_mode.assert_called_once_with(players)
-        self.plchecks_m.check_duplicates.assert_called_once_with(players)
+        self.vp_m.assert_called_once_with(self.players, full_check=False)
+        self.rps_m.assert_not_called()
+        assert len(self.caplog.records) == 2
         assert self.caplog.records[1].message == "Player checks passed"
 
-    def test_check_players_online_fail(self):
-        self.plchecks_m.check_online_mode.return_value = False
-        self.plchecks_m.check_duplicates.return_value = True
-        players = mock.MagicMock()
+    @pytest.mark.parametrize("removed", [True, False])
+    def test_check_players_online_fail(self, removed):
+        report = ValidationReport(True, mode_mismatches=[self.players[1]])
+        self.vp_m.return_value = report
+        self.rps_m.return_value = removed
 
-        with pytest.raises(CheckError, match="Online mode check failed"):
-            check_players(players)
-
-        self.plchecks_m.check_online_mode.assert_called_once_with(players)
-        self.plchecks_m.check_duplicates.assert_not_called()
-        assert self.caplog.records[1].message == "Online mode check failed"
+        if removed:
+            assert check_players(self.players) is False
+        else:
+            with pytest.raises(CheckError, match="Online mode check failed"):
+                check_players(self.players)
+
+        self.rps_m.assert_called_once_with(self.players, item_counts=report.item_counts)
+        records = self.caplog.records
+        assert len(records) == 3
+        assert records[1].levelname == "ERROR"
+        msg = "These players are using a different mode than the server"
+        assert msg in records[1].msg
+        assert records[1].args == (False, True, [self.players[1]])
+
+        if removed:
+            assert records[2].message == "Players removed"
+        else:
+            assert records[2].levelname == "CRITICAL"
+            assert records[2].message == "Online mode check failed"
+
+    @pytest.mark.parametrize("removed", [True, False])
+    def test_check_players_duplicates_fail(self, removed):
+        duplicates = {"a": [self.players[0], self.players[2]]}
+        report = ValidationReport(True, duplicates=duplicates)
+        self.vp_m.return_value = report
+        self.rps_m.return_value = removed
+
+        if removed:
+            assert check_players(self.players) is False
+        else:
+            with pytest.raises(CheckError, match="Duplicates check failed"):
+                check_players(self.players)
+
+        self.rps_m.assert_called_once_with(self.players, item_counts=report.item_counts)
+        records = self.caplog.records
+        assert len(records) == 3
+        assert records[1].levelname == "ERROR"
+        msg = "Check result negative: these players have more than one online mode:"
+        assert msg in records[1].msg
+        assert records[1].args == {"a": 2}
+
+        if removed:
+            assert records[2].message == "Players removed"
+        else:
+            assert records[2].message == "Duplicates check failed"
 
-    def test_check_players_duplicates_fail(self):
-        self.plchecks_m.check_online_mode.return_value = True
-        self.plchecks_m.check_duplicates.return_value = False
-        players = mock.MagicMock()
+    def test_check_players_both_fail(self):
+        duplicates = {"a": [self.players[0], self.players[2]]}
+        report = ValidationReport(
+            True, mode_mismatches=self.players[1:], duplicates=duplicates
+        )
+        self.vp_m.return_value = report
+        self.rps_m.return_value = False
 
-        with pytest.raises(CheckError, match="Duplicates check failed"):
-            check_players(players)
+        with pytest.raises(CheckError, match="Online mode check failed"):
+            check_players(self.players)
 
-        self.plchecks_m.check_online_mode.assert_called_once_with(players)
-        self.plchecks_m.check_duplicates.assert_called_once_with(players)
-        assert self.caplog.records[1].message == "Duplicates check failed"
+        # Players are removed only once
+        self.rps_m.assert_called_once_with(self.players, item_counts=report.item_counts)
+        assert len(self.caplog.records) == 4
 
 
 class TestPlayerChecks:
@@ -89,6 +236,7 @@ class TestPlayerChecks:
 
         if fail:
             assert result == self.rps_m.return_value
+            self.rps_m.assert_called_once_with(players, workers=1, fail_fast=False)
             assert len(caplog.records) == 1
             assert caplog.records[0].levelname == "ERROR"
             msg = "These players are using a different mode than the server"
@@ -114,10 +262,11 @@ class TestPlayerChecks:
         self.gp_m.return_value = groups
         players = mock.MagicMock()
 
-        result = PlayerChecks.check_duplicates(players)
+        result = PlayerChecks.check_duplicates(players, workers=4, fail_fast=True)
 
         if fail:
             assert result == self.rps_m.return_value
+            self.rps_m.assert_called_once_with(players, workers=4, fail_fast=True)
             assert len(caplog.records) == 1
             assert caplog.records[0].levelname == "ERROR"
             msg = "Check result negative: these players have more than one online mode:"
@@ -128,6 +277,17 @@ class TestPlayerChecks:
             assert len(caplog.records) == 0
 
 
+@mock.patch("server_manager.src.checks.remove_players_safely")
+def test_check_duplicates_unsorted(rps_m):
+    Player = namedtuple("Player", "username online")
+    players = [Player("a", True), Player("b", True), Player("a", False)]
+
+    result = PlayerChecks.check_duplicates(players)
+
+    assert result == rps_m.return_value
+    rps_m.assert_called_once_with(players, workers=1, fail_fast=False)
+
+
 class TestCheckPlugin:
     @pytest.fixture(autouse=True)
     def mocks(self):
@@ -205,22 +365,98 @@ class TestGroupPlayers:
             assert players == [x for x in self.players if x.uuid == uuid]
             assert len(players) == 5 - int(uuid)
 
+    def test_unsorted_input(self):
+        players = list(reversed(self.players)) + [self.Player(5, "u1")]
+        result = dict(group_players(players))
+
+        assert list(result) == ["u4", "u3", "u2", "u1"]
+        assert result["u1"] == [self.Player(1, "u1"), self.Player(5, "u1")]
+        assert len(result["u4"]) == 4
+
+    def test_large_input(self):
+        rng = random.Random(0)
+        Player = namedtuple("Player", "uuid username")
+        nusers = 5000
+        players = [Player(f"uuid-{i}", f"User{i % nusers}") for i in range(10000)]
+        rng.shuffle(players)
+
+        result = group_players(players)
+        assert len(result) == nusers
+        assert all(len(group) == 2 for _, group in result)
+        assert sum(len(group) for _, group in result) == len(players)
+
+
+class TestGroupPlayersMulti:
+    @classmethod
+    def setup_class(cls):
+        cls.Player = namedtuple("Player", "uuid username")
+        cls.players = [
+            cls.Player("id-1", "Notch"),
+            cls.Player("id-2", "jeb_"),
+            cls.Player("id-3", "notch"),
+            cls.Player("id-1", "Dinnerbone"),
+        ]
+
+    def test_default_keys(self):
+        result = group_players_multi(self.players)
+        assert list(result) == ["username", "username_lower", "uuid"]
+
+        assert len(result["username"]) == 4
+        assert result["username_lower"]["notch"] == [
+            self.players[0],
+            self.players[2],
+        ]
+        assert result["uuid"]["id-1"] == [self.players[0], self.players[3]]
+        assert result["uuid"]["id-2"] == [self.players[1]]
+
+    def test_custom_keys(self):
+        keys = {"first": lambda x: x.username[0].lower()}
+        result = group_players_multi(self.players, keys=keys)
+        assert list(result) == ["first"]
+        assert result["first"] == {
+            "n": [self.players[0], self.players[2]],
+            "j": [self.players[1]],
+            "d": [self.players[3]],
+        }
+
+    def test_large_input(self):
+        rng = random.Random(1)
+        players = [
+            self.Player(f"uuid-{i % 7000}", f"User{i % 3000}") for i in range(10000)
+        ]
+        rng.shuffle(players)
+
+        result = group_players_multi(players)
+        assert len(result["username"]) == 3000
+        assert len(result["username_lower"]) == 3000
+        assert len(result["uuid"]) == 7000
+
+
+@pytest.fixture
+def quarantine_m():
+    with mock.patch("server_manager.src.checks.Quarantine") as quarantine_m:
+        yield quarantine_m.create.return_value.__enter__.return_value
+
+
+def quarantined(quarantine_m):
+    return [call[0][0] for call in quarantine_m.add.call_args_list]
+
 
 class TestRemovePlayersSafely:
     @pytest.fixture(autouse=True)
-    def mocks(self):
-        # self.plyayer_m = mock.patch("server_manager.src.checks.Player")
+    def mocks(self, quarantine_m):
+        self.quarantine_m = quarantine_m
         yield
         mock.patch.stopall()
 
     def test_ok(self, caplog, capsys):
         caplog.set_level(10, "server_manager.src.checks")
         player = mock.MagicMock(username="p", online=True)
-        player.get_ender_chest.return_value = []
-        player.get_inventory.return_value = []
+        player.get_summary.return_value = Summary(ender_chest=0, inventory=0)
         players = [player] * 5
 
-        remove_players_safely(players)
+        assert remove_players_safely(players) is True
+        assert quarantined(self.quarantine_m) == players
         captured = capsys.readouterr()
 
         assert len(caplog.records) == 10
@@ -235,16 +471,16 @@ class TestRemovePlayersSafely:
 
         assert captured.out == ""
         assert captured.err == ""
+        assert player.get_summary.call_count == 5
 
     def test_fail_inventory(self, caplog, capsys):
         caplog.set_level(10, "server_manager.src.checks")
         player = mock.MagicMock(username="p", online=True)
-        player.get_ender_chest.return_value = []
-        player.get_inventory.return_value = ["a", "b"]
+        player.get_summary.return_value = Summary(ender_chest=0, inventory=2)
         player.to_extended_repr.return_value = "<ext-repr>"
         players = [player] * 5
 
-        remove_players_safely(players)
+        assert remove_players_safely(players) is False
         captured = capsys.readouterr()
 
         assert len(caplog.records) == 10
@@ -268,12 +504,11 @@ class TestRemovePlayersSafely:
     def test_fail_ender_chest(self, caplog, capsys):
         caplog.set_level(10, "server_manager.src.checks")
         player = mock.MagicMock(username="p", online=True)
-        player.get_ender_chest.return_value = ["a", "b", "c"]
-        player.get_inventory.return_value = []
+        player.get_summary.return_value = Summary(ender_chest=3, inventory=0)
         player.to_extended_repr.return_value = "<ext-repr>"
         players = [player] * 5
 
-        remove_players_safely(players)
+        assert remove_players_safely(players) is False
 
         captured = capsys.readouterr()
         assert len(caplog.records) == 10
@@ -299,12 +534,11 @@ class TestRemovePlayersSafely:
     def test_fail_both(self, caplog):
         caplog.set_level(10, "server_manager.src.checks")
         player = mock.MagicMock(username="p", online=True)
-        player.get_ender_chest.return_value = ["a", "b", "c"]
-        player.get_inventory.return_value = ["a", "b", "c", "d", "e"]
+        player.get_summary.return_value = Summary(ender_chest=3, inventory=5)
         player.to_extended_repr.return_value = "<ext-repr>"
         players = [player] * 5
 
-        remove_players_safely(players)
+        assert remove_players_safely(players) is False
 
         assert len(caplog.records) == 10
         records = iter(caplog.records)
@@ -319,18 +553,17 @@ class TestRemovePlayersSafely:
                 == "Can't remove player %s\nItems: ender_chest=%d, inventory=%d"
             )
             assert rec2.args == ("<ext-repr>", 3, 5)
-        player.remove.assert_not_called()
+        self.quarantine_m.add.assert_not_called()
 
     def test_ok_force(self, caplog, capsys):
         caplog.set_level(10, "server_manager.src.checks")
         player = mock.MagicMock(username="p", online=True)
-        player.get_ender_chest.return_value = ["a", "b", "c"]
-        player.get_inventory.return_value = ["a", "b", "c", "d", "e"]
+        player.get_summary.return_value = Summary(ender_chest=3, inventory=5)
         player.to_extended_repr.return_value = "<ext-repr>"
 
         players = [player] * 5
 
-        remove_players_safely(players, force=True)
+        assert remove_players_safely(players, force=True) is True
 
         captured = capsys.readouterr()
         assert len(caplog.records) == 15
@@ -354,3 +587,155 @@ class TestRemovePlayersSafely:
             assert rec3.message == "Removed player p [True]"
 
         assert captured.err == ""
+
+    def test_item_counts(self, caplog):
+        caplog.set_level(10, "server_manager.src.checks")
+        empty = mock.MagicMock(username="empty", online=True)
+        full = mock.MagicMock(username="full", online=True)
+        unknown = mock.MagicMock(username="unknown", online=False)
+        unknown.get_summary.return_value = Summary(ender_chest=0, inventory=0)
+        item_counts = {empty: (0, 0), full: (1, 0)}
+
+        result = remove_players_safely([empty, full, unknown], item_counts=item_counts)
+
+        assert result is False
+        empty.get_summary.assert_not_called()
+        full.get_summary.assert_not_called()
+        unknown.get_summary.assert_called_once_with()
+
+        assert quarantined(self.quarantine_m) == [empty, unknown]
+
+
+def make_players(counts):
+    players = []
+    for i, (ender_chest, inventory) in enumerate(counts):
+        player = mock.MagicMock(username=f"p{i}", online=True)
+        player.get_summary.return_value = Summary(ender_chest, inventory)
+        player.to_extended_repr.return_value = f"<p{i}>"
+        players.append(player)
+    return players
+
+
+class TestAnalysePlayers:
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_collect_all(self, workers):
+        counts = [(0, 0), (1, 0), (0, 0), (0, 2), (3, 3)] * 4
+        players = make_players(counts)
+
+        result = analyse_players(players, workers=workers)
+
+        assert result == counts
+        for player in players:
+            player.get_summary.assert_called_once_with()
+
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_known_counts(self, workers):
+        players = make_players([(0, 0), (0, 0)])
+        result = analyse_players(players, {players[0]: (5, 5)}, workers=workers)
+
+        assert result == [(5, 5), (0, 0)]
+        players[0].get_summary.assert_not_called()
+        players[1].get_summary.assert_called_once_with()
+
+    def test_fail_fast_sequential(self):
+        players = make_players([(0, 0), (0, 1), (0, 0), (2, 0)])
+        result = analyse_players(players, fail_fast=True)
+
+        assert result == [(0, 0), (0, 1), None, None]
+        players[2].get_summary.assert_not_called()
+        players[3].get_summary.assert_not_called()
+
+    def test_fail_fast_known_counts(self):
+        players = make_players([(0, 0), (0, 0)])
+        result = analyse_players(players, {players[1]: (1, 0)}, fail_fast=True)
+
+        assert result == [None, (1, 0)]
+        players[0].get_summary.assert_not_called()
+
+    def test_fail_fast_pool(self):
+        counts = [(0, 0)] * 5 + [(1, 1)] + [(0, 0)] * 200
+        players = make_players(counts)
+
+        def slow_summary():
+            time.sleep(0.005)
+            return Summary(0, 0)
+
+        for player in players[6:]:
+            player.get_summary.side_effect = slow_summary
+
+        result = analyse_players(players, workers=2, fail_fast=True)
+
+        assert result[5] == (1, 1)
+        assert None in result
+        assert sum(player.get_summary.called for player in players) < len(players)
+
+    def test_fail_fast_pool_deterministic(self):
+        players = make_players([(0, 0), (0, 1), (0, 0), (2, 0)])
+
+        def slow_summary():
+            time.sleep(0.05)
+            return Summary(0, 1)
+
+        # the last offender is found first
+        players[1].get_summary.side_effect = slow_summary
+        result = analyse_players(players, workers=4, fail_fast=True)
+
+        assert result == [(0, 0), (0, 1), None, None]
+
+    def test_invalid_workers(self):
+        with pytest.raises(ValueError, match="workers must be at least 1"):
+            analyse_players([], workers=0)
+
+
+class TestRemovePlayersSafelyParallel:
+    @pytest.fixture(autouse=True)
+    def mocks(self, quarantine_m):
+        self.quarantine_m = quarantine_m
+
+    @pytest.mark.parametrize("workers", [1, 8])
+    def test_collect_all_deterministic(self, workers, caplog, capsys):
+        caplog.set_level(10, "server_manager.src.checks")
+        counts = [(0, 0), (1, 0), (0, 0), (0, 2)] * 5
+        players = make_players(counts)
+
+        assert remove_players_safely(players, workers=workers) is False
+
+        messages = [record.getMessage() for record in caplog.records]
+        expected = []
+        for i, (ender_chest, inventory) in enumerate(counts):
+            expected.append(f"Analysing player p{i} [True]")
+            if ender_chest or inventory:
+                expected.append(
+                    f"Can't remove player <p{i}>\n"
+                    f"Items: ender_chest={ender_chest}, inventory={inventory}"
+                )
+            else:
+                expected.append(f"Removed player p{i} [True]")
+        assert messages == expected
+
+        removed = quarantined(self.quarantine_m)
+        assert removed == [players[i] for i in range(0, len(players), 2)]
+
+        err_lines = capsys.readouterr().err
+        assert err_lines.index("<p1>") < err_lines.index("<p3>")
+
+    @pytest.mark.parametrize("workers", [1, 8])
+    def test_fail_fast(self, workers, caplog, capsys):
+        caplog.set_level(10, "server_manager.src.checks")
+        players = make_players([(0, 0), (0, 0), (4, 0), (0, 0)])
+
+        assert remove_players_safely(players, workers=workers, fail_fast=True) is False
+
+        self.quarantine_m.add.assert_not_called()
+
+        assert caplog.records[0].levelname == "ERROR"
+        assert caplog.records[0].args == ("<p2>", 4, 0)
+        assert caplog.records[-1].levelname == "CRITICAL"
+        assert "fail-fast" in caplog.records[-1].message
+        assert "<p2>" in capsys.readouterr().err
+
+    def test_fail_fast_force(self):
+        players = make_players([(0, 0), (4, 0)])
+
+        assert remove_players_safely(players, force=True, fail_fast=True) is True
+        assert quarantined(self.quarantine_m) == players
@@ -1,13 +1,19 @@
 import pytest
 
 from server_manager.src.exceptions import (
+    BackupError,
     CheckError,
     InvalidFileError,
     InvalidPlayerDataStateError,
     InvalidPlayerError,
     InvalidPluginStateError,
     InvalidServerStateError,
+    JournalError,
+    PlanError,
     PropertyError,
+    QuarantineError,
+    RconError,
+    RewriterError,
     SFKError,
     SFKNotFoundError,
     SearchError,
@@ -24,6 +30,15 @@ class TestServerManagerError:
             raise ServerManagerError
 
 
+class TestBackupError:
+    def test_inheritance(self):
+        assert issubclass(BackupError, ServerManagerError)
+
+    def test_raises(self):
+        with pytest.raises(BackupError):
+            raise BackupError
+
+
 class TestCheckError:
     def test_inheritance(self):
         assert issubclass(CheckError, ServerManagerError)
@@ -78,6 +93,51 @@ class TestPropertyError:
             raise PropertyError
 
 
+class TestJournalError:
+    def test_inheritance(self):
+        assert issubclass(JournalError, ServerManagerError)
+
+    def test_raises(self):
+        with pytest.raises(JournalError):
+            raise JournalError
+
+
+class TestPlanError:
+    def test_inheritance(self):
+        assert issubclass(PlanError, ServerManagerError)
+
+    def test_raises(self):
+        with pytest.raises(PlanError):
+            raise PlanError
+
+
+class TestQuarantineError:
+    def test_inheritance(self):
+        assert issubclass(QuarantineError, ServerManagerError)
+
+    def test_raises(self):
+        with pytest.raises(QuarantineError):
+            raise QuarantineError
+
+
+class TestRconError:
+    def test_inheritance(self):
+        assert issubclass(RconError, ServerManagerError)
+
+    def test_raises(self):
+        with pytest.raises(RconError):
+            raise RconError
+
+
+class TestRewriterError:
+    def test_inheritance(self):
+        assert issubclass(RewriterError, ServerManagerError)
+
+    def test_raises(self):
+        with pytest.raises(RewriterError):
+            raise RewriterError
+
+
 class TestSearchError:
     def test_inheritance(self):
         assert issubclass(SearchError, ServerManagerError)
@@ -336,6 +336,18 @@ class TestFile:
             "hidden/typec/00000000-0000-0000-0000-0000000000c1.json"
         )
 
+    @mock.patch("os.walk")
+    def test_gen_files_rescan(self, walk_m):
+        uuid = "00000000-0000-0000-0000-0000000000"
+        walk_m.return_value = (("./typea", [], [uuid + "a1.json", uuid + "a2.json"]),)
+        File.gen_files(Path("./"))
+        assert len(File.memory["typea"]) == 2
+
+        # the files removed since the previous scan are forgotten
+        walk_m.return_value = (("./typea", [], [uuid + "a2.json"]),)
+        File.gen_files(Path("./"))
+        assert File.memory["typea"] == [File(Path("typea", uuid + "a2.json"))]
+
     def test_repr(self, file_creator):
         file = file_creator("/path/to/file.ext")
         assert repr(file) == "File('/path/to/file.ext')"
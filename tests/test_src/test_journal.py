@@ -0,0 +1,349 @@
+import gzip
+import json
+from pathlib import Path
+from unittest import mock
+from uuid import UUID
+
+import pytest
+
+from server_manager.src.exceptions import JournalError
+from server_manager.src.journal import (
+    Journal,
+    apply_step,
+    get_journal_path,
+    group_file_steps,
+    patch_json_step,
+    patch_plugins_step,
+    patch_regions_step,
+    patch_uuid_step,
+    recover,
+    rename_step,
+    revert_step,
+    run_mode_switch,
+)
+
+OLD_UUID = "4a618768-4f26-4688-8ab5-6e64f250c62f"
+NEW_UUID = "0f2d2b0c-6a6e-4c43-9d0e-5d2b6f1f7a10"
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def properties(tmp_path):
+    path = tmp_path.joinpath("server.properties")
+    path.write_text("motd=A Minecraft Server\nonline-mode=false\n")
+    with mock.patch(
+        "server_manager.src.properties_manager.get_server_properties_filepath",
+        return_value=path,
+    ):
+        yield path
+
+
+@pytest.fixture
+def server(tmp_path, properties):
+    root = "server_manager.src.journal."
+    with mock.patch(
+        root + "get_journal_path", return_value=tmp_path.joinpath("journal")
+    ):
+        plugin = tmp_path.joinpath("plugins", "SkinsRestorer.jar")
+        plugin.parent.mkdir()
+        plugin.write_text("jar")
+
+        steps = []
+        for uuid in ("a", "b"):
+            for folder, ext in (("playerdata", ".dat"), ("stats", ".json")):
+                path = tmp_path.joinpath(folder, "off-" + uuid + ext)
+                path.parent.mkdir(exist_ok=True)
+                path.write_text(folder)
+                steps.append(rename_step(path, path.with_name("on-" + uuid + ext)))
+
+        steps.append(
+            rename_step(plugin, plugin.with_name("SkinsRestorer.jar.disabled"))
+        )
+        steps.append(
+            {"op": "property", "name": "online_mode", "old": False, "new": True}
+        )
+        yield mock.MagicMock(
+            path=tmp_path, steps=steps, plugin=plugin, properties=properties
+        )
+
+
+def get_uuids(server):
+    return sorted(x.stem for x in server.path.joinpath("stats").iterdir())
+
+
+def get_online_mode(server):
+    return server.properties.read_text().splitlines()[1]
+
+
+@mock.patch("server_manager.src.journal.get_cache_folder")
+def test_get_journal_path(gcf_m):
+    assert get_journal_path() == gcf_m.return_value.joinpath.return_value
+    gcf_m.return_value.joinpath.assert_called_once_with("mode-switch.journal")
+
+
+class TestSteps:
+    def test_rename(self, tmp_path):
+        src, dst = tmp_path.joinpath("src"), tmp_path.joinpath("dst")
+        src.write_text("data")
+        step = rename_step(src, dst)
+
+        apply_step(step)
+        apply_step(step)
+        assert dst.read_text() == "data" and not src.exists()
+
+        revert_step(step)
+        revert_step(step)
+        assert src.read_text() == "data" and not dst.exists()
+
+    def test_rename_missing(self, tmp_path):
+        step = rename_step(tmp_path.joinpath("src"), tmp_path.joinpath("dst"))
+        with pytest.raises(JournalError, match="file not found"):
+            apply_step(step)
+
+    def test_patch_uuid(self, tmp_path):
+        path = tmp_path.joinpath("player.dat")
+        path.write_bytes(gzip.compress(b"\x00\x00\x00\x04" + UUID(OLD_UUID).bytes))
+        step = patch_uuid_step(path, OLD_UUID, NEW_UUID)
+
+        apply_step(step)
+        apply_step(step)
+        assert gzip.decompress(path.read_bytes())[4:] == UUID(NEW_UUID).bytes
+
+        revert_step(step)
+        revert_step(step)
+        assert gzip.decompress(path.read_bytes())[4:] == UUID(OLD_UUID).bytes
+
+    def test_patch_uuid_missing(self, tmp_path):
+        step = patch_uuid_step(tmp_path.joinpath("player.dat"), OLD_UUID, NEW_UUID)
+        with pytest.raises(JournalError, match="file not found"):
+            apply_step(step)
+        revert_step(step)
+
+    @mock.patch("server_manager.src.journal.rewrite_regions")
+    def test_patch_regions(self, rr_m):
+        step = patch_regions_step({OLD_UUID: NEW_UUID})
+        apply_step(step)
+        rr_m.assert_called_once_with({OLD_UUID: NEW_UUID})
+
+        rr_m.reset_mock()
+        revert_step(step)
+        rr_m.assert_called_once_with({NEW_UUID: OLD_UUID})
+
+    @mock.patch("server_manager.src.journal.rewrite_json_files")
+    def test_patch_json(self, rjf_m):
+        step = patch_json_step({OLD_UUID: NEW_UUID})
+        apply_step(step)
+        rjf_m.assert_called_once_with({OLD_UUID: NEW_UUID})
+
+        rjf_m.reset_mock()
+        revert_step(step)
+        rjf_m.assert_called_once_with({NEW_UUID: OLD_UUID})
+
+    @mock.patch("server_manager.src.journal.rewrite_plugin_data")
+    def test_patch_plugins(self, rpd_m):
+        step = patch_plugins_step({OLD_UUID: NEW_UUID})
+        apply_step(step)
+        rpd_m.assert_called_once_with({OLD_UUID: NEW_UUID})
+
+        rpd_m.reset_mock()
+        revert_step(step)
+        rpd_m.assert_called_once_with({NEW_UUID: OLD_UUID})
+
+    def test_property(self, properties):
+        step = {"op": "property", "name": "online_mode", "old": False, "new": True}
+        for _ in range(2):
+            apply_step(step)
+            assert properties.read_text().splitlines()[1] == "online-mode=true"
+
+        for _ in range(2):
+            revert_step(step)
+            assert properties.read_text().splitlines()[1] == "online-mode=false"
+        assert properties.read_text().splitlines()[0] == "motd=A Minecraft Server"
+
+
+def test_group_file_steps():
+    steps = [
+        rename_step(Path("b"), Path("c")),
+        rename_step(Path("x"), Path("y")),
+        rename_step(Path("a"), Path("b")),
+        rename_step(Path("e"), Path("f")),
+        rename_step(Path("d"), Path("e")),
+        rename_step(Path("c"), Path("d")),
+    ]
+    assert group_file_steps(steps, list(range(6))) == [[0, 2, 3, 4, 5], [1]]
+    assert group_file_steps(steps, [1, 3]) == [[1], [3]]
+
+    steps.append(patch_uuid_step(Path("y"), OLD_UUID, NEW_UUID))
+    steps.append(patch_uuid_step(Path("z"), OLD_UUID, NEW_UUID))
+    assert group_file_steps(steps, [1, 3, 6, 7]) == [[1, 6], [3], [7]]
+
+
+class TestJournal:
+    def test_run_mode_switch(self, server):
+        stats = run_mode_switch(server.steps)
+        assert stats.steps == 6
+        assert stats.seconds > 0
+
+        assert get_uuids(server) == ["on-a", "on-b"]
+        assert server.plugin.with_name("SkinsRestorer.jar.disabled").is_file()
+        assert get_online_mode(server) == "online-mode=true"
+        assert not Journal().exists()
+
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_apply_chain(self, tmp_path, server, workers):
+        paths = [tmp_path.joinpath(f"chain-{i}") for i in range(4)]
+        for i, path in enumerate(paths[:3]):
+            path.write_text(str(i))
+        # 2 -> 3, 1 -> 2, 0 -> 1
+        steps = [rename_step(paths[i], paths[i + 1]) for i in reversed(range(3))]
+        steps += server.steps
+
+        journal = Journal()
+        journal.begin(steps)
+        assert journal.apply(workers=workers) == len(steps)
+
+        assert [path.read_text() for path in paths[1:]] == ["0", "1", "2"]
+        assert get_uuids(server) == ["on-a", "on-b"]
+
+    def test_apply_invalid_workers(self, server):
+        with pytest.raises(ValueError, match="workers must be at least 1"):
+            Journal().apply(workers=0)
+
+    def test_apply_error(self, server):
+        journal = Journal()
+        journal.begin(server.steps)
+        server.path.joinpath("stats", "off-b.json").unlink()
+
+        with pytest.raises(JournalError, match="off-b.json"):
+            journal.apply(workers=4)
+
+        journal.load()
+        assert 3 not in journal.done
+        assert get_online_mode(server) == "online-mode=false"
+
+    def test_progress_is_logged(self, server):
+        journal = Journal()
+        journal.begin(server.steps)
+
+        with mock.patch("server_manager.src.journal.apply_step") as apply_m:
+            apply_m.side_effect = [None, None, KeyboardInterrupt]
+            with pytest.raises(KeyboardInterrupt):
+                journal.apply(workers=1)
+
+        lines = journal.path.read_text().splitlines()
+        assert json.loads(lines[0])["steps"] == server.steps
+        assert lines[1:] == ["0", "1"]
+
+    def test_begin_interrupted(self, server):
+        Journal().begin([])
+        with pytest.raises(JournalError, match="online-mode recover"):
+            Journal().begin([])
+
+    def test_recover_forward(self, server):
+        journal = Journal()
+        journal.begin(server.steps)
+        for index in range(2):
+            apply_step(journal.steps[index])
+            journal.mark_done(index)
+        # crash after the rename, before the journal write
+        apply_step(journal.steps[2])
+
+        assert recover() == 4
+        assert get_uuids(server) == ["on-a", "on-b"]
+        assert get_online_mode(server) == "online-mode=true"
+        assert not journal.exists()
+
+    def test_recover_forward_applied_property(self, server):
+        journal = Journal()
+        journal.begin(server.steps)
+        for index in range(5):
+            apply_step(journal.steps[index])
+            journal.mark_done(index)
+        # crash after writing server.properties, before the journal write
+        apply_step(journal.steps[5])
+
+        assert recover() == 1
+        assert get_online_mode(server) == "online-mode=true"
+        assert not journal.exists()
+
+    def test_recover_rollback(self, server):
+        journal = Journal()
+        journal.begin(server.steps)
+        for index in range(2):
+            apply_step(journal.steps[index])
+            journal.mark_done(index)
+        apply_step(journal.steps[2])
+        with journal.path.open("at") as file_handler:
+            file_handler.write("2\n3")  # write torn by the crash
+
+        assert recover(rollback=True) == 3
+        assert get_uuids(server) == ["off-a", "off-b"]
+        assert sorted(x.name for x in server.path.rglob("*.dat")) == [
+            "off-a.dat",
+            "off-b.dat",
+        ]
+        assert server.plugin.is_file()
+        assert get_online_mode(server) == "online-mode=false"
+        assert not journal.exists()
+
+    def test_recover_rollback_completed_property(self, server):
+        journal = Journal()
+        journal.begin(server.steps)
+        for index in range(6):
+            apply_step(journal.steps[index])
+            journal.mark_done(index)
+
+        assert get_online_mode(server) == "online-mode=true"
+        assert recover(rollback=True) == 6
+        assert get_uuids(server) == ["off-a", "off-b"]
+        assert get_online_mode(server) == "online-mode=false"
+
+    def test_recover_rollback_unrecorded_property(self, server):
+        journal = Journal()
+        journal.begin(server.steps)
+        for index in range(5):
+            apply_step(journal.steps[index])
+            journal.mark_done(index)
+        # crash after writing server.properties, before the journal write
+        apply_step(journal.steps[5])
+
+        assert recover(rollback=True) == 5
+        assert get_uuids(server) == ["off-a", "off-b"]
+        assert get_online_mode(server) == "online-mode=false"
+
+    @mock.patch("server_manager.src.journal.rewrite_plugin_data")
+    @mock.patch("server_manager.src.journal.rewrite_json_files")
+    @mock.patch("server_manager.src.journal.rewrite_regions")
+    def test_recover_rollback_interrupted_regions(self, rr_m, rjf_m, rpd_m, server):
+        mapping = {OLD_UUID: NEW_UUID}
+        steps = [
+            patch_regions_step(mapping),
+            patch_json_step(mapping),
+            patch_plugins_step(mapping),
+        ]
+        journal = Journal()
+        journal.begin(server.steps[:4] + steps + server.steps[4:])
+        for index in range(4):
+            apply_step(journal.steps[index])
+            journal.mark_done(index)
+
+        # crash while rewriting the region files
+        assert recover(rollback=True) == 4
+        rr_m.assert_called_once_with({NEW_UUID: OLD_UUID})
+        # the steps after it never ran
+        rjf_m.assert_not_called()
+        rpd_m.assert_not_called()
+        assert get_uuids(server) == ["off-a", "off-b"]
+
+    def test_recover_no_journal(self, server):
+        with pytest.raises(JournalError, match="no interrupted mode switch"):
+            recover()
+
+    def test_recover_incomplete_header(self, server):
+        get_journal_path = server.path.joinpath("journal")
+        get_journal_path.write_text('{"steps": [{"op"')
+
+        assert recover() == 0
+        assert not get_journal_path.exists()
+        assert get_uuids(server) == ["off-a", "off-b"]
@@ -0,0 +1,154 @@
+from collections import namedtuple
+from unittest import mock
+
+import pytest
+
+from server_manager.src.listing import (
+    FieldSource,
+    format_table,
+    get_player_rows,
+    items_to_str,
+    parse_fields,
+    plan_sources,
+)
+from server_manager.src.player import Item, PlayerSummary
+
+Player = namedtuple("Player", "username uuid")
+
+
+def test_items_to_str():
+    assert items_to_str([]) == "-"
+    items = [Item("stone", 3), Item("torch", 1)]
+    assert items_to_str(items) == "stone x3, torch x1"
+
+
+class TestParseFields:
+    def test_ok(self):
+        assert parse_fields("username") == ["username"]
+        assert parse_fields(" UUID, ender-chest,,") == ["uuid", "ender-chest"]
+
+    def test_invalid(self):
+        with pytest.raises(ValueError, match="Invalid field 'invalid'"):
+            parse_fields("username,invalid")
+
+    def test_empty(self):
+        with pytest.raises(ValueError, match="at least one field"):
+            parse_fields(" , ")
+
+
+def test_plan_sources():
+    assert plan_sources(["username", "uuid"]) == {FieldSource.REGISTRY}
+    assert plan_sources(["username", "inventory"]) == {
+        FieldSource.REGISTRY,
+        FieldSource.SUMMARY,
+    }
+    assert plan_sources(["inventory-items"]) == {FieldSource.DETAILED}
+
+
+class TestGetPlayerRows:
+    @pytest.fixture(autouse=True)
+    def mocks(self):
+        root = "server_manager.src.listing."
+        self.gps_m = mock.patch(root + "get_player_summaries").start()
+        self.gps_m.side_effect = lambda players, use_cache: [
+            self.summaries[player.uuid] for player in players
+        ]
+        self.get_mode_m = mock.patch(root + "get_mode").start()
+        self.get_mode_m.side_effect = lambda uuid: uuid.startswith("on")
+
+        self.players = [
+            Player("b", "on-1"),
+            Player("a", "off-2"),
+            Player("d", "on-3"),
+            Player("c", "off-4"),
+        ]
+        self.summaries = {
+            "on-1": PlayerSummary(5, 0, "overworld", 1, 2, 3, 20.0, 1),
+            "off-2": PlayerSummary(0, 1, "the_end", 4, 5, 6, 10.5, 2),
+            "on-3": PlayerSummary(30, 2, "the_nether", 7, 8, 9, 1.0, 3),
+            "off-4": PlayerSummary(5, 3, "overworld", 0, 0, 0, 2.0, 4),
+        }
+        yield
+        mock.patch.stopall()
+
+    def test_registry_fields_no_io(self):
+        rows = get_player_rows(self.players, ["username", "mode", "uuid"])
+        assert rows == [
+            ("b", "online", "on-1"),
+            ("a", "offline", "off-2"),
+            ("d", "online", "on-3"),
+            ("c", "offline", "off-4"),
+        ]
+        self.gps_m.assert_not_called()
+
+    @pytest.mark.parametrize("use_cache", [True, False])
+    def test_summary_fields(self, use_cache):
+        fields = ["username", "inventory", "position", "health", "xp-level"]
+        rows = get_player_rows(self.players[:2], fields, use_cache=use_cache)
+        assert rows == [
+            ("b", "5", "1 2 3", "20.0", "1"),
+            ("a", "0", "4 5 6", "10.5", "2"),
+        ]
+        self.gps_m.assert_called_once_with(self.players[:2], use_cache=use_cache)
+
+    def test_detailed_fields(self):
+        player = mock.MagicMock(username="x", uuid="on-x")
+        player.get_detailed_inventory.return_value = [Item("stone", 2)]
+        player.get_detailed_ender_chest.return_value = []
+
+        fields = ["username", "inventory-items", "ender-chest-items"]
+        rows = get_player_rows([player], fields)
+        assert rows == [("x", "stone x2", "-")]
+        self.gps_m.assert_not_called()
+
+    def test_sort_numeric_top(self):
+        rows = get_player_rows(self.players, ["username"], sort="inventory", top=2)
+        assert rows == [("d",), ("b",)]
+        self.gps_m.assert_called_once_with(self.players, use_cache=True)
+
+    def test_sort_numeric_all(self):
+        rows = get_player_rows(self.players, ["username"], sort="inventory")
+        assert rows == [("d",), ("b",), ("c",), ("a",)]
+
+    def test_sort_text(self):
+        rows = get_player_rows(self.players, ["uuid"], sort="username", top=3)
+        assert rows == [("off-2",), ("on-1",), ("off-4",)]
+        self.gps_m.assert_not_called()
+
+        rows = get_player_rows(self.players, ["uuid"], sort="username")
+        assert rows == [("off-2",), ("on-1",), ("off-4",), ("on-3",)]
+
+    def test_sort_reuses_summaries(self):
+        fields = ["username", "ender-chest"]
+        rows = get_player_rows(self.players, fields, sort="health", top=2)
+        assert rows == [("b", "0"), ("a", "1")]
+        self.gps_m.assert_called_once_with(self.players, use_cache=True)
+
+    def test_sort_registry_then_summary(self):
+        fields = ["username", "ender-chest"]
+        rows = get_player_rows(self.players, fields, sort="username", top=1)
+        assert rows == [("a", "1")]
+        self.gps_m.assert_called_once_with([self.players[1]], use_cache=True)
+
+    def test_top_without_sort(self):
+        rows = get_player_rows(self.players, ["username"], top=3)
+        assert rows == [("b",), ("a",), ("d",)]
+
+    def test_invalid(self):
+        with pytest.raises(ValueError, match="top can't be negative"):
+            get_player_rows(self.players, ["username"], top=-1)
+
+        with pytest.raises(ValueError, match="Invalid field"):
+            get_player_rows(self.players, ["username"], sort="invalid")
+
+        with pytest.raises(ValueError, match="Invalid field"):
+            get_player_rows(self.players, ["invalid"])
+
+
+def test_format_table():
+    lines = format_table(("name", "count"), [("alpha", "1"), ("b", "200")])
+    assert lines == [
+        " | name  - count |",
+        " | alpha -   1   |",
+        " | b     -  200  |",
+    ]
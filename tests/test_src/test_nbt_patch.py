@@ -0,0 +1,119 @@
+import gzip
+from pathlib import Path
+import shutil
+from unittest import mock
+from uuid import UUID
+
+from nbtlib import File as NBTFile
+import pytest
+
+from server_manager.src.journal import Journal, patch_uuid_step
+from server_manager.src.nbt_patch import (
+    INT_ARRAY_4,
+    get_uuid_map,
+    patch_gzip_file,
+    patch_uuid_arrays,
+    uuid_to_bytes,
+)
+
+# pylint: disable=redefined-outer-name
+
+OLD_UUID = "4a618768-4f26-4688-8ab5-6e64f250c62f"
+NEW_UUID = "0f2d2b0c-6a6e-4c43-9d0e-5d2b6f1f7a10"
+OTHER_UUID = "6f1e3f0a-8a52-4a55-9d9d-2c1b6c0f4e11"
+
+
+@pytest.fixture
+def nbt_file(tmp_path):
+    nbt_path = Path(__file__).parent.parent.joinpath("test_data/nbt-example.dat")
+    path = tmp_path.joinpath(OLD_UUID + ".dat")
+    shutil.copy(nbt_path, path)
+    yield path
+
+
+def get_nbt_uuid(path):
+    ints = NBTFile.load(path.as_posix(), gzipped=True)[""]["UUID"]
+    return UUID(bytes=b"".join(int(x).to_bytes(4, "big", signed=True) for x in ints))
+
+
+def test_uuid_to_bytes():
+    assert uuid_to_bytes(OLD_UUID) == UUID(OLD_UUID).bytes
+    assert uuid_to_bytes(OLD_UUID.replace("-", "")) == UUID(OLD_UUID).bytes
+
+
+def test_get_uuid_map():
+    uuid_map = get_uuid_map({OLD_UUID: NEW_UUID})
+    assert uuid_map == {UUID(OLD_UUID).bytes: UUID(NEW_UUID).bytes}
+
+
+class TestPatchUUIDArrays:
+    def test_patch(self):
+        old, new = UUID(OLD_UUID).bytes, UUID(NEW_UUID).bytes
+        other = UUID(OTHER_UUID).bytes
+        data = (
+            b"\x0b\x00\x04UUID"
+            + INT_ARRAY_4
+            + old
+            + b"\x0b\x00\x05Owner"
+            + INT_ARRAY_4
+            + old
+            + b"\x0b\x00\x06Attach"
+            + INT_ARRAY_4
+            + other
+        )
+
+        patched, count = patch_uuid_arrays(data, get_uuid_map({OLD_UUID: NEW_UUID}))
+        assert count == 2
+        assert patched == data.replace(old, new)
+
+    def test_uuid_not_in_array(self):
+        data = b"\x00\x00\x00\x03" + UUID(OLD_UUID).bytes
+        patched, count = patch_uuid_arrays(data, get_uuid_map({OLD_UUID: NEW_UUID}))
+        assert count == 0
+        assert patched is data
+
+    def test_overlapping_length(self):
+        # the first bytes of the uuid look like the length of an int array
+        old = b"\x00\x00\x00\x04" + bytes(range(12))
+        new = UUID(NEW_UUID).bytes
+        data = b"\x00\x00\x00" + INT_ARRAY_4 + old
+        patched, count = patch_uuid_arrays(data, {old: new})
+        assert count == 1
+        assert patched == b"\x00\x00\x00" + INT_ARRAY_4 + new
+
+
+class TestPatchGzipFile:
+    def test_patch(self, nbt_file):
+        assert get_nbt_uuid(nbt_file) == UUID(OLD_UUID)
+
+        count = patch_gzip_file(nbt_file, get_uuid_map({OLD_UUID: NEW_UUID}))
+        assert count == 1
+        assert get_nbt_uuid(nbt_file) == UUID(NEW_UUID)
+        assert not nbt_file.with_name(nbt_file.name + ".tmp").exists()
+
+    def test_no_match(self, nbt_file):
+        content = nbt_file.read_bytes()
+        count = patch_gzip_file(nbt_file, get_uuid_map({NEW_UUID: OTHER_UUID}))
+        assert count == 0
+        assert nbt_file.read_bytes() == content
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_journal_patches_in_parallel(tmp_path, workers):
+    paths = []
+    for i in range(8):
+        path = tmp_path.joinpath(f"player-{i}.dat")
+        path.write_bytes(gzip.compress(INT_ARRAY_4 + UUID(OLD_UUID).bytes))
+        paths.append(path)
+    steps = [patch_uuid_step(path, OLD_UUID, NEW_UUID) for path in paths]
+
+    with mock.patch(
+        "server_manager.src.journal.get_journal_path",
+        return_value=tmp_path.joinpath("journal"),
+    ):
+        journal = Journal()
+        journal.begin(steps)
+        assert journal.apply(workers=workers) == 8
+
+    for path in paths:
+        assert gzip.decompress(path.read_bytes())[4:] == UUID(NEW_UUID).bytes
@@ -3,7 +3,11 @@ from unittest import mock
 
 import pytest
 
-from server_manager.src.paths import gen_and_save_server_path, get_server_path
+from server_manager.src.paths import (
+    gen_and_save_server_path,
+    get_cache_folder,
+    get_server_path,
+)
 
 
 class TestGetServerPath:
@@ -53,6 +57,24 @@ class TestGetServerPath:
         self.data_path_m.write_text.assert_not_called()
 
 
+@mock.patch("server_manager.src.paths.os.makedirs")
+@mock.patch("server_manager.src.paths.get_server_path")
+def test_get_cache_folder(gsp_m, mkdirs_m):
+    result = get_cache_folder()
+    gsp_m.assert_called_once_with()
+
+    assert result == gsp_m.return_value.with_name.return_value
+    gsp_m.return_value.with_name.assert_called_once_with("lia-cache")
+    mkdirs_m.assert_called_once_with(result, exist_ok=True)
+
+    # Test LRU cache
+    result = get_cache_folder()
+    gsp_m.assert_called_once_with()
+    mkdirs_m.assert_called_once_with(result, exist_ok=True)
+
+    get_cache_folder.cache_clear()
+
+
 class TestGenAndSaveServerPath:
     @pytest.fixture(autouse=True)
     def mocks(self):
@@ -78,3 +100,6 @@ class TestGenAndSaveServerPath:
         self.input_m.assert_called_once_with("Write the path of the server: ")
         self.vsp_m.assert_called_once_with("<root-path>")
         self.data_path_m.write_text.assert_called_with("<root-path>")
+        self.data_path_m.parent.mkdir.assert_called_once_with(
+            parents=True, exist_ok=True
+        )
@@ -0,0 +1,264 @@
+import json
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+from uuid import NAMESPACE_OID, uuid5
+
+import pytest
+
+from server_manager.src.exceptions import PlanError
+from server_manager.src.plan import (
+    PLAN_VERSION,
+    ModeSwitchPlan,
+    build_plan,
+    get_plan_path,
+)
+from server_manager.src.players_data import PlayerInterface, PlayersIndex
+
+# pylint: disable=redefined-outer-name
+
+
+def uid(name):
+    return str(uuid5(NAMESPACE_OID, name))
+
+
+OFF_A, ON_A, OFF_B, ON_B = uid("off-a"), uid("on-a"), uid("off-b"), uid("on-b")
+DATA = "/server/world/playerdata/"
+
+
+def make_index(*players):
+    interfaces = [PlayerInterface(*player) for player in players]
+    return PlayersIndex(
+        {x.uuid: x for x in interfaces},
+        {(x.username, x.online): x for x in interfaces},
+    )
+
+
+class FakeFile:
+    def __init__(self, path):
+        self.path = path
+
+    def as_posix(self):
+        return self.path.as_posix()
+
+
+def make_player(uuid):
+    return SimpleNamespace(
+        uuid=uuid,
+        player_data_file=FakeFile(Path("/server/world/playerdata", uuid + ".dat")),
+        stats_file=FakeFile(Path("/server/world/stats", uuid + ".json")),
+        advancements_file=FakeFile(Path("/server/world/advancements", uuid + ".json")),
+    )
+
+
+@pytest.fixture(autouse=True)
+def mocks():
+    root = "server_manager.src.plan."
+    with mock.patch(root + "get_players_index") as gpi_m, mock.patch(
+        root + "get_plugin_rename"
+    ) as gpr_m:
+        gpr_m.return_value = (Path("/plugins/a.jar"), Path("/plugins/a.jar.disabled"))
+        gpi_m.return_value = make_index(
+            ("alice", OFF_A, False),
+            ("alice", ON_A, True),
+            ("bob", OFF_B, False),
+            ("bob", ON_B, True),
+        )
+        yield gpi_m
+
+
+@mock.patch("server_manager.src.plan.get_cache_folder")
+def test_get_plan_path(gcf_m):
+    assert get_plan_path() == gcf_m.return_value.joinpath.return_value
+    gcf_m.return_value.joinpath.assert_called_once_with("mode-switch-plan.json")
+
+
+class TestBuildPlan:
+    def test_ok(self):
+        players = [make_player(OFF_A), make_player(OFF_B)]
+        plan = build_plan(players, True)
+
+        assert plan.ok
+        plan.check()
+        assert plan.mapping == {OFF_A: ON_A, OFF_B: ON_B}
+        assert len(plan.steps) == 13
+        assert plan.steps[0] == {
+            "op": "rename",
+            "src": DATA + OFF_A + ".dat",
+            "dst": DATA + ON_A + ".dat",
+        }
+        assert plan.steps[6] == {
+            "op": "patch_uuid",
+            "path": DATA + ON_A + ".dat",
+            "old": OFF_A,
+            "new": ON_A,
+        }
+        assert plan.steps[7]["path"] == DATA + ON_B + ".dat"
+        assert plan.steps[8] == {
+            "op": "patch_regions",
+            "mapping": {OFF_A: ON_A, OFF_B: ON_B},
+        }
+        assert plan.steps[9] == {
+            "op": "patch_json",
+            "mapping": {OFF_A: ON_A, OFF_B: ON_B},
+        }
+        assert plan.steps[10] == {
+            "op": "patch_plugins",
+            "mapping": {OFF_A: ON_A, OFF_B: ON_B},
+        }
+        assert plan.steps[11] == {
+            "op": "rename",
+            "src": "/plugins/a.jar",
+            "dst": "/plugins/a.jar.disabled",
+        }
+        assert plan.steps[12] == {
+            "op": "property",
+            "name": "online_mode",
+            "old": False,
+            "new": True,
+        }
+
+    def test_missing_roster_entries(self, mocks):
+        mocks.return_value = make_index(("alice", OFF_A, False), ("bob", OFF_B, False))
+        players = [make_player(OFF_A), make_player(uid("off-c"))]
+        plan = build_plan(players, True)
+
+        assert plan.errors == [
+            "Missing roster entry for username=alice and online=True",
+            f"Missing roster entry for uuid={uid('off-c')}",
+        ]
+        assert plan.mapping == {}
+        with pytest.raises(PlanError, match="Missing roster entry"):
+            plan.check()
+
+    def test_collision(self, mocks):
+        mocks.return_value = make_index(
+            ("alice", OFF_A, False),
+            ("alice", ON_A, True),
+            ("bob", ON_A, False),
+        )
+        players = [make_player(OFF_A), make_player(ON_A)]
+        plan = build_plan(players, True)
+
+        assert not plan.ok
+        assert plan.errors[1] == (
+            f"Collision: {DATA}{OFF_A}.dat would overwrite {DATA}{ON_A}.dat"
+        )
+
+    def test_collision_same_target(self, mocks):
+        mocks.return_value = make_index(
+            ("alice", OFF_A, False),
+            ("alice", ON_A, True),
+        )
+        index = mocks.return_value
+        index.by_uuid[OFF_B] = index.by_uuid[OFF_A]
+        players = [make_player(OFF_A), make_player(OFF_B)]
+        plan = build_plan(players, True)
+
+        assert len(plan.errors) == 3
+        assert plan.errors[0].startswith(
+            f"Collision: {DATA}{OFF_A}.dat and {DATA}{OFF_B}.dat would be renamed to"
+        )
+
+    def test_chain_is_ordered(self, mocks):
+        # a -> b -> c: b must be renamed before a
+        alice = PlayerInterface("alice", uid("uuid-a"), False)
+        bob = PlayerInterface("bob", uid("uuid-b"), False)
+        mocks.return_value = PlayersIndex(
+            {uid("uuid-a"): alice, uid("uuid-b"): bob},
+            {
+                ("alice", True): PlayerInterface("alice", uid("uuid-b"), True),
+                ("bob", True): PlayerInterface("bob", uid("uuid-c"), True),
+            },
+        )
+        players = [make_player(uid("uuid-a")), make_player(uid("uuid-b"))]
+        plan = build_plan(players, True)
+
+        assert plan.ok
+        renames = [(Path(x["src"]).stem, Path(x["dst"]).stem) for x in plan.steps[:6]]
+        assert renames[:2] == [
+            (uid("uuid-b"), uid("uuid-c")),
+            (uid("uuid-a"), uid("uuid-b")),
+        ]
+        assert [step["op"] for step in plan.steps[6:8]] == ["patch_uuid"] * 2
+
+    def test_cycle(self, mocks):
+        # a -> b -> a: the uuids are swapped
+        alice = PlayerInterface("alice", uid("uuid-a"), False)
+        bob = PlayerInterface("bob", uid("uuid-b"), False)
+        mocks.return_value = PlayersIndex(
+            {uid("uuid-a"): alice, uid("uuid-b"): bob},
+            {
+                ("alice", True): PlayerInterface("alice", uid("uuid-b"), True),
+                ("bob", True): PlayerInterface("bob", uid("uuid-a"), True),
+            },
+        )
+        players = [make_player(uid("uuid-a")), make_player(uid("uuid-b"))]
+        plan = build_plan(players, True)
+
+        assert len(plan.errors) == 3
+        assert all(error.startswith("Rename cycle: ") for error in plan.errors)
+        assert f"{uid('uuid-a')}.dat -> {DATA}{uid('uuid-b')}.dat" in plan.errors[0]
+        ops = [step["op"] for step in plan.steps]
+        assert ops == [
+            "patch_uuid",
+            "patch_uuid",
+            "patch_regions",
+            "patch_json",
+            "patch_plugins",
+            "rename",
+            "property",
+        ]
+
+    def test_unchanged_uuid(self, mocks):
+        mocks.return_value = make_index(
+            ("alice", uid("same"), False), ("alice", uid("same"), True)
+        )
+        plan = build_plan([make_player(uid("same"))], True)
+
+        assert plan.ok
+        assert plan.mapping == {uid("same"): uid("same")}
+        assert len(plan.steps) == 2
+
+    def test_invalid_uuid(self, mocks):
+        mocks.return_value = make_index(
+            ("alice", OFF_A, False), ("alice", "not-an-uuid", True)
+        )
+        plan = build_plan([make_player(OFF_A)], True)
+
+        assert plan.errors == [f"Invalid uuid: {OFF_A} -> not-an-uuid"]
+        assert plan.mapping == {}
+
+    def test_scaling(self, mocks):
+        n = 10000
+        mocks.return_value = make_index(
+            *[(f"user{i}", uid(f"off-{i}"), False) for i in range(n)],
+            *[(f"user{i}", uid(f"on-{i}"), True) for i in range(n)],
+        )
+        players = [make_player(uid(f"off-{i}")) for i in range(n)]
+        plan = build_plan(players, True)
+
+        assert plan.ok
+        assert len(plan.steps) == 4 * n + 5
+
+
+class TestPlanPersistence:
+    def test_save_load(self, tmp_path):
+        path = tmp_path.joinpath("plan.json")
+        plan = build_plan([make_player(OFF_A)], True)
+        plan.save(path)
+
+        data = json.loads(path.read_text())
+        assert data["version"] == PLAN_VERSION
+        assert data["mapping"] == {OFF_A: ON_A}
+        assert ModeSwitchPlan.load(path) == plan
+
+    def test_load_not_found(self, tmp_path):
+        with pytest.raises(PlanError, match="No saved plan"):
+            ModeSwitchPlan.load(tmp_path.joinpath("plan.json"))
+
+    def test_load_old_version(self, tmp_path):
+        path = tmp_path.joinpath("plan.json")
+        path.write_text(json.dumps({"version": 0, "new_mode": True}))
+        with pytest.raises(PlanError, match="not compatible"):
+            ModeSwitchPlan.load(path)
@@ -7,7 +7,13 @@ import pytest
 
 from server_manager.src.exceptions import InvalidPlayerError
 from server_manager.src.files import AdvancementsFile, File, PlayerDataFile, StatsFile
-from server_manager.src.player import Coords, Item, Player, change_players_mode
+from server_manager.src.player import (
+    Coords,
+    Item,
+    Player,
+    PlayerSummary,
+    change_players_mode,
+)
 
 # pylint: disable=redefined-outer-name
 
@@ -62,7 +68,8 @@ class TestInit:
         for files in permutations:
             players.append(Player("<uuid>", *files))
 
-        assert gm_m.call_count == gu_m.call_count == 6
+        # username and mode are resolved lazily
+        assert gm_m.call_count == gu_m.call_count == 0
 
         for player in players[1:]:
             assert player == players[0]
@@ -84,7 +91,8 @@ class TestInit:
             with pytest.raises(InvalidPlayerError, match="Can't create Player"):
                 Player("<uuid>", *files)
 
-        assert gm_m.call_count == gu_m.call_count == 6
+        assert gm_m.call_count == 0
+        assert gu_m.call_count == 6
 
         with pytest.raises(TypeError, match="files can't be"):
             Player("<uuid>", "invalid-file")
@@ -101,11 +109,53 @@ def test_repr(player_mocks):
 
     player = Player("<uuid>", adv_file, stats_file, data_file)
     assert repr(player) == "Player(<username>|<mode> - <uuid>)"
+    assert repr(player) == "Player(<username>|<mode> - <uuid>)"
 
+    # Lookups are cached
     assert gm_m.call_count == 1
     assert gu_m.call_count == 1
 
 
+def test_lazy_attributes(player_mocks):
+    gm_m, gu_m = player_mocks
+    gm_m.return_value = False
+    gu_m.return_value = "<username>"
+
+    adv_file = AdvancementsFile("<path>")
+    stats_file = StatsFile("<path>")
+    data_file = PlayerDataFile("<path>")
+
+    player = Player("<uuid>", adv_file, stats_file, data_file)
+    gm_m.assert_not_called()
+    gu_m.assert_not_called()
+
+    assert player.username == "<username>"
+    assert player.username == "<username>"
+    gu_m.assert_called_once_with("<uuid>")
+
+    assert player.online is False
+    assert player.online is False
+    gm_m.assert_called_once_with("<uuid>")
+
+    with pytest.raises(AttributeError):
+        player.invalid_attribute = True
+
+
+def test_many_players_no_lookups(player_mocks):
+    gm_m, gu_m = player_mocks
+    adv_file = AdvancementsFile("<path>")
+    stats_file = StatsFile("<path>")
+    data_file = PlayerDataFile("<path>")
+
+    players = [
+        Player(f"<uuid-{i}>", adv_file, stats_file, data_file) for i in range(10000)
+    ]
+
+    assert len(set(players)) == 10000
+    gm_m.assert_not_called()
+    gu_m.assert_not_called()
+
+
 def test_eq(player_mocks):
     gm_m, gu_m = player_mocks
 
@@ -117,9 +167,13 @@ def test_eq(player_mocks):
     player2 = Player("<uuid>", adv_file, stats_file, data_file)
 
     assert player1 == player2
+    assert hash(player1) == hash(player2)
+    assert len({player1, player2}) == 1
+    assert {player1: 1}[player2] == 1
+    assert player1 != "<uuid>"
 
-    assert gm_m.call_count == 2
-    assert gu_m.call_count == 2
+    assert gm_m.call_count == 0
+    assert gu_m.call_count == 0
 
 
 def test_neq(player_mocks):
@@ -140,12 +194,15 @@ def test_neq(player_mocks):
     player5 = Player("<uuid-1>", adv_file1, stats_file1, data_file2)
 
     assert player1 != player2
-    assert player1 != player3
-    assert player1 != player4
-    assert player1 != player5
+    assert len({player1, player2}) == 2
+
+    # Players are identified by their uuid
+    assert player1 == player3
+    assert player1 == player4
+    assert player1 == player5
 
-    assert gm_m.call_count == 5
-    assert gu_m.call_count == 5
+    assert gm_m.call_count == 0
+    assert gu_m.call_count == 0
 
 
 def test_to_extended_repr(player_mocks):
@@ -296,6 +353,53 @@ def test_position(gnbtd_m, player_mocks, unparsed_dim, parsed_dim):
     assert player.get_position() == expected
 
 
+@mock.patch("server_manager.src.player.Player.get_nbt_data")
+def test_position_exact(gnbtd_m, player_mocks):
+    pos = [-0.4, 64.5, 511.6]
+    gnbtd_m.return_value = {"Pos": pos, "Dimension": "minecraft:overworld"}
+    gm_m, gu_m = player_mocks
+    gm_m.return_value = "<mode>"
+    gu_m.return_value = "<username>"
+
+    adv_file = AdvancementsFile("<adv-path>")
+    stats_file = StatsFile("<stats-path>")
+    data_file = PlayerDataFile("<data-path>")
+
+    player = Player("<uuid>", adv_file, stats_file, data_file)
+    assert player.get_position() == Coords("overworld", 0, 64, 512)
+    assert player.get_position(exact=True) == Coords("overworld", -0.4, 64.5, 511.6)
+
+
+def test_get_summary(player_mocks):
+    gm_m, gu_m = player_mocks
+    gm_m.return_value = "<mode>"
+    gu_m.return_value = "<username>"
+
+    pdf_m = mock.MagicMock()
+    nbt_path = Path(__file__).parent.parent.joinpath("test_data/nbt-example.dat")
+    pdf_m.read_bytes.return_value = nbt_path.read_bytes()
+
+    adv_file = AdvancementsFile("<adv-path>")
+    stats_file = StatsFile("<stats-path>")
+    data_file = PlayerDataFile("<data-path>")
+
+    player = Player("<uuid>", adv_file, stats_file, data_file)
+    player.player_data_file = pdf_m
+
+    expected = PlayerSummary(
+        inventory=10,
+        ender_chest=15,
+        dimension="overworld",
+        x=-142,
+        y=91,
+        z=83,
+        health=20.0,
+        xp_level=0,
+    )
+    assert player.get_summary() == expected
+    pdf_m.read_bytes.assert_called_once_with()
+
+
 @mock.patch("server_manager.src.player.Player.get_nbt_data")
 def test_get_inventory(gnbtd_m, player_mocks):
     gnbtd_m.return_value = {"Inventory": "<inventory>"}
@@ -436,7 +540,7 @@ class TestGenerate:
         assert str(CustomPlayer(1, 2, 3)) == "CustomPlayer(uuid=1, files=(2, 3))"
         assert repr(CustomPlayer(1, 2, 3)) == "CustomPlayer(uuid=1, files=(2, 3))"
 
-        File.uuid_pattern = re.compile(r"<[-\w]+>")
+        mock.patch.object(File, "uuid_pattern", re.compile(r"<[-\w]+>")).start()
         self.guff = mock.patch(
             "server_manager.src.files.File.get_uuid_from_filepath"
         ).start()
@@ -6,6 +6,7 @@ import pytest
 from server_manager.src.players_data import (
     get_mode,
     get_players_data,
+    get_players_index,
     get_username,
     get_uuid,
     CSV_PATH,
@@ -13,6 +14,13 @@ from server_manager.src.players_data import (
 from server_manager.src.exceptions import SearchError
 
 
+@pytest.fixture(autouse=True)
+def clear_index_cache():
+    get_players_index.cache_clear()
+    yield
+    get_players_index.cache_clear()
+
+
 def test_get_players_data():
     assert CSV_PATH.exists()
     assert CSV_PATH.is_file()
@@ -36,6 +44,23 @@ def test_get_players_data():
         assert first.online == (not second.online)
 
 
+def test_get_players_index():
+    with mock.patch(
+        "server_manager.src.players_data.get_players_data", wraps=get_players_data
+    ) as gpd_m:
+        index = get_players_index()
+        assert get_players_index() is index
+        gpd_m.assert_called_once_with()
+
+    players_data = get_players_data()
+    assert len(index.by_uuid) == len(players_data)
+    assert len(index.by_username) == len(players_data)
+
+    player = index.by_username[("SrAlloza", True)]
+    assert player.uuid == "4a618768-4f26-4688-8ab5-6e64f250c62f"
+    assert index.by_uuid[player.uuid] is player
+
+
 def test_get_uuid_ok():
     assert get_uuid("SrAlloza", True) == "4a618768-4f26-4688-8ab5-6e64f250c62f"
     assert get_uuid("SrAlloza", False) == "be17640b-8471-321e-a355-d2a2859ebda1"
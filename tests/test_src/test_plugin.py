@@ -9,6 +9,7 @@ from server_manager.src.plugin import (
     get_plugin_mode,
     get_plugin_offline_path,
     get_plugin_online_path,
+    get_plugin_rename,
     get_plugins_folder,
     set_plugin_mode,
 )
@@ -108,6 +109,14 @@ class TestSetPluginMode:
 
         mock.patch.stopall()
 
+    @pytest.mark.parametrize("new_mode", [True, False])
+    def test_get_plugin_rename(self, new_mode):
+        old, new = get_plugin_rename(new_mode)
+        if new_mode:
+            assert (old, new) == (self.offline_m, self.online_m)
+        else:
+            assert (old, new) == (self.online_m, self.offline_m)
+
     def test_set_plugin_online(self):
         set_plugin_mode(True)
 
@@ -0,0 +1,148 @@
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from server_manager.src.exceptions import RewriterError
+from server_manager.src.plugin_data import (
+    BUILTIN_REWRITERS,
+    ENTRY_POINT_GROUP,
+    UserdataRewriter,
+    UUIDRewriter,
+    check_ownership,
+    get_entry_points,
+    load_rewriters,
+    rewrite_plugin_data,
+)
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def userdata(tmp_path):
+    folder = tmp_path.joinpath("plugins", "Essentials", "userdata")
+    folder.mkdir(parents=True)
+    for uuid in ("a", "b", "c", "x"):
+        folder.joinpath(uuid + ".yml").write_text(uuid)
+    yield folder
+
+
+def get_contents(folder):
+    return {x.name: x.read_text() for x in folder.iterdir()}
+
+
+class TestUUIDRewriter:
+    def test_repr(self):
+        rewriter = UserdataRewriter("test", "plugins/Test/userdata")
+        assert repr(rewriter) == "UserdataRewriter('test')"
+
+    def test_abstract(self):
+        with pytest.raises(TypeError, match="abstract"):
+            UUIDRewriter("test")  # pylint: disable=abstract-class-instantiated
+
+        class PathsOnly(UUIDRewriter):
+            def get_paths(self, server_path):
+                return []
+
+        with pytest.raises(TypeError, match="abstract"):
+            PathsOnly("test")  # pylint: disable=abstract-class-instantiated
+
+
+class TestUserdataRewriter:
+    @pytest.fixture
+    def rewriter(self):
+        yield UserdataRewriter("essentials", "plugins/Essentials/userdata")
+
+    def test_get_paths(self, rewriter, tmp_path):
+        assert rewriter.get_paths(tmp_path) == [
+            tmp_path.joinpath("plugins/Essentials/userdata")
+        ]
+
+    def test_rewrite(self, rewriter, userdata):
+        # chain (c -> d, b -> c) and swap (a <-> x)
+        mapping = {"a": "x", "x": "a", "b": "c", "c": "d", "z": "y"}
+        assert rewriter.rewrite(userdata.parents[2], mapping) == 4
+        assert get_contents(userdata) == {
+            "x.yml": "a",
+            "a.yml": "x",
+            "c.yml": "b",
+            "d.yml": "c",
+        }
+
+    def test_rewrite_taken(self, rewriter, userdata, caplog):
+        assert rewriter.rewrite(userdata.parents[2], {"a": "b"}) == 0
+        assert get_contents(userdata)["a.yml"] == "a"
+        assert "Can't rename a.yml, b.yml already exists" in caplog.text
+
+    def test_rewrite_interrupted(self, rewriter, userdata):
+        userdata.joinpath("a.yml").rename(userdata.joinpath("e.yml.lia-tmp"))
+        assert rewriter.rewrite(userdata.parents[2], {"b": "f"}) == 2
+        assert sorted(get_contents(userdata)) == ["c.yml", "e.yml", "f.yml", "x.yml"]
+
+    def test_no_folder(self, rewriter, tmp_path):
+        assert rewriter.rewrite(tmp_path, {"a": "b"}) == 0
+
+
+@mock.patch("server_manager.src.plugin_data.entry_points")
+class TestGetEntryPoints:
+    def test_select(self, ep_m):
+        assert get_entry_points("group") == ep_m.return_value.select.return_value
+        ep_m.return_value.select.assert_called_once_with(group="group")
+
+    def test_dict(self, ep_m):
+        ep_m.return_value = {"group": ["entry-point"]}
+        assert get_entry_points("group") == ["entry-point"]
+        assert get_entry_points("other") == []
+
+
+@mock.patch("server_manager.src.plugin_data.get_entry_points")
+class TestLoadRewriters:
+    def test_builtin(self, ep_m):
+        ep_m.return_value = []
+        assert load_rewriters() == BUILTIN_REWRITERS
+        ep_m.assert_called_once_with(ENTRY_POINT_GROUP)
+
+    def test_entry_points(self, ep_m):
+        rewriter = UserdataRewriter("homes", "plugins/Homes/players")
+        ep_m.return_value = [mock.MagicMock(load=mock.MagicMock(return_value=rewriter))]
+        assert load_rewriters() == BUILTIN_REWRITERS + [rewriter]
+
+    def test_invalid_entry_point(self, ep_m):
+        entry_point = mock.MagicMock(load=mock.MagicMock(return_value=object()))
+        entry_point.name = "invalid"
+        ep_m.return_value = [entry_point]
+        with pytest.raises(RewriterError, match="'invalid' is not a UUIDRewriter"):
+            load_rewriters()
+
+    def test_duplicated(self, ep_m):
+        rewriter = UserdataRewriter("essentials", "plugins/Other/userdata")
+        ep_m.return_value = [mock.MagicMock(load=mock.MagicMock(return_value=rewriter))]
+        with pytest.raises(RewriterError, match="Duplicated rewriters: essentials"):
+            load_rewriters()
+
+
+class TestCheckOwnership:
+    def test_ok(self):
+        check_ownership(BUILTIN_REWRITERS, Path("/server"))
+
+    @pytest.mark.parametrize(
+        "folder", ["plugins/Essentials/userdata", "plugins/Essentials", "plugins"]
+    )
+    def test_overlap(self, folder):
+        rewriters = BUILTIN_REWRITERS + [UserdataRewriter("other", folder)]
+        with pytest.raises(RewriterError, match="'other' and 'essentials' both own"):
+            check_ownership(rewriters, Path("/server"))
+
+
+@mock.patch("server_manager.src.plugin_data.load_rewriters")
+def test_rewrite_plugin_data(lr_m, tmp_path):
+    rewriters = [mock.MagicMock(spec=UUIDRewriter) for _ in range(3)]
+    for i, rewriter in enumerate(rewriters):
+        rewriter.name = f"rewriter-{i}"
+        rewriter.get_paths.return_value = [tmp_path.joinpath(str(i))]
+        rewriter.rewrite.return_value = i
+    lr_m.return_value = rewriters
+
+    assert rewrite_plugin_data({"a": "b"}, tmp_path, workers=2) == 3
+    for rewriter in rewriters:
+        rewriter.rewrite.assert_called_once_with(tmp_path, {"a": "b"})
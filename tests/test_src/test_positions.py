@@ -0,0 +1,151 @@
+from collections import namedtuple
+import random
+from unittest import mock
+
+import pytest
+
+from server_manager.src.player import Coords
+from server_manager.src.positions import (
+    PositionIndex,
+    get_region_filename,
+    normalize_dimension,
+)
+
+Player = namedtuple("Player", "username")
+
+
+@pytest.mark.parametrize(
+    "dimension,expected",
+    [
+        ("minecraft:overworld", "overworld"),
+        ("minecraft:the_nether", "the_nether"),
+        ("the_end", "the_end"),
+        ("Overworld", "overworld"),
+    ],
+)
+def test_normalize_dimension(dimension, expected):
+    assert normalize_dimension(dimension) == expected
+
+
+@pytest.mark.parametrize(
+    "x,z,expected",
+    [
+        (0, 0, "r.0.0.mca"),
+        (511, 511, "r.0.0.mca"),
+        (512, -1, "r.1.-1.mca"),
+        (-512, -513, "r.-1.-2.mca"),
+        (1500, 3000, "r.2.5.mca"),
+        (-0.4, 0.4, "r.-1.0.mca"),
+        (511.6, -512.5, "r.0.-2.mca"),
+        (512.0, -511.9, "r.1.-1.mca"),
+    ],
+)
+def test_get_region_filename(x, z, expected):
+    assert get_region_filename(Coords("overworld", x, 64, z)) == expected
+
+
+class TestPositionIndex:
+    @pytest.fixture
+    def index(self):
+        index = PositionIndex(cell_size=16)
+        index.add(Player("a"), Coords("minecraft:overworld", 0, 64, 0))
+        index.add(Player("b"), Coords("overworld", 10, 64, 0))
+        index.add(Player("c"), Coords("overworld", -20, 70, 5))
+        index.add(Player("d"), Coords("overworld", 600, 64, 600))
+        index.add(Player("e"), Coords("the_nether", 1, 64, 1))
+        yield index
+
+    def test_invalid_cell_size(self):
+        with pytest.raises(ValueError, match="cell_size must be positive"):
+            PositionIndex(cell_size=0)
+
+    def test_len_and_dimensions(self, index):
+        assert len(index) == 5
+        assert index.dimensions == ["overworld", "the_nether"]
+
+    def test_near(self, index):
+        result = index.near(0, 64, 0, radius=25)
+        assert [x.player.username for x in result] == ["a", "b", "c"]
+        assert [x.distance for x in result[:2]] == [0, 10]
+        assert result[0].coords == Coords("overworld", 0, 64, 0)
+
+        result = index.near(0, 64, 0, radius=10)
+        assert [x.player.username for x in result] == ["a", "b"]
+
+        result = index.near(0, 64, 0, radius=5, dim="minecraft:the_nether")
+        assert [x.player.username for x in result] == ["e"]
+
+        assert index.near(0, 64, 0, radius=5000, dim="the_end") == []
+        result = index.near(0, 64, 0, radius=5000)
+        assert [x.player.username for x in result] == ["a", "b", "c", "d"]
+
+    def test_near_negative_radius(self, index):
+        with pytest.raises(ValueError, match="radius can't be negative"):
+            index.near(0, 0, 0, radius=-1)
+
+    def test_near_matches_brute_force(self):
+        rng = random.Random(1)
+        index = PositionIndex()
+        positions = []
+        for i in range(2000):
+            coords = Coords(
+                "overworld",
+                rng.randint(-5000, 5000),
+                rng.randint(0, 255),
+                rng.randint(-5000, 5000),
+            )
+            player = Player(f"player-{i}")
+            positions.append((player, coords))
+            index.add(player, coords)
+
+        for _ in range(20):
+            x, y, z = rng.randint(-5000, 5000), 64, rng.randint(-5000, 5000)
+            radius = rng.choice([10, 100, 500, 20000])
+            expected = {
+                player
+                for player, coords in positions
+                if (coords.x - x) ** 2 + (coords.y - y) ** 2 + (coords.z - z) ** 2
+                <= radius**2
+            }
+            result = index.near(x, y, z, radius=radius)
+            assert {x.player for x in result} == expected
+
+    def test_by_region(self, index):
+        regions = index.by_region()
+        assert list(regions) == [
+            ("overworld", "r.-1.0.mca"),
+            ("overworld", "r.0.0.mca"),
+            ("overworld", "r.1.1.mca"),
+            ("the_nether", "r.0.0.mca"),
+        ]
+        assert regions[("overworld", "r.0.0.mca")] == [Player("a"), Player("b")]
+
+        regions = index.by_region(dim="minecraft:the_nether")
+        assert regions == {("the_nether", "r.0.0.mca"): [Player("e")]}
+
+    def test_build(self):
+        player_a = mock.MagicMock()
+        player_a.get_position.return_value = Coords("overworld", 1, 2, 3)
+        player_b = mock.MagicMock()
+        player_b.get_position.return_value = Coords("the_end", 4, 5, 6)
+
+        index = PositionIndex.build([player_a, player_b], cell_size=32)
+
+        assert index.cell_size == 32
+        assert len(index) == 2
+        assert index.dimensions == ["overworld", "the_end"]
+        player_a.get_position.assert_called_once_with(exact=True)
+        player_b.get_position.assert_called_once_with(exact=True)
+
+    def test_build_exact_regions(self):
+        # rounding would move both players to the neighbour region
+        player_a = mock.MagicMock(username="a")
+        player_a.get_position.return_value = Coords("overworld", -0.4, 64.0, 10.0)
+        player_b = mock.MagicMock(username="b")
+        player_b.get_position.return_value = Coords("overworld", 511.6, 64.0, 10.0)
+
+        index = PositionIndex.build([player_a, player_b])
+        assert index.by_region() == {
+            ("overworld", "r.-1.0.mca"): [player_a],
+            ("overworld", "r.0.0.mca"): [player_b],
+        }
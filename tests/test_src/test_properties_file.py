@@ -0,0 +1,149 @@
+from pathlib import Path
+
+import pytest
+
+from server_manager.src.properties_file import (
+    PropertiesFile,
+    escape,
+    parse_properties,
+    split_line,
+    unescape,
+)
+
+TEXT = """#Minecraft server properties
+#Tue May 05 15:59:32 CEST 2020
+level-name=my-world
+rcon.password=p4ss\\:w0rd\\=\\#1!
+motd=\\u00A7aHello world
+   spaced  :  value with spaces
+! bang comment
+
+long=first \\
+    second \\
+    third
+key\\ with\\ spaces=1
+empty=
+"""
+
+
+@pytest.mark.parametrize(
+    "escaped,unescaped",
+    [
+        ("plain", "plain"),
+        ("a\\:b\\=c", "a:b=c"),
+        ("\\#\\!", "#!"),
+        ("tab\\there", "tab\there"),
+        ("back\\\\slash", "back\\slash"),
+        ("\\u00A7a", "§a"),
+        ("end\\", "end\\"),
+        ("C:\\users\\u12", "C:usersu12"),
+        ("\\u+0A7", "u+0A7"),
+    ],
+)
+def test_unescape(escaped, unescaped):
+    assert unescape(escaped) == unescaped
+
+
+def test_escape():
+    assert escape("a:b=c#d!e\\f") == "a\\:b\\=c\\#d\\!e\\\\f"
+    assert escape(" leading space") == "\\ leading space"
+    assert escape("key with spaces", is_key=True) == "key\\ with\\ spaces"
+    for text in ("a:b=c", "\ttab", " x ", "\\"):
+        assert unescape(escape(text)) == text
+
+
+@pytest.mark.parametrize(
+    "line,pair",
+    [
+        ("a=b", ("a", "b")),
+        ("a = b", ("a", "b")),
+        ("a:b", ("a", "b")),
+        ("a b", ("a", "b")),
+        ("a", ("a", "")),
+        ("a==b", ("a", "=b")),
+        ("  # comment", None),
+        ("! comment", None),
+        ("   ", None),
+    ],
+)
+def test_split_line(line, pair):
+    assert split_line(line) == pair
+
+
+class TestPropertiesFile:
+    @pytest.fixture
+    def properties(self):
+        yield PropertiesFile.parse(TEXT)
+
+    def test_parse(self, properties):
+        assert properties.items() == [
+            ("level-name", "my-world"),
+            ("rcon.password", "p4ss:w0rd=#1!"),
+            ("motd", "§aHello world"),
+            ("spaced", "value with spaces"),
+            ("long", "first second third"),
+            ("key with spaces", "1"),
+            ("empty", ""),
+        ]
+        assert len(properties) == 7
+        assert list(properties) == [key for key, _ in properties.items()]
+
+    def test_get(self, properties):
+        assert properties["level-name"] == "my-world"
+        assert properties.get("empty") == ""
+        assert properties.get("missing") is None
+        assert properties.get("missing", "x") == "x"
+        assert "motd" in properties and "missing" not in properties
+        with pytest.raises(KeyError):
+            properties["missing"]  # pylint: disable=pointless-statement
+
+    def test_line_numbers(self, properties):
+        assert properties.get_line_number("level-name") == 2
+        assert properties.get_line_number("long") == 8
+        assert properties.get_line_number("empty") == 10
+
+    def test_dump_unchanged(self, properties):
+        assert properties.dump() == TEXT
+
+    def test_set(self, properties):
+        properties["long"] = "short"
+        properties["rcon.password"] = "new:pass"
+        properties["new-key"] = "new value"
+
+        assert properties["long"] == "short"
+        assert properties["rcon.password"] == "new:pass"
+        lines = TEXT.splitlines()
+        expected = lines[:3] + ["rcon.password=new\\:pass"] + lines[4:8]
+        expected += ["long=short"] + lines[11:] + ["new-key=new value"]
+        assert properties.dump() == "\n".join(expected) + "\n"
+        assert PropertiesFile.parse(properties.dump()).items() == properties.items()
+
+    def test_copy(self, properties):
+        copy = properties.copy()
+        copy["level-name"] = "other"
+        assert properties["level-name"] == "my-world"
+        assert copy.dump() == TEXT.replace("my-world", "other")
+
+    def test_trailing_newline(self):
+        assert PropertiesFile.parse("a=1").dump() == "a=1"
+        assert PropertiesFile.parse("a=1\n").dump() == "a=1\n"
+        properties = PropertiesFile.parse("")
+        properties["a"] = "1"
+        assert properties.dump() == "a=1\n"
+
+    def test_server_properties(self):
+        path = Path(__file__).parent.parent.joinpath("test_data/server.properties")
+        text = path.read_text()
+        properties = PropertiesFile.parse(text)
+
+        assert len(properties) == 49
+        assert properties["online-mode"] == "true"
+        assert properties["generator-settings"] == ""
+        assert properties.dump() == text
+
+
+def test_parse_properties():
+    parse_properties.cache_clear()
+    first = parse_properties(TEXT)
+    assert parse_properties(TEXT) is first
+    assert parse_properties("a=1") is not first
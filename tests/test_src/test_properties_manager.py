@@ -1,4 +1,5 @@
 from enum import Enum
+import os
 from pathlib import Path
 from unittest import mock
 
@@ -7,17 +8,21 @@ import pytest
 
 from server_manager.src.exceptions import PropertyError
 from server_manager.src.properties_manager import (
-    DifficultyProperty,
-    MetaProperty,
+    DEFAULTS,
     Properties,
     PropertiesManager,
-    WhitelistProperty,
+    PropertySpec,
+    WhitelistSpec,
+    get_schema,
     get_server_properties_filepath,
     set_default_properties,
     validate_server_path,
 )
+from server_manager.src.properties_schema import SCHEMA
 from server_manager.src.utils import str2bool
 
+TEST_DATA = Path(__file__).parent.parent.joinpath("test_data/server.properties")
+
 
 class TestPropertiesEnum:
     def test_members_values(self):
@@ -105,21 +110,15 @@ class TestPropertiesManager:
     def mocks(self):
         root = "server_manager.src.properties_manager."
         self.gspf_m = mock.patch(root + "get_server_properties_filepath").start()
-        self.prop_path = Path(__file__).parent.parent.joinpath(
-            "test_data/server.properties"
-        )
-        self.text = self.prop_path.read_text()
+        self.text = TEST_DATA.read_text()
         self.gspf_m.return_value.read_text.return_value = self.text
-
-        self.mock_a = mock.MagicMock()
-        self.mock_b = mock.MagicMock()
-        self.mock_c = mock.MagicMock()
+        PropertiesManager.raw_cache.cache_clear()
+        PropertiesManager.values_cache.cache_clear()
 
         class NewProperties(Enum):
             mock_a = "mock-a"
             mock_b = "mock-b"
             mock_c = "mock-c"
-            dummy = "dummy"
 
             @classmethod
             def get(cls, value):
@@ -131,190 +130,248 @@ class TestPropertiesManager:
         self.new_properties = NewProperties
         mock.patch(root + "Properties", NewProperties).start()
 
-        self.validator_m = mock.MagicMock()
-        self.validator_m.a.str_to_value = str
-        self.validator_m.b.str_to_value = str2bool
-        self.validator_m.c.str_to_value = int
+        self.spec_m = mock.MagicMock()
+        self.spec_m.a.str_to_value = str
+        self.spec_m.b.str_to_value = str2bool
+        self.spec_m.c.str_to_value = int
+        self.spec_m.a.get.return_value = 10
+        self.spec_m.b.get.return_value = 11
+        self.spec_m.c.get.return_value = 12
+        for name in "abc":
+            getattr(self.spec_m, name).key = "mock-" + name
 
         self.general_map = {
-            NewProperties.mock_a: self.validator_m.a,
-            NewProperties.mock_b: self.validator_m.b,
-            NewProperties.mock_c: self.validator_m.c,
-            NewProperties.dummy: None,
+            NewProperties.mock_a: self.spec_m.a,
+            NewProperties.mock_b: self.spec_m.b,
+            NewProperties.mock_c: self.spec_m.c,
         }
         mock.patch(root + "PropertiesManager.general_map", self.general_map).start()
 
-        self.getters = {
-            NewProperties.mock_a: lambda: 10,
-            NewProperties.mock_b: lambda: 11,
-            NewProperties.mock_c: lambda: 12,
-            NewProperties.dummy: None,
-        }
-        mock.patch(root + "PropertiesManager.getters_map", self.getters).start()
-
-        self.setters = {
-            NewProperties.mock_a: self.mock_a,
-            NewProperties.mock_b: self.mock_b,
-            NewProperties.mock_c: self.mock_c,
-            NewProperties.dummy: None,
-        }
-        mock.patch(root + "PropertiesManager.setters_map", self.setters).start()
-
         yield
 
         mock.patch.stopall()
 
+    def test_get_spec(self):
+        assert PropertiesManager.get_spec("mock_a") is self.spec_m.a
+        assert PropertiesManager.get_spec("mock-b") is self.spec_m.b
+        assert (
+            PropertiesManager.get_spec("view-distance") is get_schema()["view-distance"]
+        )
+        assert (
+            PropertiesManager.get_spec("view_distance") is get_schema()["view-distance"]
+        )
+        assert PropertiesManager.get_spec("rcon.port") is get_schema()["rcon.port"]
+
+    def test_get_spec_unknown_key(self):
+        self.gspf_m.return_value.read_text.return_value = "custom-key=1\n"
+        spec = PropertiesManager.get_spec("custom-key")
+        assert (spec.key, spec.type) == ("custom-key", "str")
+
+        with pytest.raises(ValueError, match="Unknown property: 'other-key'"):
+            PropertiesManager.get_spec("other-key")
+
     def test_get_property(self):
         assert PropertiesManager.get_property("mock-a") == 10
         assert PropertiesManager.get_property("mock-b") == 11
         assert PropertiesManager.get_property("mock-c") == 12
+        assert PropertiesManager.get_property("view-distance") == 8
+        assert PropertiesManager.get_property("level_type") == "default"
+        assert PropertiesManager.get_property("gamemode") == "survival"
 
     def test_adapt_value(self):
         assert PropertiesManager.adapt_value("mock-a", 123) == "123"
         assert PropertiesManager.adapt_value("mock-b", "on") is True
         assert PropertiesManager.adapt_value("mock-c", "12") == 12
+        assert PropertiesManager.adapt_value("simulation-distance", "12") == 12
 
     def test_set_property_ok(self):
-        self.mock_a.assert_not_called()
-        self.mock_b.assert_not_called()
-        self.mock_c.assert_not_called()
-
         PropertiesManager.set_property(mock_a="a")
-
-        self.mock_a.assert_called_once_with("a")
-        self.mock_b.assert_not_called()
-        self.mock_c.assert_not_called()
+        self.spec_m.a.set.assert_called_once_with("a")
 
         PropertiesManager.set_property(mock_b="on")
-        self.mock_a.assert_called_once_with("a")
-        self.mock_b.assert_called_once_with(True)
-        self.mock_c.assert_not_called()
+        self.spec_m.b.set.assert_called_once_with(True)
+
+        PropertiesManager.set_property(**{"mock-c": -9})
+        self.spec_m.c.set.assert_called_once_with(-9)
 
-        PropertiesManager.set_property(mock_c=-9)
-        self.mock_a.assert_called_once_with("a")
-        self.mock_b.assert_called_once_with(True)
-        self.mock_c.assert_called_once_with(-9)
+    @mock.patch(
+        "server_manager.src.properties_manager.PropertiesManager.set_raw_values"
+    )
+    def test_set_property_any_key(self, srv_m):
+        PropertiesManager.set_property(view_distance="12")
+        srv_m.assert_called_once_with(**{"view-distance": "12"})
+
+        with pytest.raises(ValueError, match="Invalid value for view-distance"):
+            PropertiesManager.set_property(view_distance="64")
 
     def test_set_property_fail(self):
-        with pytest.raises(ValueError):
+        with pytest.raises(ValueError, match="Unknown property"):
             PropertiesManager.set_property(invalid_property=True)
 
-        with pytest.raises(ValueError):
+        with pytest.raises(ValueError, match="Must set one argument"):
             PropertiesManager.set_property()
 
+        with pytest.raises(ValueError, match="Must set one argument"):
+            PropertiesManager.set_property(mock_a="a", mock_b="b")
+
     def test_get_properties_raw(self):
         properties_raw = PropertiesManager.get_properties_raw()
         assert properties_raw == self.text
         self.gspf_m.return_value.read_text.assert_called_once_with(encoding="utf-8")
 
-        # LRU cache
+        # Stat cache
         properties_raw = PropertiesManager.get_properties_raw()
         assert properties_raw == self.text
         self.gspf_m.return_value.read_text.assert_called_once_with(encoding="utf-8")
+        assert self.gspf_m.return_value.stat.call_count == 2
+        assert PropertiesManager.raw_cache.cache_info() == (1, 1, 1)
+
+    def test_external_edit(self, tmp_path):
+        path = tmp_path.joinpath("server.properties")
+        path.write_text("difficulty=easy\n")
+        self.gspf_m.return_value = path
+        self.spec_m.a.get.side_effect = lambda: path.read_text()[11:-1]
+
+        assert PropertiesManager.get_property("mock-a") == "easy"
+        assert PropertiesManager.get_property("mock-a") == "easy"
+        mtime_ns = path.stat().st_mtime_ns
+        path.write_text("difficulty=hard\n")
+        os.utime(path, ns=(mtime_ns, mtime_ns + 1))
+        assert PropertiesManager.get_property("mock-a") == "hard"
+
+        assert PropertiesManager.cache_info() == {
+            "server.properties": (1, 2, 1),
+            "properties": (1, 2, 1),
+        }
+
+    @mock.patch("server_manager.src.properties_manager.parse_properties")
+    @mock.patch(
+        "server_manager.src.properties_manager.PropertiesManager.get_properties_raw"
+    )
+    def test_get_properties_file(self, gpr_m, pp_m):
+        assert PropertiesManager.get_properties_file() == pp_m.return_value
+        pp_m.assert_called_once_with(gpr_m.return_value)
+
+    @mock.patch(
+        "server_manager.src.properties_manager.PropertiesManager.get_properties_raw"
+    )
+    def test_get_raw_value(self, gpr_m):
+        gpr_m.return_value = "level-name=my-world\nrcon.password=a\\:b#c-d!\n"
+        assert PropertiesManager.get_raw_value("level-name") == "my-world"
+        assert PropertiesManager.get_raw_value("rcon.password") == "a:b#c-d!"
+        with pytest.raises(PropertyError, match="'motd' not found"):
+            PropertiesManager.get_raw_value("motd")
+
+    @mock.patch(
+        "server_manager.src.properties_manager.PropertiesManager.get_properties_raw"
+    )
+    @mock.patch(
+        "server_manager.src.properties_manager.PropertiesManager.write_properties_raw"
+    )
+    def test_set_raw_values(self, wpr_m, gpr_m):
+        gpr_m.return_value = "#comment\na=1\nb=2\n"
+        PropertiesManager.set_raw_values(a="x:y", c="3")
+        wpr_m.assert_called_once_with("#comment\na=x\\:y\nb=2\nc=3\n")
+        assert PropertiesManager.get_properties_file().dump() == gpr_m.return_value
+
+    def test_write_properties_raw(self, tmp_path):
+        path = tmp_path.joinpath("server.properties")
+        path.write_text("old")
+        self.gspf_m.return_value = path
 
-    def test_write_properties_raw(self):
         PropertiesManager.write_properties_raw("<server.properties>")
-        self.gspf_m.return_value.write_text.assert_called_once_with(
-            "<server.properties>", encoding="utf-8"
+        assert path.read_text(encoding="utf-8") == "<server.properties>"
+        assert [x.name for x in tmp_path.iterdir()] == ["server.properties"]
+
+    @mock.patch(
+        "server_manager.src.properties_manager.PropertiesManager.set_raw_values"
+    )
+    def test_set_properties(self, srv_m):
+        self.spec_m.a.get.return_value = "a"
+        self.spec_m.b.get.return_value = False
+        self.spec_m.c.get.return_value = 3
+        self.spec_m.b.to_raw.return_value = {"mock-b": "true"}
+        self.spec_m.c.to_raw.return_value = {"mock-c": "5", "extra": "5"}
+
+        changed = PropertiesManager.set_properties(
+            {"mock-a": "a", "mock_b": "on", "mock-c": "5"}
         )
-
-    def test_register_property(self):
-        class DummyProperty:
-            get = 0
-            set = 1
-
-        prop = self.new_properties.dummy
-
-        assert PropertiesManager.getters_map[prop] is None
-        assert PropertiesManager.setters_map[prop] is None
-
-        PropertiesManager.register_property(DummyProperty, "dummy")
-
-        assert PropertiesManager.getters_map[prop] == DummyProperty.get
-        assert PropertiesManager.setters_map[prop] == DummyProperty.set
-
-
-class TestMetaProperty:
-    @pytest.fixture(autouse=True)
-    def mocks(self):
-        root = "server_manager.src.properties_manager."
-        self.reg_prop_m = mock.patch(
-            root + "PropertiesManager.register_property"
-        ).start()
-
-        yield
-
-        mock.patch.stopall()
-
-    def test_ok(self):
-        class BaseSomething1(metaclass=MetaProperty):
-            pass
-
-        assert BaseSomething1.__name__ == "BaseSomething1"
-
-        self.reg_prop_m.assert_not_called()
-
-        class BaseSomething2(BaseSomething1):
-            pass
-
-        assert BaseSomething2.__name__ == "BaseSomething2"
-
-        self.reg_prop_m.assert_not_called()
-
-        class NormalClass(metaclass=MetaProperty):
-            property_name = "normal-class"
-
-        assert NormalClass.__name__ == "NormalClass"
-
-        self.reg_prop_m.assert_called_once_with(NormalClass, "normal-class")
-
-        class NormalClass2(NormalClass):
-            property_name = "normal-class-2"
-
-        assert NormalClass2.__name__ == "NormalClass2"
-
-        self.reg_prop_m.assert_called()
-        assert self.reg_prop_m.call_count == 2
-        self.reg_prop_m.any_call(NormalClass2, "normal-class-2")
-
-    def test_fail(self):
-        with pytest.raises(ValueError, match="Must set property name"):
-
-            # pylint: disable=unused-variable
-            class FailedClass(metaclass=MetaProperty):
-                pass
-
-        class GoodBase1(metaclass=MetaProperty):
-            property_name = None
-
-        with pytest.raises(ValueError, match="Must set property name"):
-
-            # pylint: disable=unused-variable
-            class FailedClass1(GoodBase1):
-                pass
-
-        class GoodBase2(metaclass=MetaProperty):
-            pass
-
-        with pytest.raises(ValueError, match="Must set property name"):
-
-            # pylint: disable=unused-variable
-            class FailedClass2(GoodBase2):
-                pass
-
-
-class TestNormalProperties:
+        assert changed == ["mock-b", "mock-c"]
+        self.spec_m.a.validate.assert_called_once_with("a")
+        self.spec_m.b.validate.assert_called_once_with(True)
+        self.spec_m.c.validate.assert_called_once_with(5)
+        self.spec_m.a.to_raw.assert_not_called()
+        srv_m.assert_called_once_with(**{"mock-b": "true", "mock-c": "5", "extra": "5"})
+
+    @mock.patch(
+        "server_manager.src.properties_manager.PropertiesManager.set_raw_values"
+    )
+    def test_set_properties_unchanged(self, srv_m):
+        self.spec_m.a.get.return_value = "a"
+        assert PropertiesManager.set_properties({"mock-a": "a"}) == []
+        srv_m.assert_not_called()
+
+    @mock.patch(
+        "server_manager.src.properties_manager.PropertiesManager.set_raw_values"
+    )
+    def test_set_properties_invalid(self, srv_m):
+        self.spec_m.c.validate.side_effect = ValueError("invalid")
+        with pytest.raises(ValueError, match="invalid"):
+            PropertiesManager.set_properties({"mock-b": "on", "mock-c": "-1"})
+        srv_m.assert_not_called()
+
+    @mock.patch(
+        "server_manager.src.properties_manager.PropertiesManager.set_raw_values"
+    )
+    def test_transaction_rollback(self, srv_m):
+        with pytest.raises(RuntimeError):
+            with PropertiesManager.transaction() as transaction:
+                transaction["mock-a"] = "x"
+                raise RuntimeError
+        srv_m.assert_not_called()
+        self.spec_m.a.get.assert_not_called()
+
+
+class TestSchema:
+    def test_rows(self):
+        keys = [row[0] for row in SCHEMA]
+        assert keys == sorted(keys)
+        assert len(set(keys)) == len(keys)
+
+    def test_defaults(self):
+        schema = get_schema()
+        assert schema["max-players"].default == 20
+        assert schema["online-mode"].default is True
+        assert schema["difficulty"].default == "easy"
+        assert schema["motd"].default == "A Minecraft Server"
+
+    def test_test_data(self):
+        # every key of a real server.properties is described by the schema
+        schema = get_schema()
+        for line in TEST_DATA.read_text().splitlines()[2:]:
+            key, value = line.split("=", 1)
+            schema[key].validate(schema[key].str_to_value(value))
+
+    def test_managed(self):
+        assert set(PropertiesManager.general_map) == set(Properties)
+        assert set(DEFAULTS) == set(Properties)
+        for prop, spec in PropertiesManager.general_map.items():
+            assert spec.key == prop.value
+
+
+class TestPropertySpec:
     defaults = {
         "allow-nether": True,
         "broadcast-rcon-to-ops": True,
         "difficulty": "hard",
         "enable-rcon": True,
         "enable-status": True,
-        "enforce-whitelist": True,
         "max-players": 3,
         "online-mode": True,
         "rcon.password": "",
         "rcon.port": 25575,
+        "view-distance": 8,
+        "gamemode": "survival",
         "whitelist": True,
     }
     new_values = {
@@ -323,12 +380,12 @@ class TestNormalProperties:
         "difficulty": "peaceful",
         "enable-rcon": False,
         "enable-status": False,
-        "enforce-whitelist": False,
         "max-players": 50,
         "online-mode": False,
         "rcon.password": "fdssfasdf",
         "rcon.port": 15957,
-        "whitelist": False,
+        "view-distance": 12,
+        "gamemode": "creative",
     }
     wrong_values = {
         "allow-nether": 1 + 2j,
@@ -336,29 +393,17 @@ class TestNormalProperties:
         "difficulty": 23,
         "enable-rcon": "maybe",
         "enable-status": "what?",
-        "enforce-whitelist": "?",
         "max-players": False,
         "online-mode": "I am the king",
         "rcon.password": dict(),
-        "rcon.port": list(),
+        "rcon.port": 70000,
+        "view-distance": 64,
+        "gamemode": "hardcore",
         "whitelist": set(),
     }
 
-    properties = [
-        "AllowNetherProperty",
-        "BroadcastRconToOpsProperty",
-        "EnableRconProperty",
-        "EnableStatusProperty",
-        "MaxPlayersProperty",
-        "OnlineModeProperty",
-        "RconPasswordProperty",
-        "RconPortProperty",
-    ]
-
     @pytest.fixture(autouse=True)
     def mocks(self):
-        self.module = __import__("server_manager").src.properties_manager
-
         self.root = "server_manager.src.properties_manager."
         self.gpr_m = mock.patch(
             self.root + "PropertiesManager.get_properties_raw"
@@ -366,145 +411,73 @@ class TestNormalProperties:
         self.wpr_m = mock.patch(
             self.root + "PropertiesManager.write_properties_raw"
         ).start()
-        self.prop_path = Path(__file__).parent.parent.joinpath(
-            "test_data/server.properties"
-        )
-        self.text = self.prop_path.read_text()
+        self.text = TEST_DATA.read_text()
         self.gpr_m.return_value = self.text
 
         yield
 
         mock.patch.stopall()
 
-    @pytest.mark.parametrize("propclassname", properties)
-    def test_get(self, propclassname):
-        prop = getattr(self.module, propclassname)
-        expected = self.defaults[prop.property_name]
-        assert prop.get() == expected
-        self.gpr_m.assert_called()
-
-    @pytest.mark.parametrize("propclassname", properties)
-    def test_set_ok(self, propclassname):
-        prop = getattr(self.module, propclassname)
-        new_value = self.new_values[prop.property_name]
-        prop.set(new_value)
-        string = f"{prop.property_name}={prop.value_to_str(new_value)}"
-        assert string in self.wpr_m.call_args[0][0]
-        self.gpr_m.assert_called()
-
-    @pytest.mark.parametrize("propclassname", properties)
-    def test_set_fail_type(self, propclassname):
-        prop = getattr(self.module, propclassname)
-        wrong_value = self.wrong_values[prop.property_name]
-        with pytest.raises(ValueError):
-            prop.set(wrong_value)
-
-    @pytest.mark.parametrize("propclassname", properties)
-    def test_set_fail_same_value(self, propclassname):
-        get_mocker = mock.patch(self.root + propclassname + ".get")
-        get_m = get_mocker.start()
-
-        prop = getattr(self.module, propclassname)
-        new_value = self.new_values[prop.property_name]
-        get_m.return_value = new_value
-        with pytest.raises(PropertyError):
-            prop.set(new_value)
-
-        get_m.assert_called_once_with()
-        get_mocker.stop()
+    def test_repr(self):
+        assert repr(get_schema()["pvp"]) == "PropertySpec('pvp', 'bool')"
 
-    @pytest.mark.parametrize("propclassname", properties)
-    def test_default(self, propclassname):
-        set_mocker = mock.patch(self.root + propclassname + ".set")
-        set_m = set_mocker.start()
-
-        prop = getattr(self.module, propclassname)
-        prop.set_default()
-
-        set_m.assert_called_once_with(prop.default)
-        set_mocker.stop()
-
-
-class TestDifficultyProperty:
-    @pytest.fixture(autouse=True)
-    def mocks(self):
-        self.module = __import__("server_manager").src.properties_manager
-
-        self.root = "server_manager.src.properties_manager."
-        self.gpr_m = mock.patch(
-            self.root + "PropertiesManager.get_properties_raw"
-        ).start()
-        self.wpr_m = mock.patch(
-            self.root + "PropertiesManager.write_properties_raw"
-        ).start()
-        self.prop_path = Path(__file__).parent.parent.joinpath(
-            "test_data/server.properties"
-        )
-        self.text = self.prop_path.read_text()
-        self.gpr_m.return_value = self.text
+    def test_invalid_type(self):
+        with pytest.raises(ValueError, match="Invalid property type for a: 'list'"):
+            PropertySpec("a", "list", "")
 
-    def test_get(self):
-        expected = TestNormalProperties.defaults["difficulty"]
-        assert DifficultyProperty.get() == expected
+    @pytest.mark.parametrize("key", sorted(defaults))
+    def test_get(self, key):
+        assert get_schema()[key].get() == self.defaults[key]
         self.gpr_m.assert_called()
 
-    def test_str_to_value(self):
-        test_ok = DifficultyProperty.str_to_value
-
-        assert test_ok("normal") == "normal"
-        assert test_ok("peaceful") == "peaceful"
-        assert test_ok("hard") == "hard"
-
-        def test_fail(value):
-            with pytest.raises(ValueError):
-                DifficultyProperty.str_to_value(value)
-
-        test_fail(23)
-        test_fail("super-hard")
-        test_fail(1 + 5j)
-        test_fail(True)
-        test_fail(False)
-        test_fail(None)
-
-    def test_set_ok(self):
-        new_value = TestNormalProperties.new_values["difficulty"]
-        DifficultyProperty.set(new_value)
-        string = f"difficulty={DifficultyProperty.value_to_str(new_value)}"
+    @pytest.mark.parametrize("key", sorted(new_values))
+    def test_set_ok(self, key):
+        spec = get_schema()[key]
+        new_value = self.new_values[key]
+        spec.set(new_value)
+        string = f"{key}={spec.value_to_str(new_value)}"
         assert string in self.wpr_m.call_args[0][0]
         self.gpr_m.assert_called()
 
-    def test_set_fail_type(self):
-        wrong_value = TestNormalProperties.wrong_values["difficulty"]
+    @pytest.mark.parametrize("key", sorted(wrong_values))
+    def test_set_fail_type(self, key):
         with pytest.raises(ValueError):
-            DifficultyProperty.set(wrong_value)
+            get_schema()[key].set(self.wrong_values[key])
+        self.wpr_m.assert_not_called()
+
+    @pytest.mark.parametrize("key", sorted(new_values))
+    def test_set_fail_same_value(self, key):
+        spec = PropertySpec(*next(row for row in SCHEMA if row[0] == key))
+        new_value = self.new_values[key]
+        with mock.patch.object(spec, "get", return_value=new_value) as get_m:
+            with pytest.raises(PropertyError, match="is already set to"):
+                spec.set(new_value)
+        get_m.assert_called_once_with()
+        self.wpr_m.assert_not_called()
 
-    def test_set_fail_same_value(self):
-        get_mocker = mock.patch(self.root + "DifficultyProperty.get")
-        get_m = get_mocker.start()
+    def test_enum_str_to_value(self):
+        str_to_value = get_schema()["difficulty"].str_to_value
 
-        new_value = TestNormalProperties.new_values["difficulty"]
-        get_m.return_value = new_value
-        with pytest.raises(PropertyError):
-            DifficultyProperty.set(new_value)
+        assert str_to_value("normal") == "normal"
+        assert str_to_value("Peaceful") == "peaceful"
+        assert str_to_value("hard") == "hard"
 
-        get_m.assert_called_once_with()
-        get_mocker.stop()
+        for value in (23, "super-hard", 1 + 5j, True, False, None):
+            with pytest.raises(ValueError, match="Invalid difficulty"):
+                str_to_value(value)
 
-    def test_default(self):
-        set_mocker = mock.patch(self.root + "DifficultyProperty.set")
-        set_m = set_mocker.start()
+    def test_bool_str_to_value(self):
+        str_to_value = get_schema()["pvp"].str_to_value
 
-        DifficultyProperty.set_default()
+        assert str_to_value("on") is True
+        assert str_to_value("false") is False
+        with pytest.raises(ValueError, match="'maybe' is not a valid boolean"):
+            str_to_value("maybe")
 
-        set_m.assert_called_once_with(DifficultyProperty.default)
-        set_mocker.stop()
 
-
-class TestWhitelistProperty:
+class TestWhitelistSpec:
     @pytest.fixture(autouse=True)
     def mocks(self):
-        self.module = __import__("server_manager").src.properties_manager
-
         self.root = "server_manager.src.properties_manager."
         self.gpr_m = mock.patch(
             self.root + "PropertiesManager.get_properties_raw"
@@ -512,15 +485,15 @@ class TestWhitelistProperty:
         self.wpr_m = mock.patch(
             self.root + "PropertiesManager.write_properties_raw"
         ).start()
-        self.prop_path = Path(__file__).parent.parent.joinpath(
-            "test_data/server.properties"
-        )
-        self.text = self.prop_path.read_text()
-        self.gpr_m.return_value = self.text
+        self.gpr_m.return_value = TEST_DATA.read_text()
+        self.spec = WhitelistSpec()
+
+        yield
+
+        mock.patch.stopall()
 
     def test_get_ok(self):
-        expected = TestNormalProperties.defaults["whitelist"]
-        assert WhitelistProperty.get() == expected
+        assert self.spec.get() is True
         self.gpr_m.assert_called()
 
     @pytest.mark.parametrize("whitelist", [True, False])
@@ -531,42 +504,23 @@ class TestWhitelistProperty:
         self.gpr_m.return_value = msg
 
         with pytest.raises(ValueError):
-            WhitelistProperty.get()
+            self.spec.get()
 
     def test_set_ok(self):
-        new_value = TestNormalProperties.new_values["whitelist"]
-        WhitelistProperty.set(new_value)
-        string1 = f"white-list={WhitelistProperty.value_to_str(new_value)}"
-        string2 = f"enforce-whitelist={WhitelistProperty.value_to_str(new_value)}"
-        assert string1 in self.wpr_m.call_args[0][0]
-        assert string2 in self.wpr_m.call_args[0][0]
-        self.gpr_m.assert_called()
-
-    def test_set_fail_type(self):
-        wrong_value = TestNormalProperties.wrong_values["whitelist"]
-        with pytest.raises(ValueError):
-            WhitelistProperty.set(wrong_value)
+        self.spec.set(False)
+        assert "white-list=false" in self.wpr_m.call_args[0][0]
+        assert "enforce-whitelist=false" in self.wpr_m.call_args[0][0]
 
     def test_set_fail_same_value(self):
-        get_mocker = mock.patch(self.root + "WhitelistProperty.get")
-        get_m = get_mocker.start()
-
-        new_value = TestNormalProperties.new_values["whitelist"]
-        get_m.return_value = new_value
         with pytest.raises(PropertyError):
-            WhitelistProperty.set(new_value)
-
-        get_m.assert_called_once_with()
-        get_mocker.stop()
+            self.spec.set(True)
+        self.wpr_m.assert_not_called()
 
-    def test_default(self):
-        set_mocker = mock.patch(self.root + "WhitelistProperty.set")
-        set_m = set_mocker.start()
-
-        WhitelistProperty.set_default()
-
-        set_m.assert_called_once_with(WhitelistProperty.default)
-        set_mocker.stop()
+    def test_to_raw(self):
+        assert self.spec.to_raw(False) == {
+            "white-list": "false",
+            "enforce-whitelist": "false",
+        }
 
 
 class TestSetDefaultProperties:
@@ -580,12 +534,15 @@ class TestSetDefaultProperties:
             "c": self.mock.c,
             "d": self.mock.d,
         }
-        self.mock.b.set_default.side_effect = PropertyError
-        self.mock.d.set_default.side_effect = PropertyError
-        mock.patch(
-            self.root + "PropertiesManager.general_map",
-            self.gen_map,
+        for name, spec in self.gen_map.items():
+            spec.get.return_value = name if name in ("b", "d") else None
+        defaults = {"a": "a", "b": "b", "c": lambda: "c", "d": lambda: "d"}
+        mock.patch(self.root + "PropertiesManager.general_map", self.gen_map).start()
+        mock.patch.dict(self.root + "DEFAULTS", defaults).start()
+        self.transaction_m = mock.patch(
+            self.root + "PropertiesManager.transaction"
         ).start()
+        self.set_m = self.transaction_m.return_value.__enter__.return_value.set
 
         yield
 
@@ -594,10 +551,10 @@ class TestSetDefaultProperties:
     def test_ok(self, capsys):
         set_default_properties()
 
-        self.mock.a.set_default.assert_called_once_with()
-        self.mock.b.set_default.assert_called_once_with()
-        self.mock.c.set_default.assert_called_once_with()
-        self.mock.d.set_default.assert_called_once_with()
+        self.transaction_m.assert_called_once_with()
+        self.set_m.assert_has_calls([mock.call("a", "a"), mock.call("c", "c")])
+        assert self.set_m.call_count == 2
+        self.transaction_m.return_value.__exit__.assert_called_once()
 
         expected = f"{Fore.CYAN}Fixed property a\n"
         expected += f"{Fore.LIGHTGREEN_EX}b OK\n"
@@ -0,0 +1,213 @@
+from datetime import datetime, timedelta
+import errno
+import json
+from unittest import mock
+
+import pytest
+
+from server_manager.src.exceptions import QuarantineError
+from server_manager.src.quarantine import (
+    Quarantine,
+    get_quarantine_folder,
+    list_quarantines,
+    move_file,
+    prune_quarantines,
+)
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def server_path(tmp_path):
+    server_path = tmp_path.joinpath("server")
+    server_path.mkdir()
+    root = "server_manager.src.quarantine."
+    with mock.patch(root + "get_server_path", return_value=server_path), mock.patch(
+        root + "get_quarantine_folder", return_value=tmp_path.joinpath("quarantine")
+    ):
+        yield server_path
+
+
+def make_player(server_path, uuid, username="user"):
+    player = mock.MagicMock(uuid=uuid, username=username, online=True)
+    folders = {
+        "player_data_file": ("world/playerdata", ".dat"),
+        "stats_file": ("world/stats", ".json"),
+        "advancements_file": ("world/advancements", ".json"),
+    }
+    for attr, (folder, ext) in folders.items():
+        path = server_path.joinpath(folder, uuid + ext)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(attr)
+        getattr(player, attr).path = path
+    return player
+
+
+@mock.patch("server_manager.src.quarantine.get_server_path")
+def test_get_quarantine_folder(gsp_m, tmp_path):
+    gsp_m.return_value = tmp_path.joinpath("server")
+    get_quarantine_folder.cache_clear()
+    try:
+        folder = get_quarantine_folder()
+    finally:
+        get_quarantine_folder.cache_clear()
+
+    assert folder == tmp_path.joinpath("quarantine")
+    assert folder.is_dir()
+
+
+class TestMoveFile:
+    def test_rename(self, tmp_path):
+        src = tmp_path.joinpath("src")
+        src.write_text("data")
+        dst = tmp_path.joinpath("a", "b", "dst")
+
+        move_file(src, dst)
+        assert not src.exists()
+        assert dst.read_text() == "data"
+
+    @mock.patch("server_manager.src.quarantine.shutil.move")
+    @mock.patch("server_manager.src.quarantine.os.replace")
+    def test_cross_device(self, replace_m, move_m, tmp_path):
+        replace_m.side_effect = OSError(errno.EXDEV, "cross-device link")
+        src, dst = tmp_path.joinpath("src"), tmp_path.joinpath("dst")
+
+        move_file(src, dst)
+        move_m.assert_called_once_with(src.as_posix(), dst.as_posix())
+
+    @mock.patch("server_manager.src.quarantine.os.replace")
+    def test_error(self, replace_m, tmp_path):
+        replace_m.side_effect = OSError(errno.EACCES, "permission denied")
+        with pytest.raises(OSError):
+            move_file(tmp_path.joinpath("src"), tmp_path.joinpath("dst"))
+
+
+class TestQuarantine:
+    def test_add_and_restore(self, server_path, capsys):
+        players = [make_player(server_path, f"uuid-{i}") for i in range(3)]
+
+        with Quarantine.create() as quarantine:
+            for player in players:
+                quarantine.add(player)
+
+        assert not list(server_path.rglob("*.dat"))
+        assert capsys.readouterr().out == (
+            f"Moved 3 players to quarantine {quarantine.id!r}\n"
+        )
+
+        manifest = json.loads(quarantine.manifest_path.read_text())
+        assert manifest["id"] == quarantine.id
+        assert [x["uuid"] for x in manifest["players"]] == [
+            "uuid-0",
+            "uuid-1",
+            "uuid-2",
+        ]
+        assert manifest["players"][0]["files"] == [
+            "world/playerdata/uuid-0.dat",
+            "world/stats/uuid-0.json",
+            "world/advancements/uuid-0.json",
+        ]
+
+        loaded = Quarantine.load(quarantine.id)
+        assert loaded.restore() == 3
+        assert not quarantine.path.exists()
+        for player in players:
+            assert player.player_data_file.path.read_text() == "player_data_file"
+
+    def test_restore_conflict(self, server_path):
+        player = make_player(server_path, "uuid-0")
+        with Quarantine.create() as quarantine:
+            quarantine.add(player)
+
+        player.stats_file.path.write_text("new")
+        with pytest.raises(QuarantineError, match="world/stats/uuid-0.json"):
+            Quarantine.load(quarantine.id).restore()
+
+        assert not player.player_data_file.path.exists()
+        assert quarantine.manifest_path.is_file()
+
+    def test_load_not_found(self, server_path):
+        with pytest.raises(QuarantineError, match="'invalid' not found"):
+            Quarantine.load("invalid")
+
+    @pytest.mark.parametrize("quarantine_id", ["", "..", "../backups", "a/b", "a\\b"])
+    def test_load_invalid_id(self, server_path, quarantine_id):
+        with pytest.raises(QuarantineError, match="Invalid quarantine id"):
+            Quarantine.load(quarantine_id)
+
+    def test_empty(self, server_path, capsys):
+        with Quarantine.create() as quarantine:
+            pass
+
+        assert not quarantine.path.exists()
+        assert capsys.readouterr().out == ""
+
+    def test_unique_ids(self, server_path):
+        first, second = Quarantine.create(), Quarantine.create()
+        assert first.id != second.id
+        assert first.path.is_dir() and second.path.is_dir()
+
+    def test_partial_add(self, server_path):
+        player = make_player(server_path, "uuid-0")
+        player.advancements_file.path.unlink()
+
+        quarantine = Quarantine.create()
+        with pytest.raises(FileNotFoundError):
+            quarantine.add(player)
+        quarantine.close()
+
+        assert quarantine.players[0]["files"] == [
+            "world/playerdata/uuid-0.dat",
+            "world/stats/uuid-0.json",
+        ]
+        assert Quarantine.load(quarantine.id).restore() == 1
+        assert player.player_data_file.path.is_file()
+
+
+def create_quarantines(server_path, count):
+    quarantines = []
+    for i in range(count):
+        with Quarantine.create() as quarantine:
+            quarantine.add(make_player(server_path, f"uuid-{i}"))
+        quarantines.append(quarantine)
+    return quarantines
+
+
+class TestListPruneQuarantines:
+    def test_list(self, server_path):
+        quarantines = create_quarantines(server_path, 3)
+        Quarantine.create()
+
+        assert [q.id for q in list_quarantines()] == [q.id for q in quarantines]
+
+    def test_list_same_second(self, server_path):
+        class FrozenDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return cls(2021, 5, 17, 10, 30, 12)
+
+        with mock.patch("server_manager.src.quarantine.datetime", FrozenDatetime):
+            quarantines = create_quarantines(server_path, 12)
+
+        assert quarantines[-1].id == "2021.05.17.10.30.12-11"
+        assert [q.id for q in list_quarantines()] == [q.id for q in quarantines]
+        assert prune_quarantines(keep=1) == [q.id for q in quarantines[:11]]
+
+    def test_prune_keep(self, server_path):
+        quarantines = create_quarantines(server_path, 4)
+
+        pruned = prune_quarantines(keep=1)
+        assert pruned == [q.id for q in quarantines[:3]]
+        assert [q.id for q in list_quarantines()] == [quarantines[3].id]
+        assert prune_quarantines(keep=1) == []
+
+    def test_prune_max_age(self, server_path):
+        quarantines = create_quarantines(server_path, 2)
+        manifest = json.loads(quarantines[0].manifest_path.read_text())
+        manifest["created"] = (datetime.now() - timedelta(days=10)).isoformat()
+        quarantines[0].manifest_path.write_text(json.dumps(manifest))
+
+        pruned = prune_quarantines(keep=None, max_age=timedelta(days=7))
+        assert pruned == [quarantines[0].id]
+        assert not quarantines[0].path.exists()
+        assert quarantines[1].path.exists()
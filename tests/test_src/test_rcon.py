@@ -0,0 +1,168 @@
+import socket
+import socketserver
+import struct
+import threading
+from unittest import mock
+
+import pytest
+
+from server_manager.src.exceptions import RconError
+from server_manager.src.rcon import (
+    RconClient,
+    get_online_players,
+    stop_server,
+    wait_port_closed,
+)
+
+# pylint: disable=redefined-outer-name
+
+PASSWORD = "s3cr3t!#"
+
+
+class RconStubHandler(socketserver.BaseRequestHandler):
+    """Minimal RCON server: checks the password, records the commands and
+    answers them with `server.responses`."""
+
+    def recv_exact(self, size):
+        data = b""
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                raise ConnectionResetError
+            data += chunk
+        return data
+
+    def send(self, request_id, packet_type, body):
+        payload = struct.pack("<ii", request_id, packet_type) + body + b"\x00\x00"
+        self.request.sendall(struct.pack("<i", len(payload)) + payload)
+
+    def handle(self):
+        try:
+            while True:
+                (length,) = struct.unpack("<i", self.recv_exact(4))
+                request_id, packet_type = struct.unpack("<ii", self.recv_exact(8))
+                body = self.recv_exact(length - 8)[:-2].decode()
+
+                if packet_type == 3:
+                    ok = body == self.server.password
+                    self.send(request_id if ok else -1, 2, b"")
+                    continue
+
+                self.server.commands.append(body)
+                if body == "stop":
+                    threading.Thread(target=self.server.stop).start()
+                    return
+                response = self.server.responses.get(body, "")
+                self.send(request_id, 0, response.encode())
+        except ConnectionResetError:
+            pass
+
+
+class RconStubServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+@pytest.fixture
+def rcon_server():
+    server = RconStubServer(("localhost", 0), RconStubHandler)
+    server.password = PASSWORD
+    server.commands = []
+    server.responses = {
+        "list": "There are 2 of a max of 20 players online: alice, bob",
+        "save-all flush": "Saved the game",
+    }
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def make_client(server, password=PASSWORD):
+    return RconClient(server.server_address[1], password, timeout=2)
+
+
+class TestRconClient:
+    def test_command(self, rcon_server):
+        with make_client(rcon_server) as client:
+            assert client.command("save-all flush") == "Saved the game"
+            assert client.command("say hi") == ""
+        assert rcon_server.commands == ["save-all flush", "say hi"]
+
+    def test_wrong_password(self, rcon_server):
+        with pytest.raises(RconError, match="authentication failed"):
+            make_client(rcon_server, "wrong").connect()
+
+    def test_connection_refused(self):
+        sock = socket.socket()
+        sock.bind(("localhost", 0))
+        port = sock.getsockname()[1]
+        sock.close()
+
+        with pytest.raises(RconError, match="Can't connect"):
+            RconClient(port, PASSWORD).connect()
+
+    def test_not_connected(self, rcon_server):
+        with pytest.raises(RconError, match="not connected"):
+            make_client(rcon_server).command("list")
+
+    @mock.patch("server_manager.src.rcon.PropertiesManager.get_property")
+    def test_from_properties(self, gp_m):
+        gp_m.side_effect = {
+            "enable_rcon": True,
+            "rcon_port": 25575,
+            "rcon_password": PASSWORD,
+        }.get
+
+        client = RconClient.from_properties()
+        assert (client.host, client.port) == ("localhost", 25575)
+        assert client.password == PASSWORD
+
+    @mock.patch("server_manager.src.rcon.PropertiesManager.get_property")
+    def test_from_properties_disabled(self, gp_m):
+        gp_m.return_value = False
+        with pytest.raises(RconError, match="enable-rcon=true"):
+            RconClient.from_properties()
+
+
+@pytest.mark.parametrize(
+    "response,players",
+    [
+        ("There are 2 of a max of 20 players online: alice, bob", ["alice", "bob"]),
+        ("There are 0 of a max of 20 players online:", []),
+        ("Unknown command", []),
+    ],
+)
+def test_get_online_players(response, players):
+    client = mock.MagicMock()
+    client.command.return_value = response
+    assert get_online_players(client) == players
+    client.command.assert_called_once_with("list")
+
+
+def test_stop_server(rcon_server):
+    port = rcon_server.server_address[1]
+    with make_client(rcon_server) as client:
+        stop_server(client, reason="bye", timeout=5)
+
+    assert rcon_server.commands == [
+        "save-all flush",
+        "list",
+        "kick alice bye",
+        "kick bob bye",
+        "save-off",
+        "stop",
+    ]
+    with pytest.raises(OSError):
+        socket.create_connection(("localhost", port), timeout=1)
+
+
+def test_wait_port_closed_timeout(rcon_server):
+    port = rcon_server.server_address[1]
+    with pytest.raises(RconError, match="still running"):
+        wait_port_closed("localhost", port, timeout=0.1)
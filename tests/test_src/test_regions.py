@@ -0,0 +1,253 @@
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+from pathlib import Path
+from unittest import mock
+from uuid import UUID
+import zlib
+
+import pytest
+
+from server_manager.src.nbt_patch import INT_ARRAY_4, get_uuid_map
+from server_manager.src.regions import (
+    HEADER_SIZE,
+    SECTOR_SIZE,
+    RegionCheckpoint,
+    RewriteStats,
+    decompress_chunk,
+    find_region_files,
+    get_checkpoint_path,
+    rewrite_chunk,
+    rewrite_region,
+    rewrite_regions,
+)
+
+# pylint: disable=redefined-outer-name
+
+OLD_UUID = "4a618768-4f26-4688-8ab5-6e64f250c62f"
+NEW_UUID = "0f2d2b0c-6a6e-4c43-9d0e-5d2b6f1f7a10"
+MAPPING = {OLD_UUID: NEW_UUID}
+
+
+def make_nbt(uuid, size=0):
+    return b"\x0b\x00\x05Owner" + INT_ARRAY_4 + UUID(uuid).bytes + bytes(size)
+
+
+def make_payload(nbt, compression=2):
+    compressors = {1: gzip.compress, 2: zlib.compress, 3: bytes}
+    return bytes([compression]) + compressors[compression](nbt)
+
+
+def write_region(path, payloads):
+    """Writes a region file with the chunks in `payloads` (by index), leaving
+    a free sector between them, like a region file with deleted chunks."""
+
+    locations, timestamps = bytearray(SECTOR_SIZE), bytearray(SECTOR_SIZE)
+    body = bytearray()
+    for index, payload in payloads.items():
+        chunk = len(payload).to_bytes(4, "big") + payload
+        sectors = -(-len(chunk) // SECTOR_SIZE)
+        sector = 2 + len(body) // SECTOR_SIZE
+        locations[index * 4 : index * 4 + 4] = ((sector << 8) | sectors).to_bytes(
+            4, "big"
+        )
+        timestamps[index * 4 : index * 4 + 4] = (1000 + index).to_bytes(4, "big")
+        body += chunk.ljust((sectors + 1) * SECTOR_SIZE, b"\x00")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(bytes(locations + timestamps + body))
+
+
+def read_region(path):
+    data = path.read_bytes()
+    chunks = {}
+    for index in range(1024):
+        location = int.from_bytes(data[index * 4 : index * 4 + 4], "big")
+        if location:
+            offset = (location >> 8) * SECTOR_SIZE
+            length = int.from_bytes(data[offset : offset + 4], "big")
+            chunks[index] = data[offset + 4 : offset + 4 + length]
+    return chunks, data[SECTOR_SIZE:HEADER_SIZE]
+
+
+@pytest.fixture
+def checkpoint_path(tmp_path):
+    path = tmp_path.joinpath("checkpoint")
+    with mock.patch(
+        "server_manager.src.regions.get_checkpoint_path", return_value=path
+    ):
+        yield path
+
+
+@mock.patch("server_manager.src.regions.get_cache_folder")
+def test_get_checkpoint_path(gcf_m):
+    assert get_checkpoint_path() == gcf_m.return_value.joinpath.return_value
+    gcf_m.return_value.joinpath.assert_called_once_with("region-rewrite.checkpoint")
+
+
+def test_find_region_files(tmp_path):
+    paths = [
+        tmp_path.joinpath("world", "region", "r.0.0.mca"),
+        tmp_path.joinpath("world", "entities", "r.0.0.mca"),
+        tmp_path.joinpath("world_nether", "DIM-1", "region", "r.-1.0.mca"),
+        tmp_path.joinpath("world", "poi", "r.0.0.mca"),
+        tmp_path.joinpath("world", "region", "r.0.0.mca.tmp"),
+    ]
+    for path in paths:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+
+    assert find_region_files(tmp_path) == sorted(paths[:3])
+
+
+class TestRewriteChunk:
+    @pytest.mark.parametrize("compression", [1, 2, 3])
+    def test_rewrite(self, compression):
+        payload = make_payload(make_nbt(OLD_UUID), compression)
+        new_payload = rewrite_chunk(payload, get_uuid_map(MAPPING))
+
+        assert new_payload[0] == compression
+        assert decompress_chunk(compression, new_payload[1:]) == make_nbt(NEW_UUID)
+
+    def test_no_match(self):
+        payload = make_payload(make_nbt(NEW_UUID))
+        assert rewrite_chunk(payload, get_uuid_map(MAPPING)) is None
+
+    @pytest.mark.parametrize("compression", [4, 130])
+    def test_unsupported_compression(self, compression, caplog):
+        payload = bytes([compression]) + make_nbt(OLD_UUID)
+        assert rewrite_chunk(payload, get_uuid_map(MAPPING)) is None
+        assert "Skipping chunk" in caplog.text
+
+    @mock.patch("server_manager.src.regions.MAX_CHUNK_SECTORS", 2)
+    def test_oversized(self, caplog):
+        payload = make_payload(make_nbt(OLD_UUID, size=10000), compression=3)
+        assert rewrite_chunk(payload, get_uuid_map(MAPPING)) is None
+        assert "Skipping chunk of 10" in caplog.text
+
+
+class TestRewriteRegion:
+    def test_rewrite(self, tmp_path):
+        path = tmp_path.joinpath("r.0.0.mca")
+        unchanged = make_payload(make_nbt(NEW_UUID))
+        big = make_payload(make_nbt(OLD_UUID, size=10000), compression=3)
+        write_region(path, {0: make_payload(make_nbt(OLD_UUID)), 5: unchanged, 9: big})
+
+        assert rewrite_region(path, get_uuid_map(MAPPING)) == 2
+
+        chunks, timestamps = read_region(path)
+        assert sorted(chunks) == [0, 5, 9]
+        assert zlib.decompress(chunks[0][1:]) == make_nbt(NEW_UUID)
+        assert chunks[5] == unchanged
+        assert chunks[9][1:] == make_nbt(NEW_UUID, size=10000)
+        assert int.from_bytes(timestamps[20:24], "big") == 1005
+        # the free sectors are compacted
+        assert path.stat().st_size == HEADER_SIZE + 5 * SECTOR_SIZE
+        assert not path.with_name("r.0.0.mca.tmp").exists()
+
+    @mock.patch("server_manager.src.regions.MAX_CHUNK_SECTORS", 2)
+    def test_oversized(self, tmp_path):
+        path = tmp_path.joinpath("r.0.0.mca")
+        big = make_payload(make_nbt(NEW_UUID, size=10000), compression=3)
+        write_region(path, {0: make_payload(make_nbt(OLD_UUID)), 1: big})
+        content = path.read_bytes()
+
+        with pytest.raises(ValueError, match="Chunk 1 takes 3 sectors"):
+            rewrite_region(path, get_uuid_map(MAPPING))
+        assert path.read_bytes() == content
+
+    def test_no_match(self, tmp_path):
+        path = tmp_path.joinpath("r.0.0.mca")
+        write_region(path, {0: make_payload(make_nbt(NEW_UUID))})
+        content = path.read_bytes()
+
+        assert rewrite_region(path, get_uuid_map(MAPPING)) == 0
+        assert path.read_bytes() == content
+
+    def test_empty(self, tmp_path):
+        path = tmp_path.joinpath("r.0.0.mca")
+        path.touch()
+        assert rewrite_region(path, get_uuid_map(MAPPING)) == 0
+
+
+class TestRegionCheckpoint:
+    def test_resume(self, checkpoint_path):
+        checkpoint = RegionCheckpoint(MAPPING)
+        assert checkpoint.load() == set()
+        checkpoint.mark_done(Path("/world/region/r.0.0.mca"))
+
+        assert RegionCheckpoint(MAPPING).load() == {"/world/region/r.0.0.mca"}
+
+    def test_other_mapping(self, checkpoint_path):
+        checkpoint = RegionCheckpoint(MAPPING)
+        checkpoint.load()
+        checkpoint.mark_done(Path("/world/region/r.0.0.mca"))
+
+        assert RegionCheckpoint({NEW_UUID: OLD_UUID}).load() == set()
+        assert RegionCheckpoint(MAPPING).load() == set()
+
+    def test_corrupted(self, checkpoint_path, caplog):
+        checkpoint_path.write_text('{"mapp\n')
+        assert RegionCheckpoint(MAPPING).load() == set()
+        assert "Ignoring corrupted checkpoint" in caplog.text
+
+    def test_delete(self, checkpoint_path):
+        checkpoint = RegionCheckpoint(MAPPING)
+        checkpoint.load()
+        checkpoint.delete()
+        checkpoint.delete()
+        assert not checkpoint_path.exists()
+
+
+class TestRewriteRegions:
+    @pytest.fixture
+    def world(self, tmp_path):
+        paths = []
+        for i in range(6):
+            path = tmp_path.joinpath("server", "world", "region", f"r.{i}.0.mca")
+            uuid = OLD_UUID if i % 2 else NEW_UUID
+            write_region(path, {i: make_payload(make_nbt(uuid))})
+            paths.append(path)
+        yield paths
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_rewrite(self, world, checkpoint_path, workers):
+        root_path = world[0].parents[2]
+        stats = rewrite_regions(MAPPING, root_path, workers=workers)
+
+        assert stats == RewriteStats(regions=3, chunks=3)
+        for path in world:
+            chunks, _ = read_region(path)
+            assert zlib.decompress(next(iter(chunks.values()))[1:]) == make_nbt(
+                NEW_UUID
+            )
+        assert not checkpoint_path.exists()
+
+    def test_resume(self, world, checkpoint_path):
+        checkpoint = RegionCheckpoint(MAPPING)
+        checkpoint.load()
+        checkpoint.mark_done(world[1])
+
+        stats = rewrite_regions(MAPPING, world[0].parents[2], workers=1)
+        assert stats == RewriteStats(regions=2, chunks=2)
+        chunks, _ = read_region(world[1])
+        assert zlib.decompress(chunks[1][1:]) == make_nbt(OLD_UUID)
+
+    @mock.patch("server_manager.src.regions.rewrite_region")
+    def test_interrupted(self, rr_m, world, checkpoint_path):
+        rr_m.side_effect = [0, 1, KeyboardInterrupt]
+        with pytest.raises(KeyboardInterrupt):
+            rewrite_regions(MAPPING, world[0].parents[2], workers=1)
+
+        assert RegionCheckpoint(MAPPING).load() == {
+            world[0].as_posix(),
+            world[1].as_posix(),
+        }
+
+    @mock.patch("server_manager.src.regions.ProcessPoolExecutor", ThreadPoolExecutor)
+    @mock.patch("server_manager.src.regions.rewrite_region")
+    def test_interrupted_pool(self, rr_m, world, checkpoint_path):
+        rr_m.side_effect = OSError("disk full")
+        with pytest.raises(OSError, match="disk full"):
+            rewrite_regions(MAPPING, world[0].parents[2], workers=2)
+
+        assert checkpoint_path.exists()
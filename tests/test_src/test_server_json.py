@@ -0,0 +1,100 @@
+import json
+from unittest import mock
+
+import pytest
+
+from server_manager.src.server_json import (
+    JSON_FILES,
+    register_json_file,
+    remap_entries,
+    rewrite_json_file,
+    rewrite_json_files,
+)
+
+# pylint: disable=redefined-outer-name
+
+OLD_UUID = "4a618768-4f26-4688-8ab5-6e64f250c62f"
+NEW_UUID = "0f2d2b0c-6a6e-4c43-9d0e-5d2b6f1f7a10"
+OTHER_UUID = "6f1e3f0a-8a52-4a55-9d9d-2c1b6c0f4e11"
+MAPPING = {OLD_UUID: NEW_UUID}
+
+
+@pytest.fixture
+def registry():
+    backup = dict(JSON_FILES)
+    yield JSON_FILES
+    JSON_FILES.clear()
+    JSON_FILES.update(backup)
+
+
+def test_default_registry():
+    assert set(JSON_FILES) == {
+        "ops.json",
+        "banned-players.json",
+        "usercache.json",
+        "whitelist.json",
+    }
+    assert all(x is remap_entries for x in JSON_FILES.values())
+
+
+def test_register_json_file(registry):
+    rewriter = mock.MagicMock()
+    register_json_file("plugins/x.json", rewriter)
+    register_json_file("other.json")
+    assert registry["plugins/x.json"] is rewriter
+    assert registry["other.json"] is remap_entries
+
+
+def test_remap_entries():
+    data = [
+        {"uuid": OLD_UUID.upper(), "name": "alice"},
+        {"uuid": OTHER_UUID, "name": "bob"},
+        {"name": "charlie"},
+    ]
+    assert remap_entries(data, MAPPING) == 1
+    assert data == [
+        {"uuid": NEW_UUID, "name": "alice"},
+        {"uuid": OTHER_UUID, "name": "bob"},
+        {"name": "charlie"},
+    ]
+
+
+class TestRewriteJsonFile:
+    def test_indented(self, tmp_path):
+        path = tmp_path.joinpath("ops.json")
+        path.write_text(json.dumps([{"uuid": OLD_UUID, "level": 4}], indent=2))
+
+        assert rewrite_json_file(path, remap_entries, MAPPING) == 1
+        assert path.read_text() == json.dumps(
+            [{"uuid": NEW_UUID, "level": 4}], indent=2
+        )
+        assert not tmp_path.joinpath("ops.json.tmp").exists()
+
+    def test_compact(self, tmp_path):
+        path = tmp_path.joinpath("usercache.json")
+        path.write_text(f'[{{"name":"alice","uuid":"{OLD_UUID}"}}]')
+
+        assert rewrite_json_file(path, remap_entries, MAPPING) == 1
+        assert path.read_text() == f'[{{"name":"alice","uuid":"{NEW_UUID}"}}]'
+
+    def test_no_match(self, tmp_path):
+        path = tmp_path.joinpath("ops.json")
+        path.write_text(json.dumps([{"uuid": OTHER_UUID}]))
+
+        with mock.patch("server_manager.src.server_json.os.replace") as replace_m:
+            assert rewrite_json_file(path, remap_entries, MAPPING) == 0
+        replace_m.assert_not_called()
+
+
+def test_rewrite_json_files(tmp_path, registry):
+    for filename in ("ops.json", "whitelist.json"):
+        tmp_path.joinpath(filename).write_text(json.dumps([{"uuid": OLD_UUID}]))
+    rewriter = mock.MagicMock(return_value=2)
+    register_json_file("custom.json", rewriter)
+    tmp_path.joinpath("custom.json").write_text("{}")
+
+    assert rewrite_json_files({OLD_UUID.upper(): NEW_UUID}, tmp_path) == 4
+    rewriter.assert_called_once_with({}, MAPPING)
+    for filename in ("ops.json", "whitelist.json"):
+        data = json.loads(tmp_path.joinpath(filename).read_text())
+        assert data == [{"uuid": NEW_UUID}]
@@ -2,8 +2,17 @@ from unittest import mock
 
 import pytest
 
-from server_manager.src.exceptions import CheckError
-from server_manager.src.set_mode import set_mode
+from server_manager.src.checks import ValidationReport
+from server_manager.src.exceptions import CheckError, JournalError, PlanError
+from server_manager.src.plan import ModeSwitchPlan
+from server_manager.src.set_mode import (
+    apply_plan,
+    check_plan_players,
+    plan_mode,
+    restart_server,
+    set_mode,
+    switch,
+)
 
 
 class TestSetMode:
@@ -15,9 +24,9 @@ class TestSetMode:
         self.player_gen_m = mock.patch(root + "Player.generate").start()
         self.check_players_m = mock.patch(root + "check_players").start()
         self.check_plugin_m = mock.patch(root + "check_plugin").start()
-        self.cpm_m = mock.patch(root + "change_players_mode").start()
-        self.spm_m = mock.patch(root + "set_plugin_mode").start()
-        self.sp_m = mock.patch(root + "PropertiesManager.set_property").start()
+        self.journal_m = mock.patch(root + "Journal").start()
+        self.rms_m = mock.patch(root + "run_mode_switch").start()
+        self.build_plan_m = mock.patch(root + "build_plan").start()
 
         yield
 
@@ -30,16 +39,14 @@ class TestSetMode:
 
         msg = "server is already running with online-mode=%s" % new_mode
         with pytest.raises(ValueError, match=msg):
-            set_mode(new_mode)
+            assert set_mode(new_mode) == self.rms_m.return_value
 
         self.gsp_m.assert_called_once_with()
         self.gp_m.assert_called_once_with("online_mode")
         self.player_gen_m.assert_not_called()
         self.check_players_m.assert_not_called()
         self.check_plugin_m.assert_not_called()
-        self.cpm_m.assert_not_called()
-        self.spm_m.assert_not_called()
-        self.sp_m.assert_not_called()
+        self.rms_m.assert_not_called()
 
         assert len(caplog.records) == 2
         assert caplog.records[0].levelname == "DEBUG"
@@ -50,20 +57,20 @@ class TestSetMode:
     @pytest.mark.parametrize("new_mode", [False, True])
     def test_set_mode_fails_players_check(self, new_mode, caplog):
         caplog.set_level(10)
-        self.sp_m.return_value = not new_mode
+        self.gp_m.return_value = not new_mode
         self.check_players_m.side_effect = CheckError("players check failed")
 
         with pytest.raises(CheckError, match="players check failed"):
-            set_mode(new_mode)
+            assert set_mode(new_mode) == self.rms_m.return_value
 
         self.gsp_m.assert_called_once_with()
         self.gp_m.assert_called_once_with("online_mode")
         self.player_gen_m.assert_called_once_with(self.gsp_m.return_value)
-        self.check_players_m.assert_called_once_with(self.player_gen_m.return_value)
+        self.check_players_m.assert_called_once_with(
+            self.player_gen_m.return_value, full_check=False
+        )
         self.check_plugin_m.assert_not_called()
-        self.cpm_m.assert_not_called()
-        self.spm_m.assert_not_called()
-        self.sp_m.assert_not_called()
+        self.rms_m.assert_not_called()
 
         assert len(caplog.records) == 1
         assert caplog.records[0].levelname == "DEBUG"
@@ -72,20 +79,20 @@ class TestSetMode:
     @pytest.mark.parametrize("new_mode", [False, True])
     def test_set_mode_fails_plugin_check(self, new_mode, caplog):
         caplog.set_level(10)
-        self.sp_m.return_value = not new_mode
+        self.gp_m.return_value = not new_mode
         self.check_plugin_m.side_effect = CheckError("plugin check failed")
 
         with pytest.raises(CheckError, match="plugin check failed"):
-            set_mode(new_mode)
+            assert set_mode(new_mode) == self.rms_m.return_value
 
         self.gsp_m.assert_called_once_with()
         self.gp_m.assert_called_once_with("online_mode")
         self.player_gen_m.assert_called_once_with(self.gsp_m.return_value)
-        self.check_players_m.assert_called_once_with(self.player_gen_m.return_value)
+        self.check_players_m.assert_called_once_with(
+            self.player_gen_m.return_value, full_check=False
+        )
         self.check_plugin_m.assert_called_once_with()
-        self.cpm_m.assert_not_called()
-        self.spm_m.assert_not_called()
-        self.sp_m.assert_not_called()
+        self.rms_m.assert_not_called()
 
         assert len(caplog.records) == 1
         assert caplog.records[0].levelname == "DEBUG"
@@ -94,19 +101,334 @@ class TestSetMode:
     @pytest.mark.parametrize("new_mode", [False, True])
     def test_set_mode_ok(self, new_mode, caplog):
         caplog.set_level(10)
-        self.sp_m.return_value = not new_mode
+        self.gp_m.return_value = not new_mode
 
-        set_mode(new_mode)
+        assert set_mode(new_mode) == self.rms_m.return_value
 
         self.gsp_m.assert_called_once_with()
         self.gp_m.assert_called_once_with("online_mode")
         self.player_gen_m.assert_called_once_with(self.gsp_m.return_value)
-        self.check_players_m.assert_called_once_with(self.player_gen_m.return_value)
+        self.check_players_m.assert_called_once_with(
+            self.player_gen_m.return_value, full_check=False
+        )
         self.check_plugin_m.assert_called_once_with()
-        self.cpm_m.assert_called_once_with(self.player_gen_m.return_value, new_mode)
-        self.spm_m.assert_called_once_with(not new_mode)
-        self.sp_m.assert_called_once_with(online_mode=new_mode)
+        self.journal_m.return_value.check_clean.assert_called_once_with()
+        self.build_plan_m.assert_called_once_with(
+            self.player_gen_m.return_value, new_mode
+        )
+        plan = self.build_plan_m.return_value
+        plan.check.assert_called_once_with()
+        self.rms_m.assert_called_once_with(plan.steps, workers=8)
 
         assert len(caplog.records) == 1
         assert caplog.records[0].levelname == "DEBUG"
         assert caplog.records[0].msg == "Setting online-mode=%s (current=%s, path=%s)"
+
+    def test_set_mode_players_removed(self):
+        self.gp_m.return_value = False
+        self.check_players_m.return_value = False
+        old_players, new_players = mock.MagicMock(), mock.MagicMock()
+        self.player_gen_m.side_effect = [old_players, new_players]
+
+        assert set_mode(True) == self.rms_m.return_value
+
+        self.check_players_m.assert_called_once_with(old_players, full_check=False)
+        assert self.player_gen_m.call_count == 2
+        self.build_plan_m.assert_called_once_with(new_players, True)
+
+    @mock.patch("server_manager.src.set_mode.stop_server")
+    @mock.patch("server_manager.src.set_mode.RconClient")
+    @mock.patch("server_manager.src.set_mode.validate_players")
+    def test_set_mode_live(self, vp_m, rcon_m, stop_m):
+        self.gp_m.return_value = False
+        players, new_players = mock.MagicMock(), mock.MagicMock()
+        self.player_gen_m.side_effect = [players, new_players]
+        first_plan, plan = mock.MagicMock(), mock.MagicMock()
+        self.build_plan_m.side_effect = [first_plan, plan]
+        self.check_players_m.return_value = True
+        manager = mock.MagicMock()
+        manager.attach_mock(vp_m, "validate_players")
+        manager.attach_mock(stop_m, "stop_server")
+        manager.attach_mock(self.check_players_m, "check_players")
+        manager.attach_mock(self.rms_m, "run_mode_switch")
+
+        stats = set_mode(True, live=True)
+
+        # the players are only removed once the server is stopped
+        client = rcon_m.from_properties.return_value.__enter__.return_value
+        assert manager.mock_calls == [
+            mock.call.validate_players(players, full_check=False),
+            mock.call.stop_server(client),
+            mock.call.check_players(new_players, full_check=False),
+            mock.call.run_mode_switch(plan.steps, workers=8),
+        ]
+        assert stats == self.rms_m.return_value
+        assert self.build_plan_m.call_args_list == [
+            mock.call(players, True),
+            mock.call(new_players, True),
+        ]
+        first_plan.check.assert_called_once_with()
+        plan.check.assert_called_once_with()
+
+    @mock.patch("server_manager.src.set_mode.stop_server")
+    @mock.patch("server_manager.src.set_mode.RconClient")
+    @mock.patch("server_manager.src.set_mode.validate_players")
+    def test_set_mode_live_fails_plan(self, vp_m, rcon_m, stop_m):
+        self.gp_m.return_value = False
+        self.build_plan_m.return_value.check.side_effect = PlanError("x")
+
+        with pytest.raises(PlanError):
+            set_mode(True, live=True)
+
+        # the server is not stopped
+        vp_m.assert_called_once_with(self.player_gen_m.return_value, full_check=False)
+        rcon_m.from_properties.assert_not_called()
+        stop_m.assert_not_called()
+        self.check_players_m.assert_not_called()
+        self.rms_m.assert_not_called()
+
+    def test_set_mode_fails_interrupted_switch(self):
+        self.gp_m.return_value = False
+        self.journal_m.return_value.check_clean.side_effect = JournalError("x")
+
+        with pytest.raises(JournalError):
+            set_mode(True)
+
+        self.player_gen_m.assert_not_called()
+        self.check_players_m.assert_not_called()
+        self.rms_m.assert_not_called()
+
+    def test_set_mode_fails_plan(self):
+        self.gp_m.return_value = False
+        self.build_plan_m.return_value.check.side_effect = PlanError("x")
+
+        with pytest.raises(PlanError):
+            set_mode(True)
+
+        self.rms_m.assert_not_called()
+
+
+def test_set_mode_quarantined_players(tmp_path):
+    server_path = tmp_path.joinpath("server")
+    uuids = [
+        "0a34bd8d-6ce4-4da3-83f6-d6ed6bf5e2c2",
+        "4b6dc1c6-0a42-4f8a-b2a5-2ecf3e4c8f60",
+    ]
+    for uuid in uuids:
+        for folder, ext in (("playerdata", ".dat"), ("stats", ".json")):
+            path = server_path.joinpath("world", folder, uuid + ext)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("data")
+        path = server_path.joinpath("world", "advancements", uuid + ".json")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("data")
+
+    def validate_players(players, full_check):
+        # the first player uses a different mode than the server
+        return ValidationReport(
+            True,
+            mode_mismatches=players[:1],
+            item_counts=dict.fromkeys(players, (0, 0)),
+        )
+
+    with mock.patch.multiple(
+        "server_manager.src.set_mode",
+        get_server_path=mock.Mock(return_value=server_path),
+        PropertiesManager=mock.DEFAULT,
+        Journal=mock.DEFAULT,
+        check_plugin=mock.DEFAULT,
+        build_plan=mock.DEFAULT,
+        run_mode_switch=mock.DEFAULT,
+    ) as mocks, mock.patch.multiple(
+        "server_manager.src.quarantine",
+        get_server_path=mock.Mock(return_value=server_path),
+        get_quarantine_folder=mock.Mock(return_value=tmp_path.joinpath("quarantine")),
+    ), mock.patch(
+        "server_manager.src.checks.validate_players", validate_players
+    ), mock.patch(
+        "server_manager.src.player.get_username", return_value="user"
+    ), mock.patch(
+        "server_manager.src.player.get_mode", return_value=False
+    ):
+        mocks["PropertiesManager"].get_property.return_value = True
+        set_mode(False)
+
+    # the plan is built from the files left, not from the files quarantined
+    mocks["build_plan"].assert_called_once_with([], False)
+    assert not any(server_path.joinpath("world", "playerdata").iterdir())
+    assert len(list(tmp_path.joinpath("quarantine").iterdir())) == 1
+
+
+class TestPlanMode:
+    @pytest.fixture(autouse=True)
+    def mocks(self):
+        root = "server_manager.src.set_mode."
+        self.gsp_m = mock.patch(root + "get_server_path").start()
+        self.gp_m = mock.patch(root + "PropertiesManager.get_property").start()
+        self.gp_m.return_value = False
+        self.journal_m = mock.patch(root + "Journal").start()
+        self.player_gen_m = mock.patch(root + "Player.generate").start()
+        self.check_players_m = mock.patch(root + "check_players").start()
+        self.check_plugin_m = mock.patch(root + "check_plugin").start()
+        self.build_plan_m = mock.patch(root + "build_plan").start()
+        self.rms_m = mock.patch(root + "run_mode_switch").start()
+        self.load_m = mock.patch(root + "ModeSwitchPlan.load").start()
+        self.gpp_m = mock.patch(root + "get_plan_path").start()
+        yield
+        mock.patch.stopall()
+
+    @pytest.mark.parametrize("is_ok", [True, False])
+    def test_plan_mode(self, is_ok):
+        plan = self.build_plan_m.return_value
+        plan.ok = is_ok
+
+        assert plan_mode(True) == plan
+
+        self.journal_m.return_value.check_clean.assert_called_once_with()
+        self.build_plan_m.assert_called_once_with(self.player_gen_m.return_value, True)
+        assert plan.save.called is is_ok
+        self.check_players_m.assert_not_called()
+        self.rms_m.assert_not_called()
+
+    def test_plan_mode_same_mode(self):
+        with pytest.raises(ValueError, match="already running"):
+            plan_mode(False)
+        self.build_plan_m.assert_not_called()
+
+    def test_apply_plan(self, tmp_path):
+        src = tmp_path.joinpath("src")
+        src.write_text("data")
+        steps = [{"op": "rename", "src": src.as_posix(), "dst": "dst"}]
+        self.load_m.return_value = ModeSwitchPlan(True, steps=steps)
+
+        assert apply_plan(True, workers=3) == self.rms_m.return_value
+
+        self.player_gen_m.assert_not_called()
+        self.check_plugin_m.assert_called_once_with()
+        self.rms_m.assert_called_once_with(steps, workers=3)
+        self.gpp_m.return_value.unlink.assert_called_once_with()
+
+    def test_apply_plan_other_mode(self):
+        self.gp_m.return_value = True
+        self.load_m.return_value = ModeSwitchPlan(True)
+
+        with pytest.raises(PlanError, match="online-mode=True"):
+            apply_plan(False)
+        self.rms_m.assert_not_called()
+
+    def test_apply_plan_with_errors(self):
+        self.load_m.return_value = ModeSwitchPlan(True, errors=["error"])
+
+        with pytest.raises(PlanError, match="error"):
+            apply_plan(True)
+        self.rms_m.assert_not_called()
+
+    @mock.patch("server_manager.src.set_mode.stop_server")
+    @mock.patch("server_manager.src.set_mode.RconClient")
+    def test_apply_plan_live_new_player(self, rcon_m, stop_m, tmp_path):
+        src = tmp_path.joinpath("src")
+        src.write_text("data")
+        steps = [{"op": "rename", "src": src.as_posix(), "dst": "dst"}]
+        self.load_m.return_value = ModeSwitchPlan(True, {"a": "b"}, steps=steps)
+        self.player_gen_m.return_value = [mock.MagicMock(uuid="a")]
+
+        assert apply_plan(True, live=True) == self.rms_m.return_value
+        self.rms_m.assert_called_once_with(steps, workers=8)
+
+        # a player joined while the server was running
+        self.rms_m.reset_mock()
+        self.player_gen_m.return_value.append(mock.MagicMock(uuid="c"))
+        with pytest.raises(PlanError, match="players not planned: c"):
+            apply_plan(True, live=True)
+
+        assert stop_m.call_count == 2
+        self.rms_m.assert_not_called()
+
+    def test_apply_plan_outdated(self, tmp_path):
+        src = tmp_path.joinpath("src").as_posix()
+        steps = [{"op": "rename", "src": src, "dst": "dst"}]
+        self.load_m.return_value = ModeSwitchPlan(True, steps=steps)
+
+        with pytest.raises(PlanError, match="outdated"):
+            apply_plan(True)
+        self.check_plugin_m.assert_not_called()
+        self.rms_m.assert_not_called()
+
+
+def test_check_plan_players(tmp_path):
+    src = tmp_path.joinpath("src")
+    steps = [{"op": "rename", "src": src.as_posix(), "dst": "dst"}]
+    plan = ModeSwitchPlan(True, {"a": "b", "c": "c"}, steps=steps)
+    players = [mock.MagicMock(uuid="a"), mock.MagicMock(uuid="c")]
+
+    with pytest.raises(PlanError, match="'.*src' not found"):
+        check_plan_players(plan, players)
+
+    src.write_text("data")
+    check_plan_players(plan, players)
+
+    players.append(mock.MagicMock(uuid="e"))
+    with pytest.raises(PlanError, match="players not planned: e"):
+        check_plan_players(plan, players)
+
+
+class TestSwitch:
+    @pytest.fixture(autouse=True)
+    def mocks(self):
+        root = "server_manager.src.set_mode."
+        self.rcon_m = mock.patch(root + "RconClient").start()
+        self.stop_m = mock.patch(root + "stop_server").start()
+        self.rms_m = mock.patch(root + "run_mode_switch").start()
+        self.restart_m = mock.patch(root + "restart_server").start()
+        yield
+        mock.patch.stopall()
+
+    def test_offline(self):
+        assert switch(["step"], workers=2) == self.rms_m.return_value
+
+        self.rcon_m.from_properties.assert_not_called()
+        self.stop_m.assert_not_called()
+        self.rms_m.assert_called_once_with(["step"], workers=2)
+        self.restart_m.assert_not_called()
+
+    def test_live(self):
+        manager = mock.MagicMock()
+        manager.attach_mock(self.stop_m, "stop_server")
+        manager.attach_mock(self.rms_m, "run_mode_switch")
+        manager.attach_mock(self.restart_m, "restart_server")
+
+        switch(["step"], live=True, restart_command="./start.sh")
+
+        client = self.rcon_m.from_properties.return_value.__enter__.return_value
+        assert manager.mock_calls == [
+            mock.call.stop_server(client),
+            mock.call.run_mode_switch(["step"], workers=8),
+            mock.call.restart_server("./start.sh"),
+        ]
+
+    @mock.patch("server_manager.src.set_mode.get_server_path")
+    @mock.patch("server_manager.src.set_mode.Player.generate")
+    def test_live_replan(self, generate_m, gsp_m):
+        replan_m = mock.MagicMock()
+        replan_m.return_value.steps = ["new-step"]
+
+        switch(["step"], live=True, replan=replan_m)
+
+        generate_m.assert_called_once_with(gsp_m.return_value)
+        replan_m.assert_called_once_with(generate_m.return_value)
+        self.rms_m.assert_called_once_with(["new-step"], workers=8)
+
+    def test_offline_replan(self):
+        replan_m = mock.MagicMock()
+        switch(["step"], replan=replan_m)
+
+        replan_m.assert_not_called()
+        self.rms_m.assert_called_once_with(["step"], workers=8)
+
+
+@mock.patch("server_manager.src.set_mode.subprocess.run")
+def test_restart_server(run_m):
+    restart_server("systemctl start 'minecraft server'")
+    run_m.assert_called_once_with(
+        ["systemctl", "start", "minecraft server"], check=True
+    )
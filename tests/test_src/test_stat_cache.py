@@ -0,0 +1,48 @@
+import os
+from unittest import mock
+
+from server_manager.src.stat_cache import CacheInfo, StatCache, get_stat_key
+
+
+def test_get_stat_key(tmp_path):
+    path = tmp_path.joinpath("file")
+    path.write_text("abc")
+    stat = path.stat()
+    key = get_stat_key(path)
+    assert key == (stat.st_mtime_ns, 3, stat.st_ino)
+
+    os.utime(path, ns=(stat.st_mtime_ns, stat.st_mtime_ns + 1))
+    assert get_stat_key(path) != key
+
+    path.with_name("new").write_text("abc")
+    os.replace(path.with_name("new"), path)
+    assert get_stat_key(path)[2] != key[2]
+
+
+class TestStatCache:
+    def test_get(self):
+        cache = StatCache("test")
+        func = mock.MagicMock(side_effect=[1, 2, 3])
+
+        assert cache.get("v1", "a", func) == 1
+        assert cache.get("v1", "a", func) == 1
+        assert cache.get("v1", "b", func) == 2
+        assert cache.cache_info() == CacheInfo(1, 2, 2)
+
+        # key changed, the values are dropped
+        assert cache.get("v2", "a", func) == 3
+        assert cache.cache_info() == CacheInfo(1, 3, 1)
+        assert func.call_count == 3
+
+    def test_invalidate(self):
+        cache = StatCache("test")
+        cache.get("v1", "a", lambda: 1)
+        cache.get("v1", "a", lambda: 1)
+
+        cache.invalidate()
+        assert cache.get("v1", "a", lambda: 2) == 2
+        assert cache.cache_info() == CacheInfo(1, 2, 1)
+
+        cache.cache_clear()
+        assert cache.cache_info() == CacheInfo(0, 0, 0)
+        assert repr(cache) == "StatCache('test')"
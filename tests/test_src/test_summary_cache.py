@@ -0,0 +1,109 @@
+import os
+from unittest import mock
+
+import pytest
+
+from server_manager.src.player import PlayerSummary
+from server_manager.src.summary_cache import (
+    SummaryCache,
+    get_player_summaries,
+    get_summary_cache_path,
+)
+
+# pylint: disable=redefined-outer-name
+
+
+def make_player(path, inventory=1):
+    player = mock.MagicMock()
+    player.player_data_file.path = path
+    player.player_data_file.as_posix.return_value = path.as_posix()
+    player.get_summary.return_value = PlayerSummary(
+        inventory, 2, "overworld", 10, 64, -10, 20.0, 5
+    )
+    return player
+
+
+@pytest.fixture
+def player(tmp_path):
+    path = tmp_path.joinpath("playerdata", "<uuid>.dat")
+    path.parent.mkdir()
+    path.write_bytes(b"player-data")
+    yield make_player(path)
+
+
+@mock.patch("server_manager.src.summary_cache.get_cache_folder")
+def test_get_summary_cache_path(gcf_m):
+    assert get_summary_cache_path() == gcf_m.return_value.joinpath.return_value
+    gcf_m.return_value.joinpath.assert_called_once_with("player-summaries.sqlite3")
+
+
+class TestSummaryCache:
+    def test_miss_then_hit(self, tmp_path, player):
+        db_path = tmp_path.joinpath("cache.sqlite3")
+
+        with SummaryCache(db_path) as cache:
+            summary = cache.get(player)
+            assert summary == player.get_summary.return_value
+            assert (cache.hits, cache.misses) == (0, 1)
+
+        player.get_summary.reset_mock()
+
+        with SummaryCache(db_path) as cache:
+            summary = cache.get(player)
+            assert summary == player.get_summary.return_value
+            assert isinstance(summary, PlayerSummary)
+            assert (cache.hits, cache.misses) == (1, 0)
+
+        player.get_summary.assert_not_called()
+
+    def test_stale_entry(self, tmp_path, player):
+        db_path = tmp_path.joinpath("cache.sqlite3")
+
+        with SummaryCache(db_path) as cache:
+            cache.get(player)
+
+        path = player.player_data_file.path
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        new_player = make_player(path, inventory=33)
+
+        with SummaryCache(db_path) as cache:
+            assert cache.get(new_player).inventory == 33
+            assert (cache.hits, cache.misses) == (0, 1)
+            assert cache.get(new_player).inventory == 33
+            assert (cache.hits, cache.misses) == (1, 1)
+
+        new_player.get_summary.assert_called_once_with()
+
+    def test_schema_reset(self, tmp_path, player):
+        db_path = tmp_path.joinpath("cache.sqlite3")
+
+        with SummaryCache(db_path) as cache:
+            cache.get(player)
+            cache.connection.execute("PRAGMA user_version = 0")
+
+        with SummaryCache(db_path) as cache:
+            cache.get(player)
+            assert (cache.hits, cache.misses) == (0, 1)
+
+
+class TestGetPlayerSummaries:
+    def test_no_cache(self, player):
+        with mock.patch("server_manager.src.summary_cache.SummaryCache") as cache_m:
+            result = get_player_summaries([player, player], use_cache=False)
+
+        cache_m.assert_not_called()
+        assert result == [player.get_summary.return_value] * 2
+        assert player.get_summary.call_count == 2
+
+    def test_cache(self, tmp_path, player):
+        path = tmp_path.joinpath("cache.sqlite3")
+        with mock.patch(
+            "server_manager.src.summary_cache.get_summary_cache_path"
+        ) as gscp_m:
+            gscp_m.return_value = path
+            result = get_player_summaries([player, player])
+
+        assert result == [player.get_summary.return_value] * 2
+        player.get_summary.assert_called_once_with()
+        assert path.is_file()
@@ -1,15 +1,21 @@
+import logging
 from pathlib import Path
 import re
 from unittest import mock
 
+import click
 from click.exceptions import ClickException
+from click.testing import CliRunner
 import pytest
 
 from server_manager.src.utils import (
+    DeferredFileHandler,
+    LazyGroup,
     Validators,
     bool2str,
     click_handle_exception,
     gen_hash,
+    get_timestamp_id_key,
     str2bool,
 )
 
@@ -147,6 +153,20 @@ def test_gen_hash(gsp_m, string):
     assert len(server_hash) == 64
 
 
+def test_get_timestamp_id_key():
+    identifiers = [
+        "2021.05.17.10.30.12-10",
+        "2021.05.17.10.30.12",
+        "2021.05.17.10.30.12-2",
+    ]
+    assert sorted(identifiers, key=get_timestamp_id_key) == [
+        "2021.05.17.10.30.12",
+        "2021.05.17.10.30.12-2",
+        "2021.05.17.10.30.12-10",
+    ]
+    assert get_timestamp_id_key("2021.05.17.10.30.12-x") == ("2021.05.17.10.30.12", 0)
+
+
 exceptions = [
     (ValueError("something went south", 43), "ValueError: something went south, 43"),
     (RuntimeError("yeah", 654, 1 + 5j), "RuntimeError: yeah, 654, (1+5j)"),
@@ -194,3 +214,77 @@ def test_click_handle_exception(exc, expected, target_exc, always_call, invalid)
     else:
         with pytest.raises(ClickException, match=expected):
             dummy_function(exc)
+
+
+def test_deferred_file_handler(tmp_path):
+    path = tmp_path.joinpath("logs", "file.log")
+    get_path_m = mock.MagicMock(return_value=path)
+    handler = DeferredFileHandler(get_path_m)
+    logger = logging.getLogger("test_deferred_file_handler")
+    logger.addHandler(handler)
+
+    try:
+        get_path_m.assert_not_called()
+        assert not path.parent.exists()
+
+        logger.warning("message")
+        logger.warning("other message")
+        get_path_m.assert_called_once_with()
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+    assert path.read_text() == "message\nother message\n"
+
+
+@click.command("eager")
+def eager_command():
+    """Eager command"""
+
+
+class TestLazyGroup:
+    @pytest.fixture(autouse=True)
+    def mocks(self):
+        self.im_m = mock.patch("server_manager.src.utils.import_module").start()
+        self.im_m.return_value.command = click.Command("lazy", help="Lazy command")
+        self.im_m.return_value.invalid = object()
+
+        @click.group(
+            cls=LazyGroup,
+            lazy_subcommands={
+                "lazy": ("package.module:command", "Lazy command"),
+                "invalid": ("package.module:invalid", "Invalid command"),
+            },
+        )
+        def group():
+            pass
+
+        group.add_command(eager_command)
+        self.group = group
+        yield
+        mock.patch.stopall()
+
+    def test_list_commands(self):
+        ctx = click.Context(self.group)
+        assert self.group.list_commands(ctx) == ["eager", "invalid", "lazy"]
+        self.im_m.assert_not_called()
+
+    def test_get_command(self):
+        ctx = click.Context(self.group)
+        assert self.group.get_command(ctx, "eager") is eager_command
+        self.im_m.assert_not_called()
+
+        command = self.group.get_command(ctx, "lazy")
+        assert command is self.im_m.return_value.command
+        self.im_m.assert_called_once_with("package.module")
+
+        with pytest.raises(TypeError, match="'invalid' is not a click command"):
+            self.group.get_command(ctx, "invalid")
+
+    def test_help(self):
+        result = CliRunner().invoke(self.group, ["--help"])
+        assert result.exit_code == 0
+        assert "eager    Eager command" in result.output
+        assert "invalid  Invalid command" in result.output
+        assert "lazy     Lazy command" in result.output
+        self.im_m.assert_not_called()
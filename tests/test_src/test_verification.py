@@ -0,0 +1,142 @@
+import json
+import os
+from unittest import mock
+
+import pytest
+
+from server_manager.src.verification import (
+    FORMAT_VERSION,
+    VerdictCache,
+    get_file_digest,
+    get_player_digest,
+    get_verdicts_path,
+)
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def player(tmp_path):
+    player = mock.MagicMock(uuid="<uuid>")
+    for name in ("player_data_file", "stats_file", "advancements_file"):
+        path = tmp_path.joinpath(name)
+        path.write_bytes(name.encode())
+        getattr(player, name).path = path
+    yield player
+
+
+@mock.patch("server_manager.src.verification.get_cache_folder")
+def test_get_verdicts_path(gcf_m):
+    assert get_verdicts_path() == gcf_m.return_value.joinpath.return_value
+    gcf_m.return_value.joinpath.assert_called_once_with("verdicts.json")
+
+
+def test_get_file_digest(tmp_path):
+    path = tmp_path.joinpath("file")
+    path.write_bytes(b"data")
+    digest = get_file_digest(path)
+
+    assert digest[:2] == [path.as_posix(), 4]
+    path.write_bytes(b"dat4")
+    os.utime(path, ns=(0, digest[2]))
+    assert get_file_digest(path)[:3] == digest[:3]
+    assert get_file_digest(path) != digest
+
+
+def test_get_file_digest_previous(tmp_path):
+    path = tmp_path.joinpath("file")
+    path.write_bytes(b"data")
+    digest = get_file_digest(path)
+
+    # unchanged stat, the content is not read
+    with mock.patch.object(type(path), "read_bytes") as read_bytes_m:
+        assert get_file_digest(path, digest[:3] + [123]) == digest[:3] + [123]
+    read_bytes_m.assert_not_called()
+
+    os.utime(path, ns=(0, digest[2] + 1))
+    assert get_file_digest(path, digest[:3] + [123]) == [
+        path.as_posix(),
+        4,
+        digest[2] + 1,
+        digest[3],
+    ]
+
+
+def test_get_player_digest(player):
+    digest = get_player_digest(player)
+    assert len(digest) == 3
+    assert digest[0] == get_file_digest(player.player_data_file.path)
+
+
+class TestVerdictCache:
+    def test_miss_then_hit(self, tmp_path, player):
+        path = tmp_path.joinpath("verdicts.json")
+        cache = VerdictCache(path)
+        assert cache.get(player) is None
+        cache.set(player, (1, 2))
+        cache.save()
+        assert (cache.hits, cache.misses) == (0, 1)
+
+        data = json.loads(path.read_text())
+        assert data["version"] == FORMAT_VERSION
+        assert data["players"]["<uuid>"]["verdict"] == [1, 2]
+
+        cache = VerdictCache(path)
+        assert cache.get(player) == (1, 2)
+        assert (cache.hits, cache.misses) == (1, 0)
+
+    def test_changed_file(self, tmp_path, player):
+        path = tmp_path.joinpath("verdicts.json")
+        cache = VerdictCache(path)
+        cache.set(player, (0, 0))
+        cache.save()
+
+        player.stats_file.path.write_bytes(b"new-stats")
+        cache = VerdictCache(path)
+        assert cache.get(player) is None
+        assert (cache.hits, cache.misses) == (0, 1)
+
+    def test_touched_file(self, tmp_path, player):
+        path = tmp_path.joinpath("verdicts.json")
+        cache = VerdictCache(path)
+        cache.set(player, (1, 2))
+        cache.save()
+
+        stat = player.stats_file.path.stat()
+        os.utime(player.stats_file.path, ns=(0, stat.st_mtime_ns + 10**9))
+        cache = VerdictCache(path)
+        assert cache.get(player) == (1, 2)
+        cache.save()
+
+        # the new modification time is recorded
+        data = json.loads(path.read_text())
+        assert data["players"]["<uuid>"]["digest"][1][2] == stat.st_mtime_ns + 10**9
+
+    def test_drop_unseen(self, tmp_path, player):
+        path = tmp_path.joinpath("verdicts.json")
+        cache = VerdictCache(path)
+        cache.set(player, (0, 0))
+        cache.save()
+
+        cache = VerdictCache(path)
+        cache.entries["<gone>"] = cache.entries["<uuid>"]
+        cache.save()
+        assert json.loads(path.read_text())["players"] == {}
+
+        cache = VerdictCache(path)
+        cache.set(player, (0, 0))
+        cache.entries["<gone>"] = cache.entries["<uuid>"]
+        cache.save()
+
+        cache = VerdictCache(path)
+        assert cache.get(player) == (0, 0)
+        cache.save()
+        assert list(json.loads(path.read_text())["players"]) == ["<uuid>"]
+
+    @pytest.mark.parametrize("content", ["{invalid", '{"version": 0}'])
+    def test_invalid_file(self, tmp_path, player, content):
+        path = tmp_path.joinpath("verdicts.json")
+        path.write_text(content)
+        cache = VerdictCache(path)
+        assert cache.entries == {}
+        assert cache.get(player) is None
@@ -0,0 +1,210 @@
+import hashlib
+import os
+from pathlib import Path
+import stat
+import time
+from unittest import mock
+import zipfile
+
+import pytest
+
+from server_manager.src.zip_writer import (
+    ZipStats,
+    ZipWriter,
+    compress_file,
+    get_date_time,
+    iter_folder,
+    write_zip,
+)
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = tmp_path.joinpath("server")
+    folder.joinpath("world/region").mkdir(parents=True)
+    folder.joinpath("server.properties").write_text("online-mode=true\n")
+    folder.joinpath("world/level.dat").write_bytes(os.urandom(1000))
+    folder.joinpath("world/region/r.0.0.mca").write_bytes(b"region" * 100_000)
+    folder.joinpath("world/region/r.0.1.mca").write_bytes(b"")
+    folder.joinpath("empty").mkdir()
+    yield folder
+
+
+def read_zip(path: Path):
+    with zipfile.ZipFile(path) as archive:
+        assert archive.testzip() is None
+        return {x.filename: archive.read(x) for x in archive.infolist()}
+
+
+def test_iter_folder(folder):
+    entries = list(iter_folder(folder))
+    assert [x[1] for x in entries] == [
+        "server/server.properties",
+        "server/world/level.dat",
+        "server/world/region/r.0.0.mca",
+        "server/world/region/r.0.1.mca",
+    ]
+    assert entries[1][0] == folder.joinpath("world/level.dat")
+
+    entries = list(iter_folder(folder.joinpath("world"), prefix=""))
+    assert [x[1] for x in entries][0] == "level.dat"
+
+
+@pytest.mark.parametrize("level", [0, 1, 9])
+def test_compress_file(folder, level):
+    path = folder.joinpath("world/region/r.0.0.mca")
+    info, payload = compress_file(path, "r.0.0.mca", level)
+
+    assert info.filename == "r.0.0.mca"
+    assert info.file_size == 600_000
+    assert info.digest == hashlib.sha256(b"region" * 100_000).hexdigest()
+    assert info.mtime_ns == path.stat().st_mtime_ns
+    assert info.compress_size == len(payload.read())
+    if level:
+        assert info.compress_type == zipfile.ZIP_DEFLATED
+        assert info.compress_size < 10_000
+    else:
+        assert info.compress_type == zipfile.ZIP_STORED
+        assert info.compress_size == 600_000
+
+
+def test_compress_file_old_timestamp(folder):
+    path = folder.joinpath("server.properties")
+    os.utime(path, (0, 0))
+    info, _ = compress_file(path, "server.properties", 6)
+    assert info.date_time == (1980, 1, 1, 0, 0, 0)
+
+
+def test_get_date_time():
+    assert get_date_time(0) == (1980, 1, 1, 0, 0, 0)
+    assert get_date_time(7_258_118_400) == (2107, 12, 31, 23, 59, 59)
+    timestamp = time.mktime((2021, 5, 17, 10, 30, 12, 0, 0, -1))
+    assert get_date_time(timestamp) == (2021, 5, 17, 10, 30, 12)
+
+
+class TestZipWriter:
+    def write(self, folder, zip_path):
+        entries = []
+        with zip_path.open("wb") as file_handler:
+            writer = ZipWriter(file_handler)
+            for path, arcname in iter_folder(folder):
+                entry = compress_file(path, arcname, 6)
+                written = writer.write_entry(entry)
+                assert written > entry.info.compress_size
+                assert entry.payload.closed
+                entries.append(entry.info)
+            writer.close()
+        return entries
+
+    @mock.patch("server_manager.src.zip_writer.CHUNK_SIZE", 1000)
+    def test_write(self, folder, tmp_path):
+        folder.joinpath("world", "café.json").write_text("{}")
+        folder.joinpath("world", "level.dat").chmod(0o600)
+        zip_path = tmp_path.joinpath("test.zip")
+        entries = self.write(folder, zip_path)
+
+        contents = read_zip(zip_path)
+        assert contents["server/world/region/r.0.0.mca"] == b"region" * 100_000
+        assert contents["server/world/region/r.0.1.mca"] == b""
+        assert contents["server/world/café.json"] == b"{}"
+
+        with zipfile.ZipFile(zip_path) as archive:
+            infos = archive.infolist()
+        assert [x.filename for x in infos] == [x.filename for x in entries]
+        for info, entry in zip(infos, entries):
+            # the DOS format stores the seconds halved
+            *date_time, seconds = entry.date_time
+            assert info.date_time == (*date_time, seconds // 2 * 2)
+            assert info.CRC == entry.crc
+            assert info.compress_type == zipfile.ZIP_DEFLATED
+        level = archive.getinfo("server/world/level.dat")
+        assert level.external_attr >> 16 == stat.S_IFREG | 0o600
+
+    @mock.patch("server_manager.src.zip_writer.ZIP_FILECOUNT_LIMIT", 2)
+    @mock.patch("server_manager.src.zip_writer.ZIP64_LIMIT", 500)
+    def test_zip64(self, folder, tmp_path):
+        zip_path = tmp_path.joinpath("test.zip")
+        self.write(folder, zip_path)
+
+        # zip64 extra fields, end of central directory record and locator
+        data = zip_path.read_bytes()
+        assert b"PK\x06\x06" in data
+        assert b"PK\x06\x07" in data
+        contents = read_zip(zip_path)
+        assert contents == {x[1]: x[0].read_bytes() for x in iter_folder(folder)}
+
+    def test_empty(self, tmp_path):
+        zip_path = tmp_path.joinpath("test.zip")
+        with zip_path.open("wb") as file_handler:
+            ZipWriter(file_handler).close()
+        assert read_zip(zip_path) == {}
+
+
+class TestWriteZip:
+    @pytest.mark.parametrize("workers", [1, 2, 8])
+    @pytest.mark.parametrize("level", [0, 6])
+    def test_round_trip(self, folder, tmp_path, level, workers):
+        zip_path = tmp_path.joinpath("backup.zip")
+        stats = write_zip(iter_folder(folder), zip_path, level, workers)
+
+        contents = read_zip(zip_path)
+        expected = {x[1]: x[0].read_bytes() for x in iter_folder(folder)}
+        assert contents == expected
+        assert list(contents) == [x[1] for x in iter_folder(folder)]
+
+        assert stats.files == 4
+        assert stats.bytes_in == sum(len(x) for x in expected.values())
+        assert stats.bytes_out == zip_path.stat().st_size
+        assert not tmp_path.joinpath("backup.zip.part").exists()
+
+    def test_on_entry(self, folder, tmp_path):
+        infos = []
+        write_zip(
+            iter_folder(folder), tmp_path.joinpath("backup.zip"), on_entry=infos.append
+        )
+
+        assert [x.filename for x in infos] == [x[1] for x in iter_folder(folder)]
+        contents = read_zip(tmp_path.joinpath("backup.zip"))
+        for info in infos:
+            assert info.digest == hashlib.sha256(contents[info.filename]).hexdigest()
+
+    def test_same_archive(self, folder, tmp_path):
+        first, second = tmp_path.joinpath("1.zip"), tmp_path.joinpath("2.zip")
+        write_zip(iter_folder(folder), first, workers=1)
+        write_zip(iter_folder(folder), second, workers=4)
+        assert first.read_bytes() == second.read_bytes()
+
+    def test_skip_missing(self, folder, tmp_path, caplog):
+        entries = list(iter_folder(folder))
+        entries.insert(1, (folder.joinpath("missing"), "server/missing"))
+        stats = write_zip(entries, tmp_path.joinpath("backup.zip"), workers=2)
+
+        assert stats.files == 4
+        assert "server/missing" not in read_zip(tmp_path.joinpath("backup.zip"))
+        assert caplog.records[0].msg == "Skipping %r: %s"
+        assert caplog.records[0].levelname == "WARNING"
+
+    @mock.patch("server_manager.src.zip_writer.compress_file")
+    def test_error(self, compress_m, folder, tmp_path):
+        compress_m.side_effect = OSError("disk error")
+        zip_path = tmp_path.joinpath("backup.zip")
+
+        with pytest.raises(OSError, match="disk error"):
+            write_zip(iter_folder(folder), zip_path, workers=2)
+        assert not zip_path.exists()
+        assert not tmp_path.joinpath("backup.zip.part").exists()
+
+    @pytest.mark.parametrize("level,workers", [(-1, 1), (10, 1), (6, 0)])
+    def test_invalid(self, tmp_path, level, workers):
+        with pytest.raises(ValueError, match="Invalid"):
+            write_zip([], tmp_path.joinpath("backup.zip"), level, workers)
+
+
+def test_zip_stats():
+    stats = ZipStats(2, 1000, 250, 0.5)
+    assert stats.throughput == 2000
+    assert stats.ratio == 0.25
+    assert ZipStats(0, 0, 22, 0).throughput == 0
+    assert ZipStats(0, 0, 22, 0).ratio == 1